@@ -29,6 +29,7 @@ from rich.text import Text
 # 项目内部导入
 from cli.models import AnalystType
 from cli.utils import (
+    prompt_ticker,
     select_analysts,
     select_deep_thinking_agent,
     select_llm_provider,
@@ -37,6 +38,7 @@ from cli.utils import (
 )
 from tradingagents.default_config import DEFAULT_CONFIG
 from tradingagents.graph.trading_graph import TradingAgentsGraph
+from tradingagents.graph.streaming import NodeOutputBuffer, stream_graph
 from tradingagents.utils.logging_manager import get_logger
 
 # 加载环境变量
@@ -64,14 +66,8 @@ def setup_cli_logging():
 
     logger_manager = get_logger_manager()
 
-    # 获取根日志器
-    root_logger = logging.getLogger()
-
-    # 移除所有控制台处理器，只保留文件日志
-    for handler in root_logger.handlers[:]:
-        if isinstance(handler, logging.StreamHandler) and hasattr(handler, 'stream'):
-            if handler.stream.name in ['<stderr>', '<stdout>']:
-                root_logger.removeHandler(handler)
+    # 移除所有控制台处理器（包括日志队列后台线程中的），只保留文件日志
+    logger_manager.disable_console_output()
 
     # 同时移除tradingagents日志器的控制台处理器
     tradingagents_logger = logging.getLogger('tradingagents')
@@ -175,6 +171,8 @@ class MessageBuffer:
             "Portfolio Manager": "pending",
         }
         self.current_agent = None
+        # LLM正在生成的内容（流式输出）
+        self.streaming = NodeOutputBuffer()
         self.report_sections = {
             "market_report": None,
             "sentiment_report": None,
@@ -201,6 +199,7 @@ class MessageBuffer:
     def update_report_section(self, section_name, content):
         if section_name in self.report_sections:
             self.report_sections[section_name] = content
+            self.streaming.clear()
             self._update_current_report()
 
     def _update_current_report(self):
@@ -480,7 +479,16 @@ def update_display(layout, spinner_text=None):
     )
 
     # Analysis panel showing current report
-    if message_buffer.current_report:
+    if message_buffer.streaming.text:
+        layout["analysis"].update(
+            Panel(
+                Markdown(message_buffer.streaming.text),
+                title=f"✍️ {message_buffer.streaming.node} 生成中...",
+                border_style="yellow",
+                padding=(1, 2),
+            )
+        )
+    elif message_buffer.current_report:
         layout["analysis"].update(
             Panel(
                 Markdown(message_buffer.current_report),
@@ -650,7 +658,8 @@ def select_market():
             "examples": ["SPY", "AAPL", "TSLA", "NVDA", "MSFT"],
             "format": "直接输入代码 (如: AAPL)",
             "pattern": r'^[A-Z]{1,5}$',
-            "data_source": "yahoo_finance"
+            "data_source": "yahoo_finance",
+            "index_market": "us"
         },
         "2": {
             "name": "A股",
@@ -659,7 +668,8 @@ def select_market():
             "examples": ["000001 (平安银行)", "600036 (招商银行)", "000858 (五粮液)"],
             "format": "6位数字代码 (如: 600036, 000001)",
             "pattern": r'^\d{6}$',
-            "data_source": "china_stock"
+            "data_source": "china_stock",
+            "index_market": "china"
         },
         "3": {
             "name": "港股",
@@ -668,7 +678,8 @@ def select_market():
             "examples": ["0700.HK (腾讯)", "09988.HK (阿里巴巴)", "03690.HK (美团)"],
             "format": "代码.HK (如: 0700.HK, 09988.HK)",
             "pattern": r'^\d{4,5}\.HK$',
-            "data_source": "yahoo_finance"
+            "data_source": "yahoo_finance",
+            "index_market": "hk"
         }
     }
 
@@ -700,8 +711,8 @@ def get_ticker(market):
     console.print(f"\n[dim]格式要求 | Format: {market['format']}[/dim]")
 
     while True:
-        ticker = typer.prompt(f"\n请输入{market['name']}股票代码 | Enter {market['name_en']} ticker",
-                             default=market['default'])
+        ticker = prompt_ticker(f"请输入{market['name']}股票代码（支持名称/拼音检索） | Enter {market['name_en']} ticker",
+                               default=market['default'], market=market.get('index_market'))
 
         # 记录用户输入（只写入文件）
         logger.info(f"用户输入股票代码: {ticker}")
@@ -1235,7 +1246,7 @@ def run_analysis():
         init_agent_state = graph.propagator.create_initial_state(
             selections["ticker"], selections["analysis_date"]
         )
-        args = graph.propagator.get_graph_args()
+        args = graph.propagator.get_graph_args(stream_tokens=True)
 
         ui.show_success("数据获取准备完成")
 
@@ -1258,7 +1269,13 @@ def run_analysis():
         # 跟踪已完成的分析师，避免重复提示
         completed_analysts = set()
 
-        for chunk in graph.graph.stream(init_agent_state, **args):
+        def on_token(node, text):
+            # 实时显示节点正在生成的内容，限制刷新频率
+            message_buffer.streaming.append(node, text)
+            if message_buffer.streaming.ready():
+                update_display(layout)
+
+        for chunk in stream_graph(graph.graph, init_agent_state, args, on_token):
             if len(chunk["messages"]) > 0:
                 # Get the last message from the chunk
                 last_message = chunk["messages"][-1]
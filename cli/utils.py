@@ -1,5 +1,6 @@
 import questionary
 from typing import List, Optional, Tuple, Dict
+from prompt_toolkit.completion import Completer, Completion
 from rich.console import Console
 
 from cli.models import AnalystType
@@ -16,6 +17,50 @@ ANALYST_ORDER = [
 ]
 
 
+class SymbolCompleter(Completer):
+    """股票代码自动补全：按代码前缀、名称、拼音首字母检索股票索引"""
+
+    def __init__(self, market: Optional[str] = None, limit: int = 10):
+        self.market = market
+        self.limit = limit
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor.strip()
+        if not text:
+            return
+        try:
+            from tradingagents.dataflows.symbol_index import get_symbol_index
+            entries = get_symbol_index().search(text, limit=self.limit, market=self.market)
+        except Exception as e:
+            logger.debug(f"股票检索索引不可用: {e}")
+            return
+        for entry in entries:
+            yield Completion(entry.code, start_position=-len(document.text_before_cursor),
+                             display=f"{entry.code}  {entry.name}")
+
+
+def prompt_ticker(message: str, default: str = "", market: Optional[str] = None) -> str:
+    """带自动补全的股票代码输入，返回用户输入（未去除空格）"""
+    ticker = questionary.autocomplete(
+        message,
+        choices=[],
+        default=default,
+        completer=SymbolCompleter(market),
+        style=questionary.Style(
+            [
+                ("text", "fg:green"),
+                ("highlighted", "noinherit"),
+            ]
+        ),
+    ).ask()
+
+    if ticker is None:
+        logger.info(f"\n[red]未提供股票代码，退出程序... | No ticker symbol provided. Exiting...[/red]")
+        exit(1)
+
+    return ticker
+
+
 def get_ticker() -> str:
     """Prompt the user to enter a ticker symbol."""
     ticker = questionary.text(
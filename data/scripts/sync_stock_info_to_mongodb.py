@@ -20,7 +20,7 @@ logger = get_logger('scripts')
 project_root = os.path.abspath(os.path.dirname(__file__))
 sys.path.insert(0, project_root)
 
-from enhanced_stock_list_fetcher import enhanced_fetch_stock_list
+from tradingagents.dataflows.stock_info_sync import StockInfoSyncJob, default_stock_fetcher
 
 try:
     import pymongo
@@ -151,11 +151,7 @@ class StockInfoSyncer:
         logger.info(f"📊 正在从通达信获取{stock_type}数据...")
         
         try:
-            stock_data = enhanced_fetch_stock_list(
-                type_=stock_type,
-                enable_server_failover=True,
-                max_retries=3
-            )
+            stock_data = default_stock_fetcher(stock_type)
             
             if stock_data is not None and not stock_data.empty:
                 logger.info(f"✅ 成功获取 {len(stock_data)} 条{stock_type}数据")
@@ -168,8 +164,8 @@ class StockInfoSyncer:
             logger.error(f"❌ 获取{stock_type}数据时发生错误: {e}")
             return None
     
-    def sync_to_mongodb(self, stock_data: pd.DataFrame) -> bool:
-        """将股票数据同步到MongoDB"""
+    def sync_to_mongodb(self, stock_data: pd.DataFrame, stock_type: str = '') -> bool:
+        """将股票数据同步到MongoDB（内容未变化的记录跳过，分块无序批量upsert）"""
         if self.mongodb_db is None:
             logger.error(f"❌ MongoDB未连接，无法同步数据")
             return False
@@ -179,57 +175,16 @@ class StockInfoSyncer:
             return False
         
         try:
-            collection = self.mongodb_db[self.collection_name]
-            current_time = datetime.utcnow()
-            
-            # 准备批量操作
-            bulk_operations = []
+            job = StockInfoSyncJob(self.mongodb_db[self.collection_name])
+            report = job.sync_frame(stock_data, stock_type)
             
-            for idx, row in stock_data.iterrows():
-                # 构建文档
-                document = {
-                    'code': row['code'],
-                    'name': row['name'],
-                    'sse': row['sse'],
-                    'market': row.get('market', '深圳' if row['sse'] == 'sz' else '上海'),
-                    'sec': row.get('sec', 'unknown'),
-                    'category': row.get('category', '未知'),
-                    'volunit': row.get('volunit', 0),
-                    'decimal_point': row.get('decimal_point', 0),
-                    'pre_close': row.get('pre_close', 0.0),
-                    'updated_at': current_time,
-                    'sync_source': 'tdx',  # 数据来源标识
-                    'data_version': '1.0'
-                }
-                
-                # 添加创建时间（仅在插入时）
-                update_doc = {
-                    '$set': document,
-                    '$setOnInsert': {'created_at': current_time}
-                }
-                
-                # 使用upsert操作
-                bulk_operations.append(
-                    pymongo.UpdateOne(
-                        {'code': row['code'], 'sse': row['sse']},
-                        update_doc,
-                        upsert=True
-                    )
-                )
+            logger.info(f"📊 数据同步完成:")
+            logger.info(f"  - 插入新记录: {report.inserted}")
+            logger.info(f"  - 更新记录: {report.modified}")
+            logger.info(f"  - 未变化记录: {report.unchanged}")
+            logger.info(f"  - 吞吐量: {report.throughput:.0f} 条/秒")
             
-            # 执行批量操作
-            if bulk_operations:
-                result = collection.bulk_write(bulk_operations)
-                
-                logger.info(f"📊 数据同步完成:")
-                logger.info(f"  - 插入新记录: {result.upserted_count}")
-                logger.info(f"  - 更新记录: {result.modified_count}")
-                logger.info(f"  - 匹配记录: {result.matched_count}")
-                
-                return True
-            else:
-                logger.error(f"❌ 没有数据需要同步")
-                return False
+            return not report.errors
                 
         except Exception as e:
             logger.error(f"❌ 同步数据到MongoDB时发生错误: {e}")
@@ -305,16 +260,8 @@ class StockInfoSyncer:
             if category:
                 query['sec'] = category
             
-            # 执行查询
-            cursor = collection.find(query).limit(limit)
-            results = list(cursor)
-            
-            # 移除MongoDB的_id字段
-            for result in results:
-                if '_id' in result:
-                    del result['_id']
-            
-            return results
+            # 执行查询（投影中排除MongoDB的_id字段）
+            return list(collection.find(query, {'_id': 0}).limit(limit))
             
         except Exception as e:
             logger.error(f"❌ 查询股票信息时发生错误: {e}")
@@ -345,19 +292,19 @@ def main():
         logger.info(f"\n🏢 同步股票数据...")
         stock_data = syncer.fetch_stock_data('stock')
         if stock_data is not None:
-            syncer.sync_to_mongodb(stock_data)
+            syncer.sync_to_mongodb(stock_data, 'stock')
         
         # 同步指数数据
         logger.info(f"\n📊 同步指数数据...")
         index_data = syncer.fetch_stock_data('index')
         if index_data is not None:
-            syncer.sync_to_mongodb(index_data)
+            syncer.sync_to_mongodb(index_data, 'index')
         
         # 同步ETF数据
         logger.info(f"\n📈 同步ETF数据...")
         etf_data = syncer.fetch_stock_data('etf')
         if etf_data is not None:
-            syncer.sync_to_mongodb(etf_data)
+            syncer.sync_to_mongodb(etf_data, 'etf')
         
         # 显示统计信息
         logger.info(f"\n📊 同步统计信息:")
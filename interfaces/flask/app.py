@@ -28,6 +28,7 @@ load_dotenv(project_root / ".env", override=True)
 # 导入TradingAgents核心功能
 try:
     from tradingagents.graph.trading_graph import TradingAgentsGraph
+    from tradingagents.graph.streaming import NodeOutputBuffer
     from tradingagents.default_config import DEFAULT_CONFIG
     from tradingagents.utils.logging_manager import get_logger
     from tradingagents.config.database_config import DatabaseConfig
@@ -249,6 +250,8 @@ def api_analyze():
             'message': '正在初始化分析...',
             'result': None,
             'error': None,
+            'streaming_node': None,
+            'streaming_content': '',
             'created_at': datetime.datetime.now()
         }
         
@@ -268,8 +271,16 @@ def api_analyze():
                 analysis_tasks[analysis_id]['progress'] = 20
                 analysis_tasks[analysis_id]['message'] = '正在获取股票数据...'
                 
-                # 执行分析
-                state, decision = ta.propagate(stock_symbol, analysis_date)
+                # 执行分析（LLM生成的内容实时写入任务状态，供前端轮询显示）
+                streaming = NodeOutputBuffer(max_chars=3000, min_interval=0)
+                
+                def on_token(node, text):
+                    streaming.append(node, text)
+                    analysis_tasks[analysis_id]['streaming_node'] = streaming.node
+                    analysis_tasks[analysis_id]['streaming_content'] = streaming.text
+                
+                state, decision = ta.propagate(stock_symbol, analysis_date, on_token=on_token)
+                analysis_tasks[analysis_id]['streaming_content'] = ''
                 
                 # 更新进度
                 analysis_tasks[analysis_id]['progress'] = 100
@@ -313,6 +324,8 @@ def api_progress(analysis_id):
         'status': task['status'],
         'progress': task['progress'],
         'message': task['message'],
+        'streaming_node': task.get('streaming_node'),
+        'streaming_content': task.get('streaming_content', ''),
         'result': task['result'],
         'error': task['error']
     })
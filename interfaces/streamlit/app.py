@@ -267,6 +267,13 @@ def main():
 
     # 初始化会话状态
     initialize_session_state()
+
+    # 启动股票基础信息定时同步（TRADINGAGENTS_STOCK_INFO_SYNC_HOURS 未设置时不启动，进程内只启动一次）
+    try:
+        from tradingagents.dataflows.stock_info_sync import start_stock_info_sync_schedule
+        start_stock_info_sync_schedule()
+    except Exception as e:
+        logger.warning(f"⚠️ 股票信息定时同步启动失败: {e}")
     
     # 处理query params导航
     if 'page' in st.query_params:
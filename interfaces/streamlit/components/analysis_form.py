@@ -10,6 +10,23 @@ from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('web')
 
 
+# 表单市场类型对应的股票检索索引市场
+SYMBOL_INDEX_MARKETS = {"美股": "us", "A股": "china", "港股": "hk"}
+
+
+def _render_symbol_suggestions(keyword, market_type):
+    """显示股票检索索引中与输入匹配的股票（代码前缀、名称、拼音首字母）"""
+    try:
+        from tradingagents.dataflows.symbol_index import search_symbols
+        matches = search_symbols(keyword, limit=5, market=SYMBOL_INDEX_MARKETS.get(market_type))
+    except Exception as e:
+        logger.debug(f"⚠️ 股票检索索引不可用: {e}")
+        return
+
+    if matches:
+        st.caption("🔎 匹配股票: " + "　".join(f"{m['code']} {m['name']}" for m in matches))
+
+
 def render_analysis_form():
     """渲染股票分析表单"""
 
@@ -187,6 +204,7 @@ def render_analysis_form():
             st.info("💡 请在上方输入股票代码，输入完成后按回车键确认")
         else:
             st.success(f"✅ 已输入股票代码: {stock_symbol}")
+            _render_symbol_suggestions(stock_symbol, market_type)
 
         # 添加JavaScript来改善用户体验
         st.markdown("""
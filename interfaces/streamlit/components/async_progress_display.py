@@ -595,6 +595,13 @@ def display_static_progress_with_controls(analysis_id: str, show_refresh_control
     else:
         st.info(f"{status_icon} **当前状态**: {last_message}")
 
+        # 显示LLM正在生成的内容
+        streaming_content = progress_data.get('streaming_content')
+        if streaming_content:
+            streaming_node = progress_data.get('streaming_node') or '分析师'
+            with st.expander(f"✍️ {streaming_node} 正在生成...", expanded=True):
+                st.markdown(streaming_content)
+
     # 显示刷新控制的条件：
     # 1. 需要显示刷新控件 AND
     # 2. (分析正在运行 OR 分析刚开始还没有状态)
@@ -154,7 +154,8 @@ def start_analysis(form_data):
                 llm_provider=config['llm_provider'],
                 market_type=form_data.get('market_type', '美股'),
                 llm_model=config['llm_model'],
-                progress_callback=progress_callback
+                progress_callback=progress_callback,
+                token_callback=async_tracker.update_stream
             )
             
             if results and results.get('success', False):
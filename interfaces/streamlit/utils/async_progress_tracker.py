@@ -14,6 +14,7 @@ from pathlib import Path
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.graph.streaming import NodeOutputBuffer
 logger = get_logger('async_progress')
 
 def safe_serialize(obj):
@@ -73,9 +74,14 @@ class AsyncProgressTracker:
             'last_message': '准备开始分析...',
             'last_update': time.time(),
             'start_time': self.start_time,
-            'steps': self.analysis_steps
+            'steps': self.analysis_steps,
+            'streaming_node': None,
+            'streaming_content': ''
         }
         
+        # LLM流式输出缓冲（限制写入存储的频率）
+        self.streaming = NodeOutputBuffer(max_chars=3000, min_interval=1.0)
+        
         # 尝试初始化Redis，失败则使用文件
         self.redis_client = None
         self.use_redis = self._init_redis()
@@ -360,6 +366,20 @@ class AsyncProgressTracker:
         logger.info(f"📊 [进度更新] {self.analysis_id}: {message[:50]}...")
         logger.debug(f"📊 [进度详情] 步骤{self.current_step + 1}/{len(self.analysis_steps)} ({step_name}), 进度{progress_percentage:.1f}%, 耗时{elapsed_time:.1f}s")
     
+    def update_stream(self, node: str, text: str):
+        """记录节点正在生成的内容（LLM流式输出），按时间间隔批量保存"""
+        self.streaming.append(node, text)
+        if not self.streaming.ready():
+            return
+        
+        self.progress_data.update({
+            'streaming_node': self.streaming.node,
+            'streaming_content': self.streaming.text,
+            'elapsed_time': time.time() - self.start_time,
+            'last_update': time.time()
+        })
+        self._save_progress()
+    
     def _detect_step_from_message(self, message: str) -> Optional[int]:
         """根据消息内容智能检测当前步骤"""
         message_lower = message.lower()
@@ -539,6 +559,7 @@ class AsyncProgressTracker:
         self.progress_data['status'] = 'completed'
         self.progress_data['progress_percentage'] = 100.0
         self.progress_data['remaining_time'] = 0.0
+        self.progress_data['streaming_content'] = ''
 
         # 保存分析结果（安全序列化）
         if results is not None:
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+技术指标计算性能基准
+对比共享 NumPy 指标库与 stockstats、pandas rolling 在单只股票、多只股票批量和逐根增量更新下的耗时
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from stockstats import wrap
+
+from tradingagents.indicators import MACD, RSI, batch_apply, compute_indicator, kernels, standard_indicator_frame
+
+# 市场分析师常用的指标组合
+INDICATORS = ['close_50_sma', 'close_200_sma', 'close_10_ema', 'macd', 'macds', 'macdh',
+              'rsi', 'boll', 'boll_ub', 'boll_lb', 'atr', 'vwma', 'mfi']
+
+
+def build_bars(count: int = 3750, seed: int = 0) -> pd.DataFrame:
+    """构造约15年的日K线"""
+    rng = np.random.default_rng(seed)
+    close = 50 + np.cumsum(rng.normal(scale=0.8, size=count))
+    return pd.DataFrame({
+        'Date': pd.date_range('2010-01-04', periods=count, freq='B'),
+        'Open': close + rng.normal(scale=0.2, size=count),
+        'High': close + rng.random(count),
+        'Low': close - rng.random(count),
+        'Close': close,
+        'Volume': rng.integers(10_000, 1_000_000, size=count).astype(float),
+    })
+
+
+def bench(label: str, func, rounds: int = 20) -> float:
+    func()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = (time.perf_counter() - start) / rounds * 1000
+    print(f"  {label:<36} {elapsed:>9.3f} ms/次")
+    return elapsed
+
+
+def pandas_standard(close: pd.Series) -> pd.DataFrame:
+    """原各数据源中 pandas rolling 的写法"""
+    result = pd.DataFrame(index=close.index)
+    for window in (5, 10, 20):
+        result[f'MA{window}'] = close.rolling(window).mean()
+    delta = close.diff()
+    gain = delta.clip(lower=0).rolling(14).mean()
+    loss = (-delta.clip(upper=0)).rolling(14).mean()
+    result['RSI'] = 100 - 100 / (1 + gain / loss)
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    result['MACD'] = macd
+    result['MACD_Signal'] = macd.ewm(span=9).mean()
+    std = close.rolling(20).std()
+    result['BB_Upper'] = result['MA20'] + 2 * std
+    result['BB_Lower'] = result['MA20'] - 2 * std
+    return result
+
+
+def main():
+    bars = build_bars()
+    print(f"📏 单只股票 {len(bars)} 根日K线\n")
+
+    print("⏱️ stockstats 指标组合")
+    bench("stockstats", lambda: [wrap(bars.copy())[name] for name in INDICATORS], rounds=5)
+    bench("tradingagents.indicators", lambda: [compute_indicator(bars, name) for name in INDICATORS])
+
+    print("\n⏱️ 格式化输出指标表（MA/RSI/MACD/布林带）")
+    bench("pandas rolling", lambda: pandas_standard(bars['Close']))
+    bench("standard_indicator_frame", lambda: standard_indicator_frame(bars['Close']))
+
+    symbols = {f"{i:06d}": build_bars(seed=i)['Close'].to_numpy() for i in range(200)}
+    print(f"\n⏱️ 批量计算 MACD（{len(symbols)} 只股票）")
+    bench("逐只 pandas ewm", lambda: [
+        pd.Series(values).ewm(span=12).mean() - pd.Series(values).ewm(span=26).mean()
+        for values in symbols.values()
+    ], rounds=3)
+    bench("batch_apply(kernels.macd)", lambda: batch_apply(symbols, kernels.macd), rounds=3)
+
+    print("\n⏱️ 追加一根K线")
+    closes = bars['Close'].to_numpy()
+    rsi, macd = RSI(), MACD()
+    for value in closes:
+        rsi.update(value)
+        macd.update(value)
+    bench("全量重算 RSI+MACD", lambda: (kernels.rsi(closes), kernels.macd(closes)), rounds=50)
+    bench("增量 RSI.update + MACD.update", lambda: (rsi.update(closes[-1]), macd.update(closes[-1])), rounds=10000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+日志开销基准
+以 TushareProvider._normalize_symbol（每次调用写 4 条 INFO 股票代码追踪日志）为热路径，
+对比关闭日志、同步写入（控制台+轮转文件）、日志队列，以及股票代码追踪类别采样/关闭时每次调用的耗时
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.utils.logging_manager import TradingAgentsLogger, get_logger_manager
+from tradingagents.utils.log_categories import SYMBOL_TRACE, configure_log_category
+from tradingagents.dataflows.tushare_utils import TushareProvider
+
+
+SYMBOLS = ["000001", "600519", "300750", "sh.601318", "830799", "000858.SZ"]
+
+
+def build_config(log_dir: str, level: str, queued: bool) -> dict:
+    return {
+        'level': level,
+        'format': {
+            'console': '%(asctime)s | %(name)-20s | %(levelname)-8s | %(message)s',
+            'file': '%(asctime)s | %(name)-20s | %(levelname)-8s | %(module)s:%(funcName)s:%(lineno)d | %(message)s',
+        },
+        'handlers': {
+            'console': {'enabled': True, 'colored': False, 'level': level},
+            'file': {'enabled': True, 'level': level, 'max_size': '100MB', 'backup_count': 1, 'directory': log_dir},
+            'structured': {'enabled': False, 'level': 'INFO', 'directory': log_dir},
+        },
+        'loggers': {},
+        'docker': {'enabled': False, 'stdout_only': True},
+        'queue': {'enabled': queued, 'queue_size': 100000},
+    }
+
+
+def run_hot_path(rounds: int) -> float:
+    """返回热路径每次调用的平均耗时（微秒）"""
+    provider = TushareProvider.__new__(TushareProvider)
+    start = time.perf_counter()
+    for i in range(rounds):
+        provider._normalize_symbol(SYMBOLS[i % len(SYMBOLS)])
+    return (time.perf_counter() - start) / rounds * 1e6
+
+
+def main(rounds: int = 20000):
+    print(f"⏱️ 热路径: TushareProvider._normalize_symbol × {rounds}\n")
+    results = {}
+    real_stdout = sys.stdout
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, 'w') as devnull:
+        for label, level, queued, trace in (("日志关闭 (WARNING)", 'WARNING', False, 'on'),
+                                            ("同步写入 (INFO)", 'INFO', False, 'on'),
+                                            ("日志队列 (INFO)", 'INFO', True, 'on'),
+                                            ("日志队列 + 追踪采样1/20", 'INFO', True, 'sample:20'),
+                                            ("日志队列 + 追踪关闭", 'INFO', True, 'off')):
+            # 控制台输出重定向到空设备，只测量日志系统本身的开销
+            sys.stdout = devnull
+            try:
+                manager = TradingAgentsLogger(build_config(log_dir, level, queued))
+                configure_log_category(SYMBOL_TRACE, trace)
+                start = time.perf_counter()
+                results[label] = run_hot_path(rounds)
+                manager.flush()
+                drained = time.perf_counter() - start
+                stats = manager.get_queue_stats()
+                if manager.pipeline is not None:
+                    manager.pipeline.close()
+            finally:
+                sys.stdout = real_stdout
+            extra = f"  队列统计={stats}" if stats else ""
+            print(f"  {label:<24} {results[label]:>8.2f} µs/次  (含后台写完共 {drained:.2f}s){extra}")
+
+    # 恢复默认日志配置
+    configure_log_category(SYMBOL_TRACE, 'on')
+    logging.getLogger().handlers.clear()
+    get_logger_manager()
+
+    base = results["日志关闭 (WARNING)"]
+    print("\n📊 相对日志关闭的额外开销:")
+    for label, elapsed in results.items():
+        if label != "日志关闭 (WARNING)":
+            print(f"  {label:<24} {elapsed - base:>8.2f} µs/次")
+
+
+if __name__ == "__main__":
+    main()
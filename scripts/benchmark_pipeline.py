@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+离线端到端基准测试
+使用脚本化假模型和夹具数据源运行完整的 propagate，不需要任何 API Key 或网络：
+
+    python scripts/benchmark_pipeline.py                                  # 默认 AAPL，3 轮
+    python scripts/benchmark_pipeline.py --tickers AAPL 000001 --llm-latency 0.2
+    python scripts/benchmark_pipeline.py --output results/baseline.json   # 保存基线
+    python scripts/benchmark_pipeline.py --compare results/baseline.json  # 与基线对比，回归时退出码为 1
+    python scripts/benchmark_pipeline.py --replay recordings/aapl         # 回放录制的数据源和 LLM 流量
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.benchmark import (
+    BenchmarkReport, BenchmarkScenario, compare_reports, format_comparison, format_report, run_benchmark,
+)
+from tradingagents.benchmark.harness import DEFAULT_REGRESSION_THRESHOLD
+
+
+def parse_args():
+    defaults = BenchmarkScenario()
+    parser = argparse.ArgumentParser(description='TradingAgents 离线端到端基准测试')
+    parser.add_argument('--tickers', nargs='+', default=defaults.tickers, help='股票代码')
+    parser.add_argument('--date', default=defaults.trade_date, help='分析日期')
+    parser.add_argument('--analysts', nargs='+', default=defaults.analysts, help='分析师')
+    parser.add_argument('--iterations', type=int, default=defaults.iterations, help='计时轮数')
+    parser.add_argument('--warmup', type=int, default=defaults.warmup, help='预热轮数')
+    parser.add_argument('--llm-latency', type=float, default=defaults.llm_latency, help='假模型每次调用延迟（秒）')
+    parser.add_argument('--llm-jitter', type=float, default=defaults.llm_jitter, help='假模型随机延迟上限（秒）')
+    parser.add_argument('--data-latency', type=float, default=defaults.data_latency, help='数据源每次调用延迟（秒）')
+    parser.add_argument('--response-chars', type=int, default=defaults.response_chars, help='假模型回复长度')
+    parser.add_argument('--payload-chars', type=int, default=defaults.payload_chars, help='合成数据长度')
+    parser.add_argument('--debate-rounds', type=int, default=defaults.max_debate_rounds, help='多空辩论轮数')
+    parser.add_argument('--risk-rounds', type=int, default=defaults.max_risk_discuss_rounds, help='风险讨论轮数')
+    parser.add_argument('--warm', action='store_true', help='各轮之间保留缓存')
+    parser.add_argument('--llm-cache', action='store_true', help='假模型经过LLM响应缓存')
+    parser.add_argument('--no-memory', action='store_true', help='不测量峰值内存')
+    parser.add_argument('--fixtures', default=None, help='夹具文件（JSON）')
+    parser.add_argument('--replay', default=None, help='回放录制归档（代替夹具）')
+    parser.add_argument('--replay-latency-scale', type=float, default=defaults.replay_latency_scale,
+                        help='回放耗时倍数（0 为不等待）')
+    parser.add_argument('--output', default=None, help='保存结果（JSON）')
+    parser.add_argument('--compare', default=None, help='与基线结果对比（JSON）')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD, help='回归阈值（比例）')
+    parser.add_argument('--verbose', action='store_true', help='保留流水线的INFO日志')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    scenario = BenchmarkScenario(
+        tickers=args.tickers, trade_date=args.date, analysts=args.analysts,
+        iterations=args.iterations, warmup=args.warmup,
+        llm_latency=args.llm_latency, llm_jitter=args.llm_jitter, data_latency=args.data_latency,
+        response_chars=args.response_chars, payload_chars=args.payload_chars,
+        max_debate_rounds=args.debate_rounds, max_risk_discuss_rounds=args.risk_rounds,
+        warm_caches=args.warm, llm_cache=args.llm_cache, measure_memory=not args.no_memory,
+        fixtures=args.fixtures, replay_dir=args.replay, replay_latency_scale=args.replay_latency_scale,
+    )
+    report = run_benchmark(scenario)
+    print(format_report(report))
+
+    if args.output:
+        report.save(args.output)
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.compare:
+        deltas = compare_reports(report, BenchmarkReport.load(args.compare), args.threshold)
+        print(f"\n📈 与基线对比: {args.compare}（阈值 {args.threshold * 100:.0f}%）")
+        print(format_comparison(deltas))
+        if any(delta.regressed for delta in deltas):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Reddit离线语料索引构建
+一次性把 reddit_data 下各分类的 .jsonl 语料按日期和子版块分区，
+之后 get_reddit_global_news / get_reddit_company_news 只读取窗口内的日期分区
+
+用法:
+    python scripts/build_reddit_index.py
+    python scripts/build_reddit_index.py --data-path /path/to/reddit_data --category company_news
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.dataflows.config import get_config
+from tradingagents.dataflows.reddit_utils import build_reddit_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reddit离线语料索引构建")
+    parser.add_argument('--data-path', default=os.path.join(get_config()['data_dir'], 'reddit_data'), help="reddit_data 目录")
+    parser.add_argument('--category', action='append', help="只构建指定分类，可重复")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_path):
+        parser.error(f"目录不存在: {args.data_path}")
+
+    started = time.time()
+    counts = build_reddit_index(args.data_path, args.category)
+    for category, count in counts.items():
+        print(f"{category}: {count} 条")
+    print(f"索引构建完成，耗时 {time.time() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
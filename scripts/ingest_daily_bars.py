@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+A股全市场日线入库任务
+按交易日截面获取全市场日线写入本地日线库，补齐缺口，并可刷新指定股票的行情缓存
+
+用法:
+    python scripts/ingest_daily_bars.py                           # 入库今天
+    python scripts/ingest_daily_bars.py --start 2025-06-01 --end 2025-06-30
+    python scripts/ingest_daily_bars.py --start 2025-06-01 --gaps-only
+    python scripts/ingest_daily_bars.py --start 2025-06-01 --refresh 000001,600519
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.dataflows.daily_bar_store import DailyBarIngestor
+
+
+def main():
+    today = datetime.now().strftime('%Y-%m-%d')
+    parser = argparse.ArgumentParser(description="A股全市场日线入库")
+    parser.add_argument('--start', default=today, help="开始日期 YYYY-MM-DD")
+    parser.add_argument('--end', default=today, help="结束日期 YYYY-MM-DD")
+    parser.add_argument('--force', action='store_true', help="重新获取已入库的交易日")
+    parser.add_argument('--gaps-only', action='store_true', help="只检测缺口，不入库")
+    parser.add_argument('--refresh', default='', help="入库后刷新行情缓存的股票代码，逗号分隔")
+    args = parser.parse_args()
+
+    ingestor = DailyBarIngestor()
+    if args.gaps_only:
+        gaps = ingestor.find_gaps(args.start, args.end)
+        print(f"缺失 {len(gaps)} 个交易日" + (f": {', '.join(gaps)}" if gaps else ""))
+        return 0 if not gaps else 1
+
+    report = ingestor.ingest_range(args.start, args.end, force=args.force)
+    print(report.summary())
+
+    symbols = [symbol.strip() for symbol in args.refresh.split(',') if symbol.strip()]
+    if symbols:
+        refreshed = ingestor.refresh_symbol_caches(symbols, args.start, args.end)
+        print(f"刷新行情缓存: {len(refreshed)}/{len(symbols)} 只")
+    return 0 if not report.failed and not report.gaps else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+自选股数据预取任务
+在早盘批量分析之前运行，预先获取自选股的行情、基本信息、基本面和新闻
+
+用法:
+    python scripts/prefetch_watchlist.py 000001 600519 0700.HK AAPL
+    python scripts/prefetch_watchlist.py --file watchlist.txt --date 2025-07-01 --kinds price,news
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.dataflows.prefetch import PREFETCH_KINDS, WatchlistPrefetcher
+
+
+def load_watchlist(args) -> list:
+    symbols = list(args.symbols)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    symbols.extend(part.strip() for part in line.split(',') if part.strip())
+    return symbols
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自选股数据预取")
+    parser.add_argument('symbols', nargs='*', help="股票代码")
+    parser.add_argument('--file', help="自选股文件（每行一个或逗号分隔，# 开头为注释）")
+    parser.add_argument('--date', default=datetime.now().strftime('%Y-%m-%d'), help="交易日 YYYY-MM-DD")
+    parser.add_argument('--kinds', default=','.join(PREFETCH_KINDS), help="数据类型，逗号分隔")
+    parser.add_argument('--workers', type=int, default=4, help="并发线程数")
+    parser.add_argument('--lookback', type=int, default=30, help="行情回看天数")
+    args = parser.parse_args()
+
+    watchlist = load_watchlist(args)
+    if not watchlist:
+        parser.error("请提供股票代码或 --file")
+
+    prefetcher = WatchlistPrefetcher(max_workers=args.workers, lookback_days=args.lookback)
+    report = prefetcher.prefetch(watchlist, args.date, kinds=args.kinds.split(','))
+    print(report.summary())
+    return 0 if not report.failed() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+刷新交易日历
+从数据源获取交易日重建节假日表，写入缓存目录（之后优先于内置表使用）
+
+用法:
+    python scripts/refresh_trading_calendar.py                  # 刷新全部市场
+    python scripts/refresh_trading_calendar.py china            # A股（akshare）
+    python scripts/refresh_trading_calendar.py hk us            # 港股/美股（pandas_market_calendars）
+    python scripts/refresh_trading_calendar.py --show china     # 查看当前日历覆盖范围
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.dataflows.trading_calendar import (
+    MARKET_SESSIONS, get_trading_calendar, refresh_trading_calendar,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="刷新交易日历")
+    parser.add_argument('markets', nargs='*', help=f"市场（{'/'.join(MARKET_SESSIONS)}），默认全部")
+    parser.add_argument('--show', action='store_true', help="只显示当前日历，不刷新")
+    args = parser.parse_args()
+    unknown = [market for market in args.markets if market not in MARKET_SESSIONS]
+    if unknown:
+        parser.error(f"未知市场: {', '.join(unknown)}")
+
+    failed = 0
+    for market in args.markets or list(MARKET_SESSIONS):
+        if args.show:
+            calendar = get_trading_calendar(market)
+        else:
+            try:
+                calendar = refresh_trading_calendar(market)
+            except Exception as e:
+                print(f"❌ {market}: 刷新失败 ({e})", file=sys.stderr)
+                failed += 1
+                continue
+        print(f"📅 {market}: {calendar.covered_from} ~ {calendar.covered_to}，"
+              f"{len(set(calendar.holidays))} 个节假日，{len(calendar.early_closes)} 个提前收市日（{calendar.source}）")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+录制归档概览
+按数据源/模型汇总调用次数和录制耗时，列出最慢的调用和内容去重情况：
+
+    TRADINGAGENTS_REPLAY_MODE=record TRADINGAGENTS_REPLAY_DIR=./recordings/aapl python -m cli.main
+    python scripts/replay_archive.py ./recordings/aapl
+    python scripts/benchmark_pipeline.py --replay ./recordings/aapl --replay-latency-scale 1
+"""
+
+import argparse
+import os
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.utils.replay import ReplayArchive
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TradingAgents 录制归档概览')
+    parser.add_argument('path', help='录制归档目录')
+    parser.add_argument('--slowest', type=int, default=10, help='列出最慢的调用条数')
+    args = parser.parse_args()
+
+    archive = ReplayArchive(args.path)
+    entries = archive.entries()
+    if not entries:
+        print('未找到录制记录', file=sys.stderr)
+        return 1
+
+    totals = defaultdict(lambda: [0, 0.0, 0])
+    for entry in entries:
+        row = totals[(entry.kind, entry.provider)]
+        row[0] += 1
+        row[1] += entry.latency_ms
+        row[2] += entry.error is not None
+
+    span_ms = max(entry.offset_ms + entry.latency_ms for entry in entries)
+    total_ms = sum(entry.latency_ms for entry in entries)
+    print(f"📼 {args.path}: {len(entries)} 次调用，录制时长 {span_ms / 1000:.1f}s，调用耗时合计 {total_ms / 1000:.1f}s")
+    print(f"\n{'类型':<10}{'来源':<18}{'次数':>6}{'耗时(ms)':>12}{'平均(ms)':>10}{'异常':>6}")
+    for (kind, provider), (count, latency, errors) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        print(f"{kind:<10}{provider:<18}{count:>6}{latency:>12.1f}{latency / count:>10.1f}{errors:>6}")
+
+    print(f"\n最慢的 {args.slowest} 次调用:")
+    for entry in sorted(entries, key=lambda e: -e.latency_ms)[:args.slowest]:
+        print(f"  #{entry.seq:<5}{entry.provider}.{entry.name:<40}{entry.latency_ms:>10.1f}ms")
+
+    blobs = archive.blob_stats()
+    distinct = len({entry.blob for entry in entries if entry.blob})
+    print(f"\n内容: {blobs['blobs']} 份（{distinct} 份被引用），压缩后 {blobs['bytes'] / 1024:.1f} KB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
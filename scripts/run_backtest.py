@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+历史回测
+对股票池和日期区间运行完整分析，持有期结束后反思，输出绩效汇总；中断后重新运行即可续跑：
+
+    python scripts/run_backtest.py 000001 600519 --start 2024-01-01 --end 2024-12-31
+    python scripts/run_backtest.py 000001 --start 2024-01-01 --end 2024-03-31 --horizon 5 --workers 8
+    python scripts/run_backtest.py AAPL --start 2024-01-01 --end 2024-03-31 --prices data/prices   # 美股: <代码>.csv
+    python scripts/run_backtest.py 000001 600519 --start 2024-01-01 --end 2024-12-31 --memory-scope ticker
+
+A股价格来自本地日线库（先用 scripts/ingest_daily_bars.py 入库）
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from tradingagents.backtest import BacktestEngine, BacktestSettings, FramePriceSource
+from tradingagents.backtest.engine import MEMORY_SCOPES
+from tradingagents.default_config import DEFAULT_CONFIG
+
+
+def parse_args():
+    defaults = BacktestSettings(tickers=[], start_date='', end_date='')
+    parser = argparse.ArgumentParser(description='TradingAgents 历史回测')
+    parser.add_argument('tickers', nargs='+', help='股票代码')
+    parser.add_argument('--start', required=True, help='开始日期 YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='结束日期 YYYY-MM-DD')
+    parser.add_argument('--analysts', nargs='+', default=defaults.analysts, help='分析师')
+    parser.add_argument('--horizon', type=int, default=defaults.horizon, help='反思使用的持有期（交易日）')
+    parser.add_argument('--step', type=int, default=defaults.step, help='每隔多少个交易日决策一次')
+    parser.add_argument('--workers', type=int, default=defaults.max_workers, help='并行分析数')
+    parser.add_argument('--memory-scope', choices=MEMORY_SCOPES, default=defaults.memory_scope, help='记忆范围')
+    parser.add_argument('--allow-short', action='store_true', help='卖出时做空（默认只清仓）')
+    parser.add_argument('--cost-bps', type=float, default=defaults.cost_bps, help='每次调仓成本（基点）')
+    parser.add_argument('--output', default=defaults.output_dir, help='输出与断点目录')
+    parser.add_argument('--no-resume', action='store_true', help='忽略断点重新开始')
+    parser.add_argument('--prices', default=None, help='价格目录（<代码>.csv，含 date、close 列），默认A股日线库')
+    parser.add_argument('--llm-provider', default=DEFAULT_CONFIG['llm_provider'], help='LLM提供商')
+    parser.add_argument('--quick-model', default=DEFAULT_CONFIG['quick_think_llm'], help='快速模型')
+    parser.add_argument('--deep-model', default=DEFAULT_CONFIG['deep_think_llm'], help='深度模型')
+    parser.add_argument('--backend-url', default=DEFAULT_CONFIG['backend_url'], help='API地址')
+    return parser.parse_args()
+
+
+def load_prices(directory: str, tickers) -> FramePriceSource:
+    prices = {}
+    for ticker in tickers:
+        path = os.path.join(directory, f"{ticker}.csv")
+        if os.path.exists(path):
+            prices[ticker] = pd.read_csv(path)
+        else:
+            print(f"⚠️ 没有价格文件: {path}", file=sys.stderr)
+    return FramePriceSource(prices)
+
+
+def main():
+    args = parse_args()
+    settings = BacktestSettings(
+        tickers=args.tickers, start_date=args.start, end_date=args.end, analysts=args.analysts,
+        horizon=args.horizon, step=args.step, max_workers=args.workers, memory_scope=args.memory_scope,
+        long_only=not args.allow_short, cost_bps=args.cost_bps, output_dir=args.output,
+        resume=not args.no_resume,
+    )
+    config = DEFAULT_CONFIG.copy()
+    config.update({
+        'llm_provider': args.llm_provider,
+        'quick_think_llm': args.quick_model,
+        'deep_think_llm': args.deep_model,
+        'backend_url': args.backend_url,
+    })
+    price_source = load_prices(args.prices, args.tickers) if args.prices else None
+
+    report = BacktestEngine(settings, config=config, price_source=price_source).run()
+    print(report.summary())
+    print(f"\n💾 结果已保存: {os.path.join(args.output, 'report.json')}")
+    return 1 if report.overall and report.overall.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
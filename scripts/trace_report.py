@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+追踪报告
+读取 TRADINGAGENTS_TRACE_DIR 下的 traces.jsonl，输出关键路径摘要，或导出折叠栈用于生成火焰图：
+
+    python scripts/trace_report.py ./traces                    # 最近一次分析的关键路径
+    python scripts/trace_report.py ./traces --all              # 全部分析
+    python scripts/trace_report.py ./traces --folded > out.folded
+    flamegraph.pl out.folded > propagate.svg                   # 或拖入 speedscope.app
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import OrderedDict, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.utils.tracing import Span, Trace
+
+
+def load_traces(path: str):
+    """按 trace_id 分组读取 span，保持文件中的顺序"""
+    if os.path.isdir(path):
+        path = os.path.join(path, 'traces.jsonl')
+    grouped = OrderedDict()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                span = Span.from_dict(json.loads(line))
+                grouped.setdefault(span.trace_id, []).append(span)
+    return [Trace.from_spans(spans) for spans in grouped.values()
+            if any(span.parent_id is None for span in spans)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='TradingAgents 追踪报告')
+    parser.add_argument('path', help='traces.jsonl 或其所在目录')
+    parser.add_argument('--all', action='store_true', help='输出全部分析（默认只输出最近一次）')
+    parser.add_argument('--folded', action='store_true', help='输出折叠栈（多次分析累加）')
+    parser.add_argument('--rows', type=int, default=60, help='关键路径最多显示的行数')
+    args = parser.parse_args()
+
+    traces = load_traces(args.path)
+    if not traces:
+        print('未找到追踪数据', file=sys.stderr)
+        return 1
+
+    if args.folded:
+        totals = defaultdict(int)
+        for trace in traces:
+            for line in trace.folded_stacks():
+                stack, value = line.rsplit(' ', 1)
+                totals[stack] += int(value)
+        for stack, value in totals.items():
+            print(f"{stack} {value}")
+        return 0
+
+    for trace in (traces if args.all else traces[-1:]):
+        print(trace.summary(max_rows=args.rows))
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
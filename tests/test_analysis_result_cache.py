@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+测试分析结果缓存
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.graph.result_cache import AnalysisResultCache
+
+
+CONFIG = {
+    "llm_provider": "dashscope",
+    "deep_think_llm": "qwen-max",
+    "quick_think_llm": "qwen-plus",
+    "backend_url": "https://dashscope.aliyuncs.com/api/v1",
+    "max_debate_rounds": 1,
+    "max_risk_discuss_rounds": 1,
+    "online_tools": True,
+    "memory_enabled": True,
+}
+
+STATE = {
+    "messages": ["not serializable"],
+    "company_of_interest": "000001",
+    "trade_date": "2025-01-02",
+    "market_report": "市场报告",
+    "sentiment_report": "情绪报告",
+    "news_report": "新闻报告",
+    "fundamentals_report": "基本面报告",
+    "final_trade_decision": "买入",
+}
+
+
+def test_fingerprint_is_deterministic():
+    """相同配置生成相同指纹，辩论深度变化生成不同指纹"""
+    fp1 = AnalysisResultCache.build_fingerprint("000001", "2025-01-02", ["news", "market"], CONFIG)
+    fp2 = AnalysisResultCache.build_fingerprint("000001", "2025-01-02", ["market", "news"], dict(CONFIG))
+    assert fp1 == fp2
+
+    deeper = dict(CONFIG, max_debate_rounds=3)
+    assert AnalysisResultCache.build_fingerprint("000001", "2025-01-02", ["market"], deeper) != \
+        AnalysisResultCache.build_fingerprint("000001", "2025-01-02", ["market"], CONFIG)
+
+    # 辩论上下文压缩设置改变提示，也改变指纹
+    for key, value in (("context_compaction_enabled", False), ("context_digest_mode", "llm"),
+                       ("report_digest_max_chars", 500), ("debate_history_max_turns", 2),
+                       ("node_prompt_token_budget", 4000)):
+        assert AnalysisResultCache.build_fingerprint("000001", "2025-01-02", ["market"], dict(CONFIG, **{key: value})) != \
+            AnalysisResultCache.build_fingerprint("000001", "2025-01-02", ["market"], CONFIG)
+
+    # 报告指纹不受辩论深度和深度思考模型影响
+    assert AnalysisResultCache.build_report_fingerprint("000001", "2025-01-02", "market", deeper) == \
+        AnalysisResultCache.build_report_fingerprint("000001", "2025-01-02", "market", CONFIG)
+
+
+def test_put_and_get_result(tmp_path):
+    cache = AnalysisResultCache(cache_dir=tmp_path)
+    fp = cache.build_fingerprint("000001", "2025-01-02", ["market"], CONFIG)
+    cache.put(fp, "000001", "2025-01-02", STATE, {"action": "买入"})
+
+    entry = cache.get(fp)
+    assert entry["decision"] == {"action": "买入"}
+    assert entry["final_state"]["market_report"] == "市场报告"
+    assert entry["final_state"]["messages"] == []
+
+
+def test_provisional_result_expires_quickly(tmp_path):
+    """交易日当天生成的结果只在较短TTL内有效"""
+    cache = AnalysisResultCache(cache_dir=tmp_path, ttl_hours=24, provisional_ttl_hours=1)
+    today = datetime.now().strftime("%Y-%m-%d")
+    fp = cache.build_fingerprint("000001", today, ["market"], CONFIG)
+    cache.put(fp, "000001", today, STATE, {"action": "持有"})
+    assert cache.get(fp) is not None
+
+    # 将生成时间回拨两小时
+    path = tmp_path / "results" / f"{fp}.json"
+    entry = json.loads(path.read_text(encoding="utf-8"))
+    entry["created_at"] = (datetime.now() - timedelta(hours=2)).isoformat()
+    path.write_text(json.dumps(entry), encoding="utf-8")
+    assert cache.get(fp) is None
+
+
+def test_reports_reuse_requires_all_analysts(tmp_path):
+    cache = AnalysisResultCache(cache_dir=tmp_path)
+    cache.put_reports("000001", "2025-01-02", ["market", "news"], CONFIG, STATE)
+
+    reports = cache.get_reports("000001", "2025-01-02", ["market", "news"], CONFIG)
+    assert reports == {"market_report": "市场报告", "news_report": "新闻报告"}
+    assert cache.get_reports("000001", "2025-01-02", ["market", "social"], CONFIG) is None
+
+
+def test_invalidate_by_ticker(tmp_path):
+    cache = AnalysisResultCache(cache_dir=tmp_path)
+    fp = cache.build_fingerprint("000001", "2025-01-02", ["market"], CONFIG)
+    cache.put(fp, "000001", "2025-01-02", STATE, {})
+    cache.put_reports("000001", "2025-01-02", ["market"], CONFIG, STATE)
+
+    assert cache.invalidate(ticker="600519") == 0
+    assert cache.invalidate(ticker="000001") == 2
+    assert cache.get(fp) is None
+
+
+def test_global_cache_follows_config_dir_and_ttl(tmp_path):
+    """全局缓存按 (目录, 有效期) 区分，默认关闭且不写入包目录"""
+    from tradingagents.default_config import DEFAULT_CONFIG
+    from tradingagents.graph.result_cache import get_result_cache
+
+    first = get_result_cache({"analysis_cache_dir": str(tmp_path / "a")})
+    assert get_result_cache({"analysis_cache_dir": str(tmp_path / "a")}) is first
+    other = get_result_cache({"analysis_cache_dir": str(tmp_path / "b")})
+    assert other is not first and other.cache_dir == tmp_path / "b"
+    shorter = get_result_cache({"analysis_cache_dir": str(tmp_path / "a"), "analysis_cache_ttl_hours": 1})
+    assert shorter is not first and shorter.ttl_hours == 1
+
+    if "TRADINGAGENTS_ANALYSIS_CACHE" not in os.environ:
+        assert DEFAULT_CONFIG["analysis_cache_enabled"] is False
+    assert "data_cache" not in str(DEFAULT_CONFIG["analysis_cache_dir"])
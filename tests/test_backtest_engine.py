@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+测试回测引擎：记忆依赖调度（无未来信息）、并行度、断点续跑、收益与绩效统计
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from tradingagents.backtest import (
+    BacktestEngine, BacktestSettings, BarStorePriceSource, FramePriceSource, to_ts_code,
+)
+from tradingagents.backtest.metrics import ticker_metrics
+from tradingagents.dataflows.daily_bar_store import DailyBarStore
+
+
+DAYS = [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2024-01-01', periods=20)]
+
+
+def _prices(*tickers):
+    return FramePriceSource({
+        ticker: pd.Series([100.0 + i * (1 if n % 2 == 0 else -1) for i in range(len(DAYS))], index=DAYS)
+        for n, ticker in enumerate(tickers)
+    })
+
+
+class FakeGraph:
+    """记录每次分析时记忆中已有的决策，反思时写入记忆"""
+
+    memories = {}
+    seen = {}
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def __init__(self, config):
+        self.namespace = config.get('memory_namespace')
+        self.config = config
+
+    def propagate(self, ticker, trade_date):
+        cls = FakeGraph
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            cls.seen[(ticker, trade_date)] = list(cls.memories.get(self.namespace, []))
+        time.sleep(0.01)
+        with cls.lock:
+            cls.active -= 1
+        if ticker == 'FAIL':
+            raise RuntimeError('数据源不可用')
+        state = {'company_of_interest': ticker, 'trade_date': trade_date,
+                 'market_report': '', 'sentiment_report': '', 'news_report': '', 'fundamentals_report': ''}
+        return state, {'action': '买入' if ticker != 'MSFT' else '卖出', 'target_price': 1.0}
+
+    def reflect_and_remember(self, returns, state=None):
+        with FakeGraph.lock:
+            FakeGraph.memories.setdefault(self.namespace, []).append(state['trade_date'])
+        return {'trader_memory': f"{state['company_of_interest']} {returns}"}
+
+    def restore_memories(self, state, lessons):
+        with FakeGraph.lock:
+            FakeGraph.memories.setdefault(self.namespace, []).append(state['trade_date'])
+
+
+@pytest.fixture(autouse=True)
+def reset_fake_graph():
+    FakeGraph.memories = {}
+    FakeGraph.seen = {}
+    FakeGraph.active = FakeGraph.peak = 0
+
+
+def _engine(tmp_path, tickers=('AAPL',), **kwargs):
+    settings = BacktestSettings(tickers=list(tickers), start_date=DAYS[0], end_date=DAYS[14],
+                                output_dir=str(tmp_path), **kwargs)
+    config = {'memory_enabled': True, 'analysis_cache_enabled': True}
+    return BacktestEngine(settings, config=config, price_source=_prices(*tickers), graph_factory=FakeGraph)
+
+
+def _assert_point_in_time(horizon):
+    assert FakeGraph.seen
+    for (_, trade_date), seen in FakeGraph.seen.items():
+        trade_index = DAYS.index(trade_date)
+        for reflected_date in seen:
+            # 只能看到持有期终点不晚于当天的决策
+            assert DAYS.index(reflected_date) + horizon <= trade_index
+
+
+def test_memory_dependencies_allow_horizon_parallelism_without_lookahead(tmp_path):
+    report = _engine(tmp_path, horizon=3, max_workers=8).run()
+
+    assert report.executed == 15 and report.resumed == 0
+    # 持有期终点在区间内（含区间之后的价格）的决策都已反思
+    assert report.reflections == 15
+    _assert_point_in_time(3)
+    # 同一记忆范围内最多 3 个交易日同时运行
+    assert 1 < report.max_concurrency <= 3
+    first = report.runs[0]
+    assert first.outcome_date == DAYS[3] and first.outcome_return == pytest.approx(3 / 100)
+
+
+def test_ticker_scope_runs_tickers_in_parallel(tmp_path):
+    report = _engine(tmp_path, tickers=('AAPL', 'MSFT'), horizon=2, max_workers=8, memory_scope='ticker').run()
+    assert report.executed == 30
+    assert report.max_concurrency == 4
+    assert len(FakeGraph.memories) == 2
+    _assert_point_in_time(2)
+
+
+def test_without_memory_everything_runs_in_parallel(tmp_path):
+    engine = _engine(tmp_path, horizon=2, max_workers=5, memory_scope='none')
+    report = engine.run()
+    assert report.max_concurrency == 5 and report.reflections == 0
+    assert FakeGraph.memories == {}
+    # 不启用记忆也不复用分析结果缓存（缓存中的实盘结果用到了决策日之后的数据）
+    assert engine._graph(None).config['analysis_cache_enabled'] is False
+
+
+def test_resume_skips_completed_runs_and_restores_memories(tmp_path):
+    first = _engine(tmp_path, horizon=2, max_workers=4).run()
+    assert first.executed == 15
+
+    # 删除最后几条记录，模拟中途退出
+    path = tmp_path / 'checkpoint.jsonl'
+    lines = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    path.write_text(''.join(lines[:12]) + '{"type": "run", "ticker"', encoding='utf-8')
+    FakeGraph.memories = {}
+
+    resumed = _engine(tmp_path, horizon=2, max_workers=4).run()
+    assert resumed.resumed > 0 and resumed.executed == 15 - resumed.resumed
+    assert resumed.reflections == 15
+    assert sorted(FakeGraph.memories[next(iter(FakeGraph.memories))]) == sorted(DAYS[:15])
+    _assert_point_in_time(2)
+
+    fresh = _engine(tmp_path, horizon=2, resume=False).run()
+    assert fresh.resumed == 0 and fresh.executed == 15
+
+
+def test_failed_runs_do_not_block_and_are_retried(tmp_path):
+    report = _engine(tmp_path, tickers=('FAIL',), horizon=1, max_workers=2).run()
+    assert all(run.error for run in report.runs) and report.reflections == 0
+    assert report.metrics['FAIL'].failed == 15
+    again = _engine(tmp_path, tickers=('FAIL',), horizon=1, max_workers=2).run()
+    assert again.resumed == 0 and again.executed == 15
+
+
+def test_metrics_follow_positions():
+    from tradingagents.backtest import BacktestRun
+    days = DAYS[:5]
+    runs = [
+        BacktestRun('X', days[0], price=100, next_date=days[1], next_price=110, outcome_date=days[1],
+                    outcome_price=110, action='买入'),
+        BacktestRun('X', days[1], price=110, next_date=days[2], next_price=99, outcome_date=days[2],
+                    outcome_price=99, action='卖出'),
+        BacktestRun('X', days[2], price=99, next_date=days[3], next_price=100, outcome_date=days[3],
+                    outcome_price=100, action='持有'),
+    ]
+    metrics = ticker_metrics(runs, {'X': days})
+    assert metrics.total_return == pytest.approx(0.10)
+    assert metrics.benchmark_return == pytest.approx(0.0)
+    assert metrics.hit_rate == 1.0 and metrics.trades == 2
+    assert metrics.exposure == pytest.approx(1 / 3)
+
+    short = ticker_metrics(runs, {'X': days}, long_only=False, cost_bps=10)
+    assert short.total_return == pytest.approx(1.1 * 0.999 * (1 + 0.1) * 0.998 * (1 - 1 / 99) - 1)
+
+
+def test_bar_store_price_source_uses_adjusted_returns(tmp_path):
+    store = DailyBarStore(str(tmp_path), file_format='csv')
+    for day, close, pct in (('20240102', 10.0, 0.0), ('20240103', 5.5, 10.0), ('20240104', 5.0, -9.0909)):
+        store.write_partition(day, pd.DataFrame([{'ts_code': '000001.SZ', 'trade_date': day, 'close': close,
+                                                  'pct_chg': pct}]))
+    closes = BarStorePriceSource(store).closes('000001', '2024-01-01', '2024-01-31')
+    assert list(closes.index) == ['2024-01-02', '2024-01-03', '2024-01-04']
+    # 除权后收盘价减半，但收益按涨跌幅计算
+    assert closes.iloc[1] / closes.iloc[0] == pytest.approx(1.10)
+    assert to_ts_code('600000') == '600000.SH' and to_ts_code('AAPL') is None
+    assert BarStorePriceSource(store).closes('AAPL', '2024-01-01', '2024-01-31').empty
+
+
+def test_end_to_end_with_trading_graph(tmp_path, monkeypatch):
+    pytest.importorskip("langgraph")
+    from tradingagents.benchmark import FakeDataProviders, FixtureSet, ScriptedChatModel
+    from tradingagents.default_config import DEFAULT_CONFIG
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    monkeypatch.chdir(tmp_path)
+    llm = ScriptedChatModel(use_llm_cache=False, response_chars=200)
+    # 缓存写入临时目录并关闭分析结果缓存，不读写包内的 data_cache
+    config = dict(DEFAULT_CONFIG, llm_provider='benchmark', memory_enabled=False, trace_summary=False,
+                  analysis_cache_enabled=False, data_cache_dir=str(tmp_path / 'cache'))
+    settings = BacktestSettings(tickers=['AAPL'], start_date=DAYS[0], end_date=DAYS[2], analysts=['market'],
+                                horizon=1, max_workers=2, output_dir=str(tmp_path / 'bt'))
+    engine = BacktestEngine(settings, config=config, price_source=_prices('AAPL'),
+                            graph_factory=lambda cfg: TradingAgentsGraph(['market'], config=cfg,
+                                                                         quick_thinking_llm=llm,
+                                                                         deep_thinking_llm=llm))
+    with FakeDataProviders(FixtureSet.load(payload_chars=200)):
+        report = engine.run()
+
+    assert [run.action for run in report.runs] == ['持有'] * 3
+    assert (tmp_path / 'bt' / 'states' / 'AAPL' / f"{DAYS[0]}.json").exists()
+    assert (tmp_path / 'bt' / 'report.json').exists()
+    # 状态写入回测目录，不写 eval_results/
+    assert not (tmp_path / 'eval_results').exists()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+测试K线帧：一次获取历史数据，实时行情、区间历史和技术指标共用
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+from tradingagents.dataflows import bar_frame, indicator_state, tdx_utils
+from tradingagents.dataflows.bar_frame import BarFrameCache, compute_indicator_frame
+
+
+def _bars(count=200):
+    end = datetime.now().replace(hour=15, minute=0, second=0, microsecond=0)
+    closes = 10 + np.cumsum(np.sin(np.arange(count) / 5.0))
+    return [
+        {
+            "datetime": (end - timedelta(days=count - 1 - i)).strftime("%Y-%m-%d %H:%M"),
+            "open": c, "high": c + 0.5, "low": c - 0.5, "close": c, "vol": 1000 + i, "amount": c * 1000,
+        }
+        for i, c in enumerate(closes)
+    ]
+
+
+class _FakeApi:
+    def __init__(self):
+        self.bar_calls = 0
+
+    def get_security_bars(self, category, market, code, start, count):
+        self.bar_calls += 1
+        return _bars()[-count:]
+
+    def get_security_quotes(self, securities):
+        return [{"price": 12.0, "last_close": 11.5, "vol": 5000}]
+
+
+def _provider(monkeypatch, tmp_path):
+    monkeypatch.setattr(bar_frame, "_bar_frame_cache", BarFrameCache())
+    monkeypatch.setattr(indicator_state, "_indicator_state_store", indicator_state.IndicatorStateStore(tmp_path))
+    provider = object.__new__(tdx_utils.TongDaXinDataProvider)
+    provider.api = _FakeApi()
+    provider.connected = True
+    monkeypatch.setattr(provider, "_get_stock_name", lambda code: "平安银行", raising=False)
+    return provider
+
+
+def test_indicator_frame_matches_pandas_reference():
+    df = pd.DataFrame({"Close": 10 + np.cumsum(np.random.default_rng(0).normal(size=120))})
+    indicators = compute_indicator_frame(df)
+
+    close = df["Close"]
+    assert np.isclose(indicators["MA20"].iloc[-1], close.rolling(20).mean().iloc[-1])
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    assert np.isclose(indicators["MACD_Signal"].iloc[-1], macd.ewm(span=9).mean().iloc[-1])
+    std = close.rolling(20).std().iloc[-1]
+    assert np.isclose(indicators["BB_Upper"].iloc[-1], close.rolling(20).mean().iloc[-1] + 2 * std)
+
+
+def test_snapshot_needs_one_history_fetch(monkeypatch, tmp_path):
+    provider = _provider(monkeypatch, tmp_path)
+    end = datetime.now().strftime("%Y-%m-%d")
+    start = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+
+    snapshot = provider.get_stock_snapshot("000001", start, end)
+    assert provider.api.bar_calls == 1
+    assert snapshot.realtime["price"] == 12.0
+    assert snapshot.history.index[0] >= pd.Timestamp(start)
+    assert snapshot.indicators["MACD"] is not None and snapshot.indicators["BB_Lower"] is not None
+
+    # 同一请求内再次获取指标和历史，复用同一个K线帧
+    assert provider.get_stock_technical_indicators("000001") == pytest.approx(snapshot.frame.indicators())
+    provider.get_stock_history_data("000001", start, end)
+    assert provider.api.bar_calls == 1
+
+
+def test_frame_refetches_for_earlier_start(monkeypatch, tmp_path):
+    provider = _provider(monkeypatch, tmp_path)
+    today = datetime.now()
+    provider.get_bar_frame("000001", (today - timedelta(days=30)).strftime("%Y-%m-%d"))
+    provider.get_bar_frame("000001", (today - timedelta(days=150)).strftime("%Y-%m-%d"))
+    assert provider.api.bar_calls == 2
+    provider.get_bar_frame("000001", (today - timedelta(days=60)).strftime("%Y-%m-%d"))
+    assert provider.api.bar_calls == 2
+
+
+def test_indicators_as_of_date_and_min_bars():
+    index = pd.date_range("2024-01-01", periods=30, freq="D")
+    frame = bar_frame.BarFrame("000001", "D", pd.DataFrame({"Close": np.arange(30.0) + 1}, index=index), "2024-01-01")
+
+    early = frame.indicators(as_of="2024-01-15")
+    assert early["MA10"] == np.mean(np.arange(6.0, 16.0))
+    assert early["MA20"] is None and early["MACD"] is None
+    assert frame.indicators()["MA20"] == np.mean(np.arange(11.0, 31.0))
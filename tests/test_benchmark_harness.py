@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+测试离线基准测试：假模型的确定性回复、夹具数据源替换与还原、端到端运行统计和基线对比
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+import tradingagents.dataflows.interface as interface
+from tradingagents.benchmark import (
+    BenchmarkReport, BenchmarkScenario, FakeDataProviders, FixtureSet, RunMetrics,
+    ScriptedChatModel, compare_reports, run_benchmark,
+)
+from tradingagents.dataflows.prefetch import get_dataflow_memo
+
+
+@tool
+def lookup_prices(ticker: str, start_date: str, end_date: str) -> str:
+    """Price lookup used by the tests."""
+    return ticker
+
+
+def test_scripted_model_calls_bound_tools_then_answers():
+    llm = ScriptedChatModel(use_llm_cache=False, response_chars=200)
+    llm.set_context("AAPL", "2024-05-10")
+    bound = llm.bind_tools([lookup_prices])
+
+    first = bound.invoke([HumanMessage("AAPL")])
+    assert [call["name"] for call in first.tool_calls] == ["lookup_prices"]
+    assert first.tool_calls[0]["args"] == {"ticker": "AAPL", "start_date": "2024-04-10", "end_date": "2024-05-10"}
+
+    messages = [HumanMessage("AAPL"), first, ToolMessage("data", tool_call_id=first.tool_calls[0]["id"])]
+    second = bound.invoke(messages)
+    assert not second.tool_calls
+    assert len(second.content) >= 200 and "**持有**" in second.content
+    assert second.usage_metadata["input_tokens"] > 0
+    # 相同提示词回复相同
+    assert bound.invoke(messages).content == second.content
+    assert llm.calls == 3
+
+
+def test_scripted_model_signal_json_and_scripted_responses():
+    llm = ScriptedChatModel(use_llm_cache=False, responses={"特别问题": "特别回答"})
+    assert '"action": "持有"' in llm.invoke("请输出 target_price 和 risk_score").content
+    assert llm.invoke("这是一个特别问题").content == "特别回答"
+
+
+def test_fake_providers_install_and_restore():
+    original = interface.get_YFin_data_online
+    fixtures = FixtureSet({"get_YFin_data_online": {"AAPL": "recorded"}}, payload_chars=300)
+    get_dataflow_memo().clear()
+    with FakeDataProviders(fixtures) as providers:
+        assert interface.get_YFin_data_online("AAPL", "2024-04-10", "2024-05-10") == "recorded"
+        # 保留 dataflow_memo：第二次调用命中缓存，不再访问数据源
+        assert interface.get_YFin_data_online("AAPL", "2024-04-10", "2024-05-10") == "recorded"
+        synthetic = interface.get_YFin_data_online("MSFT", "2024-04-10", "2024-05-10")
+        assert synthetic.startswith("# MSFT") and len(synthetic) >= 300
+        assert providers.calls["get_YFin_data_online"] == 2
+        assert fixtures.misses["get_YFin_data_online"] == 1
+    assert interface.get_YFin_data_online is original
+    get_dataflow_memo().clear()
+
+
+def test_end_to_end_run_collects_metrics():
+    scenario = BenchmarkScenario(analysts=["market", "news"], iterations=2, warmup=0, measure_memory=False)
+    report = run_benchmark(scenario)
+
+    assert len(report.runs) == 2
+    run = report.runs[0]
+    assert run.wall_s > 0 and run.cpu_s > 0
+    assert run.decision == "持有"
+    assert run.tools["get_stock_market_data_unified"] == 1
+    assert run.provider_calls > 0
+    assert run.nodes["Market Analyst"].llm_calls == 2
+    assert run.nodes["Market Analyst"].prompt_chars > 0
+    assert run.prompt_tokens > 0
+    # 冷缓存：每轮的调用次数相同
+    assert report.runs[1].llm_calls == run.llm_calls
+    assert report.runs[1].provider_calls == run.provider_calls
+
+
+def test_report_roundtrip_and_comparison(tmp_path):
+    def report(wall, hits):
+        runs = [RunMetrics(ticker="AAPL", wall_s=wall, cpu_s=wall / 2, llm_calls=10,
+                           cache={"memo": {"hits": hits, "misses": 1}})]
+        return BenchmarkReport(scenario=BenchmarkScenario(), runs=runs)
+
+    baseline = report(1.0, 4)
+    path = tmp_path / "baseline.json"
+    baseline.save(str(path))
+    loaded = BenchmarkReport.load(str(path))
+    assert loaded.summary() == baseline.summary()
+
+    deltas = {d.name: d for d in compare_reports(report(1.5, 8), loaded, threshold=0.1)}
+    assert deltas["wall_s"].regressed and deltas["cpu_s"].regressed
+    assert deltas["cache_hits"].improved and not deltas["cache_hits"].regressed
+    assert not deltas["llm_calls"].regressed
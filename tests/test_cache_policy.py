@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+测试统一缓存策略：交易时段感知的有效期、历史行情永不过期、旧值后台刷新、负缓存
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tradingagents.dataflows import cache_policy, prefetch
+from tradingagents.dataflows.cache_manager import StockDataCache
+from tradingagents.dataflows.cache_policy import (
+    EXPIRED, FRESH, STALE, CachePolicyEngine, MarketClock, infer_context, is_no_data, market_of,
+)
+from tradingagents.dataflows.prefetch import DataflowMemo, dataflow_memo
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+# 2025-07-02 为周三；A股 10:00 = UTC 02:00，20:00 = UTC 12:00
+CHINA_OPEN = _utc(2025, 7, 2, 2, 0)
+CHINA_EVENING = _utc(2025, 7, 2, 12, 0)
+CHINA_FRIDAY_EVENING = _utc(2025, 7, 4, 12, 0)
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = CachePolicyEngine()
+    previous = cache_policy.set_cache_policy_engine(engine)
+    monkeypatch.setattr(prefetch, "_dataflow_memo", DataflowMemo())
+    yield engine
+    engine.wait_for_refreshes()
+    cache_policy.set_cache_policy_engine(previous)
+
+
+def test_market_clock_sessions():
+    clock = MarketClock()
+    assert clock.is_open('china', CHINA_OPEN)
+    assert not clock.is_open('china', _utc(2025, 7, 2, 4, 0))  # 午休 12:00
+    assert not clock.is_open('china', CHINA_EVENING)
+    assert clock.seconds_until_open('china', CHINA_EVENING) == pytest.approx(13.5 * 3600)
+    # 周五晚上到周一开盘
+    assert clock.seconds_until_open('china', CHINA_FRIDAY_EVENING) == pytest.approx((48 + 13.5) * 3600)
+    assert clock.is_settled('china', '2025-07-01', CHINA_OPEN)
+    assert not clock.is_settled('china', '2025-07-02', CHINA_OPEN)
+    assert clock.is_settled('china', '2025-07-02', CHINA_EVENING)
+    assert [market_of(s) for s in ('600519', '000001.SZ', '0700.HK', '00700', 'AAPL', 'apple stock')] == \
+        ['china', 'china', 'hk', 'hk', 'us', None]
+
+
+def test_ttl_depends_on_market_hours_and_settlement(engine):
+    # 盘中行情短有效期，休市时有效期到下一次开盘
+    assert engine.ttl_seconds('price', 'china', '2025-07-02', now=CHINA_OPEN) == 900
+    assert engine.ttl_seconds('price', 'china', None, now=CHINA_EVENING) == pytest.approx(13.5 * 3600)
+    # 已收盘的历史K线永不过期
+    assert engine.ttl_seconds('price', 'china', '2025-07-01', now=CHINA_OPEN) is None
+    assert engine.ttl_seconds('stock_data', 'china', '2025-07-02', now=CHINA_EVENING) is None
+    # 新闻与交易时段无关
+    assert engine.ttl_seconds('news', 'china', '2025-07-01', now=CHINA_EVENING) == 1800
+    assert engine.ttl_seconds('news', 'china', negative=True, now=CHINA_OPEN) == 900
+    assert engine.store_seconds('price', 'china', '2025-07-01', now=CHINA_OPEN) is None
+
+    assert engine.freshness('price', CHINA_OPEN, 'china', now=CHINA_OPEN + 100) == FRESH
+    assert engine.freshness('price', CHINA_OPEN, 'china', now=CHINA_OPEN + 1000) == STALE
+    assert engine.freshness('price', CHINA_OPEN, 'china', now=CHINA_OPEN + 7 * 3600) == EXPIRED
+    assert engine.freshness('price', CHINA_OPEN, 'china', ttl_override=3600, now=CHINA_OPEN + 1000) == FRESH
+
+    engine.set_policy('news', market='us', ttl=60)
+    assert engine.policy('news', 'us').ttl == 60 and engine.policy('news', 'china').ttl == 1800
+
+
+def test_memo_serves_stale_value_and_refreshes_in_background(engine):
+    engine.set_policy('news', ttl=0.05, stale_seconds=60)
+    version = {'n': 0}
+    release = threading.Event()
+
+    @dataflow_memo('news')
+    def news(query, curr_date):
+        version['n'] += 1
+        if version['n'] > 1:
+            release.wait(5)
+        return f"news v{version['n']}"
+
+    assert news('AAPL', '2025-07-01') == 'news v1'
+    time.sleep(0.1)
+    # 已过期：立即返回旧值，刷新在后台进行
+    started = time.perf_counter()
+    assert news('AAPL', '2025-07-01') == 'news v1'
+    assert news('AAPL', '2025-07-01') == 'news v1'
+    assert time.perf_counter() - started < 1
+    assert engine.stats.refreshes == 1 and engine.stats.refresh_skipped == 1
+    release.set()
+    assert engine.wait_for_refreshes(5)
+    assert news('AAPL', '2025-07-01') == 'news v2'
+    assert prefetch.get_dataflow_memo().stats['stale_hits'] == 2
+
+
+def test_memo_negative_caching_but_not_failures(engine):
+    calls = []
+
+    @dataflow_memo('price')
+    def prices(symbol, start_date, end_date):
+        calls.append(symbol)
+        if symbol == 'BAD':
+            return '❌ 获取失败'
+        return f"No data found for symbol '{symbol}'"
+
+    prices('ZZZZ', '2025-07-01', '2025-07-02')
+    prices('ZZZZ', '2025-07-01', '2025-07-02')
+    prices('BAD', '2025-07-01', '2025-07-02')
+    prices('BAD', '2025-07-01', '2025-07-02')
+    assert calls == ['ZZZZ', 'BAD', 'BAD']
+    assert prefetch.get_dataflow_memo().stats['negative_hits'] == 1
+    assert is_no_data('') and is_no_data('暂无数据') and not is_no_data('❌ 无数据') and not is_no_data(None)
+    assert infer_context(('600519', '2025-06-01', '2025-07-02', 30), {}) == ('china', '2025-07-02')
+
+
+def test_file_cache_stale_lookup(engine, tmp_path):
+    engine.set_policy('price', ttl=0.05, stale_seconds=60)
+    cache = StockDataCache(str(tmp_path / 'cache'))
+    key = cache.save_stock_data('AAPL', 'bars', start_date='2025-01-01', end_date='2099-01-01',
+                                data_source='yfinance')
+    time.sleep(0.1)
+    # 显式指定的有效期覆盖交易时段推算的有效期
+    assert cache.cache_freshness(key, max_age_hours=0.00001) == STALE
+    assert cache.find_cached_stock_data('AAPL', '2025-01-01', '2099-01-01', 'yfinance', max_age_hours=0.00001) is None
+    assert cache.find_cached_stock_data('AAPL', '2025-01-01', '2099-01-01', 'yfinance', max_age_hours=0.00001,
+                                        allow_stale=True) == key
+    settled = cache.save_stock_data('AAPL', 'old bars', start_date='2024-01-01', end_date='2024-02-01',
+                                    data_source='yfinance')
+    assert cache.cache_freshness(settled, max_age_hours=0) == FRESH
+
+
+def test_memo_keeps_settled_prices_for_a_finite_time(engine):
+    # 已收盘的历史行情在策略中永不过期，进程内缓存仍只保留有限时长
+    before = time.time()
+    entry = prefetch._memo_entry('price', ('AAPL', '2024-01-02', '2024-02-01'), {}, 'bars')
+    assert entry.fresh_until is not None
+    assert before + prefetch.SETTLED_MEMO_SECONDS <= entry.fresh_until <= time.time() + prefetch.SETTLED_MEMO_SECONDS
+    assert entry.stale_until == entry.fresh_until
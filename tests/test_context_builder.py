@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+测试辩论节点的提示上下文压缩
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.agents.utils.context_builder import (
+    build_debate_context,
+    enforce_token_budget,
+    estimate_tokens,
+    extract_report_digest,
+    get_report_digests,
+    window_history,
+)
+
+
+LONG_REPORT = "\n".join(
+    ["# 市场分析"]
+    + [f"普通描述性文字第{i}行，没有实质内容" for i in range(200)]
+    + ["## 结论", "- 目标价 45.50 元，建议买入", "- 主要风险：成交量萎缩"]
+)
+
+
+def _state(**overrides):
+    state = {
+        "market_report": LONG_REPORT,
+        "sentiment_report": "情绪偏正面",
+        "news_report": "无重大新闻",
+        "fundamentals_report": "市盈率 12 倍",
+        "report_digests": {},
+    }
+    state.update(overrides)
+    return state
+
+
+def test_extract_digest_keeps_key_lines():
+    digest = extract_report_digest(LONG_REPORT, 300)
+    assert len(digest) <= 300
+    assert "目标价 45.50 元，建议买入" in digest
+    assert "# 市场分析" in digest
+    # 短报告原样返回
+    assert extract_report_digest("短报告", 300) == "短报告"
+
+
+def test_digests_are_cached_in_state():
+    state = _state()
+    digests, update = get_report_digests(state, {"report_digest_max_chars": 300})
+    assert set(update) == {"market_report", "sentiment_report", "news_report", "fundamentals_report"}
+    assert len(digests["market_report"]) <= 300
+
+    # 报告未变化时直接复用状态中的摘要，不再产生更新
+    state["report_digests"] = update
+    digests_again, update_again = get_report_digests(state, {"report_digest_max_chars": 300})
+    assert digests_again == digests
+    assert update_again == {}
+
+    # 报告变化后重新计算
+    state["news_report"] = "突发利好"
+    _, changed = get_report_digests(state, {"report_digest_max_chars": 300})
+    assert changed["news_report"]["digest"] == "突发利好"
+
+
+def test_window_history_keeps_recent_turns():
+    history = "".join(f"\nBull Analyst: 观点{i}\nBear Analyst: 反驳{i}" for i in range(5))
+    windowed = window_history(history, 3)
+    assert "已省略较早的 7 轮发言" in windowed
+    assert "反驳4" in windowed and "观点0" not in windowed
+    assert window_history(history, 0) == history
+
+
+def test_enforce_token_budget():
+    sections = {"a": "短" * 10, "b": "长" * 5000, "history": "历" * 5000}
+    result = enforce_token_budget(sections, 3000)
+    assert result["a"] == sections["a"]
+    assert sum(estimate_tokens(text) for text in result.values()) <= 3000 + 20
+
+    protected = enforce_token_budget(sections, 6000, protected=("history",))
+    assert protected["history"] == sections["history"]
+
+
+def test_build_debate_context_disabled_returns_full_reports():
+    state = _state()
+    context, update = build_debate_context(state, "\nBull Analyst: x", {"context_compaction_enabled": False})
+    assert context["market_report"] == LONG_REPORT
+    assert update == {}
+
+    context, update = build_debate_context(state, "\nBull Analyst: x", {"report_digest_max_chars": 500})
+    assert len(context["market_report"]) <= 500
+    assert "report_digests" in update
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+测试A股日线截面入库：按交易日分区、幂等重跑、缺口检测、刷新单只股票缓存
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import daily_bar_store
+from tradingagents.dataflows.daily_bar_store import DailyBarIngestor, DailyBarStore
+from tradingagents.dataflows.prefetch import RateLimiter
+
+CODES = ["000001.SZ", "600519.SH", "300750.SZ"]
+CALENDAR = ["20250701", "20250702", "20250703", "20250704"]
+
+
+def _cross_section(trade_date):
+    day = int(trade_date[-2:])
+    return pd.DataFrame({
+        "ts_code": list(reversed(CODES)),
+        "trade_date": [trade_date] * len(CODES),
+        "open": [10.0 + day] * len(CODES),
+        "high": [11.0 + day] * len(CODES),
+        "low": [9.0 + day] * len(CODES),
+        "close": [10.5 + day + i for i in range(len(CODES))],
+        "vol": [1000.0] * len(CODES),
+    })
+
+
+class FakeProvider:
+    def __init__(self, missing=()):
+        self.calls = []
+        self.missing = set(missing)
+        self.saved = []
+        self.cache_manager = self
+
+    def get_daily_by_trade_date(self, trade_date):
+        self.calls.append(trade_date)
+        return pd.DataFrame() if trade_date in self.missing else _cross_section(trade_date)
+
+    def get_trade_dates(self, start_date, end_date):
+        return [d for d in CALENDAR if start_date.replace("-", "") <= d <= end_date.replace("-", "")]
+
+    def _normalize_symbol(self, symbol):
+        return f"{symbol}.SH" if symbol.startswith("6") else f"{symbol}.SZ"
+
+    def save_stock_data(self, symbol, data, start_date=None, end_date=None, data_source=None):
+        self.saved.append((symbol, data, start_date, end_date, data_source))
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def store(request, tmp_path):
+    if request.param == "parquet" and not daily_bar_store.PARQUET_AVAILABLE:
+        pytest.skip("pyarrow 未安装")
+    return DailyBarStore(tmp_path / "daily_bars", file_format=request.param)
+
+
+def _ingestor(store, provider):
+    return DailyBarIngestor(store=store, provider=provider, rate_limiter=RateLimiter({"tushare": 0}))
+
+
+def test_ingest_is_idempotent_and_detects_gaps(store):
+    provider = FakeProvider(missing={"20250703"})
+    ingestor = _ingestor(store, provider)
+
+    report = ingestor.ingest_range("2025-07-01", "2025-07-04")
+    assert report.ingested == {"20250701": 3, "20250702": 3, "20250704": 3}
+    assert report.empty == ["20250703"]
+    assert report.gaps == ["20250703"]
+    assert ingestor.find_gaps("2025-07-01", "2025-07-04") == ["20250703"]
+
+    # 重跑只请求缺口
+    provider.calls.clear()
+    report = ingestor.ingest_range("2025-07-01", "2025-07-04")
+    assert provider.calls == ["20250703"]
+    assert report.skipped == ["20250701", "20250702", "20250704"]
+
+    # 强制重跑整体替换分区，行数不重复
+    ingestor.ingest_date("20250701", force=True)
+    assert len(store.read_date("2025-07-01")) == 3
+
+    # 清单在新实例中保留
+    assert DailyBarStore(store.root_dir, file_format=store.file_format).partition_dates() == ["20250701", "20250702", "20250704"]
+
+
+def test_read_symbols_and_refresh_caches(store):
+    provider = FakeProvider()
+    ingestor = _ingestor(store, provider)
+    ingestor.ingest_range("2025-07-01", "2025-07-04")
+
+    bars = store.read_symbols(["600519.SH"], "2025-07-02", "2025-07-03")
+    assert bars["trade_date"].tolist() == ["20250702", "20250703"]
+    assert bars["close"].tolist() == [13.5, 14.5]
+
+    refreshed = ingestor.refresh_symbol_caches(["000001", "600519", "688981"], "2025-07-01", "2025-07-04")
+    assert sorted(refreshed) == ["000001", "600519"]
+    symbol, data, start, end, source = provider.saved[0]
+    assert (start, end, source) == ("2025-07-01", "2025-07-04", "tushare")
+    assert len(data) == 4 and pd.api.types.is_datetime64_any_dtype(data["trade_date"])
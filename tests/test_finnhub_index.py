@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+测试finnhub离线数据日期索引：区间查询结果与逐键扫描一致，文件只解析一次，修改后重新解析
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tradingagents.dataflows import finnhub_utils
+from tradingagents.dataflows.finnhub_utils import FinnhubDateIndex, get_data_in_range
+
+
+DATA = {
+    "2024-03-05": [{"headline": "c", "summary": "s3"}],
+    "2024-03-01": [{"headline": "a", "summary": "s1"}],
+    "2024-03-03": [],
+    "2024-03-02": [{"headline": "b", "summary": "s2"}],
+    "2024-03-10": [{"headline": "d", "summary": "s4"}],
+}
+
+RANGES = [
+    ("2024-03-01", "2024-03-05"),
+    ("2024-03-02", "2024-03-02"),
+    ("2024-03-06", "2024-03-09"),
+    ("2024-01-01", "2024-12-31"),
+    ("2024-03-05", "2024-03-01"),
+]
+
+
+def _scan(data, start_date, end_date):
+    """原实现的逐键过滤"""
+    return {k: v for k, v in data.items() if start_date <= k <= end_date and len(v) > 0}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    finnhub_utils.get_finnhub_index_cache().clear()
+    news_dir = tmp_path / "finnhub_data" / "news_data"
+    news_dir.mkdir(parents=True)
+    (news_dir / "AAPL_data_formatted.json").write_text(json.dumps(DATA))
+    yield tmp_path
+    finnhub_utils.get_finnhub_index_cache().clear()
+
+
+@pytest.mark.parametrize("start_date,end_date", RANGES)
+def test_range_matches_scan_including_order(start_date, end_date):
+    result = FinnhubDateIndex(DATA).range(start_date, end_date)
+    expected = _scan(DATA, start_date, end_date)
+    assert list(result.items()) == list(expected.items())
+
+
+def test_file_parsed_once(data_dir, monkeypatch):
+    loads = []
+    real_load = json.load
+    monkeypatch.setattr(finnhub_utils.json, "load", lambda f: loads.append(1) or real_load(f))
+
+    for start_date, end_date in RANGES:
+        assert get_data_in_range("AAPL", start_date, end_date, "news_data", str(data_dir)) == \
+            _scan(DATA, start_date, end_date)
+    assert len(loads) == 1
+
+
+def test_reparsed_after_file_change(data_dir):
+    path = data_dir / "finnhub_data" / "news_data" / "AAPL_data_formatted.json"
+    assert get_data_in_range("AAPL", "2024-03-11", "2024-03-31", "news_data", str(data_dir)) == {}
+
+    updated = dict(DATA, **{"2024-03-12": [{"headline": "e", "summary": "s5"}]})
+    path.write_text(json.dumps(updated))
+    os.utime(path, (path.stat().st_atime, path.stat().st_mtime + 10))
+    assert list(get_data_in_range("AAPL", "2024-03-11", "2024-03-31", "news_data", str(data_dir))) == ["2024-03-12"]
+
+
+def test_missing_or_invalid_file_returns_empty(data_dir):
+    assert get_data_in_range("NONEXISTENT", "2024-01-01", "2024-12-31", "news_data", str(data_dir)) == {}
+    (data_dir / "finnhub_data" / "news_data" / "BAD_data_formatted.json").write_text("{not json")
+    assert get_data_in_range("BAD", "2024-01-01", "2024-12-31", "news_data", str(data_dir)) == {}
+
+
+def test_lru_eviction(data_dir):
+    cache = finnhub_utils.FinnhubIndexCache(max_files=2)
+    news_dir = data_dir / "finnhub_data" / "news_data"
+    for ticker in ("A", "B", "C"):
+        (news_dir / f"{ticker}_data_formatted.json").write_text(json.dumps(DATA))
+        cache.get(str(news_dir / f"{ticker}_data_formatted.json"))
+    assert [os.path.basename(p) for p in cache._indexes] == ["B_data_formatted.json", "C_data_formatted.json"]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+测试指标增量状态：持久化后只追加新K线、盘中K线不写回、复权调整后重建
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows.indicator_state import IndicatorStateStore
+from tradingagents.indicators import MACD, STANDARD_SPEC, compute_indicator, parse_indicator, standard_indicator_frame
+
+
+def _bars(count=300, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 20 + np.cumsum(rng.normal(scale=0.3, size=count))
+    return pd.DataFrame({
+        "Date": pd.date_range("2024-01-01", periods=count, freq="B").strftime("%Y-%m-%d"),
+        "High": close + 0.2,
+        "Low": close - 0.2,
+        "Close": close,
+        "Volume": rng.integers(1000, 5000, size=count).astype(float),
+    })
+
+
+def test_state_round_trip_continues_identically():
+    closes = _bars()["Close"].to_numpy()
+    full, resumed = MACD(), MACD()
+    for value in closes[:200]:
+        full.update(value)
+        resumed.update(value)
+    resumed = MACD().load_state_dict(resumed.state_dict())
+    for value in closes[200:]:
+        assert resumed.update(value) == full.update(value)
+
+
+def test_next_day_appends_one_bar_from_disk(tmp_path):
+    bars = _bars()
+    spec = parse_indicator("macds")
+    settled = "2099-01-01"
+
+    IndicatorStateStore(tmp_path).advance("AAPL", spec, bars.iloc[:-1], settled_before=settled)
+
+    # 新进程：从磁盘恢复状态，只追加最新一根K线
+    store = IndicatorStateStore(tmp_path)
+    series = store.advance("AAPL", spec, bars, settled_before=settled)
+    assert series.appended == 1 and not series.rebuilt
+    expected = compute_indicator(bars, "macds")
+    assert series.latest == pytest.approx(expected[-1], rel=1e-9)
+    assert series.value_on(bars["Date"].iloc[-30]) == pytest.approx(expected[-30], rel=1e-9)
+
+    # 同一天再次调用不追加也不重写
+    assert store.advance("AAPL", spec, bars, settled_before=settled).appended == 0
+
+
+def test_unsettled_bar_is_not_persisted(tmp_path):
+    bars = _bars()
+    store = IndicatorStateStore(tmp_path)
+    today = bars["Date"].iloc[-1]
+
+    series = store.advance("000001", STANDARD_SPEC, bars, settled_before=today)
+    expected = standard_indicator_frame(bars["Close"]).iloc[-1]
+    assert series.latest["MA20"] == pytest.approx(expected["MA20"])
+    assert series.latest["RSI"] == pytest.approx(expected["RSI"])
+
+    # 盘中价格变化后重新计算，状态停留在前一交易日
+    bars.loc[bars.index[-1], "Close"] += 1.0
+    series = store.advance("000001", STANDARD_SPEC, bars, settled_before=today)
+    assert series.appended == 0 and not series.rebuilt
+    assert series.latest["MA5"] == pytest.approx(bars["Close"].iloc[-5:].mean())
+
+
+def test_price_adjustment_rebuilds_state(tmp_path):
+    bars = _bars()
+    store = IndicatorStateStore(tmp_path)
+    spec = parse_indicator("close_50_sma")
+    store.advance("000001", spec, bars.iloc[:-1], settled_before="2099-01-01")
+
+    # 除权后前复权价格整体下调
+    adjusted = bars.copy()
+    adjusted[["High", "Low", "Close"]] *= 0.9
+    series = store.advance("000001", spec, adjusted, settled_before="2099-01-01")
+    assert series.rebuilt
+    assert series.latest == pytest.approx(compute_indicator(adjusted, "close_50_sma")[-1])
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+测试共享技术指标库：与 stockstats、pandas rolling 的数值一致性，增量更新和批量计算
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+from stockstats import wrap
+
+from tradingagents.indicators import (
+    ATR, MACD, MFI, RSI, SMA, VWMA, Bollinger, batch_apply, compute_indicator, kernels,
+    standard_indicator_frame,
+)
+
+
+def _bars(count=400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 50 + np.cumsum(rng.normal(size=count))
+    return pd.DataFrame({
+        "Date": pd.date_range("2023-01-02", periods=count, freq="B"),
+        "Open": close,
+        "High": close + rng.random(count),
+        "Low": close - rng.random(count),
+        "Close": close,
+        "Volume": rng.integers(1000, 5000, size=count).astype(float),
+    })
+
+
+@pytest.mark.parametrize("name", [
+    "close_50_sma", "close_200_sma", "close_10_ema", "macd", "macds", "macdh",
+    "rsi", "boll", "boll_ub", "boll_lb", "atr", "vwma", "mfi",
+])
+def test_matches_stockstats(name):
+    bars = _bars()
+    expected = wrap(bars.copy())[name].to_numpy()
+    np.testing.assert_allclose(compute_indicator(bars, name), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_standard_frame_matches_pandas_rolling():
+    close = _bars()["Close"]
+    frame = standard_indicator_frame(close)
+
+    pd.testing.assert_series_equal(frame["MA10"], close.rolling(10).mean(), check_names=False)
+    delta = close.diff()
+    gain = delta.clip(lower=0).rolling(14).mean()
+    loss = (-delta.clip(upper=0)).rolling(14).mean()
+    pd.testing.assert_series_equal(frame["RSI"], 100 - 100 / (1 + gain / loss), check_names=False)
+    std = close.rolling(20).std()
+    pd.testing.assert_series_equal(frame["BB_Lower"], close.rolling(20).mean() - 2 * std, check_names=False)
+
+
+def test_incremental_updates_match_vectorized():
+    bars = _bars(200)
+    high, low, close, volume = (bars[c].to_numpy() for c in ("High", "Low", "Close", "Volume"))
+    tp = kernels.typical_price(high, low, close)
+    expected = {
+        "sma": kernels.sma(close, 20),
+        "rsi": kernels.rsi(close),
+        "macd": kernels.macd(close)[1],
+        "boll": kernels.bollinger(close)[1],
+        "atr": kernels.atr(high, low, close),
+        "vwma": kernels.vwma(tp, volume),
+        "mfi": kernels.mfi(tp, volume),
+    }
+    states = {"sma": SMA(20), "rsi": RSI(), "macd": MACD(), "boll": Bollinger(),
+              "atr": ATR(), "vwma": VWMA(), "mfi": MFI()}
+
+    for i, bar in enumerate(bars.to_dict("records")):
+        for name, state in states.items():
+            value = state.update(bar)
+            if name in ("macd", "boll"):
+                value = value[1]
+            if value is None:
+                assert np.isnan(expected[name][i])
+            else:
+                assert value == pytest.approx(expected[name][i], rel=1e-9, abs=1e-9), name
+
+
+def test_batch_matches_per_symbol():
+    series = {f"{i:06d}": _bars(300 if i % 2 else 250, seed=i)["Close"].to_numpy() for i in range(6)}
+    batch = batch_apply(series, kernels.macd)
+    for symbol, values in series.items():
+        for got, expected in zip(batch[symbol], kernels.macd(values)):
+            np.testing.assert_allclose(got, expected)
+    rsi = batch_apply(series, kernels.rsi, window=6)
+    np.testing.assert_allclose(rsi["000001"], kernels.rsi(series["000001"], 6))
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+测试LLM响应缓存
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_openai import ChatOpenAI
+
+from tradingagents.llm_adapters import llm_cache
+from tradingagents.llm_adapters.llm_cache import (
+    LLMResponseCache,
+    MemoryLRUCache,
+    SQLiteCacheBackend,
+    cached_generate,
+    deserialize_result,
+    make_cache_key,
+    serialize_result,
+)
+
+
+def _result(text="回复", tool_calls=None):
+    message = AIMessage(content=text, tool_calls=tool_calls or [])
+    return ChatResult(
+        generations=[ChatGeneration(message=message)],
+        llm_output={"token_usage": {"prompt_tokens": 100, "completion_tokens": 20}},
+    )
+
+
+def test_cache_key_normalizes_whitespace():
+    key1 = make_cache_key("qwen-plus", [SystemMessage(content="你好  世界\n"), HumanMessage(content="A")], 0.0)
+    key2 = make_cache_key("qwen-plus", [SystemMessage(content="你好 世界"), HumanMessage(content="A")], 0.0)
+    assert key1 == key2
+
+    # 模型、温度、工具不同则键不同
+    assert key1 != make_cache_key("qwen-max", [SystemMessage(content="你好 世界"), HumanMessage(content="A")], 0.0)
+    assert key1 != make_cache_key("qwen-plus", [SystemMessage(content="你好 世界"), HumanMessage(content="A")], 0.5)
+    assert key1 != make_cache_key("qwen-plus", [SystemMessage(content="你好 世界"), HumanMessage(content="A")], 0.0,
+                                  tools=[{"name": "get_data"}])
+
+    # 会话参数不影响缓存键
+    assert key1 == make_cache_key("qwen-plus", [SystemMessage(content="你好 世界"), HumanMessage(content="A")], 0.0,
+                                  session_id="abc")
+
+
+def test_result_roundtrip_keeps_tool_calls():
+    result = _result("", tool_calls=[{"name": "get_data", "args": {"ticker": "000001"}, "id": "call_1"}])
+    restored = deserialize_result(serialize_result(result))
+    assert restored.generations[0].message.tool_calls[0]["name"] == "get_data"
+    assert restored.llm_output["token_usage"]["prompt_tokens"] == 100
+
+
+def test_memory_lru_eviction():
+    cache = MemoryLRUCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+
+
+def test_sqlite_backend_promotes_to_memory(tmp_path):
+    backend = SQLiteCacheBackend(str(tmp_path / "llm.sqlite"))
+    writer = LLMResponseCache(backend=backend)
+    writer.set("k", _result("持久化"))
+
+    reader = LLMResponseCache(backend=backend)
+    assert reader.get("k").generations[0].message.content == "持久化"
+    assert reader.get("k") is not None
+    stats = reader.get_stats()
+    assert stats["backend_hits"] == 1 and stats["memory_hits"] == 1
+
+
+def test_sqlite_backend_defaults_to_user_data_dir(tmp_path, monkeypatch):
+    import tradingagents
+
+    package_dir = os.path.dirname(os.path.abspath(tradingagents.__file__))
+    assert not str(llm_cache.DEFAULT_SQLITE_PATH).startswith(package_dir)
+
+    monkeypatch.setenv("TRADINGAGENTS_LLM_CACHE_PATH", str(tmp_path / "custom.sqlite"))
+    backend = llm_cache._create_backend("sqlite", 1)
+    assert backend.db_path == tmp_path / "custom.sqlite" and backend.db_path.exists()
+
+
+def test_cached_generate_respects_temperature_and_bypass():
+    llm_cache.set_llm_cache(LLMResponseCache(max_temperature=0.0))
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return _result()
+
+    messages = [HumanMessage(content="提取信号")]
+    assert cached_generate("m", 0.0, messages, None, {}, generate)[1] == "miss"
+    assert cached_generate("m", 0.0, messages, None, {}, generate)[1] == "hit"
+    assert len(calls) == 1
+
+    # 高温度调用默认不缓存，llm_cache=False 强制绕过，llm_cache=True 强制缓存
+    assert cached_generate("m", 0.7, messages, None, {}, generate)[1] == "bypass"
+    kwargs = {"llm_cache": False}
+    assert cached_generate("m", 0.0, messages, None, kwargs, generate)[1] == "bypass"
+    assert "llm_cache" not in kwargs
+    assert cached_generate("m", 0.7, messages, None, {"llm_cache": True}, generate)[1] == "miss"
+    llm_cache.set_llm_cache(None)
+
+
+def test_deepseek_adapter_uses_cache(monkeypatch):
+    from tradingagents.config.config_manager import token_tracker
+    from tradingagents.llm_adapters.deepseek_adapter import ChatDeepSeek
+
+    llm_cache.set_llm_cache(LLMResponseCache(max_temperature=0.0))
+    calls = []
+
+    def fake_generate(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(kwargs)
+        return _result("确定性回复")
+
+    monkeypatch.setattr(ChatOpenAI, "_generate", fake_generate)
+    monkeypatch.setattr(token_tracker, "track_usage", lambda *args, **kwargs: None)
+
+    llm = ChatDeepSeek(api_key="sk-test", temperature=0.0)
+    first = llm.invoke([HumanMessage(content="同一个提示")])
+    second = llm.invoke([HumanMessage(content="同一个提示")])
+
+    assert first.content == second.content == "确定性回复"
+    assert len(calls) == 1
+    stats = token_tracker.get_cache_stats()["deepseek/deepseek-chat"]
+    assert stats["hits"] >= 1 and stats["saved_input_tokens"] >= 100
+    llm_cache.set_llm_cache(None)
+
+
+def test_dashscope_native_adapter_reports_cache_events(monkeypatch):
+    from types import SimpleNamespace
+
+    from tradingagents.llm_adapters import dashscope_adapter
+    from tradingagents.llm_adapters.dashscope_adapter import ChatDashScope
+
+    llm_cache.set_llm_cache(LLMResponseCache())
+    calls, tracked, events = [], [], []
+
+    def fake_call(**params):
+        calls.append(params)
+        choice = SimpleNamespace(message=SimpleNamespace(content="信号：买入"))
+        return SimpleNamespace(status_code=200, output=SimpleNamespace(choices=[choice]),
+                               usage=SimpleNamespace(input_tokens=80, output_tokens=6))
+
+    monkeypatch.setattr(dashscope_adapter.Generation, "call", fake_call)
+    monkeypatch.setattr(dashscope_adapter.token_tracker, "track_usage", lambda **kwargs: tracked.append(kwargs))
+    monkeypatch.setattr(dashscope_adapter.token_tracker, "track_cache_event",
+                        lambda *args: events.append(args))
+
+    llm = ChatDashScope(api_key="sk-test", model="qwen-plus", temperature=0.1)
+    first = llm.invoke("提取交易信号", llm_cache=True)
+    second = llm.invoke("提取交易信号", llm_cache=True)
+
+    assert first.content == second.content == "信号：买入" and len(calls) == 1
+    assert "llm_cache" not in calls[0]
+    assert events == [("dashscope", "qwen-plus", False, 80, 6), ("dashscope", "qwen-plus", True, 80, 6)]
+    assert len(tracked) == 1 and tracked[0]["input_tokens"] == 80
+    llm_cache.set_llm_cache(None)
+
+
+def test_graph_adapter_config_caches_signal_and_reflection(monkeypatch):
+    """按 trading_graph 的方式创建适配器（温度 0.1）：信号提取和反思命中缓存，其余调用不缓存"""
+    from tradingagents.config.config_manager import token_tracker
+    from tradingagents.graph.reflection import Reflector
+    from tradingagents.graph.signal_processing import SignalProcessor
+    from tradingagents.llm_adapters.dashscope_openai_adapter import ChatDashScopeOpenAI
+
+    llm_cache.set_llm_cache(LLMResponseCache())
+    calls = []
+
+    def fake_generate(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(kwargs)
+        return _result('{"action": "买入", "target_price": 10.5, "confidence": 0.7, "risk_score": 0.3, "reasoning": "理由"}')
+
+    monkeypatch.setattr(ChatOpenAI, "_generate", fake_generate)
+    monkeypatch.setattr(token_tracker, "track_usage", lambda *args, **kwargs: None)
+
+    quick = ChatDashScopeOpenAI(model="qwen-plus", api_key="sk-test", temperature=0.1, max_tokens=2000)
+    processor = SignalProcessor(quick)
+    first = processor.process_signal("最终交易决策：买入", "000001")
+    second = processor.process_signal("最终交易决策：买入", "000001")
+    assert first == second and len(calls) == 1
+    assert all("llm_cache" not in kwargs for kwargs in calls)
+
+    # 分析师、辩论等普通调用（温度 0.1，未显式启用）每次重新采样
+    quick.invoke("市场分析")
+    quick.invoke("市场分析")
+    assert len(calls) == 3
+
+    # 反思显式启用缓存，温度高于阈值的模型也缓存
+    creative = ChatDashScopeOpenAI(model="qwen-plus", api_key="sk-test", temperature=0.7, max_tokens=2000)
+    reflector = Reflector(creative)
+    reflector._reflect_on_component("TRADER", "买入", "市场报告", 0.05)
+    reflector._reflect_on_component("TRADER", "买入", "市场报告", 0.05)
+    assert len(calls) == 4
+    assert llm_cache.cached_invoke_kwargs(ChatOpenAI(api_key="sk-test")) == {}
+    llm_cache.set_llm_cache(None)
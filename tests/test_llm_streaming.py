@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+测试LLM适配器流式输出及图流式执行
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_openai import ChatOpenAI
+
+from tradingagents.llm_adapters import llm_cache
+from tradingagents.llm_adapters.llm_cache import LLMResponseCache
+
+
+def _openai_chunks():
+    yield ChatGenerationChunk(message=AIMessageChunk(content="看涨"))
+    yield ChatGenerationChunk(message=AIMessageChunk(content="，目标价45元"))
+    yield ChatGenerationChunk(message=AIMessageChunk(
+        content="", usage_metadata={"input_tokens": 120, "output_tokens": 8, "total_tokens": 128}
+    ))
+
+
+def test_deepseek_stream_tracks_usage_and_uses_cache(monkeypatch):
+    from tradingagents.config.config_manager import token_tracker
+    from tradingagents.llm_adapters.deepseek_adapter import ChatDeepSeek
+
+    llm_cache.set_llm_cache(LLMResponseCache(max_temperature=0.0))
+    calls, tracked = [], []
+
+    def fake_stream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(kwargs)
+        return _openai_chunks()
+
+    monkeypatch.setattr(ChatOpenAI, "_stream", fake_stream)
+    monkeypatch.setattr(token_tracker, "track_usage", lambda **kwargs: tracked.append(kwargs))
+
+    llm = ChatDeepSeek(api_key="sk-test", temperature=0.0)
+    chunks = list(llm.stream([HumanMessage(content="分析000001")], session_id="s1"))
+
+    assert "".join(chunk.content for chunk in chunks) == "看涨，目标价45元"
+    assert calls[0]["stream_usage"] is True and "session_id" not in calls[0]
+    assert tracked[0]["input_tokens"] == 120 and tracked[0]["output_tokens"] == 8
+    assert tracked[0]["session_id"] == "s1"
+
+    # 相同的确定性调用命中缓存，一次性返回完整内容且不再计费
+    cached = list(llm.stream([HumanMessage(content="分析000001")]))
+    assert "".join(chunk.content for chunk in cached) == "看涨，目标价45元"
+    assert len(calls) == 1 and len(tracked) == 1
+    llm_cache.set_llm_cache(None)
+
+
+def test_stream_is_recorded_and_replayed(monkeypatch, tmp_path):
+    import asyncio
+
+    from tradingagents.config.config_manager import token_tracker
+    from tradingagents.llm_adapters.deepseek_adapter import ChatDeepSeek
+    from tradingagents.utils.replay import recording, replaying
+
+    llm_cache.set_llm_cache(LLMResponseCache(enabled=False))
+    calls, tracked = [], []
+
+    def fake_stream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(kwargs)
+        return _openai_chunks()
+
+    async def fake_astream(self, messages, stop=None, run_manager=None, **kwargs):
+        calls.append(kwargs)
+        for chunk in _openai_chunks():
+            yield chunk
+
+    monkeypatch.setattr(ChatOpenAI, "_stream", fake_stream)
+    monkeypatch.setattr(ChatOpenAI, "_astream", fake_astream)
+    monkeypatch.setattr(token_tracker, "track_usage", lambda **kwargs: tracked.append(kwargs))
+
+    llm = ChatDeepSeek(api_key="sk-test", temperature=0.7)
+    messages = [HumanMessage(content="分析000001")]
+    with recording(str(tmp_path)) as session:
+        chunks = list(llm.stream(messages))
+    assert len(chunks) == 3 and session.stats.recorded == 1
+
+    # 回放：不调用模型，一次性返回录制的完整内容，不重复计费
+    with replaying(str(tmp_path), latency_scale=0, strict=True) as session:
+        replayed = list(llm.stream(messages))
+    assert len(replayed) == 1 and replayed[0].content == "看涨，目标价45元"
+    assert len(calls) == 1 and len(tracked) == 1 and session.stats.replayed == 1
+
+    async def collect():
+        return [chunk async for chunk in llm.astream(messages)]
+
+    with replaying(str(tmp_path), latency_scale=0, strict=True):
+        replayed = asyncio.run(collect())
+    assert replayed[0].content == "看涨，目标价45元" and len(calls) == 1
+    llm_cache.set_llm_cache(None)
+
+
+def test_dashscope_native_stream(monkeypatch):
+    from tradingagents.llm_adapters import dashscope_adapter
+    from tradingagents.llm_adapters.dashscope_adapter import ChatDashScope
+
+    llm_cache.set_llm_cache(LLMResponseCache(enabled=False))
+    requests, tracked = [], []
+
+    def response(text, output_tokens):
+        choice = SimpleNamespace(message=SimpleNamespace(content=text), finish_reason="null")
+        return SimpleNamespace(
+            status_code=200,
+            output=SimpleNamespace(choices=[choice]),
+            usage=SimpleNamespace(input_tokens=50, output_tokens=output_tokens),
+        )
+
+    def fake_call(**params):
+        requests.append(params)
+        return iter([response("市场", 1), response("情绪偏正面", 4)])
+
+    monkeypatch.setattr(dashscope_adapter.Generation, "call", fake_call)
+    monkeypatch.setattr(dashscope_adapter.token_tracker, "track_usage", lambda **kwargs: tracked.append(kwargs))
+
+    llm = ChatDashScope(api_key="sk-test", model="qwen-plus")
+    text = "".join(chunk.content for chunk in llm.stream("情绪如何", analysis_type="sentiment"))
+
+    assert text == "市场情绪偏正面"
+    assert requests[0]["stream"] is True and requests[0]["incremental_output"] is True
+    assert "analysis_type" not in requests[0]
+    assert tracked == [{
+        "provider": "dashscope", "model_name": "qwen-plus", "input_tokens": 50, "output_tokens": 4,
+        "session_id": tracked[0]["session_id"], "analysis_type": "sentiment",
+    }]
+    llm_cache.set_llm_cache(None)
+
+
+def test_stream_graph_forwards_node_tokens():
+    from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+    from langgraph.graph import END, START, MessagesState, StateGraph
+
+    from tradingagents.graph.propagation import Propagator
+    from tradingagents.graph.streaming import NodeOutputBuffer, stream_graph
+
+    llm = GenericFakeChatModel(messages=iter(["市场 分析 完成"]))
+
+    def analyst(state):
+        return {"messages": [llm.invoke(state["messages"])]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("Market Analyst", analyst)
+    builder.add_edge(START, "Market Analyst")
+    builder.add_edge("Market Analyst", END)
+    graph = builder.compile()
+
+    buffer = NodeOutputBuffer()
+    args = Propagator().get_graph_args(stream_tokens=True)
+    states = list(stream_graph(graph, {"messages": [("human", "000001")]}, args, buffer.append))
+
+    assert buffer.node == "Market Analyst"
+    assert buffer.text == "市场 分析 完成"
+    assert states[-1]["messages"][-1].content == "市场 分析 完成"
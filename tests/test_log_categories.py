@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+测试热路径日志类别：开关、1/N 采样、限流，以及关闭时消息不被构造
+"""
+
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tradingagents.utils import log_categories
+from tradingagents.utils.log_categories import (
+    SYMBOL_TRACE, TOOL_ARGS, LazyPreview, LogCategory,
+    configure_log_categories, get_log_category, trace_symbol,
+)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def capture():
+    handler = ListHandler()
+    logger = logging.getLogger("test.log_categories")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    yield logger, handler.records
+
+
+@pytest.fixture(autouse=True)
+def restore_categories():
+    saved = {name: c.spec for name, c in log_categories._categories.items()}
+    yield
+    configure_log_categories(saved)
+
+
+def test_disabled_or_filtered_messages_not_built(capture):
+    logger, records = capture
+    category = LogCategory("test")
+    calls = []
+
+    def build():
+        calls.append(1)
+        return "expensive"
+
+    category.configure("off")
+    category.info(logger, build)
+    category.configure("on")
+    category.debug(logger, build)  # 级别被过滤
+    assert calls == [] and records == []
+
+    category.info(logger, build)
+    assert calls == [1] and records[0].getMessage() == "expensive"
+
+
+def test_sampling_keeps_one_in_n(capture):
+    logger, records = capture
+    category = LogCategory("test", "sample:5")
+    for i in range(23):
+        category.info(logger, "msg %d", i)
+    assert [r.getMessage() for r in records] == ["msg 0", "msg 5", "msg 10", "msg 15", "msg 20"]
+    assert category.suppressed == 18 and category.spec == "sample:5"
+
+
+def test_rate_limit(capture, monkeypatch):
+    logger, records = capture
+    now = [1000.0]
+    monkeypatch.setattr(log_categories.time, "monotonic", lambda: now[0])
+    category = LogCategory("test", "rate:2")
+    for _ in range(5):
+        category.info(logger, "burst")
+    assert len(records) == 2
+    now[0] += 1.0
+    for _ in range(5):
+        category.info(logger, "later")
+    assert len(records) == 4
+
+
+def test_call_site_reported_as_caller(capture):
+    logger, records = capture
+
+    def hot_path():
+        get_log_category(SYMBOL_TRACE).info(logger, lambda: "via category")
+        trace_symbol(logger, "hot_path", "000001")
+
+    hot_path()
+    assert [r.funcName for r in records] == ["hot_path"] * 4
+    assert records[3].getMessage() == "🔍 [股票代码追踪] 股票代码字符: ['0', '0', '0', '0', '0', '1']"
+
+
+def test_configure_from_spec_string_and_invalid_spec():
+    configure_log_categories("symbol-trace=off, tool-args=rate:5")
+    assert get_log_category(SYMBOL_TRACE).spec == "off"
+    assert get_log_category(TOOL_ARGS).spec == "rate:5"
+    with pytest.raises(ValueError):
+        LogCategory("bad", "sometimes")
+
+
+def test_lazy_preview():
+    assert str(LazyPreview("a" * 250, 200)) == "a" * 200 + "..."
+    assert str(LazyPreview(12345, 200)) == "12345"
+
+
+def test_normalize_symbol_trace_can_be_switched_off(capture):
+    from tradingagents.dataflows import tushare_utils
+    from tradingagents.dataflows.tushare_utils import TushareProvider
+
+    logger, records = capture
+    provider = TushareProvider.__new__(TushareProvider)
+    original = tushare_utils.logger
+    tushare_utils.logger = logger
+    try:
+        assert provider._normalize_symbol("600519") == "600519.SH"
+        assert len(records) == 4
+        configure_log_categories({SYMBOL_TRACE: "off"})
+        assert provider._normalize_symbol("000001") == "000001.SZ"
+        assert len(records) == 4
+    finally:
+        tushare_utils.logger = original
+
+
+def test_tool_args_built_only_when_enabled():
+    from tradingagents.utils import tool_logging
+
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("参数不应被转换为字符串")
+
+    @tool_logging.log_tool_call(tool_name="demo")
+    def demo(value):
+        return "ok"
+
+    configure_log_categories({TOOL_ARGS: "off"})
+    assert demo(Exploding()) == "ok"
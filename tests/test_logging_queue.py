@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+测试非阻塞日志队列：后台线程写入、延迟格式化、繁忙时对 DEBUG/INFO 降采样、WARNING 保留
+"""
+
+import logging
+import os
+import queue
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.utils.logging_manager import ColoredFormatter, TradingAgentsLogger
+from tradingagents.utils.logging_queue import BoundedQueueHandler, QueuedLoggingPipeline
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = []
+
+    def emit(self, record):
+        self.records.append(self.format(record))
+        self.threads.append(threading.current_thread().name)
+
+
+class BlockingHandler(ListHandler):
+    """写入前阻塞，用于模拟磁盘繁忙导致队列堆积"""
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+
+    def emit(self, record):
+        self.unblock.wait(5)
+        super().emit(record)
+
+
+def _logger(name, handler):
+    logger = logging.getLogger(name)
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    return logger
+
+
+def test_records_written_by_background_thread():
+    target = ListHandler()
+    pipeline = QueuedLoggingPipeline([target], queue_size=100)
+    pipeline.start()
+    logger = _logger("test.queue.basic", pipeline.handler)
+    try:
+        logger.info("价格 %s 成交量 %d", "10.5", 300)
+        logger.warning("告警")
+    finally:
+        pipeline.stop()
+    assert target.records == ["价格 10.5 成交量 300", "告警"]
+    assert threading.main_thread().name not in target.threads
+    assert pipeline.stats.enqueued == 2
+
+
+def test_formatting_deferred_for_immutable_args():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=10))
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "%s-%d", ("a", 1), None)
+    prepared = handler.prepare(record)
+    assert prepared.msg == "%s-%d" and prepared.args == ("a", 1)
+
+    items = ["a"]
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "%s", (items,), None)
+    prepared = handler.prepare(record)
+    items.append("b")
+    assert prepared.getMessage() == "['a']"
+
+
+def test_low_levels_shed_when_busy_and_warnings_kept():
+    target = BlockingHandler()
+    pipeline = QueuedLoggingPipeline([target], queue_size=20, high_water=0.5,
+                                     shed_sample_rate=5, block_timeout=5)
+    pipeline.start()
+    logger = _logger("test.queue.busy", pipeline.handler)
+    try:
+        for i in range(200):
+            logger.debug("hot %d", i)
+        stats = pipeline.stats
+        assert stats.shed > 0 and stats.dropped > 0
+        assert stats.enqueued + stats.shed + stats.dropped == 200
+        target.unblock.set()
+        logger.warning("重要告警")
+    finally:
+        pipeline.stop()
+    assert "重要告警" in target.records
+    assert any("日志队列繁忙" in line for line in target.records)
+
+
+def test_manager_queue_toggle_and_console_removal(tmp_path):
+    base = {
+        'level': 'INFO',
+        'format': {'console': '%(message)s', 'file': '%(message)s'},
+        'handlers': {
+            'console': {'enabled': True, 'colored': False, 'level': 'INFO'},
+            'file': {'enabled': True, 'level': 'DEBUG', 'max_size': '1MB', 'backup_count': 1,
+                     'directory': str(tmp_path)},
+            'structured': {'enabled': False, 'level': 'INFO', 'directory': str(tmp_path)},
+        },
+        'loggers': {},
+        'docker': {'enabled': False, 'stdout_only': True},
+        'queue': {'enabled': True, 'queue_size': 100},
+    }
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    try:
+        manager = TradingAgentsLogger(base)
+        assert isinstance(root.handlers[0], BoundedQueueHandler)
+        manager.disable_console_output()
+        assert all(not isinstance(h, logging.StreamHandler) or isinstance(h, logging.FileHandler)
+                   for h in manager.pipeline.handlers)
+        logging.getLogger("test.queue.manager").info("写入文件")
+        manager.flush()
+        assert "写入文件" in (tmp_path / "tradingagents.log").read_text(encoding="utf-8")
+        assert manager.get_queue_stats()["enqueued"] >= 1
+
+        sync = TradingAgentsLogger({**base, 'queue': {'enabled': False}})
+        assert sync.pipeline is None
+        assert not any(isinstance(h, BoundedQueueHandler) for h in root.handlers)
+        assert not manager.pipeline._running
+    finally:
+        for handler in root.handlers:
+            handler.close()
+        root.handlers[:] = saved_handlers
+        root.setLevel(saved_level)
+
+
+def test_colored_formatter_does_not_leak_into_other_handlers():
+    record = logging.LogRecord("x", logging.INFO, __file__, 1, "msg", None, None)
+    ColoredFormatter("%(levelname)s %(message)s").format(record)
+    assert record.levelname == "INFO"
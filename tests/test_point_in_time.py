@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+测试时点数据访问：as-of 日期截断、不可变快照的写入与复用、历史缓存不读到之后的数据
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import point_in_time
+from tradingagents.dataflows.cache_manager import StockDataCache
+from tradingagents.dataflows.point_in_time import (
+    KIND_NEWS, KIND_PRICE, SnapshotStore, as_of, clamp_date, current_as_of, is_settled, point_in_time as pit,
+)
+from tradingagents.dataflows.prefetch import dataflow_memo, get_dataflow_memo
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    previous = point_in_time.set_snapshot_store(store)
+    get_dataflow_memo().clear()
+    yield store
+    point_in_time.set_snapshot_store(previous)
+    get_dataflow_memo().clear()
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def test_clamp_only_inside_as_of_scope():
+    assert clamp_date('2024-05-01') == '2024-05-01'
+    with as_of('2024-03-15'):
+        assert current_as_of() == '2024-03-15'
+        assert clamp_date('2024-05-01') == '2024-03-15'
+        assert clamp_date('20240501') == '20240315'
+        assert clamp_date('2024-03-01') == '2024-03-01'
+        assert clamp_date(None) == '2024-03-15'
+        with as_of('2024-01-02'):
+            assert current_as_of() == '2024-01-02'
+        assert current_as_of() == '2024-03-15'
+    assert current_as_of() is None
+    assert is_settled('2024-03-15') and not is_settled(_today())
+    with pytest.raises(ValueError):
+        as_of('not-a-date')
+
+
+def test_as_of_propagates_to_threads_via_context():
+    import contextvars
+    seen = []
+    with as_of('2024-03-15'):
+        context = contextvars.copy_context()
+    thread = threading.Thread(target=lambda: seen.append(context.run(current_as_of)))
+    thread.start()
+    thread.join()
+    assert seen == ['2024-03-15']
+
+
+def test_snapshots_are_written_once_and_shared(store, tmp_path):
+    calls = []
+
+    @pit(KIND_PRICE, date_args=('end_date', 'start_date'))
+    @dataflow_memo(900)
+    def fetch(symbol, start_date, end_date=None):
+        calls.append((symbol, start_date, end_date))
+        return f"{symbol} {start_date}..{end_date} v{len(calls)}"
+
+    # 没有 as-of 上下文时不截断、不写快照
+    assert fetch('AAPL', '2024-01-01', '2024-06-01') == 'AAPL 2024-01-01..2024-06-01 v1'
+    assert store.count() == 0
+
+    with as_of('2024-03-15'):
+        first = fetch('AAPL', '2024-03-01', '2024-06-01')
+        # 结束日期为空（到今天）同样截断
+        assert fetch('AAPL', start_date='2024-03-01') == first
+    assert calls[-1] == ('AAPL', '2024-03-01', '2024-03-15')
+    assert first.endswith('v2') and store.count(KIND_PRICE) == 1
+
+    # 新的进程（新的存储实例、清空进程内缓存）直接读取快照
+    get_dataflow_memo().clear()
+    point_in_time.set_snapshot_store(SnapshotStore(str(tmp_path / 'snapshots')))
+    with as_of('2024-03-15'):
+        assert fetch('AAPL', '2024-03-01', '2024-03-15') == first
+    assert len(calls) == 2
+    assert point_in_time.get_snapshot_store().stats.hits == 1
+
+
+def test_no_snapshot_for_today_or_failures(store):
+    results = iter(['❌ 获取失败', '', 'ok'])
+
+    @pit(KIND_NEWS, date_args=('curr_date',))
+    def news(query, curr_date):
+        return next(results)
+
+    with as_of('2024-03-15'):
+        assert news('AAPL', '2024-03-20').startswith('❌')
+        assert news('AAPL', '2024-03-20') == ''
+        assert news('AAPL', '2024-03-20') == 'ok'
+    assert store.count() == 1 and store.stats.skipped == 2
+
+    calls = []
+
+    @pit(KIND_NEWS, date_args=('curr_date',))
+    def live(query, curr_date):
+        calls.append(curr_date)
+        return 'live'
+
+    with as_of(_today()):
+        live('AAPL', _today())
+        live('AAPL', _today())
+    assert len(calls) == 2 and store.count() == 1
+
+
+def test_snapshot_waits_for_the_symbols_market_to_close(store):
+    from tradingagents.dataflows import cache_policy
+    from tradingagents.dataflows.cache_policy import CachePolicyEngine, MarketClock
+
+    # 2024-11-29 17:30 UTC：北京时间已是 11-30，美股（当天 13:00 ET 提前收市）仍在交易，A股已收盘
+    now = datetime(2024, 11, 29, 17, 30, tzinfo=timezone.utc).timestamp()
+
+    class FixedClock(MarketClock):
+        def local_time(self, market, at=None):
+            return super().local_time(market, now if at is None else at)
+
+    previous = cache_policy.set_cache_policy_engine(CachePolicyEngine(clock=FixedClock()))
+    calls = []
+
+    @pit(KIND_PRICE, date_args=('end_date',))
+    def prices(symbol, end_date):
+        calls.append(symbol)
+        return f'{symbol} bars'
+
+    try:
+        assert not is_settled('2024-11-29', 'us') and is_settled('2024-11-29', 'china')
+        with as_of('2024-11-29'):
+            prices('AAPL', '2024-11-29')
+            prices('AAPL', '2024-11-29')
+            prices('600519', '2024-11-29')
+            prices('600519', '2024-11-29')
+    finally:
+        cache_policy.set_cache_policy_engine(previous)
+    assert calls == ['AAPL', 'AAPL', '600519'] and store.count() == 1
+
+
+def test_clamp_only_functions_do_not_snapshot(store):
+    @pit(KIND_NEWS, date_args=('curr_date',), snapshot=False)
+    def offline(ticker, curr_date, look_back_days):
+        return f"{ticker} {curr_date}"
+
+    with as_of('2024-03-15'):
+        assert offline('AAPL', '2024-12-31', 7) == 'AAPL 2024-03-15'
+    assert store.count() == 0
+
+
+def test_file_cache_never_serves_later_data(tmp_path):
+    cache = StockDataCache(str(tmp_path / 'cache'))
+    cache.save_stock_data('AAPL', 'through june', start_date='2024-01-01', end_date='2024-06-30', data_source='yfinance')
+    wide = cache.save_stock_data('AAPL', 'wide march', start_date='2023-01-01', end_date='2024-03-15',
+                                 data_source='yfinance')
+
+    # 结束日期不同的缓存不作为部分匹配
+    assert cache.find_cached_stock_data('AAPL', '2024-01-01', '2024-03-01', data_source='yfinance') is None
+    # 相同结束日期、覆盖开始日期的缓存可以使用
+    assert cache.find_cached_stock_data('AAPL', '2024-01-01', '2024-03-15', data_source='yfinance') == wide
+    # 已经确定的历史行情不过期
+    assert cache.is_cache_valid(wide, max_age_hours=0)
+
+
+def test_tdx_snapshot_uses_bar_instead_of_live_quote_for_past_dates(monkeypatch, tmp_path):
+    from tradingagents.dataflows import bar_frame, indicator_state, tdx_utils
+    from tradingagents.dataflows.bar_frame import BarFrameCache
+
+    days = pd.bdate_range(end=datetime.now() - timedelta(days=1), periods=120)
+    bars = [{"datetime": day.strftime("%Y-%m-%d 15:00"), "open": 10 + i * 0.1, "high": 11 + i * 0.1,
+             "low": 9 + i * 0.1, "close": 10 + i * 0.1, "vol": 1000, "amount": 10000} for i, day in enumerate(days)]
+
+    class FakeApi:
+        def get_security_bars(self, category, market, code, start, count):
+            return bars[-count:]
+
+        def get_security_quotes(self, securities):
+            raise AssertionError("历史日期不应请求实时行情")
+
+    monkeypatch.setattr(bar_frame, "_bar_frame_cache", BarFrameCache())
+    monkeypatch.setattr(indicator_state, "_indicator_state_store", indicator_state.IndicatorStateStore(tmp_path))
+    provider = object.__new__(tdx_utils.TongDaXinDataProvider)
+    provider.api = FakeApi()
+    provider.connected = True
+    monkeypatch.setattr(provider, "_get_stock_name", lambda code: "平安银行", raising=False)
+
+    end = days[-30].strftime('%Y-%m-%d')
+    snapshot = provider.get_stock_snapshot("000001", days[-60].strftime('%Y-%m-%d'), end)
+    assert snapshot.realtime['update_time'] == end
+    assert snapshot.realtime['price'] == pytest.approx(10 + (len(days) - 30) * 0.1)
+    assert snapshot.history.index[-1].strftime('%Y-%m-%d') == end
+
+
+def test_backtest_runs_inside_as_of_scope(tmp_path):
+    from tradingagents.backtest import BacktestEngine, BacktestSettings, FramePriceSource
+
+    days = [d.strftime('%Y-%m-%d') for d in pd.bdate_range('2024-01-01', periods=6)]
+    seen = {}
+
+    class Graph:
+        def __init__(self, config):
+            pass
+
+        def propagate(self, ticker, trade_date):
+            seen[trade_date] = current_as_of()
+            return {'company_of_interest': ticker, 'trade_date': trade_date}, {'action': '持有'}
+
+    settings = BacktestSettings(tickers=['AAPL'], start_date=days[0], end_date=days[3], horizon=1,
+                                memory_scope='none', output_dir=str(tmp_path))
+    prices = FramePriceSource({'AAPL': pd.Series([100.0] * len(days), index=days)})
+    BacktestEngine(settings, config={'memory_enabled': False}, price_source=prices, graph_factory=Graph).run()
+    assert seen == {day: day for day in days[:4]}
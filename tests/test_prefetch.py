@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+测试自选股批量预取：并发预热、覆盖率报告、结果缓存命中
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.dataflows import prefetch
+from tradingagents.dataflows.prefetch import DataflowMemo, WatchlistPrefetcher, dataflow_memo
+
+
+def test_dataflow_memo_skips_failures(monkeypatch):
+    monkeypatch.setattr(prefetch, "_dataflow_memo", DataflowMemo())
+    calls = []
+
+    @dataflow_memo(60)
+    def fetch(symbol, curr_date):
+        calls.append(symbol)
+        return "❌ 获取失败" if symbol == "BAD" else f"{symbol} 数据"
+
+    assert fetch("AAPL", "2025-07-01") == fetch("AAPL", "2025-07-01") == "AAPL 数据"
+    fetch("BAD", "2025-07-01")
+    fetch("BAD", "2025-07-01")
+    assert calls == ["AAPL", "BAD", "BAD"]
+
+
+def test_dataflow_memo_is_bounded_and_purges_expired(monkeypatch):
+    memo = DataflowMemo(max_entries=3)
+    for i in range(3):
+        memo.set(("f", (str(i),), ()), i, ttl_seconds=60)
+    assert memo.get(("f", ("0",), ()))[0]       # 0 变为最近使用
+    memo.set(("f", ("3",), ()), 3, ttl_seconds=60)
+    assert len(memo) == 3 and memo.stats['evictions'] == 1
+    assert not memo.get(("f", ("1",), ()))[0] and memo.get(("f", ("0",), ()))[0]
+
+    # 写入时清理已过期的条目，而不是等同一个键再次出现
+    monkeypatch.setattr(prefetch, "MEMO_PURGE_INTERVAL", 1)
+    memo = DataflowMemo(max_entries=100)
+    memo.set(("f", ("old",), ()), "old", ttl_seconds=-1)
+    memo.set(("f", ("new",), ()), "new", ttl_seconds=60)
+    assert len(memo) == 1 and memo.stats['purged'] == 1
+
+
+def test_prefetch_warms_all_kinds_and_reports_coverage(monkeypatch):
+    monkeypatch.setattr(prefetch, "_dataflow_memo", DataflowMemo())
+    lock = threading.Lock()
+    fetched = []
+
+    @dataflow_memo(60)
+    def fake_news(symbol, curr_date):
+        with lock:
+            fetched.append(("news", symbol))
+        return f"{symbol} 新闻"
+
+    def price(symbol, trade_date, start_date):
+        if symbol == "600000":
+            raise RuntimeError("数据源超时")
+        return f"{symbol} {start_date}~{trade_date}"
+
+    warmers = {
+        "china": {"price": ("tushare", price), "news": ("google_news", lambda s, d, _: fake_news(s, d))},
+        "us": {"price": ("yfinance", price), "news": ("finnhub", lambda s, d, _: fake_news(s, d))},
+    }
+    prefetcher = WatchlistPrefetcher(max_workers=4, rate_limits={name: 0 for name in prefetch.DEFAULT_RATE_LIMITS},
+                                     warmers=warmers)
+    monkeypatch.setattr(prefetcher, "_bulk_china_daily", lambda codes, start, end: [])
+
+    report = prefetcher.prefetch(["000001", "600000", "aapl", "000001"], "2025-07-01", kinds=["price", "news", "info"])
+
+    assert report.symbols == ["000001", "600000", "AAPL"]
+    coverage = report.coverage()
+    assert coverage["price"] == {"ok": 2, "failed": 1, "skipped": 0, "ratio": 2 / 3}
+    assert coverage["news"]["ok"] == 3
+    assert coverage["info"]["skipped"] == 3
+    assert [r.symbol for r in report.failed()] == ["600000"]
+    assert "数据源超时" in report.summary()
+
+    # 分析师工具随后以相同参数调用时直接命中缓存
+    fake_news("AAPL", "2025-07-01")
+    assert fetched.count(("news", "AAPL")) == 1
+
+
+def test_rate_limiter_spaces_calls(monkeypatch):
+    now = [100.0]
+    sleeps = []
+    monkeypatch.setattr(prefetch.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(prefetch.time, "sleep", lambda seconds: sleeps.append(round(seconds, 3)))
+
+    limiter = prefetch.RateLimiter({"tushare": 0.5})
+    for _ in range(3):
+        limiter.acquire("tushare")
+    limiter.acquire("unknown")
+    assert sleeps == [0.5, 1.0]
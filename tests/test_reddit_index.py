@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+测试Reddit离线语料索引：按日期/子版块分区后的查询结果与逐行扫描一致，语料变化时重建
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tradingagents.dataflows import reddit_utils
+from tradingagents.dataflows.reddit_utils import RedditCorpusIndex, company_matcher, scan_top_from_category
+
+DATES = ["2025-07-01", "2025-07-02", "2025-07-03"]
+
+
+def _ts(date, hour):
+    return datetime.strptime(date, "%Y-%m-%d").replace(hour=hour, tzinfo=timezone.utc).timestamp()
+
+
+def _write_corpus(root):
+    topics = ["Apple earnings beat", "Nvidia GPU demand", "Meta AI spending", "facebook outage", "macro update"]
+    for category, subreddits in {"global_news": ["worldnews", "economics"],
+                                 "company_news": ["stocks", "wallstreetbets", "investing"]}.items():
+        os.makedirs(root / category)
+        for s, subreddit in enumerate(subreddits):
+            with open(root / category / f"{subreddit}.jsonl", "w", encoding="utf-8") as f:
+                for d, date in enumerate(DATES):
+                    for i in range(6):
+                        topic = topics[(i + s + d) % len(topics)]
+                        f.write(json.dumps({
+                            "created_utc": _ts(date, i * 3), "title": f"{topic} #{i}",
+                            "selftext": "" if i % 2 else f"thread about {topic.lower()}",
+                            "url": f"https://reddit.com/{subreddit}/{date}/{i}", "ups": (i * 7 + s + d) % 11,
+                        }) + "\n")
+                    f.write("\n")
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    _write_corpus(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.parametrize("category,query", [("global_news", None), ("company_news", "AAPL"),
+                                            ("company_news", "META"), ("company_news", "NVDA")])
+def test_index_matches_scan(corpus, category, query):
+    index = RedditCorpusIndex(str(corpus))
+    for date in DATES + ["2025-06-30"]:
+        for limit in (3, 9):
+            expected = scan_top_from_category(category, date, limit, query, data_path=str(corpus))
+            assert index.query(category, date, limit, query) == expected
+
+
+def test_index_is_built_once_and_rebuilt_when_corpus_changes(corpus, monkeypatch):
+    index = RedditCorpusIndex(str(corpus))
+    builds = []
+    original_build = index._build
+    monkeypatch.setattr(index, "_build", lambda category: builds.append(category) or original_build(category))
+
+    index.query("global_news", DATES[0], 4)
+    index.query("global_news", DATES[1], 4)
+    assert builds == ["global_news"]
+    assert RedditCorpusIndex(str(corpus)).is_fresh("global_news")
+
+    with open(corpus / "global_news" / "worldnews.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"created_utc": _ts(DATES[0], 23), "title": "late breaking", "selftext": "",
+                            "url": "u", "ups": 100}) + "\n")
+    fresh = RedditCorpusIndex(str(corpus))
+    assert not fresh.is_fresh("global_news")
+    assert fresh.query("global_news", DATES[0], 4)[0]["title"] == "late breaking"
+
+
+def test_concurrent_queries_build_once_and_never_see_partial_partitions(corpus, monkeypatch):
+    import threading
+
+    index = RedditCorpusIndex(str(corpus))
+    builds = []
+    original_build = index._build
+    monkeypatch.setattr(index, "_build", lambda category: builds.append(category) or original_build(category))
+    expected = {date: scan_top_from_category("global_news", date, 4, data_path=str(corpus)) for date in DATES}
+
+    errors, results = [], []
+    start = threading.Barrier(8)
+
+    def read():
+        try:
+            start.wait()
+            for _ in range(20):
+                for date in DATES:
+                    results.append(index.query("global_news", date, 4) == expected[date])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and all(results) and builds == ["global_news"]
+
+    # 重建期间读取：每个分区要么是旧文件要么是新文件
+    def rebuild():
+        try:
+            for _ in range(10):
+                index.build("global_news")
+        except Exception as e:
+            errors.append(e)
+
+    rebuilder = threading.Thread(target=rebuild)
+    rebuilder.start()
+    while rebuilder.is_alive():
+        for date in DATES:
+            assert index.partition("global_news", date)
+    rebuilder.join()
+    assert errors == []
+    assert not any(name.endswith(".tmp") for _, _, files in os.walk(index.index_path) for name in files)
+
+
+def test_max_limit_check_and_company_matcher(corpus):
+    with pytest.raises(ValueError):
+        RedditCorpusIndex(str(corpus)).query("company_news", DATES[0], 2)
+    assert company_matcher("META").search("New FACEBOOK feature")
+    assert company_matcher("UNKNOWN").search("unknown ticker mention")
+    assert reddit_utils.fetch_top_from_category("global_news", DATES[0], 4, data_path=str(corpus))
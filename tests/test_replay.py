@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+测试数据源与 LLM 流量的录制/回放：请求键、内容去重、耗时缩放、异常复现、严格模式和顺序回放
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tradingagents.llm_adapters.llm_cache import LLMResponseCache, cached_generate, get_llm_cache, set_llm_cache
+from tradingagents.utils.replay import (
+    ReplayArchive, ReplayedCallError, ReplayMissError, ReplaySession, recording, replayable, replaying,
+)
+
+
+calls = []
+
+
+@replayable('test')
+def fetch_prices(symbol, days=5):
+    calls.append(symbol)
+    return {'symbol': symbol, 'closes': [10.0 + i for i in range(days)]}
+
+
+@replayable('test')
+def slow_fetch(symbol):
+    calls.append(symbol)
+    time.sleep(0.05)
+    return symbol
+
+
+@replayable('test')
+def broken_fetch(symbol):
+    calls.append(symbol)
+    raise ConnectionError(f"{symbol} 超时")
+
+
+class Provider:
+    def __init__(self, name):
+        self.name = name
+
+    @replayable('test', method=True)
+    def get_info(self, symbol):
+        calls.append(symbol)
+        return f"{self.name}:{symbol}"
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+def test_record_then_replay_without_calling_provider(tmp_path):
+    with recording(str(tmp_path)) as session:
+        assert fetch_prices('AAPL') == {'symbol': 'AAPL', 'closes': [10.0, 11.0, 12.0, 13.0, 14.0]}
+        fetch_prices('MSFT', days=2)
+    assert session.stats.recorded == 2 and calls == ['AAPL', 'MSFT']
+
+    calls.clear()
+    with replaying(str(tmp_path), latency_scale=0, strict=True) as session:
+        assert fetch_prices('MSFT', days=2)['closes'] == [10.0, 11.0]
+        assert fetch_prices('AAPL')['symbol'] == 'AAPL'
+        # 调用次数多于录制时重复最后一条
+        assert fetch_prices('AAPL')['symbol'] == 'AAPL'
+    assert calls == []
+    assert session.stats.replayed == 3 and session.stats.fallback == 0
+
+    # 会话结束后直接调用
+    fetch_prices('AAPL')
+    assert calls == ['AAPL']
+
+
+def test_method_key_ignores_instance(tmp_path):
+    with recording(str(tmp_path)):
+        Provider('live').get_info('000001')
+    calls.clear()
+    with replaying(str(tmp_path), latency_scale=0, strict=True):
+        assert Provider('other').get_info('000001') == 'live:000001'
+    assert calls == []
+
+
+def test_identical_responses_stored_once(tmp_path):
+    with recording(str(tmp_path)):
+        for _ in range(3):
+            fetch_prices('AAPL')
+        fetch_prices('MSFT')
+    archive = ReplayArchive(str(tmp_path))
+    assert len(archive.entries()) == 4
+    assert archive.blob_stats()['blobs'] == 2
+
+
+def test_replay_latency_is_scaled(tmp_path):
+    with recording(str(tmp_path)):
+        slow_fetch('AAPL')
+    entry = ReplayArchive(str(tmp_path)).entries()[0]
+    assert entry.latency_ms >= 50
+
+    start = time.perf_counter()
+    with replaying(str(tmp_path), latency_scale=0):
+        slow_fetch('AAPL')
+    assert time.perf_counter() - start < 0.04
+
+    start = time.perf_counter()
+    with replaying(str(tmp_path), latency_scale=1.0) as session:
+        slow_fetch('AAPL')
+    assert time.perf_counter() - start >= 0.045
+    assert session.stats.slept_ms >= 45
+
+
+def test_recorded_errors_are_replayed(tmp_path):
+    with recording(str(tmp_path)):
+        with pytest.raises(ConnectionError):
+            broken_fetch('AAPL')
+    calls.clear()
+    with replaying(str(tmp_path), latency_scale=0):
+        with pytest.raises(ReplayedCallError, match="ConnectionError: AAPL 超时"):
+            broken_fetch('AAPL')
+    assert calls == []
+
+
+def test_strict_miss_raises_and_lenient_miss_calls_through(tmp_path):
+    with recording(str(tmp_path)):
+        fetch_prices('AAPL')
+    calls.clear()
+    with replaying(str(tmp_path), latency_scale=0, strict=True):
+        with pytest.raises(ReplayMissError):
+            slow_fetch('MSFT')
+    with replaying(str(tmp_path), latency_scale=0) as session:
+        assert slow_fetch('MSFT') == 'MSFT'
+    assert calls == ['MSFT'] and session.stats.misses == 1
+
+
+def test_unmatched_key_falls_back_to_recording_order(tmp_path):
+    session = ReplaySession('record', str(tmp_path))
+    session.call('llm', 'llm', 'qwen', 'key-1', lambda: 'first', group='llm')
+    session.call('llm', 'llm', 'qwen', 'key-2', lambda: 'second', group='llm')
+
+    replay = ReplaySession('replay', str(tmp_path), latency_scale=0, strict=True)
+    assert replay.call('llm', 'llm', 'qwen', 'key-2', lambda: 'live', group='llm') == 'second'
+    # 提示词变化（键不同）时按录制顺序取下一条未使用的记录
+    assert replay.call('llm', 'llm', 'qwen', 'changed', lambda: 'live', group='llm') == 'first'
+    assert replay.stats.fallback == 1
+    with pytest.raises(ReplayMissError):
+        replay.call('llm', 'llm', 'qwen', 'another', lambda: 'live', group='llm')
+
+
+def test_cached_generate_records_and_replays_llm_responses(tmp_path):
+    previous = get_llm_cache()
+    set_llm_cache(LLMResponseCache(enabled=False))
+    generated = []
+
+    def generate():
+        generated.append(1)
+        message = AIMessage(content="买入", tool_calls=[{"name": "get_data", "args": {"ticker": "AAPL"}, "id": "c1"}])
+        return ChatResult(generations=[ChatGeneration(message=message)],
+                          llm_output={"token_usage": {"prompt_tokens": 100, "completion_tokens": 20}})
+
+    messages = [HumanMessage(content="分析 AAPL")]
+    try:
+        with recording(str(tmp_path)):
+            result, status = cached_generate("qwen-plus", 0.7, messages, None, {}, generate)
+        assert status == "bypass" and len(generated) == 1
+
+        with replaying(str(tmp_path), latency_scale=0, strict=True):
+            result, status = cached_generate("qwen-plus", 0.7, messages, None, {}, generate)
+        assert status == "hit" and len(generated) == 1
+        message = result.generations[0].message
+        assert message.content == "买入" and message.tool_calls[0]["args"] == {"ticker": "AAPL"}
+        assert result.llm_output["token_usage"]["prompt_tokens"] == 100
+    finally:
+        set_llm_cache(previous)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+SimFin 财报索引存储测试
+与原先逐次读取 CSV 的实现逐行比对
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import simfin_store
+from tradingagents.dataflows.simfin_store import SimfinStatementStore
+
+
+CSV_TEXT = """Ticker;SimFinId;Currency;Fiscal Year;Report Date;Publish Date;Revenue;Net Income
+MSFT;59265;USD;2022;2022-06-30;2022-07-28;198270000000;72738000000
+AAPL;111052;USD;2021;2021-09-30;2021-10-29;365817000000;94680000000
+AAPL;111052;USD;2022;2022-09-30;2022-10-28;394328000000;99803000000
+MSFT;59265;USD;2023;2023-06-30;2023-07-27;211915000000;
+AAPL;111052;USD;2022;2022-09-30;2022-10-28;394328000001;99803000001
+AAPL;111052;USD;2023;2023-09-30;2023-11-03;383285000000;96995000000
+"""
+
+
+def _reference(path, ticker, curr_date):
+    """原实现"""
+    df = pd.read_csv(path, sep=";")
+    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
+    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
+    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
+    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    if filtered_df.empty:
+        return None
+    return filtered_df.loc[filtered_df["Publish Date"].idxmax()]
+
+
+CASES = [
+    ("AAPL", "2021-10-28"),
+    ("AAPL", "2021-10-29"),
+    ("AAPL", "2022-12-31"),
+    ("AAPL", "2024-01-01"),
+    ("MSFT", "2023-07-27"),
+    ("MSFT", "2020-01-01"),
+    ("TSLA", "2024-01-01"),
+]
+
+
+def _write_csv(tmp_path):
+    path = tmp_path / "us-income-annual.csv"
+    path.write_text(CSV_TEXT)
+    return path
+
+
+def _assert_matches(store, path):
+    for ticker, curr_date in CASES:
+        expected = _reference(path, ticker, curr_date)
+        actual = store.latest_as_of(ticker, curr_date)
+        if expected is None:
+            assert actual is None, (ticker, curr_date)
+        else:
+            assert str(actual.drop("SimFinId")) == str(expected.drop("SimFinId")), (ticker, curr_date)
+
+
+def test_store_matches_csv_implementation(tmp_path):
+    path = _write_csv(tmp_path)
+    store = SimfinStatementStore(str(path), cache_dir=str(tmp_path / "cache"))
+    _assert_matches(store, path)
+
+
+def test_duplicate_publish_date_keeps_first_row(tmp_path):
+    path = _write_csv(tmp_path)
+    store = SimfinStatementStore(str(path), cache_dir=str(tmp_path / "cache"))
+    row = store.latest_as_of("AAPL", "2022-12-31")
+    assert row["Revenue"] == 394328000000
+    assert row.name == 2
+
+
+def test_converted_file_reused_and_rebuilt_on_change(tmp_path):
+    if not simfin_store.PYARROW_AVAILABLE:
+        pytest.skip("pyarrow 未安装")
+    path = _write_csv(tmp_path)
+    cache_dir = tmp_path / "cache"
+    SimfinStatementStore(str(path), cache_dir=str(cache_dir)).load()
+    arrow_path = cache_dir / "us-income-annual.arrow"
+    built_at = arrow_path.stat().st_mtime_ns
+
+    second = SimfinStatementStore(str(path), cache_dir=str(cache_dir))
+    assert second._is_converted()
+    second.load()
+    assert arrow_path.stat().st_mtime_ns == built_at
+
+    path.write_text(CSV_TEXT + "AAPL;111052;USD;2024;2024-09-30;2024-11-01;391035000000;93736000000\n")
+    third = SimfinStatementStore(str(path), cache_dir=str(cache_dir))
+    assert not third._is_converted()
+    assert third.latest_as_of("AAPL", "2025-01-01")["Fiscal Year"] == 2024
+
+
+def test_fallback_without_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(simfin_store, "PYARROW_AVAILABLE", False)
+    path = _write_csv(tmp_path)
+    store = SimfinStatementStore(str(path), cache_dir=str(tmp_path / "cache"))
+    _assert_matches(store, path)
+    assert not (tmp_path / "cache").exists()
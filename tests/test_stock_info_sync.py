@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+测试股票基础信息同步：向量化构建文档、跳过未变化记录、分块无序批量写入、进度统计
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import stock_info_sync
+from tradingagents.dataflows.stock_info_sync import StockInfoSyncJob, build_documents
+
+pytest.importorskip("pymongo")
+
+
+class FakeResult:
+    def __init__(self, upserted, modified):
+        self.upserted_count = upserted
+        self.modified_count = modified
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+        self.batches = []
+
+    def find(self, query, projection=None):
+        return [dict(doc) for doc in self.docs.values()]
+
+    def bulk_write(self, operations, ordered=True):
+        assert ordered is False
+        self.batches.append(len(operations))
+        upserted = modified = 0
+        for op in operations:
+            key = (op._filter["code"], op._filter["sse"])
+            if key in self.docs:
+                modified += 1
+            else:
+                upserted += 1
+                self.docs[key] = dict(op._doc["$setOnInsert"])
+            self.docs[key].update(op._doc["$set"])
+        return FakeResult(upserted, modified)
+
+
+def _stocks(count, renamed=()):
+    codes = [f"{i:06d}" for i in range(count)]
+    return pd.DataFrame({
+        "code": codes,
+        "name": [f"股票{i}" + ("改" if i in renamed else "") for i in range(count)],
+        "sse": ["sz" if i % 2 else "sh" for i in range(count)],
+        "volunit": [100] * count,
+    })
+
+
+def test_build_documents_fills_defaults():
+    docs = build_documents(_stocks(2))
+    assert docs[0]["market"] == "上海" and docs[1]["market"] == "深圳"
+    assert docs[0]["category"] == "未知" and docs[0]["pre_close"] == 0.0
+    assert type(docs[0]["volunit"]) is int
+    assert docs[0]["content_hash"] != docs[1]["content_hash"]
+
+
+def test_sync_skips_unchanged_and_chunks(monkeypatch):
+    collection = FakeCollection()
+    job = StockInfoSyncJob(collection, chunk_size=40)
+    progress = []
+
+    report = job.sync_frame(_stocks(100), "stock", progress_callback=lambda r: progress.append(r.sent))
+    assert (report.inserted, report.modified, report.unchanged) == (100, 0, 0)
+    assert collection.batches == [40, 40, 20]
+    assert progress == [40, 80, 100]
+    assert "created_at" in collection.docs[("000000", "sh")]
+
+    collection.batches.clear()
+    report = job.sync_frame(_stocks(100, renamed={3, 7}), "stock")
+    assert (report.inserted, report.modified, report.unchanged) == (0, 2, 98)
+    assert collection.batches == [2]
+    assert collection.docs[("000003", "sz")]["name"] == "股票3改"
+    assert report.to_dict()["throughput"] > 0
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+测试股票检索索引：代码前缀、中文名称子串、拼音首字母、港股/美股代码、增量更新
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tradingagents.dataflows.symbol_index import SymbolEntry, SymbolIndex, entries_from_stock_records
+
+STOCK_LIST = [
+    {"ts_code": "000001.SZ", "symbol": "000001", "name": "平安银行", "cnspell": "PAYH", "industry": "银行"},
+    {"ts_code": "601318.SH", "symbol": "601318", "name": "中国平安", "cnspell": "ZGPA", "industry": "保险"},
+    {"ts_code": "600519.SH", "symbol": "600519", "name": "贵州茅台", "cnspell": "GZMT", "industry": "白酒"},
+    {"ts_code": "600036.SH", "symbol": "600036", "name": "招商银行", "cnspell": "ZSYH", "industry": "银行"},
+]
+
+
+def _index():
+    index = SymbolIndex(entries_from_stock_records(STOCK_LIST))
+    index.upsert([
+        SymbolEntry(code="0700.HK", name="腾讯控股", market="hk"),
+        SymbolEntry(code="AAPL", name="苹果公司", market="us", english_name="Apple"),
+    ])
+    return index
+
+
+def _codes(entries):
+    return [entry.code for entry in entries]
+
+
+def test_search_by_code_name_and_initials():
+    index = _index()
+    assert _codes(index.search("6000")) == ["600036"]
+    assert _codes(index.search("600519"))[0] == "600519"
+    assert _codes(index.search("601318.sh")) == ["601318"]
+    assert _codes(index.search("茅台")) == ["600519"]
+    assert _codes(index.search("gzmt")) == ["600519"]
+    assert set(_codes(index.search("银行"))) == {"000001", "600036"}
+    # 名称前缀排在名称子串之前
+    assert _codes(index.search("平安")) == ["000001", "601318"]
+    assert _codes(index.search("700")) == ["0700.HK"]
+    assert _codes(index.search("00700")) == ["0700.HK"]
+    assert _codes(index.search("app")) == ["AAPL"]
+    assert _codes(index.search("银行", market="hk")) == []
+    assert index.search("600519")[0].to_dict()["industry"] == "白酒"
+
+
+def test_incremental_refresh_replaces_and_removes():
+    index = _index()
+    index.search("平安")
+    index.upsert(entries_from_stock_records([
+        {"ts_code": "000001.SZ", "symbol": "000001", "name": "平安银行改", "cnspell": "PAYHG"},
+        {"ts_code": "688981.SH", "symbol": "688981", "name": "中芯国际", "cnspell": "ZXGJ"},
+    ]))
+    assert _codes(index.search("中芯")) == ["688981"]
+    assert _codes(index.search("payhg")) == ["000001"]
+    assert index.search("000001")[0].name == "平安银行改"
+    assert len(index) == 7
+
+    index.remove(["600519.SH"])
+    assert index.search("茅台") == []
+    assert index.search("gzmt") == []
+    assert "600519.SH" not in index
+
+
+def test_stock_and_index_sharing_a_code_are_both_kept():
+    # stock_basic_info 同时包含股票、指数、ETF，同一6位代码可能对应不同证券
+    documents = [
+        {"code": "000001", "name": "平安银行", "sse": "sz", "sec": "stock_cn", "category": "主板"},
+        {"code": "000001", "name": "上证指数", "sse": "sh", "sec": "index_cn", "category": "指数"},
+    ]
+    index = SymbolIndex(entries_from_stock_records(documents))
+    assert len(index) == 2
+    assert [entry.key for entry in index.search("000001")] == ["000001.SZ", "000001.SH"]
+    assert [entry.name for entry in index.search("平安")] == ["平安银行"]
+    assert [entry.name for entry in index.search("上证")] == ["上证指数"]
+
+    index.upsert(entries_from_stock_records([dict(documents[1], name="上证综指")]))
+    assert len(index) == 2 and index.get("000001.SZ").name == "平安银行"
+    assert index.search("上证")[0].name == "上证综指"
+
+
+def test_keystroke_latency_on_full_market():
+    records = [
+        {"ts_code": f"{i:06d}.SZ", "symbol": f"{i:06d}", "name": f"测试{chr(0x4e00 + i % 500)}{chr(0x4e00 + i // 500)}股份", "cnspell": f"CS{i}"}
+        for i in range(5000)
+    ]
+    index = SymbolIndex(entries_from_stock_records(records))
+    index.search("0")
+
+    queries = ["0", "00", "001", "0012", "测", "测试", "cs12", "股份"] * 50
+    started = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    per_query = (time.perf_counter() - started) / len(queries)
+    assert per_query < 0.005
+
+
+def test_search_output_keeps_stock_list_columns_for_mongodb_index(monkeypatch):
+    import pandas as pd
+
+    from tradingagents.dataflows import symbol_index, tushare_adapter
+    from tradingagents.dataflows.data_source_manager import DataSourceManager
+    from tradingagents.dataflows.tushare_adapter import TushareDataAdapter
+    from tradingagents.dataflows.tushare_utils import SEARCH_RESULT_COLUMNS, TushareProvider
+
+    # MongoDB stock_basic_info 文档没有行业、地区、上市日期
+    documents = [{"_id": "x", "code": "000001", "name": "平安银行", "sse": "sz", "market": "深圳", "category": "主板"}]
+    monkeypatch.setattr(symbol_index, "get_symbol_index",
+                        lambda: SymbolIndex(entries_from_stock_records(documents)))
+
+    provider = TushareProvider.__new__(TushareProvider)
+    provider.connected = True
+    provider.get_stock_list = lambda: pd.DataFrame(STOCK_LIST).assign(area="深圳", list_date="19910403")
+    adapter = TushareDataAdapter.__new__(TushareDataAdapter)
+    adapter.provider = provider
+    monkeypatch.setattr(tushare_adapter, "get_tushare_adapter", lambda: adapter)
+
+    results = provider.search_stocks("平安银行")
+    assert list(results.columns) == SEARCH_RESULT_COLUMNS
+    assert results.iloc[0].to_dict() == {"ts_code": "000001.SZ", "symbol": "000001", "name": "平安银行", "area": "深圳",
+                                         "industry": "银行", "market": "主板", "list_date": "19910403"}
+
+    output = DataSourceManager.search_china_stocks_tushare(DataSourceManager.__new__(DataSourceManager), "平安银行")
+    assert "代码: 000001" in output and "行业: 银行" in output and "地区: 深圳" in output
+    assert "上市日期: 19910403" in output
+
+
+def test_tdx_search_quotes_a_bounded_number_of_stocks(monkeypatch):
+    from tradingagents.dataflows import symbol_index
+    from tradingagents.dataflows.tdx_utils import SEARCH_QUOTE_LIMIT, TongDaXinDataProvider
+
+    records = [{"code": f"{i:06d}", "name": f"测试银行{i}", "sse": "sz", "sec": "stock_cn"} for i in range(1, 20)]
+    records.append({"code": "000001", "name": "测试银行指数", "sse": "sh", "sec": "index_cn"})
+    monkeypatch.setattr(symbol_index, "get_symbol_index", lambda: SymbolIndex(entries_from_stock_records(records)))
+
+    provider = TongDaXinDataProvider.__new__(TongDaXinDataProvider)
+    provider.connected = True
+    quoted = []
+    provider.get_real_time_data = lambda code: quoted.append(code) or {"price": 10.0, "change_percent": 1.0}
+
+    results = provider.search_stocks("测试银行")
+    assert len(quoted) == SEARCH_QUOTE_LIMIT and len(results) == SEARCH_QUOTE_LIMIT
+    assert "测试银行指数" not in [result["name"] for result in results]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+测试多级缓存：内存层按字节淘汰、读穿透提升、后台写入、统一缓存键、Redis 层过期时间
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows import cache_policy
+from tradingagents.dataflows.adaptive_cache import AdaptiveCacheSystem
+from tradingagents.dataflows.cache_manager import StockDataCache, make_cache_key
+from tradingagents.dataflows.cache_policy import FRESH, CachePolicyEngine
+from tradingagents.dataflows.db_cache_manager import DatabaseCacheManager
+from tradingagents.dataflows.tiered_cache import (
+    TIER_FILE, TIER_MEMORY, CacheEntry, FileTier, MemoryTier, RedisTier, TieredCache, TieredStockDataCache,
+    decode_entry, encode_entry,
+)
+
+
+class FakeRedis:
+    """只实现 RedisTier 用到的命令"""
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+        self.ttls.pop(key, None)
+
+    def setex(self, key, seconds, value):
+        self.values[key] = value
+        self.ttls[key] = seconds
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def engine():
+    engine = CachePolicyEngine()
+    previous = cache_policy.set_cache_policy_engine(engine)
+    yield engine
+    cache_policy.set_cache_policy_engine(previous)
+
+
+def _bars(rows=50):
+    return pd.DataFrame({'Date': pd.date_range('2024-01-02', periods=rows).strftime('%Y-%m-%d'),
+                         'Close': [float(i) for i in range(rows)]})
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    entries = [CacheEntry(f'k{i}', 'x' * 1000, {}) for i in range(5)]
+    memory = MemoryTier(max_bytes=entries[0].size * 4)
+    for entry in entries[:4]:
+        memory.put(entry)
+    assert memory.get('k0') is not None      # k0 变为最近使用
+    memory.put(entries[4])
+    assert memory.get('k1') is None and memory.get('k0') is not None
+    assert memory.stats.evictions == 1 and memory.bytes_used <= memory.max_bytes
+    # 超过容量比例的数据不放入内存层
+    memory.put(CacheEntry('big', 'x' * 10000, {}))
+    assert memory.get('big') is None
+
+
+def test_read_through_promotes_and_write_behind_flushes(tmp_path):
+    cache = TieredStockDataCache(str(tmp_path), memory_bytes=8 * 1024 * 1024, write_behind=True)
+    key = cache.save_stock_data('AAPL', _bars(), start_date='2024-01-02', end_date='2024-02-20',
+                                data_source='yfinance')
+    assert cache.flush(5)
+    assert cache.read_entry(key) is not None
+
+    # 新实例（如新进程）：第一次从文件层读取并提升到内存层，之后命中内存层
+    fresh = TieredStockDataCache(str(tmp_path), memory_bytes=8 * 1024 * 1024)
+    first = fresh.load_stock_data(key)
+    second = fresh.load_stock_data(key)
+    pd.testing.assert_frame_equal(first, second)
+    stats = fresh.tiered.get_stats()
+    assert stats[TIER_FILE]['hits'] == 1 and stats[TIER_MEMORY]['hits'] == 1
+    assert stats[TIER_MEMORY]['promotions'] == 1 and stats[TIER_MEMORY]['entries'] == 1
+
+    # 取出的数据是副本
+    first.loc[0, 'Close'] = -1.0
+    assert fresh.load_stock_data(key).loc[0, 'Close'] == 0.0
+    assert fresh.cache_freshness(key) == FRESH
+    assert fresh.find_cached_stock_data('AAPL', '2024-01-10', '2024-02-20', 'yfinance') == key
+    assert 'tiers' in fresh.get_cache_stats()
+
+
+def test_without_memory_tier_writes_are_synchronous(tmp_path):
+    cache = TieredStockDataCache(str(tmp_path), memory_bytes=0)
+    assert [tier.name for tier in cache.tiered.tiers] == [TIER_FILE]
+    key = cache.save_news_data('AAPL', 'headline', start_date='2024-01-01', end_date='2024-01-02',
+                               data_source='google')
+    assert cache.load_news_data(key) == 'headline'
+
+
+def test_redis_tier_keeps_settled_bars_and_expires_news(tmp_path):
+    redis = FakeRedis()
+    store = StockDataCache(str(tmp_path))
+    tiered = TieredCache([MemoryTier(1024 * 1024), RedisTier(redis), FileTier(store)], write_behind=False)
+    bars = CacheEntry('AAPL_stock_data_1', _bars(),
+                      {'symbol': 'AAPL', 'data_type': 'stock_data', 'market_type': 'us', 'end_date': '2024-02-20'})
+    news = CacheEntry('AAPL_news_1', 'headline', {'symbol': 'AAPL', 'data_type': 'news'})
+    tiered.put(bars)
+    tiered.put(news)
+    prefix = 'tradingagents:cache:'
+    assert prefix + bars.key not in redis.ttls and redis.ttls[prefix + news.key] > 0
+    decoded = decode_entry(redis.get(prefix + bars.key))
+    pd.testing.assert_frame_equal(decoded.value, bars.value)
+    assert decoded.metadata == bars.metadata
+
+    # 内存层未命中时由 Redis 层命中并提升，不读文件层
+    tiered.memory.clear()
+    assert tiered.get(bars.key) is not None and tiered.get(bars.key) is not None
+    stats = tiered.get_stats()
+    assert stats['redis']['hits'] == 1 and stats[TIER_MEMORY]['hits'] == 1 and stats[TIER_FILE]['hits'] == 0
+
+
+def test_pickled_values_round_trip():
+    entry = CacheEntry('k', {'pe': 12.5, 'items': [1, 2]}, {'data_type': 'fundamentals'}, stored_at=time.time())
+    decoded = decode_entry(encode_entry(entry).encode('utf-8'))
+    assert decoded.value == entry.value and decoded.stored_at == entry.stored_at
+
+
+def test_cache_key_is_shared_across_cache_classes(tmp_path):
+    expected = make_cache_key('stock_data', '600519', start_date='2024-01-01', end_date='2024-02-01',
+                              source='tushare', market='china')
+    assert StockDataCache(str(tmp_path))._generate_cache_key(
+        'stock_data', '600519', start_date='2024-01-01', end_date='2024-02-01', source='tushare',
+        market='china') == expected
+    assert DatabaseCacheManager._generate_cache_key(
+        None, 'stock', '600519', start_date='2024-01-01', end_date='2024-02-01', source='tushare',
+        market='china') == expected
+    assert AdaptiveCacheSystem.__new__(AdaptiveCacheSystem)._get_cache_key(
+        '600519', '2024-01-01', '2024-02-01', 'tushare') == expected
+    # "" 与 None 等价
+    assert make_cache_key('news', 'AAPL', start_date='', source='x') == make_cache_key('news', 'AAPL', start_date=None, source='x')
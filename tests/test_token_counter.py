@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试Token计数服务
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from tradingagents.utils.token_counter import (
+    MESSAGE_OVERHEAD_TOKENS,
+    TokenCounter,
+    heuristic_count,
+    resolve_model_family,
+)
+
+
+def test_resolve_model_family():
+    assert resolve_model_family("gpt-4o-mini") == "tiktoken:o200k_base"
+    assert resolve_model_family("gpt-4") == "tiktoken:cl100k_base"
+    assert resolve_model_family("deepseek-chat") == "deepseek"
+    assert resolve_model_family("qwen-plus-latest") == "qwen"
+    assert resolve_model_family(None) == "default"
+
+
+def test_heuristic_distinguishes_chinese_and_ascii():
+    # DeepSeek官方比例：中文0.6 token/字，英文0.3 token/字符
+    assert heuristic_count("中" * 1000, "deepseek") == 600
+    assert heuristic_count("a" * 1000, "deepseek") == 300
+    assert heuristic_count("中a" * 500, "deepseek") == 450
+    assert heuristic_count("", "deepseek") == 0
+
+
+def test_chinese_prompt_no_longer_overestimated():
+    prompt = "贵州茅台近期股价震荡，成交量放大。" * 1000
+    counter = TokenCounter()
+    estimate = counter.count(prompt, "deepseek-chat")
+    # 旧算法 len//2 与实际偏差较大，新估算接近官方比例
+    assert abs(estimate - len(prompt) * 0.6) < len(prompt) * 0.05
+    assert estimate != len(prompt) // 2
+
+
+def test_batch_and_messages():
+    counter = TokenCounter(default_model="qwen-plus")
+    texts = ["你好世界", "", "hello world"]
+    assert counter.count_batch(texts) == [counter.count(text) for text in texts]
+
+    messages = [SystemMessage(content="你是分析师"), HumanMessage(content="分析000001")]
+    expected = counter.count("你是分析师") + counter.count("分析000001") + 2 * MESSAGE_OVERHEAD_TOKENS
+    assert counter.count_messages(messages) == expected
+    assert counter.count_messages([("user", "分析000001")]) == counter.count("分析000001") + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_repeated_segments_are_memoized():
+    counter = TokenCounter()
+    text = "重复出现的系统提示" * 100
+    counter.count(text, "glm-4")
+    hits_before = counter.cache_info()["hits"]
+    counter.count(text, "glm-4")
+    assert counter.cache_info()["hits"] == hits_before + 1
+
+
+def test_segment_cache_does_not_keep_text():
+    from tradingagents.utils import token_counter
+
+    counter = TokenCounter()
+    text = "很长的辩论记录" * 5000
+    counter.count(text, "qwen-plus")
+    # 缓存键只有哈希和长度，不引用原文
+    assert all(not isinstance(part, str) or len(part) < 100
+               for key in token_counter._segment_cache._counts for part in key)
+    assert counter.count(text, "qwen-plus") == token_counter.heuristic_count(text, "qwen")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+测试端到端追踪：span 嵌套、关键路径、导出格式，以及 LangChain 回调下数据 span 挂在工具 span 之下
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tradingagents.utils.tracing import (
+    KIND_CACHE, KIND_DATA, KIND_GRAPH, KIND_LLM, KIND_NODE, KIND_TOOL, NOOP_SPAN,
+    LANGCHAIN_AVAILABLE, JsonlSpanExporter, OtlpJsonExporter, Span, Trace,
+    TracingCallbackHandler, get_tracer, to_otlp_json, trace_node, trace_span, traced,
+)
+
+
+def make_span(name, kind, start_ms, end_ms, parent=None, **attributes):
+    return Span(name=name, kind=kind, trace_id='t1', span_id=name,
+                parent_id=parent, start_ns=int(start_ms * 1e6), end_ns=int(end_ms * 1e6),
+                attributes=attributes)
+
+
+def synthetic_trace():
+    """
+    root 0-100
+      market 0-40  (llm 5-35)
+      news   0-60  (tool 10-55 -> data 12-50 -> cache 12-14)   并行
+      trader 62-98
+    """
+    return Trace.from_spans([
+        make_span('propagate', KIND_GRAPH, 0, 100, symbol='AAPL', trade_date='2024-05-10'),
+        make_span('market', KIND_NODE, 0, 40, parent='propagate'),
+        make_span('llm', KIND_LLM, 5, 35, parent='market', model='m', tokens_in=10, tokens_out=5),
+        make_span('news', KIND_NODE, 0, 60, parent='propagate'),
+        make_span('tool', KIND_TOOL, 10, 55, parent='news'),
+        make_span('data', KIND_DATA, 12, 50, parent='tool', symbol='AAPL', source='yfinance'),
+        make_span('cache', KIND_CACHE, 12, 14, parent='data', tier='file', cache_hit=False),
+        make_span('trader', KIND_NODE, 62, 98, parent='propagate'),
+    ])
+
+
+def test_span_outside_trace_is_noop():
+    with trace_span('x', KIND_DATA, symbol='AAPL') as span:
+        assert span is NOOP_SPAN
+        span.set_attribute('bytes', 1)
+    assert get_tracer().current_span() is None
+
+
+def test_nested_spans_recorded_under_root():
+    tracer = get_tracer()
+    with tracer.trace('propagate', KIND_GRAPH, symbol='AAPL') as root:
+        with trace_span('node', KIND_NODE):
+            with trace_span('data', KIND_DATA, source='tushare') as data:
+                with trace_span('cache:file', KIND_CACHE, tier='file') as cache:
+                    cache.set_attribute('cache_hit', True)
+    trace = tracer.collector.get(root.trace_id)
+    by_name = {span.name: span for span in trace.spans}
+    assert set(by_name) == {'propagate', 'node', 'data', 'cache:file'}
+    assert by_name['node'].parent_id == root.span_id
+    assert by_name['data'].parent_id == by_name['node'].span_id
+    assert by_name['cache:file'].parent_id == data.span_id
+    assert by_name['cache:file'].attributes == {'tier': 'file', 'cache_hit': True}
+    assert tracer.current_span() is None
+
+
+def test_span_records_error():
+    tracer = get_tracer()
+    with pytest.raises(ValueError):
+        with tracer.trace('propagate') as root:
+            with trace_span('data', KIND_DATA):
+                raise ValueError('boom')
+    trace = tracer.collector.get(root.trace_id)
+    assert all(span.status == 'error' for span in trace.spans)
+    assert 'ValueError: boom' in trace.spans[0].error
+
+
+def test_critical_path_follows_latest_finishing_child():
+    trace = synthetic_trace()
+    path = [(row['span'].name, row['depth']) for row in trace.critical_path()]
+    # market 与 news 并行，news 更晚结束，因此 market 不在关键路径上
+    assert path == [('propagate', 0), ('news', 1), ('tool', 2), ('data', 3), ('cache', 4), ('trader', 1)]
+    rows = {row['span'].name: row['self_ms'] for row in trace.critical_path()}
+    assert rows['propagate'] == pytest.approx(4.0)   # 60-62 与 98-100
+    assert rows['data'] == pytest.approx(36.0)
+
+
+def test_time_by_kind_and_summary():
+    trace = synthetic_trace()
+    by_kind = trace.time_by_kind()
+    assert sum(by_kind.values()) == pytest.approx(100.0)
+    assert by_kind[KIND_DATA] == pytest.approx(36.0)
+    assert KIND_LLM not in by_kind
+
+    summary = trace.summary()
+    assert 'AAPL 2024-05-10' in summary
+    assert 'source=yfinance' in summary
+    assert 'tier=file cache_hit=False' in summary
+    assert '按类型汇总' in summary
+
+
+def test_folded_stacks():
+    stacks = dict(line.rsplit(' ', 1) for line in synthetic_trace().folded_stacks())
+    assert stacks['graph:propagate;node:news;tool:tool;data:data'] == '36'
+    # 不在关键路径上的并行分支同样输出
+    assert stacks['graph:propagate;node:market;llm:llm'] == '30'
+
+
+def test_jsonl_and_otlp_export(tmp_path):
+    trace = synthetic_trace()
+    JsonlSpanExporter(str(tmp_path)).export(trace)
+    lines = (tmp_path / 'traces.jsonl').read_text(encoding='utf-8').splitlines()
+    assert len(lines) == len(trace.spans)
+    restored = Trace.from_spans(Span.from_dict(json.loads(line)) for line in lines)
+    assert [r['span'].name for r in restored.critical_path()] == \
+        [r['span'].name for r in trace.critical_path()]
+
+    OtlpJsonExporter(str(tmp_path)).export(trace)
+    payload = json.loads((tmp_path / 'otlp' / 't1.json').read_text(encoding='utf-8'))
+    spans = payload['resourceSpans'][0]['scopeSpans'][0]['spans']
+    cache = next(s for s in spans if s['name'] == 'cache')
+    assert cache['parentSpanId'] == 'data'
+    assert {'key': 'cache_hit', 'value': {'boolValue': False}} in cache['attributes']
+    assert to_otlp_json(trace)['resourceSpans'][0]['resource']['attributes'][0]['value'] == \
+        {'stringValue': 'tradingagents'}
+
+
+def test_trace_node_and_traced_decorator():
+    @traced('fetch', KIND_DATA, attributes=lambda symbol: {'symbol': symbol})
+    def fetch(symbol):
+        return 'x' * 42
+
+    node = trace_node('Market Analyst', lambda state: {'report': fetch(state['symbol'])})
+    assert node({'symbol': 'AAPL'}) == {'report': 'x' * 42}   # 追踪之外直接调用
+
+    tracer = get_tracer()
+    with tracer.trace('propagate') as root:
+        node({'symbol': 'AAPL'})
+    spans = {span.name: span for span in tracer.collector.get(root.trace_id).spans}
+    assert spans['Market Analyst'].kind == KIND_NODE
+    assert spans['fetch'].parent_id == spans['Market Analyst'].span_id
+    assert spans['fetch'].attributes == {'symbol': 'AAPL', 'bytes': 42}
+
+
+@pytest.mark.skipif(not LANGCHAIN_AVAILABLE, reason="langchain_core 未安装")
+def test_callback_handler_nests_data_spans_under_tool():
+    from langchain_core.outputs import ChatGeneration, LLMResult
+    from langchain_core.messages import AIMessage
+
+    tracer = get_tracer()
+    handler = TracingCallbackHandler(tracer)
+    with tracer.trace('propagate') as root:
+        llm_run, tool_run = uuid.uuid4(), uuid.uuid4()
+        handler.on_chat_model_start({'name': 'ChatFake'}, [[AIMessage('hi')]], run_id=llm_run,
+                                    metadata={'ls_model_name': 'fake-model'})
+        time.sleep(0.001)
+        handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=AIMessage('ok'))]],
+                                     llm_output={'token_usage': {'prompt_tokens': 12, 'completion_tokens': 3}}),
+                           run_id=llm_run)
+
+        handler.on_tool_start({'name': 'get_stock_market_data_unified'}, "{'ticker': 'AAPL'}", run_id=tool_run)
+        with trace_span('DataSourceManager.get_stock_data', KIND_DATA, symbol='AAPL'):
+            pass
+        handler.on_tool_end('result text', run_id=tool_run)
+        assert tracer.current_span() is root
+
+    spans = {span.name: span for span in tracer.collector.get(root.trace_id).spans}
+    llm = spans['llm:fake-model']
+    assert llm.kind == KIND_LLM and llm.attributes['tokens_in'] == 12 and llm.attributes['tokens_out'] == 3
+    tool = spans['tool:get_stock_market_data_unified']
+    assert tool.kind == KIND_TOOL and tool.attributes['bytes'] == len('result text')
+    assert spans['DataSourceManager.get_stock_data'].parent_id == tool.span_id
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试交易日历：节假日、向量化区间、最近交易日、交易时段（含提前收市）、刷新，以及数据接口跳过非交易日
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from tradingagents.dataflows import trading_calendar
+from tradingagents.dataflows.cache_policy import CachePolicyEngine, MarketClock
+from tradingagents.dataflows.trading_calendar import (
+    TradingCalendar, calendar_for_symbol, get_trading_calendar, refresh_trading_calendar,
+)
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_holidays_and_vectorized_ranges():
+    china = get_trading_calendar('china')
+    assert not china.is_trading_day('2024-10-01') and not china.is_trading_day('20241005')
+    assert china.is_trading_day('2024-09-30')
+    assert list(china.trading_days('2024-09-27', '2024-10-09').strftime('%Y-%m-%d')) == \
+        ['2024-09-27', '2024-09-30', '2024-10-08', '2024-10-09']
+    assert list(china.is_trading_days(['2024-09-30', '2024-10-01', '2024-10-08'])) == [True, False, True]
+    assert china.count_trading_days('2024-01-01', '2024-12-31') == 242
+    assert china.last_trading_day('2024-10-07') == datetime(2024, 9, 30)
+    assert china.next_trading_day('2024-10-01') == datetime(2024, 10, 8)
+    assert china.offset('2024-10-08', -1) == datetime(2024, 9, 30)
+
+    us = calendar_for_symbol('AAPL')
+    assert us.count_trading_days('2024-01-01', '2024-12-31') == 252
+    assert not us.is_trading_day('2024-07-04')
+    assert calendar_for_symbol('0700.HK').market == 'hk'
+
+
+def test_session_times_with_early_close():
+    us = get_trading_calendar('us')
+    (opening, closing), = us.session_times('2024-11-29')
+    assert (opening.hour, opening.minute, closing.hour) == (9, 30, 13)
+    assert us.close_time('2024-11-27').hour == 16
+    assert us.session_times('2024-11-28') == []
+
+    hk = get_trading_calendar('hk')
+    assert len(hk.session_times('2024-12-24')) == 1 and hk.close_time('2024-12-24').hour == 12
+    assert len(hk.session_times('2024-12-23')) == 2
+
+
+def test_market_clock_skips_holidays():
+    clock = MarketClock()
+    # 2024-09-30 20:00 北京时间，下一次开盘是国庆后的 10-08 09:30
+    evening = _utc(2024, 9, 30, 12, 0)
+    assert clock.next_open('china', evening).strftime('%Y-%m-%d %H:%M') == '2024-10-08 09:30'
+    holiday = _utc(2024, 10, 2, 2, 0)
+    assert not clock.is_open('china', holiday)
+    assert clock.is_settled('china', '2024-10-02', holiday)
+    # 美股提前收市后当天行情已确定
+    assert clock.is_settled('us', '2024-11-29', _utc(2024, 11, 29, 18, 30))
+    assert not clock.is_settled('us', '2024-11-29', _utc(2024, 11, 29, 17, 30))
+    # 休市期间行情的有效期延长到节后开盘
+    ttl = CachePolicyEngine(clock=clock).ttl_seconds('price', 'china', None, now=evening)
+    assert ttl == pytest.approx((7 * 24 + 13.5) * 3600)
+
+
+def test_refresh_writes_table_that_wins_over_bundled(tmp_path, monkeypatch):
+    monkeypatch.setenv(trading_calendar.CALENDAR_DIR_ENV, str(tmp_path))
+    previous = trading_calendar.set_trading_calendar('us', None)
+    try:
+        days = get_trading_calendar('us').trading_days('2026-01-01', '2027-12-31')
+        days = days[days != '2027-11-25']   # 新表中的节假日
+        calendar = refresh_trading_calendar('us', trade_dates=days)
+        assert calendar.covered_to == str(days[-1].date()) and '2027-11-25' in calendar.holidays
+        assert json.loads((tmp_path / 'us.json').read_text(encoding='utf-8'))['source'] == 'refreshed'
+
+        trading_calendar.set_trading_calendar('us', None)
+        reloaded = get_trading_calendar('us')
+        assert reloaded.source == 'refreshed' and not reloaded.is_trading_day('2027-11-25')
+        assert reloaded.close_time('2026-11-27').hour == 13
+    finally:
+        trading_calendar.set_trading_calendar('us', previous)
+
+
+def test_outside_coverage_falls_back_to_weekdays():
+    calendar = TradingCalendar('china', holidays=('2024-10-01',), covered_from='2024-01-01', covered_to='2024-12-31')
+    assert not calendar.covers('2030-10-01')
+    assert calendar.is_trading_day('2030-10-01') and not calendar.is_trading_day('2030-10-05')
+
+
+def test_stockstats_rejects_non_trading_day_before_loading(tmp_path):
+    from tradingagents.dataflows.stockstats_utils import StockstatsUtils
+
+    # 目录里没有行情文件：交易日会报错，非交易日直接返回
+    result = StockstatsUtils.get_stock_stats('AAPL', 'rsi', '2024-07-04', str(tmp_path), online=False)
+    assert result.startswith('N/A: Not a trading day')
+    with pytest.raises(Exception):
+        StockstatsUtils.get_stock_stats('AAPL', 'rsi', '2024-07-05', str(tmp_path), online=False)
+
+
+def test_indicator_window_only_computes_trading_days(monkeypatch):
+    from tradingagents.dataflows import interface
+
+    calls = []
+    monkeypatch.setattr(interface, 'get_stockstats_indicator',
+                        lambda symbol, indicator, day, online: calls.append(day) or '50.0')
+    report = interface.get_stock_stats_indicators_window('600519', 'rsi', '2024-10-09', 14, True)
+    assert calls == ['2024-10-09', '2024-10-08', '2024-09-30', '2024-09-27', '2024-09-26', '2024-09-25']
+    assert '2024-10-01:' not in report and report.index('2024-10-09:') < report.index('2024-09-25:')
@@ -4,9 +4,10 @@ import json
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.agents.utils.context_builder import build_debate_context
 
 
-def create_research_manager(llm, memory):
+def create_research_manager(llm, memory, config=None):
     def research_manager_node(state) -> dict:
         history = state["investment_debate_state"].get("history", "")
         market_research_report = state["market_report"]
@@ -29,6 +30,9 @@ def create_research_manager(llm, memory):
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
 
+        # 压缩报告摘要，辩论历史完整保留（超出token预算时才截断）
+        context, context_update = build_debate_context(state, history, config, llm, window=False)
+
         prompt = f"""作为投资组合经理和辩论主持人，您的职责是批判性地评估这轮辩论并做出明确决策：支持看跌分析师、看涨分析师，或者仅在基于所提出论点有强有力理由时选择持有。
 
 简洁地总结双方的关键观点，重点关注最有说服力的证据或推理。您的建议——买入、卖出或持有——必须明确且可操作。避免仅仅因为双方都有有效观点就默认选择持有；要基于辩论中最强有力的论点做出承诺。
@@ -53,17 +57,17 @@ def create_research_manager(llm, memory):
 \"{past_memory_str}\"
 
 以下是综合分析报告：
-市场研究：{market_research_report}
+市场研究：{context['market_report']}
 
-情绪分析：{sentiment_report}
+情绪分析：{context['sentiment_report']}
 
-新闻分析：{news_report}
+新闻分析：{context['news_report']}
 
-基本面分析：{fundamentals_report}
+基本面分析：{context['fundamentals_report']}
 
 以下是辩论：
 辩论历史：
-{history}
+{context['history']}
 
 请用中文撰写所有分析内容和建议。"""
         response = llm.invoke(prompt)
@@ -80,6 +84,7 @@ def create_research_manager(llm, memory):
         return {
             "investment_debate_state": new_investment_debate_state,
             "investment_plan": response.content,
+            **context_update,
         }
 
     return research_manager_node
@@ -4,9 +4,10 @@ import json
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.agents.utils.context_builder import build_debate_context
 
 
-def create_risk_manager(llm, memory):
+def create_risk_manager(llm, memory, config=None):
     def risk_manager_node(state) -> dict:
 
         company_name = state["company_of_interest"]
@@ -15,7 +16,7 @@ def create_risk_manager(llm, memory):
         risk_debate_state = state["risk_debate_state"]
         market_research_report = state["market_report"]
         news_report = state["news_report"]
-        fundamentals_report = state["news_report"]
+        fundamentals_report = state["fundamentals_report"]
         sentiment_report = state["sentiment_report"]
         trader_plan = state["investment_plan"]
 
@@ -32,6 +33,11 @@ def create_risk_manager(llm, memory):
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
 
+        # 辩论历史完整保留（超出token预算时才截断）
+        context, context_update = build_debate_context(
+            state, history, config, llm, window=False, include_reports=False
+        )
+
         prompt = f"""作为风险管理委员会主席和辩论主持人，您的目标是评估三位风险分析师——激进、中性和安全/保守——之间的辩论，并确定交易员的最佳行动方案。您的决策必须产生明确的建议：买入、卖出或持有。只有在有具体论据强烈支持时才选择持有，而不是在所有方面都似乎有效时作为后备选择。力求清晰和果断。
 
 决策指导原则：
@@ -47,7 +53,7 @@ def create_risk_manager(llm, memory):
 ---
 
 **分析师辩论历史：**
-{history}
+{context['history']}
 
 ---
 
@@ -71,6 +77,7 @@ def create_risk_manager(llm, memory):
         return {
             "risk_debate_state": new_risk_debate_state,
             "final_trade_decision": response.content,
+            **context_update,
         }
 
     return risk_manager_node
@@ -64,6 +64,9 @@ class AgentState(MessagesState):
         str, "Report from the News Researcher of current world affairs"
     ]
     fundamentals_report: Annotated[str, "Report from the Fundamentals Researcher"]
+    report_digests: Annotated[
+        dict, "Per-run cache of compacted analyst report digests"
+    ]
 
     # researcher team discussion step
     investment_debate_state: Annotated[
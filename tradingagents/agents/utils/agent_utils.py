@@ -21,6 +21,9 @@ from tradingagents.utils.tool_logging import log_tool_call, log_analysis_step
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
+from tradingagents.utils.log_categories import get_log_category, trace_symbol, SYMBOL_TRACE, DATA_PREVIEW
+symbol_trace = get_log_category(SYMBOL_TRACE)
+data_preview = get_log_category(DATA_PREVIEW)
 
 
 def create_msg_delete():
@@ -180,7 +183,7 @@ class Toolkit:
             logger.debug(f"📊 [DEBUG] 统一数据源接口调用完成")
             logger.debug(f"📊 [DEBUG] 返回结果类型: {type(result)}")
             logger.debug(f"📊 [DEBUG] 返回结果长度: {len(result) if result else 0}")
-            logger.debug(f"📊 [DEBUG] 返回结果前200字符: {str(result)[:200]}...")
+            data_preview.debug(logger, lambda: f"📊 [DEBUG] 返回结果前200字符: {str(result)[:200]}...")
             logger.debug(f"📊 [DEBUG] ===== agent_utils.get_china_stock_data 调用结束 =====")
 
             return result
@@ -719,9 +722,7 @@ class Toolkit:
         logger.info(f"📊 [统一基本面工具] 分析股票: {ticker}")
 
         # 添加详细的股票代码追踪日志
-        logger.info(f"🔍 [股票代码追踪] 统一基本面工具接收到的原始股票代码: '{ticker}' (类型: {type(ticker)})")
-        logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(ticker))}")
-        logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(ticker))}")
+        trace_symbol(logger, "统一基本面工具", ticker)
 
         # 保存原始ticker用于对比
         original_ticker = ticker
@@ -736,7 +737,7 @@ class Toolkit:
             is_hk = market_info['is_hk']
             is_us = market_info['is_us']
 
-            logger.info(f"🔍 [股票代码追踪] StockUtils.get_market_info 返回的市场信息: {market_info}")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] StockUtils.get_market_info 返回的市场信息: {market_info}")
             logger.info(f"📊 [统一基本面工具] 股票类型: {market_info['market_name']}")
             logger.info(f"📊 [统一基本面工具] 货币: {market_info['currency_name']} ({market_info['currency_symbol']})")
 
@@ -757,14 +758,14 @@ class Toolkit:
             if is_china:
                 # 中国A股：获取股票数据 + 基本面数据
                 logger.info(f"🇨🇳 [统一基本面工具] 处理A股数据...")
-                logger.info(f"🔍 [股票代码追踪] 进入A股处理分支，ticker: '{ticker}'")
+                symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 进入A股处理分支，ticker: '{ticker}'")
 
                 try:
                     # 获取股票价格数据
                     from tradingagents.dataflows.interface import get_china_stock_data_unified
-                    logger.info(f"🔍 [股票代码追踪] 调用 get_china_stock_data_unified，传入参数: ticker='{ticker}', start_date='{start_date}', end_date='{end_date}'")
+                    symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 get_china_stock_data_unified，传入参数: ticker='{ticker}', start_date='{start_date}', end_date='{end_date}'")
                     stock_data = get_china_stock_data_unified(ticker, start_date, end_date)
-                    logger.info(f"🔍 [股票代码追踪] get_china_stock_data_unified 返回结果前200字符: {stock_data[:200] if stock_data else 'None'}")
+                    data_preview.info(logger, lambda: f"🔍 [股票代码追踪] get_china_stock_data_unified 返回结果前200字符: {stock_data[:200] if stock_data else 'None'}")
                     result_data.append(f"## A股价格数据\n{stock_data}")
                 except Exception as e:
                     logger.error(f"🔍 [股票代码追踪] get_china_stock_data_unified 调用失败: {e}")
@@ -774,9 +775,9 @@ class Toolkit:
                     # 获取基本面数据
                     from tradingagents.dataflows.optimized_china_data import OptimizedChinaDataProvider
                     analyzer = OptimizedChinaDataProvider()
-                    logger.info(f"🔍 [股票代码追踪] 调用 OptimizedChinaDataProvider._generate_fundamentals_report，传入参数: ticker='{ticker}'")
+                    symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 OptimizedChinaDataProvider._generate_fundamentals_report，传入参数: ticker='{ticker}'")
                     fundamentals_data = analyzer._generate_fundamentals_report(ticker, stock_data if 'stock_data' in locals() else "")
-                    logger.info(f"🔍 [股票代码追踪] _generate_fundamentals_report 返回结果前200字符: {fundamentals_data[:200] if fundamentals_data else 'None'}")
+                    data_preview.info(logger, lambda: f"🔍 [股票代码追踪] _generate_fundamentals_report 返回结果前200字符: {fundamentals_data[:200] if fundamentals_data else 'None'}")
                     result_data.append(f"## A股基本面数据\n{fundamentals_data}")
                 except Exception as e:
                     logger.error(f"🔍 [股票代码追踪] _generate_fundamentals_report 调用失败: {e}")
@@ -1023,7 +1024,7 @@ class Toolkit:
                         search_query = f"{ticker} 港股"
 
                     from tradingagents.dataflows.interface import get_google_news
-                    news_data = get_google_news(search_query, curr_date)
+                    news_data = get_google_news(search_query, curr_date, 7)
                     result_data.append(f"## 中文新闻\n{news_data}")
                 except Exception as e:
                     result_data.append(f"## 中文新闻\n获取失败: {e}")
@@ -0,0 +1,266 @@
+"""
+辩论与风险节点的提示上下文构建器
+
+每轮辩论都会重新嵌入四份完整的分析师报告和不断增长的辩论历史，提示长度随
+(轮数 × 报告数) 增长。本模块负责：
+- 每次运行只对每份报告摘要/抽取一次，并把摘要缓存在状态的 report_digests 中
+- 为辩论方提供有界的滚动历史窗口
+- 对每个节点的提示上下文执行token预算
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.token_counter import count_tokens
+logger = get_logger("default")
+
+
+# 报告字段及其在提示中的中文名称
+REPORT_FIELDS = {
+    "market_report": "市场研究报告",
+    "sentiment_report": "社交媒体情绪报告",
+    "news_report": "新闻报告",
+    "fundamentals_report": "基本面报告",
+}
+
+# 默认配置（可通过 config 覆盖）
+DEFAULT_CONTEXT_CONFIG = {
+    "context_compaction_enabled": True,
+    "context_digest_mode": "extract",  # extract: 规则抽取; llm: 用节点LLM摘要（每次运行每份报告一次）
+    "report_digest_max_chars": 2000,
+    "debate_history_max_turns": 4,
+    "node_prompt_token_budget": 16000,
+}
+
+# 抽取摘要时优先保留的关键词
+_KEY_TERMS = re.compile(
+    r"建议|目标价|价格|风险|买入|卖出|持有|支撑|阻力|趋势|估值|市盈率|市净率|PE|PB|ROE|"
+    r"营收|收入|利润|增长|下降|上涨|下跌|利好|利空|情绪|结论|总结|评级|均线|MACD|RSI|成交量",
+    re.IGNORECASE,
+)
+
+# 辩论历史中每轮发言的起始标记
+_TURN_SPLIT = re.compile(r"\n(?=(?:Bull|Bear|Risky|Safe|Neutral) Analyst:)")
+
+
+def _context_config(config: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = dict(DEFAULT_CONTEXT_CONFIG)
+    if config:
+        merged.update({k: v for k, v in config.items() if k in DEFAULT_CONTEXT_CONFIG})
+    return merged
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """估算token数（委托Token计数服务，按模型家族选择分词器）"""
+    return count_tokens(text, model)
+
+
+def _score_line(line: str) -> int:
+    stripped = line.strip()
+    if not stripped:
+        return 0
+    score = 1
+    if stripped.startswith("#") or stripped.startswith("**"):
+        score += 3
+    if _KEY_TERMS.search(stripped):
+        score += 2
+    if re.search(r"\d", stripped):
+        score += 1
+    if stripped.startswith(("-", "*", "•", "|")) or re.match(r"^\d+[\.、]", stripped):
+        score += 1
+    return score
+
+
+def extract_report_digest(report: str, max_chars: int) -> str:
+    """
+    规则抽取报告摘要：按行打分，保留标题、关键结论和含数据的行，并保持原有顺序
+
+    Args:
+        report: 完整报告
+        max_chars: 摘要最大字符数
+
+    Returns:
+        摘要文本，报告本身不超过上限时原样返回
+    """
+    if not report or len(report) <= max_chars:
+        return report or ""
+
+    lines = [line for line in report.splitlines() if line.strip()]
+    ranked = sorted(range(len(lines)), key=lambda i: (-_score_line(lines[i]), i))
+
+    selected = set()
+    used = 0
+    for index in ranked:
+        cost = len(lines[index]) + 1
+        if used + cost > max_chars:
+            continue
+        selected.add(index)
+        used += cost
+
+    return "\n".join(lines[i] for i in sorted(selected))
+
+
+def _report_hash(report: str) -> str:
+    return hashlib.md5((report or "").encode("utf-8")).hexdigest()
+
+
+def _summarize_with_llm(llm, title: str, report: str, max_chars: int) -> str:
+    prompt = (
+        f"请将以下{title}压缩为不超过{max_chars}字的中文要点摘要，"
+        f"保留所有关键数据、结论、价格和风险提示，不要添加报告之外的内容：\n\n{report}"
+    )
+    try:
+        return llm.invoke(prompt).content
+    except Exception as e:
+        logger.warning(f"⚠️ [上下文构建] LLM摘要失败，改用规则抽取: {title} - {e}")
+        return extract_report_digest(report, max_chars)
+
+
+def get_report_digests(state: Dict[str, Any], config: Optional[Dict[str, Any]] = None,
+                       llm=None) -> Tuple[Dict[str, str], Dict[str, Dict[str, str]]]:
+    """
+    获取各分析师报告的摘要，优先复用状态中已缓存的摘要
+
+    Args:
+        state: 当前图状态
+        config: 上下文配置
+        llm: digest_mode 为 llm 时用于摘要的模型
+
+    Returns:
+        (报告字段到摘要的字典, 需要写回状态的 report_digests 缓存)
+    """
+    cfg = _context_config(config)
+    cached = dict(state.get("report_digests") or {})
+    digests = {}
+    changed = False
+
+    for field, title in REPORT_FIELDS.items():
+        report = state.get(field, "") or ""
+        report_hash = _report_hash(report)
+        entry = cached.get(field)
+        if entry and entry.get("hash") == report_hash:
+            digests[field] = entry["digest"]
+            continue
+
+        max_chars = cfg["report_digest_max_chars"]
+        if cfg["context_digest_mode"] == "llm" and llm is not None and len(report) > max_chars:
+            digest = _summarize_with_llm(llm, title, report, max_chars)
+        else:
+            digest = extract_report_digest(report, max_chars)
+
+        digests[field] = digest
+        cached[field] = {"hash": report_hash, "digest": digest}
+        changed = True
+        logger.debug(f"📝 [上下文构建] {title}: {len(report)} -> {len(digest)} 字符")
+
+    return digests, (cached if changed else {})
+
+
+def window_history(history: str, max_turns: int) -> str:
+    """
+    保留辩论历史中最近的 max_turns 轮发言
+
+    Args:
+        history: 完整辩论历史（每轮以 "XXX Analyst:" 开头）
+        max_turns: 保留的轮数，<=0 表示不限制
+    """
+    if not history or max_turns <= 0:
+        return history or ""
+
+    turns = [turn for turn in _TURN_SPLIT.split(history) if turn.strip()]
+    if len(turns) <= max_turns:
+        return history
+
+    omitted = len(turns) - max_turns
+    return f"（已省略较早的 {omitted} 轮发言）\n" + "\n".join(turns[-max_turns:])
+
+
+def _truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    tokens = estimate_tokens(text, model)
+    if tokens <= max_tokens:
+        return text
+    # 按比例截断后逐步收缩，保证不超过预算
+    ratio = max_tokens / max(tokens, 1)
+    cut = max(int(len(text) * ratio), 0)
+    while cut > 0 and estimate_tokens(text[:cut], model) > max_tokens:
+        cut = int(cut * 0.9)
+    return text[:cut] + "\n……（内容已截断）"
+
+
+def enforce_token_budget(sections: Dict[str, str], budget: int,
+                         protected: Tuple[str, ...] = (), model: Optional[str] = None) -> Dict[str, str]:
+    """
+    在token预算内分配各段上下文：未受保护的段落从最长的开始截断
+
+    Args:
+        sections: 段落名称到内容的字典
+        budget: 总token预算，<=0 表示不限制
+        protected: 不截断的段落名称
+        model: 模型名称，用于选择分词器
+    """
+    if budget <= 0:
+        return dict(sections)
+
+    result = dict(sections)
+    sizes = {name: estimate_tokens(text, model) for name, text in result.items()}
+    total = sum(sizes.values())
+    if total <= budget:
+        return result
+
+    fixed = sum(sizes[name] for name in protected if name in sizes)
+    flexible = [name for name in result if name not in protected]
+    remaining = max(budget - fixed, 0)
+
+    # 公平分配：短段落保持原样，剩余预算平分给长段落
+    flexible.sort(key=lambda name: sizes[name])
+    for position, name in enumerate(flexible):
+        share = remaining // max(len(flexible) - position, 1)
+        if sizes[name] > share:
+            result[name] = _truncate_to_tokens(result[name], share, model)
+            sizes[name] = estimate_tokens(result[name], model)
+        remaining -= sizes[name]
+
+    logger.debug(f"📏 [上下文构建] 提示上下文 {total} -> {sum(sizes.values())} tokens (预算 {budget})")
+    return result
+
+
+def build_debate_context(state: Dict[str, Any], history: str, config: Optional[Dict[str, Any]] = None,
+                         llm=None, window: bool = True, include_reports: bool = True,
+                         protected: Tuple[str, ...] = ()) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    构建辩论/风险节点的提示上下文
+
+    Args:
+        state: 当前图状态
+        history: 辩论历史
+        config: 上下文配置
+        llm: 摘要模式为 llm 时使用
+        window: 是否对历史应用滚动窗口（主持人/裁判节点应传 False）
+        include_reports: 提示中是否使用报告（不使用时报告不占预算）
+        protected: 不参与预算截断的额外段落
+
+    Returns:
+        (上下文字典, 需要合并到节点返回值中的状态更新)
+        上下文字典包含 history 键，include_reports 为 True 时还包含
+        market_report、sentiment_report、news_report 和 fundamentals_report
+    """
+    cfg = _context_config(config)
+    if not cfg["context_compaction_enabled"]:
+        context = {field: state.get(field, "") or "" for field in REPORT_FIELDS} if include_reports else {}
+        context["history"] = history or ""
+        return context, {}
+
+    if include_reports:
+        digests, digest_update = get_report_digests(state, cfg, llm)
+    else:
+        digests, digest_update = {}, {}
+    context = dict(digests)
+    context["history"] = window_history(history, cfg["debate_history_max_turns"]) if window else (history or "")
+    model = getattr(llm, "model_name", None) if llm is not None else None
+    context = enforce_token_budget(context, cfg["node_prompt_token_budget"], protected, model)
+
+    state_update = {"report_digests": digest_update} if digest_update else {}
+    return context, state_update
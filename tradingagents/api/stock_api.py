@@ -135,12 +135,21 @@ def search_stocks(keyword: str) -> List[Dict[str, Any]]:
         >>> for stock in results:
         logger.info(f"{stock["code']}: {stock['name']}")
     """
+    # 优先使用常驻内存的股票检索索引（代码前缀、名称、拼音首字母）
+    try:
+        from tradingagents.dataflows.symbol_index import search_symbols
+        matches = search_symbols(keyword, limit=50, market='china')
+        if matches:
+            return matches
+    except Exception as e:
+        logger.debug(f"⚠️ 股票检索索引不可用: {e}")
+
     all_stocks = get_all_stocks()
     
     if not all_stocks or (len(all_stocks) == 1 and 'error' in all_stocks[0]):
         return all_stocks
     
-    # 搜索匹配的股票
+    # 索引未命中时逐条匹配
     matches = []
     keyword_lower = keyword.lower()
     
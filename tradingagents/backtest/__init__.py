@@ -0,0 +1,15 @@
+"""
+历史回测：按记忆依赖并行运行 (股票, 交易日) 分析，持有期结束后反思，断点续跑并汇总绩效
+"""
+
+from .checkpoint import BacktestCheckpoint, BacktestRun, ReflectionRecord
+from .engine import BacktestEngine, BacktestReport, BacktestSettings, run_backtest
+from .metrics import PerformanceMetrics, portfolio_metrics, ticker_metrics
+from .prices import BarStorePriceSource, FramePriceSource, PriceSource, to_ts_code
+
+__all__ = [
+    "BacktestCheckpoint", "BacktestRun", "ReflectionRecord",
+    "BacktestEngine", "BacktestReport", "BacktestSettings", "run_backtest",
+    "PerformanceMetrics", "portfolio_metrics", "ticker_metrics",
+    "BarStorePriceSource", "FramePriceSource", "PriceSource", "to_ts_code",
+]
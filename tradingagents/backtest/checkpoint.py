@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+回测记录与断点
+每次分析和反思完成后立即追加到 <输出目录>/checkpoint.jsonl，分析的最终状态写入
+states/<股票>/<日期>.json，中断后可从断点继续：已完成的分析不再运行，已完成的反思
+从记录中恢复到记忆，不再调用 LLM
+"""
+
+import json
+import os
+import shutil
+import threading
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+CHECKPOINT_FILE = 'checkpoint.jsonl'
+META_FILE = 'meta.json'
+STATE_DIR = 'states'
+
+# 反思所需的最终状态字段
+STATE_KEYS = (
+    'company_of_interest', 'trade_date',
+    'market_report', 'sentiment_report', 'news_report', 'fundamentals_report',
+    'investment_debate_state', 'trader_investment_plan', 'risk_debate_state',
+    'investment_plan', 'final_trade_decision',
+)
+
+RunKey = Tuple[str, str]
+
+
+@dataclass
+class BacktestRun:
+    """一次 (股票, 日期) 分析及其收益"""
+    ticker: str
+    trade_date: str
+    price: Optional[float] = None          # 决策日收盘价
+    next_date: Optional[str] = None        # 下一个决策日（计算净值的持有期终点）
+    next_price: Optional[float] = None
+    outcome_date: Optional[str] = None     # 反思使用的持有期终点
+    outcome_price: Optional[float] = None
+    action: str = ''
+    target_price: Optional[float] = None
+    confidence: Optional[float] = None
+    risk_score: Optional[float] = None
+    wall_s: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def key(self) -> RunKey:
+        return (self.ticker, self.trade_date)
+
+    @property
+    def completed(self) -> bool:
+        return bool(self.action) or self.error is not None
+
+    @staticmethod
+    def _change(start: Optional[float], end: Optional[float]) -> Optional[float]:
+        if start is None or end is None or not start:
+            return None
+        return end / start - 1
+
+    @property
+    def outcome_return(self) -> Optional[float]:
+        """决策日到持有期终点的涨跌幅"""
+        return self._change(self.price, self.outcome_price)
+
+    @property
+    def period_return(self) -> Optional[float]:
+        """决策日到下一个决策日的涨跌幅"""
+        return self._change(self.price, self.next_price)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BacktestRun':
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
+
+
+@dataclass
+class ReflectionRecord:
+    """一次反思：写入各记忆的经验"""
+    ticker: str
+    trade_date: str
+    returns: str
+    lessons: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def key(self) -> RunKey:
+        return (self.ticker, self.trade_date)
+
+
+def snapshot_state(final_state: Dict[str, Any]) -> Dict[str, Any]:
+    """提取可序列化的最终状态（足以在之后反思）"""
+    return {key: final_state.get(key) for key in STATE_KEYS}
+
+
+class BacktestCheckpoint:
+    """回测输出目录"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.path = self.directory / CHECKPOINT_FILE
+        self._lock = threading.Lock()
+
+    def _state_path(self, ticker: str, trade_date: str) -> Path:
+        safe_ticker = ''.join(c if c.isalnum() or c in '.-_' else '_' for c in ticker)
+        return self.directory / STATE_DIR / safe_ticker / f"{trade_date}.json"
+
+    def reset(self):
+        """清空之前的记录（不续跑时）"""
+        with self._lock:
+            if self.path.exists():
+                self.path.unlink()
+            shutil.rmtree(self.directory / STATE_DIR, ignore_errors=True)
+
+    def check_meta(self, meta: Dict[str, Any]) -> bool:
+        """写入回测参数；与断点中的参数不一致时返回 False"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta_path = self.directory / META_FILE
+        previous = None
+        if meta_path.exists() and self.path.exists():
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return previous is None or previous == meta
+
+    def _append(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, default=str) + '\n'
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def append_run(self, run: BacktestRun):
+        self._append({'type': 'run', **run.to_dict()})
+
+    def append_reflection(self, record: ReflectionRecord):
+        self._append({'type': 'reflection', **asdict(record)})
+
+    def load(self) -> Tuple[Dict[RunKey, BacktestRun], Dict[RunKey, ReflectionRecord]]:
+        """读取已完成的分析和反思（同一键以最后一条为准，截断的末行忽略）"""
+        runs: Dict[RunKey, BacktestRun] = {}
+        reflections: Dict[RunKey, ReflectionRecord] = {}
+        if not self.path.exists():
+            return runs, reflections
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ [回测] 断点记录不完整，已忽略: {line[:80]}")
+                    continue
+                kind = record.pop('type', None)
+                if kind == 'run':
+                    run = BacktestRun.from_dict(record)
+                    runs[run.key] = run
+                elif kind == 'reflection':
+                    reflection = ReflectionRecord(**record)
+                    reflections[reflection.key] = reflection
+        return runs, reflections
+
+    def save_state(self, ticker: str, trade_date: str, state: Dict[str, Any]):
+        path = self._state_path(ticker, trade_date)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+
+    def load_state(self, ticker: str, trade_date: str) -> Optional[Dict[str, Any]]:
+        path = self._state_path(ticker, trade_date)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+历史回测引擎
+对股票池和日期区间内的每个 (股票, 交易日) 运行 TradingAgentsGraph.propagate，持有期结束后
+用本地价格计算收益并反思（reflect_and_remember），最后汇总绩效。
+
+记忆依赖决定了哪些分析可以并行：
+- 交易日 t 的分析只能看到持有期终点不晚于 t 的决策的反思（否则就是用了未来的收益）；
+- 反之，持有期终点为 o 的反思必须等到所有 t < o 的分析都完成后才写入记忆。
+在同一记忆范围内满足这两个条件的分析并行运行（持有期为 h 时，每个范围约有 h 个交易日
+同时运行）；memory_scope='ticker' 时各股票的记忆互相独立，股票之间也并行，
+memory_scope='none' 或关闭记忆时所有分析都可以并行。
+
+每次分析和反思完成后立即写入断点（见 checkpoint.py），resume=True 时从断点继续。
+价格只来自本地（日线库或调用方提供的价格表）；分析在 as_of(决策日) 上下文中运行，
+数据接口读不到决策日之后的数据（见 dataflows/point_in_time.py）
+"""
+
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from tradingagents.dataflows.point_in_time import as_of
+from tradingagents.dataflows.trading_calendar import calendar_for_symbol
+from tradingagents.default_config import DEFAULT_CONFIG
+
+from .checkpoint import BacktestCheckpoint, BacktestRun, ReflectionRecord, RunKey, snapshot_state
+from .metrics import PerformanceMetrics, directional_return, portfolio_metrics, ticker_metrics
+from .prices import BarStorePriceSource, PriceSource
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+MEMORY_SCOPES = ('shared', 'ticker', 'none')
+
+# 读取价格时在结束日期之后多取的自然日（用于计算最后几个决策的收益）
+PRICE_LOOKAHEAD_DAYS = 30
+
+
+@dataclass
+class BacktestSettings:
+    """回测参数"""
+    tickers: List[str]
+    start_date: str
+    end_date: str
+    analysts: List[str] = field(default_factory=lambda: ['market', 'social', 'news', 'fundamentals'])
+    horizon: int = 5              # 反思使用的持有期（交易日）
+    step: int = 1                 # 每隔多少个交易日决策一次
+    max_workers: int = 4
+    memory_scope: str = 'shared'  # shared: 所有股票共享记忆；ticker: 每只股票独立；none: 不反思
+    long_only: bool = True        # 卖出只清仓，不做空
+    cost_bps: float = 0.0         # 每次仓位变化的交易成本（基点）
+    output_dir: str = './results/backtest'
+    resume: bool = True
+
+    def meta(self) -> Dict[str, Any]:
+        """影响结果的参数（续跑时与断点比较）"""
+        return {key: value for key, value in asdict(self).items()
+                if key not in ('max_workers', 'output_dir', 'resume')}
+
+
+@dataclass
+class BacktestReport:
+    """回测结果"""
+    settings: BacktestSettings
+    runs: List[BacktestRun] = field(default_factory=list)
+    metrics: Dict[str, PerformanceMetrics] = field(default_factory=dict)
+    overall: Optional[PerformanceMetrics] = None
+    reflections: int = 0
+    executed: int = 0        # 本次实际运行的分析数
+    resumed: int = 0         # 从断点恢复的分析数
+    max_concurrency: int = 0
+    wall_s: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'settings': asdict(self.settings),
+            'runs': [run.to_dict() for run in self.runs],
+            'metrics': {ticker: item.to_dict() for ticker, item in self.metrics.items()},
+            'overall': self.overall.to_dict() if self.overall else None,
+            'reflections': self.reflections,
+            'executed': self.executed,
+            'resumed': self.resumed,
+            'max_concurrency': self.max_concurrency,
+            'wall_s': round(self.wall_s, 3),
+        }
+
+    def summary(self) -> str:
+        def pct(value):
+            return f"{value * 100:+.2f}%" if value is not None else '-'
+
+        lines = [
+            f"📊 回测 {self.settings.start_date} ~ {self.settings.end_date}，"
+            f"{len(self.runs)} 次分析（本次运行 {self.executed}，断点恢复 {self.resumed}），"
+            f"反思 {self.reflections} 次，最大并发 {self.max_concurrency}，耗时 {self.wall_s:.1f}s",
+            f"{'股票':<10}{'决策':>6}{'准确率':>9}{'决策收益':>10}{'策略收益':>10}{'基准收益':>10}"
+            f"{'最大回撤':>10}{'夏普':>8}{'仓位':>8}",
+        ]
+        rows = list(self.metrics.values()) + ([self.overall] if self.overall else [])
+        for item in rows:
+            hit_rate = f"{item.hit_rate * 100:.1f}%" if item.hit_rate is not None else '-'
+            sharpe = f"{item.sharpe:.2f}" if item.sharpe is not None else '-'
+            lines.append(
+                f"{item.ticker:<10}{item.decisions:>6}{hit_rate:>9}{pct(item.avg_decision_return):>10}"
+                f"{pct(item.total_return):>10}{pct(item.benchmark_return):>10}{pct(item.max_drawdown):>10}"
+                f"{sharpe:>8}{item.exposure * 100:>7.0f}%"
+            )
+        return '\n'.join(lines)
+
+
+def _default_graph_factory(analysts: List[str]) -> Callable[[Dict[str, Any]], Any]:
+    def factory(config: Dict[str, Any]):
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+        return TradingAgentsGraph(analysts, config=config)
+    return factory
+
+
+class BacktestEngine:
+    """按记忆依赖并行调度 (股票, 交易日) 分析的回测引擎"""
+
+    def __init__(self, settings: BacktestSettings, config: Optional[Dict[str, Any]] = None,
+                 price_source: Optional[PriceSource] = None,
+                 graph_factory: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        """
+        Args:
+            settings: 回测参数
+            config: TradingAgentsGraph 配置，默认 DEFAULT_CONFIG
+            price_source: 价格来源，默认A股日线库
+            graph_factory: 按配置创建分析图（每个线程、每个记忆范围一个实例）
+        """
+        if settings.memory_scope not in MEMORY_SCOPES:
+            raise ValueError(f"无效的记忆范围: {settings.memory_scope}，可选 {MEMORY_SCOPES}")
+        if settings.horizon < 1 or settings.step < 1:
+            raise ValueError("持有期和决策间隔至少为 1 个交易日")
+        self.settings = settings
+        self.config = copy.deepcopy(config or DEFAULT_CONFIG)
+        self.price_source = price_source or BarStorePriceSource()
+        self.graph_factory = graph_factory or _default_graph_factory(settings.analysts)
+        self.checkpoint = BacktestCheckpoint(settings.output_dir)
+        self.use_memory = settings.memory_scope != 'none' and self.config.get('memory_enabled', True)
+
+        # 记忆集合的前缀：同一进程中的不同回测互不影响，续跑时保持一致
+        digest = hashlib.sha1(str(self.checkpoint.directory.resolve()).encode('utf-8')).hexdigest()[:8]
+        self._namespace = f"bt{digest}"
+        self._local = threading.local()
+        self._trading_days: Dict[str, List[str]] = {}
+        self._runs: Dict[RunKey, BacktestRun] = {}
+        self._scopes: Dict[Optional[str], List[BacktestRun]] = {}
+        self._states: Dict[RunKey, Dict[str, Any]] = {}
+        self._done = set()
+        self._reflected = set()
+
+    # ---------- 计划 ----------
+
+    def _scope_of(self, ticker: str) -> Optional[str]:
+        if not self.use_memory:
+            return None
+        return ticker if self.settings.memory_scope == 'ticker' else 'shared'
+
+    def plan(self) -> List[BacktestRun]:
+        """按本地价格生成全部 (股票, 交易日) 分析及其持有期"""
+        settings = self.settings
+        price_end = (datetime.strptime(settings.end_date, '%Y-%m-%d')
+                     + timedelta(days=PRICE_LOOKAHEAD_DAYS + 2 * (settings.horizon + settings.step))).strftime('%Y-%m-%d')
+        runs = []
+        for ticker in settings.tickers:
+            closes = self.price_source.closes(ticker, settings.start_date, price_end)
+            if closes.empty:
+                logger.warning(f"⚠️ [回测] {ticker} 没有本地价格，按交易日历取交易日且不计算收益")
+                days = list(calendar_for_symbol(ticker).trading_days(settings.start_date, settings.end_date)
+                            .strftime('%Y-%m-%d'))
+                closes = pd.Series([None] * len(days), index=days, dtype=object)
+            days = list(closes.index)
+            self._trading_days[ticker] = days
+            positions = [i for i, day in enumerate(days) if settings.start_date <= day <= settings.end_date]
+            decisions = positions[::settings.step]
+            for n, i in enumerate(decisions):
+                next_i = decisions[n + 1] if n + 1 < len(decisions) else i + settings.step
+                outcome_i = i + settings.horizon
+                runs.append(BacktestRun(
+                    ticker=ticker, trade_date=days[i], price=self._price(closes, i),
+                    next_date=days[next_i] if next_i < len(days) else None,
+                    next_price=self._price(closes, next_i),
+                    outcome_date=days[outcome_i] if outcome_i < len(days) else None,
+                    outcome_price=self._price(closes, outcome_i),
+                ))
+        return runs
+
+    @staticmethod
+    def _price(closes: pd.Series, i: int) -> Optional[float]:
+        if i >= len(closes) or closes.iloc[i] is None or pd.isna(closes.iloc[i]):
+            return None
+        return float(closes.iloc[i])
+
+    # ---------- 分析图 ----------
+
+    def _graph(self, scope: Optional[str]):
+        """当前线程在该记忆范围的分析图（图实例有状态，不能跨线程共享）"""
+        graphs = getattr(self._local, 'graphs', None)
+        if graphs is None:
+            graphs = self._local.graphs = {}
+        if scope not in graphs:
+            config = copy.deepcopy(self.config)
+            config.update({
+                'memory_enabled': self.use_memory,
+                'log_states': False,  # 状态写入回测目录
+                'trace_summary': False,
+                # 分析结果缓存的指纹不区分时点，可能命中实盘分析（用到决策日之后的数据）；
+                # 启用记忆时结果还取决于记忆内容，因此回测总是不使用分析结果缓存
+                'analysis_cache_enabled': False,
+            })
+            if self.use_memory:
+                config['memory_namespace'] = re.sub(r'[^A-Za-z0-9_-]', '_', f"{self._namespace}_{scope}")
+            graphs[scope] = self.graph_factory(config)
+        return graphs[scope]
+
+    # ---------- 依赖 ----------
+
+    def _ready(self, run: BacktestRun) -> bool:
+        """持有期终点不晚于该交易日的决策都已反思"""
+        if not self.use_memory:
+            return True
+        for other in self._scopes.get(self._scope_of(run.ticker), ()):
+            if other.outcome_return is None or other.outcome_date > run.trade_date:
+                continue
+            # 分析失败的决策不反思
+            if other.key not in self._reflected and not (other.key in self._done and other.error):
+                return False
+        return True
+
+    def _can_reflect(self, run: BacktestRun) -> bool:
+        """所有早于持有期终点的分析都已完成"""
+        return all(other.key in self._done for other in self._scopes.get(self._scope_of(run.ticker), ())
+                   if other.trade_date < run.outcome_date)
+
+    def _reflection_returns(self, run: BacktestRun) -> str:
+        change = run.outcome_return
+        position_return = directional_return(run.action, change)
+        return (f"{position_return * 100:+.2f}%（决策: {run.action}，持有 {self.settings.horizon} 个交易日"
+                f"至 {run.outcome_date}，股价涨跌 {change * 100:+.2f}%）")
+
+    def _apply_reflections(self, report: BacktestReport):
+        for run in sorted(self._runs.values(), key=lambda r: (r.outcome_date or '', r.ticker)):
+            key = run.key
+            if (key not in self._done or key in self._reflected or run.error
+                    or run.outcome_return is None or not self._can_reflect(run)):
+                continue
+            state = self._states.get(key) or self.checkpoint.load_state(*key)
+            if state is None:
+                logger.warning(f"⚠️ [回测] 缺少 {run.ticker} {run.trade_date} 的分析状态，跳过反思")
+                self._reflected.add(key)
+                continue
+            returns = self._reflection_returns(run)
+            lessons = self._graph(self._scope_of(run.ticker)).reflect_and_remember(returns, state=state)
+            self.checkpoint.append_reflection(ReflectionRecord(run.ticker, run.trade_date, returns, lessons or {}))
+            self._reflected.add(key)
+            self._states.pop(key, None)
+            report.reflections += 1
+            logger.debug(f"🧠 [回测] 反思 {run.ticker} {run.trade_date}: {returns}")
+
+    # ---------- 执行 ----------
+
+    def _execute(self, run: BacktestRun) -> BacktestRun:
+        """在工作线程中运行一次分析"""
+        graph = self._graph(self._scope_of(run.ticker))
+        start = time.perf_counter()
+        try:
+            # 数据接口的日期截断到决策日，历史数据写入时点快照供之后的运行复用
+            with as_of(run.trade_date):
+                final_state, decision = graph.propagate(run.ticker, run.trade_date)
+        except Exception as e:
+            run.error = f"{type(e).__name__}: {e}"
+            run.wall_s = time.perf_counter() - start
+            logger.error(f"❌ [回测] {run.ticker} {run.trade_date} 分析失败: {e}")
+            return run
+        run.wall_s = time.perf_counter() - start
+        decision = decision if isinstance(decision, dict) else {'action': str(decision)}
+        run.action = str(decision.get('action') or '持有')
+        run.target_price = decision.get('target_price')
+        run.confidence = decision.get('confidence')
+        run.risk_score = decision.get('risk_score')
+        state = snapshot_state(final_state)
+        self.checkpoint.save_state(run.ticker, run.trade_date, state)
+        if self.use_memory:
+            self._states[run.key] = state
+        return run
+
+    def _restore(self, report: BacktestReport, pending: Dict[RunKey, BacktestRun]):
+        """从断点恢复已完成的分析和反思"""
+        runs, reflections = self.checkpoint.load()
+        for key, saved in runs.items():
+            if key not in pending or saved.error is not None or not saved.action:
+                continue
+            run = pending.pop(key)
+            run.action, run.target_price = saved.action, saved.target_price
+            run.confidence, run.risk_score, run.wall_s = saved.confidence, saved.risk_score, saved.wall_s
+            self._done.add(key)
+            report.resumed += 1
+        for key, record in reflections.items():
+            if key not in self._done or not self.use_memory:
+                continue
+            state = self.checkpoint.load_state(*key)
+            if state is not None:
+                self._graph(self._scope_of(key[0])).restore_memories(state, record.lessons)
+            self._reflected.add(key)
+            report.reflections += 1
+        if report.resumed:
+            logger.info(f"♻️ [回测] 从断点恢复 {report.resumed} 次分析、{report.reflections} 次反思")
+
+    def run(self) -> BacktestReport:
+        """运行回测并汇总绩效"""
+        settings = self.settings
+        started = time.perf_counter()
+        report = BacktestReport(settings=settings)
+
+        runs = self.plan()
+        self._runs = {run.key: run for run in runs}
+        for run in runs:
+            self._scopes.setdefault(self._scope_of(run.ticker), []).append(run)
+
+        if not settings.resume:
+            self.checkpoint.reset()
+        if not self.checkpoint.check_meta(settings.meta()):
+            logger.warning(f"⚠️ [回测] 回测参数与断点不一致，已完成的 (股票, 日期) 仍会复用: {settings.output_dir}")
+        pending = dict(self._runs)
+        if settings.resume:
+            self._restore(report, pending)
+
+        queue = sorted(pending.values(), key=lambda r: (r.trade_date, r.ticker))
+        total = len(runs)
+        logger.info(f"🚀 [回测] {len(settings.tickers)} 只股票，{total} 次分析（待运行 {len(queue)}），"
+                    f"持有期 {settings.horizon}，记忆范围 {settings.memory_scope if self.use_memory else 'none'}，"
+                    f"并发 {settings.max_workers}")
+
+        with ThreadPoolExecutor(max_workers=settings.max_workers, thread_name_prefix='backtest') as pool:
+            futures = {}
+            while queue or futures:
+                if self.use_memory:
+                    self._apply_reflections(report)
+                # 队列按日期排序：同一记忆范围内某天未就绪时，之后的日期也不会就绪
+                blocked = set()
+                for run in list(queue):
+                    if len(futures) >= settings.max_workers:
+                        break
+                    scope = self._scope_of(run.ticker)
+                    if scope in blocked:
+                        continue
+                    if self._ready(run):
+                        queue.remove(run)
+                        futures[pool.submit(self._execute, run)] = run
+                    elif scope is not None:
+                        blocked.add(scope)
+                report.max_concurrency = max(report.max_concurrency, len(futures))
+                if not futures:
+                    raise RuntimeError(f"回测调度无法继续: {len(queue)} 次分析的依赖未满足")
+
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    run = futures.pop(future)
+                    self.checkpoint.append_run(run)
+                    self._done.add(run.key)
+                    report.executed += 1
+                    logger.info(f"📈 [回测] {len(self._done)}/{total} {run.ticker} {run.trade_date}: "
+                                f"{run.action or run.error} ({run.wall_s:.1f}s)")
+        if self.use_memory:
+            self._apply_reflections(report)
+
+        report.runs = sorted(self._runs.values(), key=lambda r: (r.ticker, r.trade_date))
+        for ticker in settings.tickers:
+            ticker_runs = [run for run in report.runs if run.ticker == ticker]
+            if ticker_runs:
+                report.metrics[ticker] = ticker_metrics(ticker_runs, self._trading_days,
+                                                        settings.long_only, settings.cost_bps)
+        span = max((sum(1 for day in days if settings.start_date <= day <= settings.end_date)
+                    for days in self._trading_days.values()), default=0)
+        report.overall = portfolio_metrics(list(report.metrics.values()), span)
+        report.wall_s = time.perf_counter() - started
+        self._save_report(report)
+        logger.info(report.summary())
+        return report
+
+    def _save_report(self, report: BacktestReport):
+        path = self.checkpoint.directory / 'report.json'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report.to_dict(), f, ensure_ascii=False, indent=2, default=str)
+
+
+def run_backtest(tickers: List[str], start_date: str, end_date: str,
+                 config: Optional[Dict[str, Any]] = None, **kwargs) -> BacktestReport:
+    """便捷函数：按默认价格来源和分析图运行回测，其余参数见 BacktestSettings"""
+    settings = BacktestSettings(tickers=list(tickers), start_date=start_date, end_date=end_date, **kwargs)
+    return BacktestEngine(settings, config=config).run()
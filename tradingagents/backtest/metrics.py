@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+回测绩效统计
+每个决策的仓位持有到下一个决策日，按此计算策略净值；决策方向的准确率按反思用的持有期计算
+"""
+
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .checkpoint import BacktestRun
+
+# 年化使用的交易日数
+TRADING_DAYS_PER_YEAR = 252
+
+ACTION_BUY = '买入'
+ACTION_HOLD = '持有'
+ACTION_SELL = '卖出'
+
+
+def position_for(action: str, long_only: bool = True) -> Optional[float]:
+    """决策对应的仓位：买入满仓，卖出空仓（允许做空时为 -1），持有维持原仓位（None）"""
+    if action == ACTION_BUY:
+        return 1.0
+    if action == ACTION_SELL:
+        return 0.0 if long_only else -1.0
+    return None
+
+
+def directional_return(action: str, change: Optional[float]) -> Optional[float]:
+    """按决策方向计的收益：买入为涨跌幅，卖出为其相反数，持有为 0"""
+    if change is None:
+        return None
+    if action == ACTION_BUY:
+        return change
+    if action == ACTION_SELL:
+        return -change
+    return 0.0
+
+
+@dataclass
+class PerformanceMetrics:
+    """一只股票（或组合）的回测绩效"""
+    ticker: str
+    decisions: int = 0
+    actions: Dict[str, int] = field(default_factory=dict)
+    failed: int = 0
+    directional: int = 0                      # 买入/卖出且持有期已结束的决策数
+    hit_rate: Optional[float] = None          # 买入/卖出决策在持有期内方向正确的比例
+    avg_decision_return: Optional[float] = None  # 买入/卖出决策的平均方向收益
+    total_return: float = 0.0
+    benchmark_return: float = 0.0             # 同期买入持有
+    annualized_return: Optional[float] = None
+    volatility: Optional[float] = None
+    sharpe: Optional[float] = None
+    max_drawdown: float = 0.0
+    exposure: float = 0.0                     # 持仓时间占比
+    trades: int = 0                           # 仓位变化次数
+    equity: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _curve_stats(metrics: PerformanceMetrics, equity: pd.Series, days: int):
+    """由净值曲线计算总收益、年化、波动率、夏普和最大回撤"""
+    if equity.empty:
+        return
+    metrics.equity = {date: round(float(value), 6) for date, value in equity.items()}
+    metrics.total_return = float(equity.iloc[-1] - 1)
+    metrics.max_drawdown = float((equity / equity.cummax() - 1).min())
+    period_returns = equity.pct_change().fillna(equity.iloc[0] - 1)
+    if days > 0:
+        metrics.annualized_return = float(equity.iloc[-1] ** (TRADING_DAYS_PER_YEAR / days) - 1)
+    if len(period_returns) > 1 and days > 0:
+        periods_per_year = TRADING_DAYS_PER_YEAR * len(period_returns) / days
+        std = float(period_returns.std())
+        metrics.volatility = std * math.sqrt(periods_per_year)
+        if std > 0:
+            metrics.sharpe = float(period_returns.mean() / std * math.sqrt(periods_per_year))
+
+
+def ticker_metrics(runs: Iterable[BacktestRun], trading_days: Dict[str, List[str]],
+                   long_only: bool = True, cost_bps: float = 0.0) -> PerformanceMetrics:
+    """
+    单只股票的绩效
+
+    Args:
+        runs: 该股票的分析记录
+        trading_days: 股票 -> 交易日列表（用于计算持有天数）
+        long_only: 卖出是否只清仓（否则做空）
+        cost_bps: 每次仓位变化的交易成本（基点）
+    """
+    runs = sorted(runs, key=lambda run: run.trade_date)
+    ticker = runs[0].ticker if runs else ''
+    metrics = PerformanceMetrics(ticker=ticker)
+    days_index = {date: i for i, date in enumerate(trading_days.get(ticker, []))}
+
+    position, held, total_days = 0.0, 0, 0
+    directional = []
+    value, equity = 1.0, {}
+    first_price, last_price = None, None
+    for run in runs:
+        if run.error is not None or not run.action:
+            metrics.failed += 1
+            continue
+        metrics.decisions += 1
+        metrics.actions[run.action] = metrics.actions.get(run.action, 0) + 1
+        if run.action != ACTION_HOLD:
+            change = directional_return(run.action, run.outcome_return)
+            if change is not None:
+                directional.append(change)
+
+        target = position_for(run.action, long_only)
+        if target is not None and target != position:
+            metrics.trades += 1
+            value *= 1 - abs(target - position) * cost_bps / 10000
+            position = target
+        change = run.period_return
+        if change is None:
+            continue
+        first_price = first_price if first_price is not None else run.price
+        last_price = run.next_price
+        value *= 1 + position * change
+        equity[run.next_date] = value
+        days = days_index.get(run.next_date, 0) - days_index.get(run.trade_date, 0)
+        total_days += max(days, 1)
+        held += max(days, 1) if position else 0
+
+    metrics.directional = len(directional)
+    if directional:
+        metrics.hit_rate = sum(1 for change in directional if change > 0) / len(directional)
+        metrics.avg_decision_return = sum(directional) / len(directional)
+    if first_price:
+        metrics.benchmark_return = last_price / first_price - 1
+    metrics.exposure = held / total_days if total_days else 0.0
+    _curve_stats(metrics, pd.Series(equity, dtype=float), total_days)
+    return metrics
+
+
+def portfolio_metrics(per_ticker: List[PerformanceMetrics], days: int) -> PerformanceMetrics:
+    """等权组合：各股票净值按日期对齐（缺失时沿用上一值）后取平均"""
+    metrics = PerformanceMetrics(ticker='ALL')
+    for item in per_ticker:
+        metrics.decisions += item.decisions
+        metrics.failed += item.failed
+        metrics.trades += item.trades
+        for action, count in item.actions.items():
+            metrics.actions[action] = metrics.actions.get(action, 0) + count
+        metrics.directional += item.directional
+    if metrics.directional:
+        scored = [item for item in per_ticker if item.directional]
+        metrics.hit_rate = sum(item.hit_rate * item.directional for item in scored) / metrics.directional
+        metrics.avg_decision_return = sum(
+            item.avg_decision_return * item.directional for item in scored) / metrics.directional
+    if per_ticker:
+        metrics.benchmark_return = sum(item.benchmark_return for item in per_ticker) / len(per_ticker)
+        metrics.exposure = sum(item.exposure for item in per_ticker) / len(per_ticker)
+    curves = [pd.Series(item.equity, dtype=float) for item in per_ticker if item.equity]
+    if curves:
+        equity = pd.concat(curves, axis=1).sort_index().ffill().fillna(1.0).mean(axis=1)
+        _curve_stats(metrics, equity, days)
+    return metrics
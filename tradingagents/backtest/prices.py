@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+回测价格来源
+为回测提供每只股票的交易日序列和收盘价（用于计算决策收益和反思），只读取本地数据：
+
+- BarStorePriceSource: A股日线库（daily_bar_store），用涨跌幅复合为复权收益指数
+- FramePriceSource: 调用方提供的价格表（美股/港股的本地数据、测试数据等）
+
+价格序列以 'YYYY-MM-DD' 字符串为索引并按日期升序，只包含有行情的交易日
+"""
+
+from typing import Dict, Mapping, Optional, Union
+
+import pandas as pd
+
+from tradingagents.dataflows.daily_bar_store import DailyBarStore, _compact_date, _dashed_date
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+def to_ts_code(symbol: str) -> Optional[str]:
+    """6位A股代码转换为 Tushare 格式（000001 -> 000001.SZ），非A股返回 None"""
+    symbol = str(symbol).strip().upper()
+    if '.' in symbol:
+        code, suffix = symbol.split('.', 1)
+        return symbol if code.isdigit() and suffix in ('SH', 'SZ', 'BJ') else None
+    if len(symbol) != 6 or not symbol.isdigit():
+        return None
+    if symbol.startswith(('6', '5', '9')):
+        return f"{symbol}.SH"
+    if symbol.startswith(('0', '3', '1', '2')):
+        return f"{symbol}.SZ"
+    return f"{symbol}.BJ"
+
+
+class PriceSource:
+    """价格来源接口"""
+
+    def closes(self, ticker: str, start_date: str, end_date: str) -> pd.Series:
+        """
+        区间内的收盘价（或复权收益指数，只用于计算比值）
+
+        Returns:
+            pd.Series: 'YYYY-MM-DD' 索引、升序；没有数据时为空
+        """
+        raise NotImplementedError
+
+
+class BarStorePriceSource(PriceSource):
+    """从A股日线库读取价格"""
+
+    def __init__(self, store: Optional[DailyBarStore] = None):
+        if store is None:
+            from tradingagents.dataflows.daily_bar_store import get_daily_bar_store
+            store = get_daily_bar_store()
+        self.store = store
+
+    def closes(self, ticker: str, start_date: str, end_date: str) -> pd.Series:
+        ts_code = to_ts_code(ticker)
+        if ts_code is None:
+            return pd.Series(dtype=float)
+        bars = self.store.read_symbols([ts_code], start_date, end_date)
+        if bars.empty:
+            return pd.Series(dtype=float)
+        index = [_dashed_date(date) for date in bars['trade_date']]
+        if 'pct_chg' in bars.columns and bars['pct_chg'].notna().all():
+            # 涨跌幅已考虑除权除息，复合后的指数与复权收盘价的比值一致
+            values = (1 + bars['pct_chg'].astype(float) / 100).cumprod().values
+        else:
+            values = bars['close'].astype(float).values
+        return pd.Series(values, index=index, dtype=float)
+
+
+class FramePriceSource(PriceSource):
+    """由调用方提供的价格表"""
+
+    def __init__(self, prices: Mapping[str, Union[pd.Series, pd.DataFrame]]):
+        """
+        Args:
+            prices: 股票代码 -> 收盘价序列（日期索引），或含 date/trade_date 与 close 列的 DataFrame
+        """
+        self._prices: Dict[str, pd.Series] = {
+            str(ticker).upper(): self._normalize(data) for ticker, data in prices.items()
+        }
+
+    @staticmethod
+    def _normalize(data: Union[pd.Series, pd.DataFrame]) -> pd.Series:
+        if isinstance(data, pd.DataFrame):
+            date_column = next((c for c in ('date', 'Date', 'trade_date') if c in data.columns), None)
+            close_column = next((c for c in ('close', 'Close', 'adj_close', 'Adj Close') if c in data.columns), None)
+            if close_column is None:
+                raise ValueError(f"价格表缺少收盘价列: {list(data.columns)}")
+            series = data.set_index(date_column)[close_column] if date_column else data[close_column]
+        else:
+            series = data
+        index = [_dashed_date(_compact_date(str(date)[:10])) for date in series.index]
+        return pd.Series(series.astype(float).values, index=index).sort_index()
+
+    def closes(self, ticker: str, start_date: str, end_date: str) -> pd.Series:
+        series = self._prices.get(str(ticker).upper())
+        if series is None:
+            return pd.Series(dtype=float)
+        start, end = _dashed_date(start_date), _dashed_date(end_date)
+        return series[(series.index >= start) & (series.index <= end)]
@@ -0,0 +1,17 @@
+"""
+离线基准测试：脚本化假模型 + 夹具数据源，端到端测量分析流水线自身的开销
+"""
+
+from .fake_llm import ScriptedChatModel
+from .fake_providers import FakeDataProviders, FixtureSet, PROVIDER_TARGETS
+from .harness import (
+    BenchmarkHarness, BenchmarkReport, BenchmarkScenario, MetricDelta, NodeMetrics, RunMetrics,
+    compare_reports, format_comparison, format_report, run_benchmark,
+)
+
+__all__ = [
+    "ScriptedChatModel",
+    "FakeDataProviders", "FixtureSet", "PROVIDER_TARGETS",
+    "BenchmarkHarness", "BenchmarkReport", "BenchmarkScenario", "MetricDelta", "NodeMetrics", "RunMetrics",
+    "compare_reports", "format_comparison", "format_report", "run_benchmark",
+]
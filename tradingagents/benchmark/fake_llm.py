@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+脚本化的假聊天模型
+不访问任何 LLM 服务，按固定规则生成确定性的回复，用于离线基准测试：
+
+- 绑定了工具且对话中还没有工具结果时，对每个工具生成一次调用（参数按工具 schema 推断）
+- 信号提取提示词（要求输出 action/target_price/risk_score 的 JSON）返回固定的 JSON
+- 其他情况返回指定长度的分析报告文本，内容由提示词摘要决定
+- 可配置每次调用的固定延迟和抖动，用来模拟真实模型的响应时间
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, ClassVar, Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+from tradingagents.llm_adapters.llm_cache import cached_generate
+from tradingagents.utils.token_counter import count_tokens
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 报告正文的循环句式
+REPORT_SENTENCES = (
+    "近期价格在均线附近震荡，成交量较前期温和放大。",
+    "MACD 柱状线由负转正，短期动能有所改善。",
+    "RSI 处于 55 附近，尚未进入超买区间。",
+    "基本面方面营收保持稳定增长，毛利率小幅提升。",
+    "新闻面整体中性偏正面，未见重大利空事件。",
+    "市场情绪较为谨慎，投资者关注宏观政策变化。",
+    "估值处于历史中位数附近，安全边际一般。",
+    "需要关注下一季度财报与行业竞争格局的变化。",
+)
+
+# 工具参数推断：开始日期相对分析日期的回看天数
+TOOL_LOOKBACK_DAYS = 30
+
+
+def _message_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(message.content) for message in messages)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """确定性的假聊天模型（参见模块说明）"""
+    uses_llm_cache: ClassVar[bool] = True  # 与真实适配器一致，接受 llm_cache 参数（见 llm_cache.cached_invoke_kwargs）
+
+    model_name: str = "scripted-fake"
+    temperature: float = 0.0
+    ticker: str = "AAPL"
+    trade_date: str = "2024-05-10"
+    latency: float = 0.0            # 每次调用的固定延迟（秒）
+    jitter: float = 0.0             # 额外的随机延迟上限（秒），由 seed 决定
+    response_chars: int = 1200      # 文本回复的长度
+    max_tool_calls: int = 8         # 单次回复最多生成的工具调用数
+    decision: str = "持有"           # 报告和信号中的交易建议
+    responses: Dict[str, str] = {}  # 提示词包含某段文字时直接返回对应回复（优先于默认规则）
+    use_llm_cache: bool = True      # 是否经过 LLM 响应缓存（与真实适配器一致）
+    seed: int = 0
+
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+    _rng: Any = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def calls(self) -> int:
+        """实际生成的次数（不含 LLM 缓存命中）"""
+        return self._calls
+
+    def set_context(self, ticker: str, trade_date: str):
+        """设置本次分析的股票和日期（用于推断工具参数）"""
+        self.ticker = ticker
+        self.trade_date = str(trade_date)
+
+    def reset(self):
+        with self._lock:
+            self._calls = 0
+            self._rng = random.Random(self.seed)
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        if not self.use_llm_cache:
+            kwargs.pop("llm_cache", None)
+            return self._respond(messages, kwargs)
+        result, _ = cached_generate(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: self._respond(messages, kwargs),
+        )
+        return result
+
+    # ---------- 回复规则 ----------
+
+    def _respond(self, messages: List[BaseMessage], kwargs: Dict[str, Any]) -> ChatResult:
+        with self._lock:
+            self._calls += 1
+            if self._rng is None:
+                self._rng = random.Random(self.seed)
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        prompt = _message_text(messages)
+        tools = kwargs.get("tools") or []
+        if tools and not any(isinstance(message, ToolMessage) for message in messages):
+            message = AIMessage(content="", tool_calls=self._tool_calls(tools, prompt))
+        else:
+            message = AIMessage(content=self._text(prompt))
+
+        tokens_in = count_tokens(prompt, self.model_name)
+        tokens_out = count_tokens(str(message.content), self.model_name)
+        message.usage_metadata = {
+            "input_tokens": tokens_in, "output_tokens": tokens_out, "total_tokens": tokens_in + tokens_out,
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={
+                "model_name": self.model_name,
+                "token_usage": {"prompt_tokens": tokens_in, "completion_tokens": tokens_out,
+                                "total_tokens": tokens_in + tokens_out},
+            },
+        )
+
+    def _text(self, prompt: str) -> str:
+        for pattern, response in self.responses.items():
+            if pattern in prompt:
+                return response
+        if "target_price" in prompt and "risk_score" in prompt:
+            return self._signal_json()
+        return self._report(prompt)
+
+    def _signal_json(self) -> str:
+        return json.dumps({
+            "action": self.decision,
+            "target_price": 100.0,
+            "confidence": 0.7,
+            "risk_score": 0.5,
+            "reasoning": f"{self.ticker} 基准测试固定决策",
+        }, ensure_ascii=False)
+
+    def _report(self, prompt: str) -> str:
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        start = int(digest, 16) % len(REPORT_SENTENCES)
+        lines = [f"## {self.ticker} 分析报告（{self.trade_date}，{digest}）", ""]
+        length = 0
+        i = 0
+        while length < self.response_chars:
+            sentence = REPORT_SENTENCES[(start + i) % len(REPORT_SENTENCES)]
+            lines.append(sentence)
+            length += len(sentence)
+            i += 1
+        lines += ["", f"最终交易建议: **{self.decision}**"]
+        return "\n".join(lines)
+
+    # ---------- 工具调用 ----------
+
+    def _tool_calls(self, tools: List[Dict[str, Any]], prompt: str) -> List[Dict[str, Any]]:
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        calls = []
+        for i, tool in enumerate(tools[:self.max_tool_calls]):
+            function = tool.get("function", tool)
+            calls.append({
+                "name": function["name"],
+                "args": self._tool_args(function.get("parameters", {})),
+                "id": f"call_{digest}_{i}",
+                "type": "tool_call",
+            })
+        return calls
+
+    def _tool_args(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """按参数名和类型推断工具参数"""
+        args = {}
+        for name, schema in (parameters.get("properties") or {}).items():
+            key = name.lower()
+            kind = schema.get("type")
+            if "start" in key and "date" in key:
+                start = datetime.strptime(self.trade_date, "%Y-%m-%d") - timedelta(days=TOOL_LOOKBACK_DAYS)
+                args[name] = start.strftime("%Y-%m-%d")
+            elif "date" in key:
+                args[name] = self.trade_date
+            elif key in ("ticker", "symbol", "stock_code", "company", "company_name"):
+                args[name] = self.ticker
+            elif key == "query":
+                args[name] = f"{self.ticker} stock"
+            elif key == "freq":
+                args[name] = "quarterly"
+            elif key == "online":
+                args[name] = True
+            elif key == "indicator":
+                args[name] = "rsi"
+            elif kind == "integer":
+                args[name] = 7 if "day" in key else 5
+            elif kind == "number":
+                args[name] = 1.0
+            elif kind == "boolean":
+                args[name] = False
+            else:
+                args[name] = self.ticker
+        return args
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+离线数据源替身
+把访问网络的数据接口替换为读取录制好的夹具（fixtures）数据：
+
+- 夹具为 JSON：{接口名: {股票代码或 "*": 返回内容}}，未录制的调用按接口类型生成确定性的合成数据
+- 原接口带 dataflow_memo 时，替身同样经过进程内结果缓存，缓存层的行为与线上一致
+- 可配置每次调用的延迟，模拟数据源的响应时间
+"""
+
+import importlib
+import json
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tradingagents.dataflows.prefetch import dataflow_memo
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 被替换的接口：(模块, 属性)，属性可以是 "类名.方法名"
+PROVIDER_TARGETS: Tuple[Tuple[str, str], ...] = (
+    ('tradingagents.dataflows.interface', 'get_YFin_data_online'),
+    ('tradingagents.dataflows.interface', 'get_stock_stats_indicators_window'),
+    ('tradingagents.dataflows.interface', 'get_stock_news_openai'),
+    ('tradingagents.dataflows.interface', 'get_global_news_openai'),
+    ('tradingagents.dataflows.interface', 'get_google_news'),
+    ('tradingagents.dataflows.interface', 'get_fundamentals_openai'),
+    ('tradingagents.dataflows.interface', 'get_fundamentals_finnhub'),
+    ('tradingagents.dataflows.interface', 'get_china_stock_data_unified'),
+    ('tradingagents.dataflows.interface', 'get_china_stock_info_unified'),
+    ('tradingagents.dataflows.interface', 'get_hk_stock_data_unified'),
+    ('tradingagents.dataflows.interface', 'get_hk_stock_info_unified'),
+    ('tradingagents.dataflows.realtime_news_utils', 'get_realtime_stock_news'),
+    ('tradingagents.dataflows.improved_hk_utils', 'get_hk_company_name_improved'),
+    ('tradingagents.dataflows.optimized_china_data', 'OptimizedChinaDataProvider._generate_fundamentals_report'),
+)
+
+# 默认夹具文件
+DEFAULT_FIXTURES = Path(__file__).parent / 'fixtures' / 'default.json'
+
+# 返回行情数据的接口（合成数据为 OHLCV 表格）
+PRICE_PROVIDERS = ('get_YFin_data_online', 'get_china_stock_data_unified', 'get_hk_stock_data_unified')
+
+
+def _seed(name: str, args: tuple) -> int:
+    return zlib.crc32(f"{name}|{'|'.join(map(str, args))}".encode('utf-8'))
+
+
+def _synthetic_prices(name: str, args: tuple, chars: int) -> str:
+    symbol = str(args[0]) if args else 'UNKNOWN'
+    end = str(args[2]) if len(args) > 2 else datetime.now().strftime('%Y-%m-%d')
+    seed = _seed(name, args)
+    price = 20 + seed % 200
+    day = datetime.strptime(end, '%Y-%m-%d')
+    rows = []
+    length = 0
+    i = 0
+    while length < chars:
+        step = ((seed >> (i % 24)) % 7 - 3) / 100
+        close = round(price * (1 + step), 2)
+        row = (f"{(day - timedelta(days=i)).strftime('%Y-%m-%d')},{price:.2f},{max(price, close) * 1.01:.2f},"
+               f"{min(price, close) * 0.99:.2f},{close:.2f},{1000000 + (seed >> (i % 16)) % 500000}")
+        rows.append(row)
+        length += len(row)
+        price = close
+        i += 1
+    return f"# {symbol} 行情数据（离线夹具）\nDate,Open,High,Low,Close,Volume\n" + "\n".join(reversed(rows))
+
+
+def _synthetic_text(name: str, args: tuple, chars: int) -> str:
+    subject = str(args[0]) if args else name
+    seed = _seed(name, args)
+    lines = [f"## {name}: {subject}（离线夹具）"]
+    length = 0
+    i = 0
+    while length < chars:
+        line = f"- [{(seed + i) % 997:03d}] {subject} 相关资讯第 {i + 1} 条：市场关注度维持稳定，暂无重大异动。"
+        lines.append(line)
+        length += len(line)
+        i += 1
+    return "\n".join(lines)
+
+
+def _synthetic_info(name: str, args: tuple, chars: int):
+    symbol = str(args[0]) if args else 'UNKNOWN'
+    if name == 'get_hk_stock_info_unified':
+        return {'symbol': symbol, 'name': f'港股{symbol}', 'currency': 'HKD', 'exchange': 'HKEX', 'source': 'fixture'}
+    if name == 'get_hk_company_name_improved':
+        return f'港股{symbol}'
+    return f"股票代码: {symbol}\n股票名称: 测试公司{symbol}\n所属行业: 综合\n数据来源: 离线夹具"
+
+
+SYNTHESIZERS: Dict[str, Callable[[str, tuple, int], Any]] = {
+    'get_china_stock_info_unified': _synthetic_info,
+    'get_hk_stock_info_unified': _synthetic_info,
+    'get_hk_company_name_improved': _synthetic_info,
+}
+SYNTHESIZERS.update({name: _synthetic_prices for name in PRICE_PROVIDERS})
+
+
+class FixtureSet:
+    """录制的接口返回内容"""
+
+    def __init__(self, data: Optional[Dict[str, Dict[str, Any]]] = None, payload_chars: int = 4000):
+        """
+        Args:
+            data: {接口名: {股票代码或 "*": 返回内容}}
+            payload_chars: 合成数据的长度（字符）
+        """
+        self.data = data or {}
+        self.payload_chars = payload_chars
+        self.misses: Counter = Counter()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None, payload_chars: int = 4000) -> 'FixtureSet':
+        path = Path(path) if path else DEFAULT_FIXTURES
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), payload_chars)
+
+    def lookup(self, name: str, args: tuple) -> Any:
+        """按接口名和第一个参数查找，找不到时返回合成数据"""
+        entries = self.data.get(name, {})
+        key = str(args[0]) if args else '*'
+        if key in entries:
+            value = entries[key]
+        elif '*' in entries:
+            value = entries['*']
+        else:
+            self.misses[name] += 1
+            value = SYNTHESIZERS.get(name, _synthetic_text)(name, args, self.payload_chars)
+        return dict(value) if isinstance(value, dict) else value
+
+
+class FakeDataProviders:
+    """在 with 块内把 PROVIDER_TARGETS 替换为夹具数据"""
+
+    def __init__(self, fixtures: Optional[FixtureSet] = None, latency: float = 0.0,
+                 targets: Tuple[Tuple[str, str], ...] = PROVIDER_TARGETS):
+        """
+        Args:
+            fixtures: 夹具数据，默认为内置的 fixtures/default.json
+            latency: 每次调用的模拟延迟（秒）
+            targets: 要替换的接口
+        """
+        self.fixtures = fixtures or FixtureSet.load()
+        self.latency = latency
+        self.targets = targets
+        self.calls: Counter = Counter()
+        self._originals: List[Tuple[Any, str, Any]] = []
+        self._lock = threading.Lock()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def reset_counts(self):
+        with self._lock:
+            self.calls.clear()
+
+    def _make_fake(self, name: str, original: Callable) -> Callable:
+        def fake(*args, **kwargs):
+            with self._lock:
+                self.calls[name] += 1
+            if self.latency > 0:
+                time.sleep(self.latency)
+            return self.fixtures.lookup(name, args)
+
+        fake.__name__ = name
+        ttl = getattr(original, 'memo_ttl', None)
+        return dataflow_memo(ttl)(fake) if ttl is not None else fake
+
+    def install(self):
+        if self._originals:
+            return
+        for module_name, attribute in self.targets:
+            try:
+                owner = importlib.import_module(module_name)
+            except ImportError as e:
+                logger.warning(f"⚠️ [基准测试] 无法导入 {module_name}，跳过替换: {e}")
+                continue
+            *path, name = attribute.split('.')
+            for part in path:
+                owner = getattr(owner, part)
+            original = owner.__dict__[name] if isinstance(owner, type) else getattr(owner, name)
+            fake = self._make_fake(name, original)
+            # 类方法替换为静态方法，调用时不传 self
+            setattr(owner, name, staticmethod(fake) if isinstance(owner, type) else fake)
+            self._originals.append((owner, name, original))
+
+    def uninstall(self):
+        while self._originals:
+            owner, name, original = self._originals.pop()
+            setattr(owner, name, original)
+
+    def __enter__(self) -> 'FakeDataProviders':
+        self.install()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.uninstall()
+        return False
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+离线端到端基准测试
+用脚本化假模型和夹具数据源完整运行 TradingAgentsGraph.propagate，只测量流水线自身的开销：
+
+- 墙钟时间、CPU 时间、峰值内存（tracemalloc，单独一轮测量，不影响计时）
+- LLM 调用、工具调用、数据接口调用、各层缓存的命中/未命中次数
+- 每个图节点的 LLM 调用次数和提示词大小（字符/token）
+
+每轮的调用明细取自端到端追踪（tradingagents.utils.tracing）。结果可保存为 JSON，
+之后用 compare_reports 与基线比较，量化缓存、并发和提示词构造方面的改动
+"""
+
+import copy
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import nullcontext
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tradingagents.dataflows.prefetch import get_dataflow_memo
+from tradingagents.default_config import DEFAULT_CONFIG
+from tradingagents.llm_adapters.llm_cache import LLMResponseCache, get_llm_cache, set_llm_cache
+from tradingagents.utils.replay import replaying
+from tradingagents.utils.tracing import KIND_CACHE, KIND_DATA, KIND_LLM, KIND_NODE, KIND_TOOL, Trace
+
+from .fake_llm import ScriptedChatModel
+from .fake_providers import FakeDataProviders, FixtureSet
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 结果文件格式版本
+REPORT_VERSION = 1
+
+# 默认回归阈值：比基线慢/大 10% 视为回归
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# 不属于任何节点的调用（工具节点、图本身）
+GRAPH_NODE = '(graph)'
+
+
+@dataclass
+class BenchmarkScenario:
+    """一次基准测试的配置"""
+    tickers: List[str] = field(default_factory=lambda: ['AAPL'])
+    trade_date: str = '2024-05-10'
+    analysts: List[str] = field(default_factory=lambda: ['market', 'social', 'news', 'fundamentals'])
+    iterations: int = 3
+    warmup: int = 1
+    llm_latency: float = 0.0        # 假模型每次调用的延迟（秒）
+    llm_jitter: float = 0.0
+    data_latency: float = 0.0       # 夹具数据源每次调用的延迟（秒）
+    response_chars: int = 1200      # 假模型文本回复长度
+    payload_chars: int = 4000       # 合成数据长度
+    max_debate_rounds: int = 1
+    max_risk_discuss_rounds: int = 1
+    warm_caches: bool = False       # 各轮之间保留数据/LLM缓存（默认每轮冷启动）
+    llm_cache: bool = False         # 假模型是否经过 LLM 响应缓存
+    measure_memory: bool = True     # 额外运行一轮测量峰值内存
+    fixtures: Optional[str] = None  # 夹具文件，默认 fixtures/default.json
+    seed: int = 0
+    replay_dir: Optional[str] = None    # 录制归档目录：设置后回放录制的数据源和 LLM 流量，代替夹具
+    replay_latency_scale: float = 0.0   # 回放时录制耗时的倍数（0 为不等待）
+
+
+@dataclass
+class NodeMetrics:
+    """单个图节点的调用统计"""
+    llm_calls: int = 0
+    prompt_chars: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tool_calls: int = 0
+
+
+@dataclass
+class RunMetrics:
+    """一次 propagate 的测量结果"""
+    ticker: str
+    wall_s: float
+    cpu_s: float
+    decision: str = ''
+    llm_calls: int = 0
+    tool_calls: int = 0
+    data_calls: int = 0
+    provider_calls: int = 0
+    prompt_chars: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tools: Dict[str, int] = field(default_factory=dict)
+    cache: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    nodes: Dict[str, NodeMetrics] = field(default_factory=dict)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(tier.get('hits', 0) for tier in self.cache.values())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunMetrics':
+        data = dict(data)
+        data['nodes'] = {name: NodeMetrics(**node) for name, node in data.get('nodes', {}).items()}
+        return cls(**data)
+
+
+def _owning_node(span, spans_by_id) -> str:
+    parent = spans_by_id.get(span.parent_id)
+    while parent is not None:
+        if parent.kind == KIND_NODE:
+            return parent.name
+        parent = spans_by_id.get(parent.parent_id)
+    return GRAPH_NODE
+
+
+def collect_trace_metrics(trace: Trace, run: RunMetrics) -> RunMetrics:
+    """从一次分析的追踪中统计 LLM/工具/数据/缓存调用，按节点汇总"""
+    spans_by_id = {span.span_id: span for span in trace.spans}
+    tools: Dict[str, int] = defaultdict(int)
+    cache: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0})
+    nodes: Dict[str, NodeMetrics] = defaultdict(NodeMetrics)
+
+    for span in trace.spans:
+        attrs = span.attributes
+        if span.kind == KIND_LLM:
+            node = nodes[_owning_node(span, spans_by_id)]
+            node.llm_calls += 1
+            node.prompt_chars += attrs.get('prompt_chars', 0)
+            node.prompt_tokens += attrs.get('tokens_in') or 0
+            node.completion_tokens += attrs.get('tokens_out') or 0
+        elif span.kind == KIND_TOOL:
+            tools[attrs.get('tool', span.name)] += 1
+            nodes[_owning_node(span, spans_by_id)].tool_calls += 1
+        elif span.kind == KIND_DATA:
+            run.data_calls += 1
+        elif span.kind == KIND_CACHE:
+            cache[attrs.get('tier', span.name)]['hits' if attrs.get('cache_hit') else 'misses'] += 1
+
+    run.tools = dict(sorted(tools.items()))
+    run.cache = dict(sorted(cache.items()))
+    run.nodes = dict(nodes)
+    run.llm_calls = sum(node.llm_calls for node in nodes.values())
+    run.tool_calls = sum(tools.values())
+    run.prompt_chars = sum(node.prompt_chars for node in nodes.values())
+    run.prompt_tokens = sum(node.prompt_tokens for node in nodes.values())
+    run.completion_tokens = sum(node.completion_tokens for node in nodes.values())
+    return run
+
+
+@dataclass
+class BenchmarkReport:
+    """基准测试结果"""
+    scenario: BenchmarkScenario
+    runs: List[RunMetrics] = field(default_factory=list)
+    peak_alloc_mb: Optional[float] = None
+    created_at: str = ''
+    version: int = REPORT_VERSION
+
+    def _values(self, name: str) -> List[float]:
+        return [getattr(run, name) for run in self.runs]
+
+    def summary(self) -> Dict[str, Any]:
+        """各指标的中位数（时间另给出最小/最大值）"""
+        if not self.runs:
+            return {}
+        result = {}
+        for name in ('wall_s', 'cpu_s'):
+            values = self._values(name)
+            result[name] = statistics.median(values)
+            result[f'{name}_min'] = min(values)
+            result[f'{name}_max'] = max(values)
+        for name in ('llm_calls', 'tool_calls', 'data_calls', 'provider_calls', 'prompt_chars',
+                     'prompt_tokens', 'completion_tokens', 'cache_hits'):
+            result[name] = statistics.median(self._values(name))
+        if self.peak_alloc_mb is not None:
+            result['peak_alloc_mb'] = self.peak_alloc_mb
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': self.version,
+            'created_at': self.created_at,
+            'scenario': asdict(self.scenario),
+            'peak_alloc_mb': self.peak_alloc_mb,
+            'summary': self.summary(),
+            'runs': [asdict(run) for run in self.runs],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'BenchmarkReport':
+        return cls(
+            scenario=BenchmarkScenario(**data['scenario']),
+            runs=[RunMetrics.from_dict(run) for run in data.get('runs', [])],
+            peak_alloc_mb=data.get('peak_alloc_mb'),
+            created_at=data.get('created_at', ''),
+            version=data.get('version', REPORT_VERSION),
+        )
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, path: str) -> 'BenchmarkReport':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+class BenchmarkHarness:
+    """构建使用假模型和夹具数据源的分析图，并按场景重复运行"""
+
+    def __init__(self, scenario: Optional[BenchmarkScenario] = None):
+        self.scenario = scenario or BenchmarkScenario()
+        scenario = self.scenario
+        self.llm = ScriptedChatModel(
+            latency=scenario.llm_latency, jitter=scenario.llm_jitter,
+            response_chars=scenario.response_chars, seed=scenario.seed,
+            # 回放时假模型必须经过 cached_generate，才能替换为录制的响应
+            use_llm_cache=scenario.llm_cache or bool(scenario.replay_dir),
+        )
+        self.providers = FakeDataProviders(
+            FixtureSet.load(scenario.fixtures, scenario.payload_chars), latency=scenario.data_latency,
+        )
+        # 运行时会切换到临时工作目录
+        self.replay_dir = os.path.abspath(scenario.replay_dir) if scenario.replay_dir else None
+        self.graph = None
+
+    def build_config(self) -> Dict[str, Any]:
+        config = copy.deepcopy(DEFAULT_CONFIG)
+        config.update({
+            'llm_provider': 'benchmark',
+            'deep_think_llm': self.llm.model_name,
+            'quick_think_llm': self.llm.model_name,
+            'max_debate_rounds': self.scenario.max_debate_rounds,
+            'max_risk_discuss_rounds': self.scenario.max_risk_discuss_rounds,
+            'online_tools': True,
+            'memory_enabled': False,
+            'analysis_cache_enabled': False,
+            'trace_summary': False,
+        })
+        return config
+
+    def build_graph(self):
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+        self.graph = TradingAgentsGraph(
+            self.scenario.analysts, config=self.build_config(),
+            quick_thinking_llm=self.llm, deep_thinking_llm=self.llm,
+        )
+        return self.graph
+
+    def _reset_caches(self):
+        get_dataflow_memo().clear()
+        get_llm_cache().clear()
+
+    def run_once(self, ticker: str) -> RunMetrics:
+        """运行一次 propagate 并统计"""
+        if not self.scenario.warm_caches:
+            self._reset_caches()
+        self.llm.set_context(ticker, self.scenario.trade_date)
+        self.llm.reset()
+        self.providers.reset_counts()
+
+        # 每轮从归档开头回放
+        replay = (replaying(self.replay_dir, self.scenario.replay_latency_scale)
+                  if self.replay_dir else nullcontext())
+        with replay as session:
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            _, decision = self.graph.propagate(ticker, self.scenario.trade_date)
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+        if session is not None:
+            logger.info(f"📼 [基准测试] {ticker} 回放统计: {session.stats.to_dict()}")
+
+        run = RunMetrics(ticker=ticker, wall_s=wall, cpu_s=cpu,
+                         decision=str(decision.get('action', '')) if isinstance(decision, dict) else str(decision),
+                         provider_calls=self.providers.total_calls)
+        if self.graph.last_trace is not None:
+            collect_trace_metrics(self.graph.last_trace, run)
+        return run
+
+    def run(self) -> BenchmarkReport:
+        """按场景运行：预热、计时轮次，以及可选的内存测量轮次"""
+        scenario = self.scenario
+        report = BenchmarkReport(scenario=scenario, created_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+        previous_cache = get_llm_cache()
+        set_llm_cache(LLMResponseCache(enabled=scenario.llm_cache))
+        previous_cwd = os.getcwd()
+        # propagate 会把完整状态写入 eval_results/，放到临时目录中
+        providers = nullcontext() if scenario.replay_dir else self.providers
+        with tempfile.TemporaryDirectory(prefix='ta_benchmark_') as workdir, providers:
+            os.chdir(workdir)
+            try:
+                if self.graph is None:
+                    self.build_graph()
+                for _ in range(scenario.warmup):
+                    for ticker in scenario.tickers:
+                        self.run_once(ticker)
+                for i in range(scenario.iterations):
+                    for ticker in scenario.tickers:
+                        run = self.run_once(ticker)
+                        report.runs.append(run)
+                        logger.info(f"⏱️ [基准测试] 第{i + 1}轮 {ticker}: {run.wall_s * 1000:.1f}ms "
+                                    f"(CPU {run.cpu_s * 1000:.1f}ms, LLM {run.llm_calls}次, 工具 {run.tool_calls}次)")
+                if scenario.measure_memory:
+                    tracemalloc.start()
+                    try:
+                        for ticker in scenario.tickers:
+                            self.run_once(ticker)
+                        report.peak_alloc_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+                    finally:
+                        tracemalloc.stop()
+            finally:
+                os.chdir(previous_cwd)
+                set_llm_cache(previous_cache)
+        return report
+
+
+def run_benchmark(scenario: Optional[BenchmarkScenario] = None) -> BenchmarkReport:
+    """按场景运行离线基准测试"""
+    return BenchmarkHarness(scenario).run()
+
+
+# ==================== 对比 ====================
+
+# (指标, 是否越大越好)
+COMPARED_METRICS = (
+    ('wall_s', False),
+    ('cpu_s', False),
+    ('peak_alloc_mb', False),
+    ('prompt_chars', False),
+    ('prompt_tokens', False),
+    ('llm_calls', False),
+    ('tool_calls', False),
+    ('provider_calls', False),
+    ('cache_hits', True),
+)
+
+
+@dataclass
+class MetricDelta:
+    """单个指标与基线的差异"""
+    name: str
+    baseline: float
+    current: float
+    higher_is_better: bool = False
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD
+
+    @property
+    def change(self) -> float:
+        """相对变化（+0.1 表示增加 10%）"""
+        if self.baseline == 0:
+            return 0.0 if self.current == 0 else float('inf')
+        return (self.current - self.baseline) / self.baseline
+
+    @property
+    def regressed(self) -> bool:
+        change = -self.change if self.higher_is_better else self.change
+        return change > self.threshold
+
+    @property
+    def improved(self) -> bool:
+        change = -self.change if self.higher_is_better else self.change
+        return change < -self.threshold
+
+
+def compare_reports(current: BenchmarkReport, baseline: BenchmarkReport,
+                    threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[MetricDelta]:
+    """比较两次基准测试的中位数指标"""
+    current_summary, baseline_summary = current.summary(), baseline.summary()
+    return [
+        MetricDelta(name, baseline_summary[name], current_summary[name], higher_is_better, threshold)
+        for name, higher_is_better in COMPARED_METRICS
+        if name in current_summary and name in baseline_summary
+    ]
+
+
+def format_report(report: BenchmarkReport) -> str:
+    """文本报告：总体指标、缓存、工具和各节点的提示词大小"""
+    summary = report.summary()
+    if not summary:
+        return "（没有测量结果）"
+    scenario = report.scenario
+    lines = [
+        f"📊 离线基准测试: {', '.join(scenario.tickers)} @ {scenario.trade_date} "
+        f"({len(report.runs)} 次, LLM延迟 {scenario.llm_latency * 1000:.0f}ms, 数据延迟 {scenario.data_latency * 1000:.0f}ms, "
+        f"{'热' if scenario.warm_caches else '冷'}缓存)",
+        f"  墙钟时间  {summary['wall_s'] * 1000:9.1f} ms  (最小 {summary['wall_s_min'] * 1000:.1f}, 最大 {summary['wall_s_max'] * 1000:.1f})",
+        f"  CPU时间   {summary['cpu_s'] * 1000:9.1f} ms  (最小 {summary['cpu_s_min'] * 1000:.1f}, 最大 {summary['cpu_s_max'] * 1000:.1f})",
+    ]
+    if report.peak_alloc_mb is not None:
+        lines.append(f"  峰值内存  {report.peak_alloc_mb:9.1f} MB  (tracemalloc)")
+    lines.append(f"  LLM调用 {summary['llm_calls']:g} | 工具调用 {summary['tool_calls']:g} | "
+                 f"数据接口 {summary['data_calls']:g} | 数据源 {summary['provider_calls']:g} | "
+                 f"提示词 {summary['prompt_chars']:g} 字符 / {summary['prompt_tokens']:g} tokens")
+
+    run = report.runs[-1]
+    if run.cache:
+        lines.append("  缓存: " + ' | '.join(f"{tier} 命中 {c['hits']} 未命中 {c['misses']}" for tier, c in run.cache.items()))
+    if run.tools:
+        lines.append("  工具: " + ', '.join(f"{name}×{count}" for name, count in run.tools.items()))
+    lines.append(f"  {'节点':<24}{'LLM':>5}{'工具':>6}{'提示词字符':>12}{'提示词tokens':>14}{'输出tokens':>12}")
+    for name, node in sorted(run.nodes.items(), key=lambda item: -item[1].prompt_chars):
+        lines.append(f"  {name:<24}{node.llm_calls:>5}{node.tool_calls:>6}{node.prompt_chars:>12}"
+                     f"{node.prompt_tokens:>14}{node.completion_tokens:>12}")
+    return '\n'.join(lines)
+
+
+def format_comparison(deltas: List[MetricDelta]) -> str:
+    lines = [f"  {'指标':<16}{'基线':>14}{'当前':>14}{'变化':>10}"]
+    for delta in deltas:
+        flag = ' ❌ 回归' if delta.regressed else (' ✅ 改进' if delta.improved else '')
+        change = '   n/a' if delta.change == float('inf') else f"{delta.change * 100:+.1f}%"
+        lines.append(f"  {delta.name:<16}{delta.baseline:>14.4g}{delta.current:>14.4g}{change:>10}{flag}")
+    return '\n'.join(lines)
@@ -541,6 +541,8 @@ class TokenTracker:
 
     def __init__(self, config_manager: ConfigManager):
         self.config_manager = config_manager
+        # LLM响应缓存统计（按 provider/model 聚合）
+        self.cache_stats: Dict[str, Dict[str, int]] = {}
 
     def track_usage(self, provider: str, model_name: str, input_tokens: int,
                    output_tokens: int, session_id: str = None, analysis_type: str = "stock_analysis"):
@@ -571,6 +573,24 @@ class TokenTracker:
 
         return record
 
+    def track_cache_event(self, provider: str, model_name: str, hit: bool,
+                          input_tokens: int = 0, output_tokens: int = 0):
+        """跟踪LLM响应缓存命中情况，命中时累计节省的token"""
+        key = f"{provider}/{model_name}"
+        stats = self.cache_stats.setdefault(key, {
+            "hits": 0, "misses": 0, "saved_input_tokens": 0, "saved_output_tokens": 0
+        })
+        if hit:
+            stats["hits"] += 1
+            stats["saved_input_tokens"] += input_tokens
+            stats["saved_output_tokens"] += output_tokens
+        else:
+            stats["misses"] += 1
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """获取LLM响应缓存统计"""
+        return {key: dict(value) for key, value in self.cache_stats.items()}
+
     def _check_cost_alert(self, current_cost: float):
         """检查成本警告"""
         settings = self.config_manager.load_settings()
@@ -7,7 +7,6 @@
 import os
 import json
 import pickle
-import hashlib
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -15,6 +14,8 @@ from typing import Any, Dict, Optional, Union
 import pandas as pd
 
 from ..config.database_manager import get_database_manager
+from .cache_manager import DATA_TYPE_ALIASES, make_cache_key, market_type_of
+from .cache_policy import EXPIRED, get_cache_policy_engine, market_of
 
 class AdaptiveCacheSystem:
     """自适应缓存系统"""
@@ -31,40 +32,33 @@ class AdaptiveCacheSystem:
         
         # 获取配置
         self.config = self.db_manager.get_config()
-        self.cache_config = self.config["cache"]
         
-        # 初始化缓存后端
-        self.primary_backend = self.cache_config["primary_backend"]
-        self.fallback_enabled = self.cache_config["fallback_enabled"]
+        # 初始化缓存后端（主要后端不可用时总是降级到文件缓存）
+        self.primary_backend = self.db_manager.get_cache_backend()
+        self.fallback_enabled = True
         
         self.logger.info(f"自适应缓存系统初始化 - 主要后端: {self.primary_backend}")
     
     def _get_cache_key(self, symbol: str, start_date: str = "", end_date: str = "", 
                       data_source: str = "default", data_type: str = "stock_data") -> str:
-        """生成缓存键"""
-        key_data = f"{symbol}_{start_date}_{end_date}_{data_source}_{data_type}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        """生成缓存键（与文件缓存、多级缓存相同的规则，见 cache_manager.make_cache_key）"""
+        params = {'start_date': start_date, 'end_date': end_date, 'source': data_source}
+        if DATA_TYPE_ALIASES.get(data_type, data_type) == 'stock_data':
+            params['market'] = market_type_of(symbol)
+        return make_cache_key(data_type, symbol, **params)
     
-    def _get_ttl_seconds(self, symbol: str, data_type: str = "stock_data") -> int:
-        """获取TTL秒数"""
-        # 判断市场类型
-        if len(symbol) == 6 and symbol.isdigit():
-            market = "china"
-        else:
-            market = "us"
-        
-        # 获取TTL配置
-        ttl_key = f"{market}_{data_type}"
-        ttl_seconds = self.cache_config["ttl_settings"].get(ttl_key, 7200)
-        return ttl_seconds
+    def _get_ttl_seconds(self, symbol: str, data_type: str = "stock_data", end_date: str = None) -> Optional[int]:
+        """获取保留时长（秒），由统一缓存策略决定；None 表示永不过期（已收盘的历史行情）"""
+        return get_cache_policy_engine().store_seconds(data_type, market_of(symbol), end_date or None)
     
-    def _is_cache_valid(self, cache_time: datetime, ttl_seconds: int) -> bool:
-        """检查缓存是否有效"""
+    def _is_cache_valid(self, cache_time: datetime, metadata: Dict) -> bool:
+        """检查缓存是否有效（过期不久的旧值同样返回，按统一缓存策略）"""
         if cache_time is None:
             return False
-        
-        expiry_time = cache_time + timedelta(seconds=ttl_seconds)
-        return datetime.now() < expiry_time
+        state = get_cache_policy_engine().freshness(
+            metadata.get('data_type', 'stock_data'), cache_time.timestamp(),
+            market=market_of(metadata.get('symbol', '')), end_date=metadata.get('end_date') or None)
+        return state != EXPIRED
     
     def _save_to_file(self, cache_key: str, data: Any, metadata: Dict) -> bool:
         """保存到文件缓存"""
@@ -104,7 +98,7 @@ class AdaptiveCacheSystem:
             self.logger.error(f"文件缓存加载失败: {e}")
             return None
     
-    def _save_to_redis(self, cache_key: str, data: Any, metadata: Dict, ttl_seconds: int) -> bool:
+    def _save_to_redis(self, cache_key: str, data: Any, metadata: Dict, ttl_seconds: Optional[int]) -> bool:
         """保存到Redis缓存"""
         redis_client = self.db_manager.get_redis_client()
         if not redis_client:
@@ -119,7 +113,10 @@ class AdaptiveCacheSystem:
             }
             
             serialized_data = pickle.dumps(cache_data)
-            redis_client.setex(cache_key, ttl_seconds, serialized_data)
+            if ttl_seconds is None:
+                redis_client.set(cache_key, serialized_data)
+            else:
+                redis_client.setex(cache_key, ttl_seconds, serialized_data)
             
             self.logger.debug(f"Redis缓存保存成功: {cache_key}")
             return True
@@ -152,7 +149,7 @@ class AdaptiveCacheSystem:
             self.logger.error(f"Redis缓存加载失败: {e}")
             return None
     
-    def _save_to_mongodb(self, cache_key: str, data: Any, metadata: Dict, ttl_seconds: int) -> bool:
+    def _save_to_mongodb(self, cache_key: str, data: Any, metadata: Dict, ttl_seconds: Optional[int]) -> bool:
         """保存到MongoDB缓存"""
         mongodb_client = self.db_manager.get_mongodb_client()
         if not mongodb_client:
@@ -176,7 +173,7 @@ class AdaptiveCacheSystem:
                 'data_type': data_type,
                 'metadata': metadata,
                 'timestamp': datetime.now(),
-                'expires_at': datetime.now() + timedelta(seconds=ttl_seconds),
+                'expires_at': datetime.now() + timedelta(seconds=ttl_seconds) if ttl_seconds is not None else None,
                 'backend': 'mongodb'
             }
             
@@ -244,7 +241,7 @@ class AdaptiveCacheSystem:
         }
         
         # 获取TTL
-        ttl_seconds = self._get_ttl_seconds(symbol, data_type)
+        ttl_seconds = self._get_ttl_seconds(symbol, data_type, end_date)
         
         # 根据主要后端保存
         success = False
@@ -290,11 +287,7 @@ class AdaptiveCacheSystem:
         
         # 检查缓存是否有效（仅对文件缓存，数据库缓存有自己的TTL机制）
         if cache_data.get('backend') == 'file':
-            symbol = cache_data['metadata'].get('symbol', '')
-            data_type = cache_data['metadata'].get('data_type', 'stock_data')
-            ttl_seconds = self._get_ttl_seconds(symbol, data_type)
-            
-            if not self._is_cache_valid(cache_data['timestamp'], ttl_seconds):
+            if not self._is_cache_valid(cache_data['timestamp'], cache_data['metadata']):
                 self.logger.debug(f"文件缓存已过期: {cache_key}")
                 return None
         
@@ -355,11 +348,7 @@ class AdaptiveCacheSystem:
                 with open(cache_file, 'rb') as f:
                     cache_data = pickle.load(f)
                 
-                symbol = cache_data['metadata'].get('symbol', '')
-                data_type = cache_data['metadata'].get('data_type', 'stock_data')
-                ttl_seconds = self._get_ttl_seconds(symbol, data_type)
-                
-                if not self._is_cache_valid(cache_data['timestamp'], ttl_seconds):
+                if not self._is_cache_valid(cache_data['timestamp'], cache_data['metadata']):
                     cache_file.unlink()
                     cleared_files += 1
                     
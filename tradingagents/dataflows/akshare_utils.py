@@ -10,6 +10,7 @@ import warnings
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import replayable
 logger = get_logger('agents')
 warnings.filterwarnings('ignore')
 
@@ -65,6 +66,7 @@ class AKShareProvider:
             logger.error(f"⚠️ AKShare超时配置失败: {e}")
             logger.info(f"🔧 使用默认超时设置")
     
+    @replayable('akshare', method=True)
     def get_stock_data(self, symbol: str, start_date: str = None, end_date: str = None) -> Optional[pd.DataFrame]:
         """获取股票历史数据"""
         if not self.connected:
@@ -92,6 +94,7 @@ class AKShareProvider:
             logger.error(f"❌ AKShare获取股票数据失败: {e}")
             return None
     
+    @replayable('akshare', method=True)
     def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """获取股票基本信息"""
         if not self.connected:
@@ -115,6 +118,7 @@ class AKShareProvider:
             logger.error(f"❌ AKShare获取股票信息失败: {e}")
             return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'akshare'}
 
+    @replayable('akshare', method=True)
     def get_hk_stock_data(self, symbol: str, start_date: str = None, end_date: str = None) -> Optional[pd.DataFrame]:
         """
         获取港股历史数据
@@ -208,6 +212,7 @@ class AKShareProvider:
             logger.error(f"❌ AKShare获取港股数据失败: {e}")
             return None
 
+    @replayable('akshare', method=True)
     def get_hk_stock_info(self, symbol: str) -> Dict[str, Any]:
         """
         获取港股基本信息
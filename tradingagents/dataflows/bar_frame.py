@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+K线帧（Bar Frame）
+同一次请求内复用的K线数据对象：每个 (股票代码, 周期) 只获取一次历史数据，
+行情概览、最近数据和技术指标都从同一个帧中计算，避免重复占用数据源连接。
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from tradingagents.indicators import STANDARD_MIN_BARS, standard_indicator_frame
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 计算指标所需的最少预热天数（自然日），保证MACD(12,26,9)和20日布林带有足够数据
+INDICATOR_WARMUP_DAYS = 120
+
+# 帧在进程内的有效期（秒），盘中最新一根K线会变化，不宜过长
+DEFAULT_FRAME_TTL_SECONDS = 300
+
+
+def compute_indicator_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    在一次向量化计算中得到全部技术指标序列（由共享指标库 tradingagents.indicators 计算）
+
+    Args:
+        df: 包含 Close 列、按时间升序的K线数据
+
+    Returns:
+        与 df 同索引的指标 DataFrame：MA5/MA10/MA20、RSI、MACD/MACD_Signal/MACD_Histogram、
+        BB_Upper/BB_Middle/BB_Lower
+    """
+    return standard_indicator_frame(df['Close'].astype(float))
+
+
+# 各指标需要的最少K线数量，不足时返回 None（与原实现保持一致）
+INDICATOR_MIN_BARS = STANDARD_MIN_BARS
+
+
+class BarFrame:
+    """单只股票某一周期的K线帧"""
+
+    def __init__(self, code: str, period: str, bars: pd.DataFrame, requested_start: str,
+                 fetched_at: Optional[float] = None):
+        """
+        Args:
+            code: 股票代码
+            period: 周期 'D'/'W'/'M'
+            bars: 按时间升序、以 datetime 为索引的K线数据
+            requested_start: 获取时请求的起始日期 'YYYY-MM-DD'
+            fetched_at: 获取时间戳
+        """
+        self.code = code
+        self.period = period
+        self.bars = bars
+        self.requested_start = requested_start
+        self.fetched_at = fetched_at or time.time()
+        self._indicator_frame = None
+
+    @property
+    def empty(self) -> bool:
+        return self.bars.empty
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.time() - self.fetched_at < ttl_seconds
+
+    def covers(self, start_date: str) -> bool:
+        """帧是否包含从 start_date 开始的数据"""
+        return self.requested_start <= start_date
+
+    def window(self, start_date: str, end_date: str) -> pd.DataFrame:
+        """返回 [start_date, end_date] 区间的K线（副本）"""
+        if self.bars.empty:
+            return self.bars.copy()
+        return self.bars[start_date:end_date].copy()
+
+    @property
+    def indicator_frame(self) -> pd.DataFrame:
+        """全部指标序列，首次访问时计算一次"""
+        if self._indicator_frame is None:
+            self._indicator_frame = compute_indicator_frame(self.bars)
+        return self._indicator_frame
+
+    def indicators(self, as_of: Optional[str] = None) -> Dict[str, Optional[float]]:
+        """
+        获取截至某日的指标快照
+
+        Args:
+            as_of: 截止日期 'YYYY-MM-DD'，默认最新一根K线
+        """
+        if self.bars.empty:
+            return {}
+
+        frame = self.indicator_frame
+        if as_of is not None:
+            frame = frame[:as_of]
+        if frame.empty:
+            return {}
+
+        bar_count = len(frame)
+        latest = frame.iloc[-1]
+        return {
+            name: (float(latest[name]) if bar_count >= min_bars and pd.notna(latest[name]) else None)
+            for name, min_bars in INDICATOR_MIN_BARS.items()
+        }
+
+
+@dataclass
+class StockSnapshot:
+    """一次请求所需的行情快照：实时报价 + 区间历史 + 技术指标"""
+    code: str
+    realtime: Dict[str, Any] = field(default_factory=dict)
+    history: pd.DataFrame = field(default_factory=pd.DataFrame)
+    indicators: Dict[str, Optional[float]] = field(default_factory=dict)
+    frame: Optional[BarFrame] = None
+
+
+class BarFrameCache:
+    """进程内的K线帧缓存，键为 (股票代码, 周期)"""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_FRAME_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._frames: Dict[Tuple[str, str], BarFrame] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def get_or_fetch(self, code: str, period: str, start_date: str,
+                     fetch: Callable[[str], pd.DataFrame]) -> BarFrame:
+        """
+        获取覆盖 start_date 的K线帧，缓存未命中时调用 fetch(start_date) 获取
+
+        Args:
+            code: 股票代码
+            period: 周期
+            start_date: 需要覆盖的起始日期
+            fetch: 实际获取函数，参数为起始日期，返回K线 DataFrame
+        """
+        key = (code, period)
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None and frame.is_fresh(self.ttl_seconds) and frame.covers(start_date):
+                self.stats['hits'] += 1
+                logger.debug(f"📦 [K线帧] 复用: {code} {period} (自 {frame.requested_start})")
+                return frame
+
+        self.stats['misses'] += 1
+        # 扩大窗口时保留已请求过的更早起点，避免来回重取
+        if frame is not None and frame.is_fresh(self.ttl_seconds):
+            start_date = min(start_date, frame.requested_start)
+        bars = fetch(start_date)
+        frame = BarFrame(code, period, bars, start_date)
+        if not bars.empty:
+            with self._lock:
+                self._frames[key] = frame
+        return frame
+
+    def invalidate(self, code: Optional[str] = None):
+        """清除指定股票（或全部）的K线帧"""
+        with self._lock:
+            if code is None:
+                self._frames.clear()
+            else:
+                for key in [key for key in self._frames if key[0] == code]:
+                    del self._frames[key]
+
+
+def warmup_start(start_date: str, end_date: str) -> str:
+    """计算覆盖指标预热期的起始日期"""
+    end_dt = datetime.strptime(end_date, '%Y-%m-%d')
+    warm = (end_dt - timedelta(days=INDICATOR_WARMUP_DAYS)).strftime('%Y-%m-%d')
+    return min(start_date, warm)
+
+
+# 全局K线帧缓存
+_bar_frame_cache: Optional[BarFrameCache] = None
+
+def get_bar_frame_cache() -> BarFrameCache:
+    """获取全局K线帧缓存实例"""
+    global _bar_frame_cache
+    if _bar_frame_cache is None:
+        _bar_frame_cache = BarFrameCache()
+    return _bar_frame_cache
@@ -7,16 +7,47 @@
 import os
 import json
 import pickle
+import re
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Tuple, Union
 import hashlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.tracing import KIND_CACHE, traced
+from .cache_policy import EXPIRED, FRESH, STALE, get_cache_policy_engine, market_of
 logger = get_logger('agents')
 
+# 各缓存实现统一使用的数据类型名（缓存键的一部分）
+DATA_TYPE_ALIASES = {
+    'stock': 'stock_data',
+    'news_data': 'news',
+    'fundamentals_data': 'fundamentals',
+}
+
+
+def make_cache_key(data_type: str, symbol: str, **params) -> str:
+    """
+    统一缓存键：<股票代码>_<数据类型>_<参数哈希>，各缓存层（内存、Redis、MongoDB、文件）共用
+
+    空字符串参数与 None 等价，同一份数据不会因调用方传 "" 或 None 生成不同的键
+    """
+    data_type = DATA_TYPE_ALIASES.get(data_type, data_type)
+    params_str = f"{data_type}_{symbol}"
+    for key, value in sorted(params.items()):
+        params_str += f"_{key}_{None if value == '' else value}"
+
+    # 使用MD5生成短的唯一标识
+    digest = hashlib.md5(params_str.encode()).hexdigest()[:12]
+    return f"{symbol}_{data_type}_{digest}"
+
+
+def market_type_of(symbol: str) -> str:
+    """缓存目录使用的市场类型：6位数字为A股，其余按美股目录存放"""
+    return 'china' if re.match(r'^\d{6}$', str(symbol)) else 'us'
+
 
 class StockDataCache:
     """股票数据缓存管理器 - 支持美股和A股数据缓存优化"""
@@ -51,35 +82,29 @@ class StockDataCache:
                         self.china_fundamentals_dir, self.metadata_dir]:
             dir_path.mkdir(exist_ok=True)
 
-        # 缓存配置 - 针对不同市场设置不同的TTL
+        # 缓存配置 - 有效期由统一缓存策略决定（cache_policy.py）
         self.cache_config = {
             'us_stock_data': {
-                'ttl_hours': 2,  # 美股数据缓存2小时（考虑到API限制）
                 'max_files': 1000,
                 'description': '美股历史数据'
             },
             'china_stock_data': {
-                'ttl_hours': 1,  # A股数据缓存1小时（实时性要求高）
                 'max_files': 1000,
                 'description': 'A股历史数据'
             },
             'us_news': {
-                'ttl_hours': 6,  # 美股新闻缓存6小时
                 'max_files': 500,
                 'description': '美股新闻数据'
             },
             'china_news': {
-                'ttl_hours': 4,  # A股新闻缓存4小时
                 'max_files': 500,
                 'description': 'A股新闻数据'
             },
             'us_fundamentals': {
-                'ttl_hours': 24,  # 美股基本面数据缓存24小时
                 'max_files': 200,
                 'description': '美股基本面数据'
             },
             'china_fundamentals': {
-                'ttl_hours': 12,  # A股基本面数据缓存12小时
                 'max_files': 200,
                 'description': 'A股基本面数据'
             }
@@ -92,25 +117,11 @@ class StockDataCache:
 
     def _determine_market_type(self, symbol: str) -> str:
         """根据股票代码确定市场类型"""
-        import re
-
+        return market_type_of(symbol)
 
-        # 判断是否为中国A股（6位数字）
-        if re.match(r'^\d{6}$', str(symbol)):
-            return 'china'
-        else:
-            return 'us'
-    
     def _generate_cache_key(self, data_type: str, symbol: str, **kwargs) -> str:
-        """生成缓存键"""
-        # 创建一个包含所有参数的字符串
-        params_str = f"{data_type}_{symbol}"
-        for key, value in sorted(kwargs.items()):
-            params_str += f"_{key}_{value}"
-        
-        # 使用MD5生成短的唯一标识
-        cache_key = hashlib.md5(params_str.encode()).hexdigest()[:12]
-        return f"{symbol}_{data_type}_{cache_key}"
+        """生成缓存键（见 make_cache_key）"""
+        return make_cache_key(data_type, symbol, **kwargs)
     
     def _get_cache_path(self, data_type: str, cache_key: str, file_format: str = "json", symbol: str = None) -> Path:
         """获取缓存文件路径 - 支持市场分类"""
@@ -136,10 +147,11 @@ class StockDataCache:
         """获取元数据文件路径"""
         return self.metadata_dir / f"{cache_key}_meta.json"
     
-    def _save_metadata(self, cache_key: str, metadata: Dict[str, Any]):
-        """保存元数据"""
+    def _save_metadata(self, cache_key: str, metadata: Dict[str, Any], stored_at: float = None):
+        """保存元数据（stored_at 为数据写入时间戳，默认现在）"""
         metadata_path = self._get_metadata_path(cache_key)
-        metadata['cached_at'] = datetime.now().isoformat()
+        cached_at = datetime.fromtimestamp(stored_at) if stored_at is not None else datetime.now()
+        metadata['cached_at'] = cached_at.isoformat()
         
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
@@ -157,39 +169,39 @@ class StockDataCache:
             logger.error(f"⚠️ 加载元数据失败: {e}")
             return None
     
-    def is_cache_valid(self, cache_key: str, max_age_hours: int = None, symbol: str = None, data_type: str = None) -> bool:
-        """检查缓存是否有效 - 支持智能TTL配置"""
-        metadata = self._load_metadata(cache_key)
-        if not metadata:
-            return False
-
-        # 如果没有指定TTL，根据数据类型和市场自动确定
-        if max_age_hours is None:
-            if symbol and data_type:
-                market_type = self._determine_market_type(symbol)
-                cache_type = f"{market_type}_{data_type}"
-                max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
-            else:
-                # 从元数据中获取信息
-                symbol = metadata.get('symbol', '')
-                data_type = metadata.get('data_type', 'stock_data')
-                market_type = self._determine_market_type(symbol)
-                cache_type = f"{market_type}_{data_type}"
-                max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
-
-        cached_at = datetime.fromisoformat(metadata['cached_at'])
-        age = datetime.now() - cached_at
+    @staticmethod
+    def freshness_of(metadata: Dict[str, Any], stored_at: float, max_age_hours: float = None) -> str:
+        """按元数据和写入时间判断缓存状态（fresh/stale/expired）"""
+        data_type = metadata.get('data_type', 'stock_data')
+        return get_cache_policy_engine().freshness(
+            data_type, stored_at,
+            market=market_of(metadata.get('symbol', '')) or metadata.get('market_type'),
+            end_date=metadata.get('end_date') if data_type == 'stock_data' else None,
+            ttl_override=max_age_hours * 3600 if max_age_hours is not None else None,
+        )
+
+    def cache_freshness(self, cache_key: str, max_age_hours: float = None) -> str:
+        """
+        缓存状态（fresh/stale/expired），有效期由统一缓存策略决定（见 cache_policy.py）
 
-        is_valid = age.total_seconds() < max_age_hours * 3600
+        Args:
+            cache_key: 缓存键
+            max_age_hours: 指定有效期（小时），None时按数据类型、市场和交易时段决定；
+                已收盘的历史行情不受此限制，永不过期
+        """
+        info = self._entry_info(cache_key)
+        if info is None:
+            return EXPIRED
+        metadata, stored_at = info
+        return self.freshness_of(metadata, stored_at, max_age_hours)
 
+    def is_cache_valid(self, cache_key: str, max_age_hours: int = None, symbol: str = None, data_type: str = None) -> bool:
+        """检查缓存是否新鲜（symbol、data_type 保留用于兼容，策略按元数据决定）"""
+        is_valid = self.cache_freshness(cache_key, max_age_hours) == FRESH
         if is_valid:
-            market_type = self._determine_market_type(metadata.get('symbol', ''))
-            cache_type = f"{market_type}_{metadata.get('data_type', 'stock_data')}"
-            desc = self.cache_config.get(cache_type, {}).get('description', '数据')
-            logger.info(f"✅ 缓存有效: {desc} - {metadata.get('symbol')} (剩余 {max_age_hours - age.total_seconds()/3600:.1f}h)")
-
+            logger.debug(f"✅ 缓存有效: {cache_key}")
         return is_valid
-    
+
     def save_stock_data(self, symbol: str, data: Union[pd.DataFrame, str],
                        start_date: str = None, end_date: str = None,
                        data_source: str = "unknown") -> str:
@@ -213,16 +225,6 @@ class StockDataCache:
                                            source=data_source,
                                            market=market_type)
 
-        # 保存数据
-        if isinstance(data, pd.DataFrame):
-            cache_path = self._get_cache_path("stock_data", cache_key, "csv", symbol)
-            data.to_csv(cache_path, index=True)
-        else:
-            cache_path = self._get_cache_path("stock_data", cache_key, "txt", symbol)
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                f.write(str(data))
-
-        # 保存元数据
         metadata = {
             'symbol': symbol,
             'data_type': 'stock_data',
@@ -230,10 +232,8 @@ class StockDataCache:
             'start_date': start_date,
             'end_date': end_date,
             'data_source': data_source,
-            'file_path': str(cache_path),
-            'file_format': 'csv' if isinstance(data, pd.DataFrame) else 'txt'
         }
-        self._save_metadata(cache_key, metadata)
+        self._store(cache_key, data, metadata)
 
         # 获取描述信息
         cache_type = f"{market_type}_stock_data"
@@ -241,29 +241,83 @@ class StockDataCache:
         logger.info(f"💾 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
     
-    def load_stock_data(self, cache_key: str) -> Optional[Union[pd.DataFrame, str]]:
-        """从缓存加载股票数据"""
+    def write_entry(self, cache_key: str, data: Any, metadata: Dict[str, Any], stored_at: float = None) -> Path:
+        """
+        写入一条缓存：DataFrame 存为 csv，其余存为文本，元数据中记录文件位置
+
+        Args:
+            cache_key: 缓存键
+            data: 数据
+            metadata: 元数据（symbol、data_type 等）
+            stored_at: 数据写入时间戳，默认现在
+
+        Returns:
+            数据文件路径
+        """
+        is_frame = isinstance(data, pd.DataFrame)
+        file_format = 'csv' if is_frame else 'txt'
+        cache_path = self._get_cache_path(metadata.get('data_type', 'stock_data'), cache_key, file_format,
+                                          metadata.get('symbol'))
+        if is_frame:
+            data.to_csv(cache_path, index=True)
+        else:
+            with open(cache_path, 'w', encoding='utf-8') as f:
+                f.write(str(data))
+
+        metadata = dict(metadata, file_path=str(cache_path), file_format=file_format)
+        self._save_metadata(cache_key, metadata, stored_at)
+        return cache_path
+
+    def read_entry(self, cache_key: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """读取一条缓存，返回 (数据, 元数据)，不存在时返回 None"""
         metadata = self._load_metadata(cache_key)
         if not metadata:
             return None
-        
+
         cache_path = Path(metadata['file_path'])
         if not cache_path.exists():
             return None
-        
+
         try:
-            if metadata['file_format'] == 'csv':
-                return pd.read_csv(cache_path, index_col=0)
+            if metadata.get('file_format') == 'csv':
+                data = pd.read_csv(cache_path, index_col=0)
             else:
                 with open(cache_path, 'r', encoding='utf-8') as f:
-                    return f.read()
+                    data = f.read()
         except Exception as e:
             logger.error(f"⚠️ 加载缓存数据失败: {e}")
             return None
+        return data, metadata
+
+    # 存取入口：save_*/load_*/cache_freshness 经由以下方法访问存储，多级缓存（tiered_cache.py）覆盖它们
+
+    def _store(self, cache_key: str, data: Any, metadata: Dict[str, Any]):
+        """写入一条缓存"""
+        self.write_entry(cache_key, data, metadata)
+
+    def _fetch(self, cache_key: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """读取一条缓存，返回 (数据, 元数据)"""
+        return self.read_entry(cache_key)
+
+    def _entry_info(self, cache_key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """缓存的 (元数据, 写入时间戳)，只读元数据"""
+        metadata = self._load_metadata(cache_key)
+        if not metadata:
+            return None
+        return metadata, datetime.fromisoformat(metadata['cached_at']).timestamp()
+
+    @traced("cache:file.load_stock_data", KIND_CACHE, attributes=lambda *args, **kwargs: {'tier': 'file'},
+            result_attributes=lambda result: {'cache_hit': result is not None})
+    def load_stock_data(self, cache_key: str) -> Optional[Union[pd.DataFrame, str]]:
+        """从缓存加载股票数据"""
+        entry = self._fetch(cache_key)
+        return entry[0] if entry else None
     
+    @traced("cache:file.find_cached_stock_data", KIND_CACHE, attributes=lambda *args, **kwargs: {'tier': 'file'},
+            result_attributes=lambda result: {'cache_hit': result is not None})
     def find_cached_stock_data(self, symbol: str, start_date: str = None,
                               end_date: str = None, data_source: str = None,
-                              max_age_hours: int = None) -> Optional[str]:
+                              max_age_hours: int = None, allow_stale: bool = False) -> Optional[str]:
         """
         查找匹配的缓存数据 - 支持智能市场分类查找
 
@@ -272,17 +326,14 @@ class StockDataCache:
             start_date: 开始日期
             end_date: 结束日期
             data_source: 数据源
-            max_age_hours: 最大缓存时间（小时），None时使用智能配置
+            max_age_hours: 最大缓存时间（小时），None时使用统一缓存策略
+            allow_stale: 是否接受已过期但仍在旧值可用期内的缓存（调用方应在后台刷新，见 cache_freshness）
 
         Returns:
             cache_key: 如果找到有效缓存则返回缓存键，否则返回None
         """
         market_type = self._determine_market_type(symbol)
-
-        # 如果没有指定TTL，使用智能配置
-        if max_age_hours is None:
-            cache_type = f"{market_type}_stock_data"
-            max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
+        accepted = (FRESH, STALE) if allow_stale else (FRESH,)
 
         # 生成查找键
         search_key = self._generate_cache_key("stock_data", symbol,
@@ -292,12 +343,13 @@ class StockDataCache:
                                             market=market_type)
 
         # 检查精确匹配
-        if self.is_cache_valid(search_key, max_age_hours, symbol, 'stock_data'):
+        if self.cache_freshness(search_key, max_age_hours) in accepted:
             desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
             logger.info(f"🎯 找到精确匹配的{desc}: {symbol} -> {search_key}")
             return search_key
 
-        # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
+        # 如果没有精确匹配，查找部分匹配（相同股票代码、相同结束日期、覆盖开始日期的其他缓存）
+        # 结束日期不同的缓存不使用：更晚的会带入之后的行情，更早的缺少最近的行情
         for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
             try:
                 with open(metadata_file, 'r', encoding='utf-8') as f:
@@ -306,10 +358,12 @@ class StockDataCache:
                 if (metadata.get('symbol') == symbol and
                     metadata.get('data_type') == 'stock_data' and
                     metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
+                    (data_source is None or metadata.get('data_source') == data_source) and
+                    metadata.get('end_date') == end_date and
+                    (not start_date or not metadata.get('start_date') or metadata['start_date'] <= start_date)):
 
                     cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
+                    if self.cache_freshness(cache_key, max_age_hours) in accepted:
                         desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
                         logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
                         return cache_key
@@ -329,23 +383,22 @@ class StockDataCache:
                                            end_date=end_date,
                                            source=data_source)
         
-        cache_path = self._get_cache_path("news", cache_key, "txt")
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            f.write(news_data)
-        
         metadata = {
             'symbol': symbol,
             'data_type': 'news',
             'start_date': start_date,
             'end_date': end_date,
             'data_source': data_source,
-            'file_path': str(cache_path),
-            'file_format': 'txt'
         }
-        self._save_metadata(cache_key, metadata)
+        self._store(cache_key, news_data, metadata)
         
         logger.info(f"📰 新闻数据已缓存: {symbol} ({data_source}) -> {cache_key}")
         return cache_key
+
+    def load_news_data(self, cache_key: str) -> Optional[str]:
+        """从缓存加载新闻数据"""
+        entry = self._fetch(cache_key)
+        return entry[0] if entry else None
     
     def save_fundamentals_data(self, symbol: str, fundamentals_data: str,
                               data_source: str = "unknown") -> str:
@@ -356,19 +409,13 @@ class StockDataCache:
                                            market=market_type,
                                            date=datetime.now().strftime("%Y-%m-%d"))
         
-        cache_path = self._get_cache_path("fundamentals", cache_key, "txt", symbol)
-        with open(cache_path, 'w', encoding='utf-8') as f:
-            f.write(fundamentals_data)
-        
         metadata = {
             'symbol': symbol,
             'data_type': 'fundamentals',
             'data_source': data_source,
             'market_type': market_type,
-            'file_path': str(cache_path),
-            'file_format': 'txt'
         }
-        self._save_metadata(cache_key, metadata)
+        self._store(cache_key, fundamentals_data, metadata)
         
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         logger.info(f"💼 {desc}已缓存: {symbol} ({data_source}) -> {cache_key}")
@@ -376,20 +423,8 @@ class StockDataCache:
     
     def load_fundamentals_data(self, cache_key: str) -> Optional[str]:
         """从缓存加载基本面数据"""
-        metadata = self._load_metadata(cache_key)
-        if not metadata:
-            return None
-        
-        cache_path = Path(metadata['file_path'])
-        if not cache_path.exists():
-            return None
-        
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            logger.error(f"⚠️ 加载基本面缓存数据失败: {e}")
-            return None
+        entry = self._fetch(cache_key)
+        return entry[0] if entry else None
     
     def find_cached_fundamentals_data(self, symbol: str, data_source: str = None,
                                     max_age_hours: int = None) -> Optional[str]:
@@ -399,18 +434,13 @@ class StockDataCache:
         Args:
             symbol: 股票代码
             data_source: 数据源（如 "openai", "finnhub"）
-            max_age_hours: 最大缓存时间（小时），None时使用智能配置
+            max_age_hours: 最大缓存时间（小时），None时使用统一缓存策略
         
         Returns:
             cache_key: 如果找到有效缓存则返回缓存键，否则返回None
         """
         market_type = self._determine_market_type(symbol)
         
-        # 如果没有指定TTL，使用智能配置
-        if max_age_hours is None:
-            cache_type = f"{market_type}_fundamentals"
-            max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
-        
         # 查找匹配的缓存
         for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
             try:
@@ -498,11 +528,7 @@ class StockDataCache:
 
 
 # 全局缓存实例
-_cache_instance = None
-
 def get_cache() -> StockDataCache:
-    """获取全局缓存实例"""
-    global _cache_instance
-    if _cache_instance is None:
-        _cache_instance = StockDataCache()
-    return _cache_instance
+    """获取全局缓存实例（多级缓存：内存 → Redis/MongoDB → 文件，见 tiered_cache.py）"""
+    from .tiered_cache import get_tiered_cache
+    return get_tiered_cache()
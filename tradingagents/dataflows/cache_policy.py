@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+统一缓存策略
+
+各缓存层（进程内结果缓存、文件缓存、MongoDB/Redis、自适应缓存、港股信息缓存）共用的有效期规则：
+
+- 按数据类型配置（price/realtime/news/fundamentals/info），可按市场覆盖（如 'china:news'）
+- 感知交易时段：行情类数据在休市期间不会变化，有效期延长到下一次开盘；
+  结束日期已经收盘的历史K线永不过期
+- stale-while-revalidate：过期后的一段时间内直接返回旧值，同时在后台刷新，调用方不再等待重新获取
+- 负缓存："无数据"结果按较短的有效期缓存，避免反复请求；失败（❌）结果不缓存
+
+    engine = get_cache_policy_engine()
+    engine.freshness('price', stored_at, market='china', end_date='2024-03-15')  # fresh / stale / expired
+    engine.revalidate(key, refresh)                                             # 后台刷新（同一键只刷新一次）
+"""
+
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+from .trading_calendar import MARKET_SESSIONS, MarketSession, TradingCalendar, get_trading_calendar, market_of
+
+
+# 缓存状态
+FRESH = 'fresh'
+STALE = 'stale'
+EXPIRED = 'expired'
+
+# 数据类型
+KIND_PRICE = 'price'
+KIND_REALTIME = 'realtime'
+KIND_NEWS = 'news'
+KIND_FUNDAMENTALS = 'fundamentals'
+KIND_INFO = 'info'
+
+# 各缓存层的数据类型名 -> 策略名
+DATA_TYPE_KINDS = {
+    'stock_data': KIND_PRICE,
+    'stock': KIND_PRICE,
+    'news': KIND_NEWS,
+    'news_data': KIND_NEWS,
+    'fundamentals': KIND_FUNDAMENTALS,
+    'fundamentals_data': KIND_FUNDAMENTALS,
+    'info': KIND_INFO,
+    'stock_info': KIND_INFO,
+    'realtime': KIND_REALTIME,
+}
+
+# 出现这些内容（且没有 ❌）时视为"无数据"，按负缓存有效期缓存
+NO_DATA_MARKERS = ('No data found', '未找到', '无数据', '没有数据', '暂无数据')
+
+# 后台刷新线程数
+DEFAULT_REFRESH_WORKERS = 2
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """一种数据的缓存规则（秒）"""
+    kind: str
+    ttl: float                          # 交易时段内（或与市场无关的数据）的有效期
+    market_aware: bool = False          # 休市期间数据不变，有效期延长到下一次开盘
+    settled_forever: bool = False       # 结束日期已收盘的历史数据永不过期
+    stale_seconds: float = 0.0          # 过期后仍直接返回旧值（同时后台刷新）的时长
+    negative_ttl: float = 0.0           # "无数据"结果的有效期，0 为不缓存
+
+
+DEFAULT_POLICIES: Dict[str, CachePolicy] = {
+    KIND_PRICE: CachePolicy(KIND_PRICE, ttl=900, market_aware=True, settled_forever=True,
+                            stale_seconds=6 * 3600, negative_ttl=600),
+    KIND_REALTIME: CachePolicy(KIND_REALTIME, ttl=60, market_aware=True, stale_seconds=300, negative_ttl=60),
+    KIND_NEWS: CachePolicy(KIND_NEWS, ttl=1800, stale_seconds=6 * 3600, negative_ttl=900),
+    KIND_FUNDAMENTALS: CachePolicy(KIND_FUNDAMENTALS, ttl=6 * 3600, stale_seconds=24 * 3600, negative_ttl=3600),
+    KIND_INFO: CachePolicy(KIND_INFO, ttl=24 * 3600, stale_seconds=7 * 24 * 3600, negative_ttl=3600),
+}
+
+
+# ==================== 交易时段 ====================
+
+class MarketClock:
+    """按交易日历判断是否在交易时段、下一次开盘时间、某日是否已收盘"""
+
+    def __init__(self, calendars: Optional[Dict[str, TradingCalendar]] = None):
+        self._calendars = dict(calendars) if calendars else None
+
+    def calendar(self, market: Optional[str]) -> Optional[TradingCalendar]:
+        if market not in MARKET_SESSIONS:
+            return None
+        if self._calendars is not None and market in self._calendars:
+            return self._calendars[market]
+        return get_trading_calendar(market)
+
+    def has_market(self, market: Optional[str]) -> bool:
+        return market in MARKET_SESSIONS
+
+    def local_time(self, market: str, now: Optional[float] = None) -> datetime:
+        return datetime.fromtimestamp(time.time() if now is None else now, tz=self.calendar(market).zone)
+
+    def is_trading_day(self, market: str, day) -> bool:
+        """是否交易日（排除周末和交易所节假日）"""
+        calendar = self.calendar(market)
+        return calendar.is_trading_day(day) if calendar else day.weekday() < 5
+
+    def is_open(self, market: str, now: Optional[float] = None) -> bool:
+        calendar = self.calendar(market)
+        if calendar is None:
+            return True
+        local = self.local_time(market, now)
+        return any(start <= local < end for start, end in calendar.session_times(local.date()))
+
+    def next_open(self, market: str, now: Optional[float] = None) -> Optional[datetime]:
+        """下一次开盘时间（当地时间）"""
+        calendar = self.calendar(market)
+        if calendar is None:
+            return None
+        local = self.local_time(market, now)
+        for start, _ in calendar.session_times(local.date()):
+            if start > local:
+                return start
+        return calendar.open_time(calendar.next_trading_day(local.date() + timedelta(days=1)))
+
+    def seconds_until_open(self, market: str, now: Optional[float] = None) -> float:
+        opening = self.next_open(market, now)
+        if opening is None:
+            return 0.0
+        return max((opening - self.local_time(market, now)).total_seconds(), 0.0)
+
+    def is_settled(self, market: Optional[str], end_date: Any, now: Optional[float] = None) -> bool:
+        """end_date 当天及之前的行情是否已经确定（早于当地今天，或今天已收盘/休市）"""
+        from .point_in_time import normalize_date
+        end = normalize_date(end_date)
+        if end is None:
+            return False
+        calendar = self.calendar(market)
+        if calendar is None:
+            return end < datetime.fromtimestamp(time.time() if now is None else now).strftime('%Y-%m-%d')
+        local = self.local_time(market, now)
+        today = local.strftime('%Y-%m-%d')
+        if end < today:
+            return True
+        if end > today:
+            return False
+        closing = calendar.close_time(local.date())
+        return closing is None or local >= closing
+
+
+# ==================== 策略引擎 ====================
+
+@dataclass
+class CachePolicyStats:
+    """策略判定与后台刷新统计"""
+    fresh: int = 0
+    stale: int = 0
+    expired: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+    refresh_skipped: int = 0     # 同一键已在刷新
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def is_no_data(result: Any) -> bool:
+    """结果是"无数据"（空结果或无数据提示，不含失败标记）"""
+    if result is None:
+        return False
+    if isinstance(result, pd.DataFrame):
+        return result.empty
+    if isinstance(result, (list, tuple, dict)):
+        return len(result) == 0
+    if isinstance(result, str):
+        if not result.strip():
+            return True
+        return '❌' not in result and any(marker in result for marker in NO_DATA_MARKERS)
+    return False
+
+
+class CachePolicyEngine:
+    """缓存有效期判定和后台刷新"""
+
+    def __init__(self, policies: Optional[Dict[str, CachePolicy]] = None, clock: Optional[MarketClock] = None,
+                 refresh_workers: int = DEFAULT_REFRESH_WORKERS):
+        self._policies: Dict[str, CachePolicy] = dict(policies or DEFAULT_POLICIES)
+        self.clock = clock or MarketClock()
+        self.refresh_workers = refresh_workers
+        self.stats = CachePolicyStats()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    # ---------- 策略 ----------
+
+    def policy(self, kind: str, market: Optional[str] = None) -> CachePolicy:
+        """数据类型的策略：先查 '<市场>:<类型>' 覆盖，再查类型；未知类型按行情处理"""
+        kind = DATA_TYPE_KINDS.get(kind, kind)
+        if market and f"{market}:{kind}" in self._policies:
+            return self._policies[f"{market}:{kind}"]
+        return self._policies.get(kind) or self._policies[KIND_PRICE]
+
+    def set_policy(self, kind: str, market: Optional[str] = None, **changes) -> CachePolicy:
+        """修改策略（market 不为空时只对该市场生效）"""
+        base = self.policy(kind, market)
+        policy = replace(base, **changes)
+        self._policies[f"{market}:{policy.kind}" if market else policy.kind] = policy
+        return policy
+
+    def ttl_seconds(self, kind: str, market: Optional[str] = None, end_date: Any = None,
+                    negative: bool = False, now: Optional[float] = None) -> Optional[float]:
+        """
+        在 now 时刻写入的数据的有效期（秒），None 表示永不过期
+
+        Args:
+            kind: 数据类型
+            market: 市场（china/hk/us），None 时不考虑交易时段
+            end_date: 数据的结束日期（行情区间），已收盘时历史数据永不过期
+            negative: 是否"无数据"结果
+        """
+        policy = self.policy(kind, market)
+        if negative:
+            return policy.negative_ttl
+        if policy.settled_forever and end_date and self.clock.is_settled(market, end_date, now):
+            return None
+        ttl = policy.ttl
+        if policy.market_aware and self.clock.has_market(market) and not self.clock.is_open(market, now):
+            ttl = max(ttl, self.clock.seconds_until_open(market, now))
+        return ttl
+
+    def expiry(self, kind: str, market: Optional[str] = None, end_date: Any = None, negative: bool = False,
+               now: Optional[float] = None, ttl_override: Optional[float] = None
+               ) -> Tuple[Optional[float], Optional[float]]:
+        """返回 (新鲜截止时间, 可返回旧值的截止时间)，时间戳；None 表示永不过期"""
+        now = time.time() if now is None else now
+        ttl = self.ttl_seconds(kind, market, end_date, negative, now)
+        if ttl is not None and ttl_override is not None and not negative:
+            ttl = ttl_override
+        if ttl is None:
+            return None, None
+        stale = 0.0 if negative else self.policy(kind, market).stale_seconds
+        return now + ttl, now + ttl + stale
+
+    def freshness(self, kind: str, stored_at: float, market: Optional[str] = None, end_date: Any = None,
+                  negative: bool = False, now: Optional[float] = None,
+                  ttl_override: Optional[float] = None) -> str:
+        """stored_at 时刻写入的数据现在的状态：fresh / stale / expired"""
+        fresh_until, stale_until = self.expiry(kind, market, end_date, negative, stored_at, ttl_override)
+        now = time.time() if now is None else now
+        if fresh_until is None or now < fresh_until:
+            state = FRESH
+        elif now < stale_until:
+            state = STALE
+        else:
+            state = EXPIRED
+        with self._lock:
+            setattr(self.stats, state, getattr(self.stats, state) + 1)
+        return state
+
+    def store_seconds(self, kind: str, market: Optional[str] = None, end_date: Any = None,
+                      now: Optional[float] = None) -> Optional[int]:
+        """带过期功能的存储（Redis/MongoDB）应保留数据的时长：有效期加可返回旧值的时长"""
+        fresh_until, stale_until = self.expiry(kind, market, end_date, now=now)
+        if stale_until is None:
+            return None
+        return max(int(stale_until - (time.time() if now is None else now)), 1)
+
+    # ---------- 后台刷新 ----------
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.refresh_workers,
+                                                    thread_name_prefix='cache-refresh')
+            return self._executor
+
+    def revalidate(self, key: Hashable, refresh: Callable[[], Any]) -> bool:
+        """
+        后台刷新过期数据；同一键正在刷新时不重复提交
+
+        refresh 在提交时的上下文中运行（继承 as-of 日期、追踪等 contextvars），
+        异常只记录日志。返回是否提交了刷新
+        """
+        with self._lock:
+            if key in self._inflight:
+                self.stats.refresh_skipped += 1
+                return False
+            self._inflight[key] = True
+            self.stats.refreshes += 1
+        context = contextvars.copy_context()
+
+        def run():
+            try:
+                context.run(refresh)
+            except Exception as e:
+                with self._lock:
+                    self.stats.refresh_failures += 1
+                logger.warning(f"⚠️ [缓存策略] 后台刷新失败: {key} ({e})")
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+
+        logger.debug(f"🔄 [缓存策略] 返回旧值并后台刷新: {key}")
+        self._get_executor().submit(run)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._inflight)
+
+    def wait_for_refreshes(self, timeout: float = 30.0) -> bool:
+        """等待后台刷新完成（测试和退出前使用）"""
+        deadline = time.time() + timeout
+        while self.pending():
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+
+_cache_policy_engine: Optional[CachePolicyEngine] = None
+_cache_policy_lock = threading.Lock()
+
+def get_cache_policy_engine() -> CachePolicyEngine:
+    """获取全局缓存策略引擎"""
+    global _cache_policy_engine
+    with _cache_policy_lock:
+        if _cache_policy_engine is None:
+            _cache_policy_engine = CachePolicyEngine()
+        return _cache_policy_engine
+
+
+def set_cache_policy_engine(engine: Optional[CachePolicyEngine]) -> Optional[CachePolicyEngine]:
+    """替换全局缓存策略引擎（测试或自定义策略），返回原来的实例"""
+    global _cache_policy_engine
+    with _cache_policy_lock:
+        previous, _cache_policy_engine = _cache_policy_engine, engine
+        return previous
+
+
+# ==================== 调用参数推断 ====================
+
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$|^\d{8}$')
+
+
+def infer_context(args: Iterable[Any], kwargs: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+    """从数据接口的调用参数推断 (市场, 结束日期)：第一个股票代码参数和最晚的日期参数"""
+    from .point_in_time import normalize_date
+    market, end_date = None, None
+    for value in list(args) + list(kwargs.values()):
+        if not isinstance(value, str):
+            continue
+        text = value.strip()
+        if _DATE_PATTERN.match(text):
+            normalized = normalize_date(text)
+            if normalized and (end_date is None or normalized > end_date):
+                end_date = normalized
+        elif market is None:
+            market = market_of(text)
+    return market, end_date
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+A股日线截面入库
+
+按交易日一次请求获取全市场日线（Tushare daily 的 trade_date 截面查询），
+写入本地列式K线库，再从库中刷新单只股票的行情缓存。
+
+- 存储按交易日分区（daily_bars/YYYY/YYYYMMDD.parquet），分区内按股票代码排序；
+  未安装 pyarrow 时退化为 CSV
+- 重复运行幂等：分区原子替换，已入库的交易日默认跳过
+- 缺口检测：对照交易日历找出缺失的交易日并补齐
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from .trading_calendar import get_trading_calendar
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+
+# 分区文件中的列，与 Tushare daily 返回一致
+BAR_COLUMNS = ['ts_code', 'trade_date', 'open', 'high', 'low', 'close',
+               'pre_close', 'change', 'pct_chg', 'vol', 'amount']
+
+
+def _compact_date(date: str) -> str:
+    """'YYYY-MM-DD' / 'YYYYMMDD' -> 'YYYYMMDD'"""
+    return str(date).replace('-', '')
+
+
+def _dashed_date(date: str) -> str:
+    """'YYYYMMDD' -> 'YYYY-MM-DD'"""
+    date = _compact_date(date)
+    return f"{date[:4]}-{date[4:6]}-{date[6:]}"
+
+
+def _calendar_trade_dates(start_date: str, end_date: str) -> List[str]:
+    """数据源的交易日历不可用时，使用内置的A股交易日历"""
+    days = get_trading_calendar('china').trading_days(_dashed_date(start_date), _dashed_date(end_date))
+    return list(days.strftime('%Y%m%d'))
+
+
+class DailyBarStore:
+    """按交易日分区的A股日线库"""
+
+    def __init__(self, root_dir: str, file_format: Optional[str] = None):
+        """
+        Args:
+            root_dir: 存储根目录
+            file_format: 'parquet' 或 'csv'，默认有 pyarrow 时用 parquet
+        """
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.file_format = file_format or ('parquet' if PARQUET_AVAILABLE else 'csv')
+        self._manifest_path = self.root_dir / 'manifest.json'
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    # ---------- 清单 ----------
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not self._manifest_path.exists():
+            return {}
+        try:
+            with open(self._manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ [日线库] 清单读取失败，将按分区文件重建: {e}")
+            return self._rebuild_manifest()
+
+    def _rebuild_manifest(self) -> Dict[str, Dict]:
+        manifest = {}
+        for path in self.root_dir.glob('*/*.*'):
+            if path.suffix in ('.parquet', '.csv') and path.stem.isdigit():
+                manifest[path.stem] = {'rows': None, 'file': str(path.relative_to(self.root_dir))}
+        return manifest
+
+    def _save_manifest(self):
+        tmp_path = self._manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self._manifest_path)
+
+    # ---------- 分区读写 ----------
+
+    def _partition_path(self, trade_date: str) -> Path:
+        trade_date = _compact_date(trade_date)
+        return self.root_dir / trade_date[:4] / f"{trade_date}.{self.file_format}"
+
+    def has_partition(self, trade_date: str) -> bool:
+        return _compact_date(trade_date) in self._manifest
+
+    def partition_dates(self) -> List[str]:
+        """已入库的交易日（YYYYMMDD，升序）"""
+        return sorted(self._manifest)
+
+    def write_partition(self, trade_date: str, bars: pd.DataFrame) -> int:
+        """
+        写入一个交易日的截面数据，已存在时整体替换
+
+        Returns:
+            写入的行数
+        """
+        trade_date = _compact_date(trade_date)
+        bars = bars.copy()
+        bars['trade_date'] = bars['trade_date'].astype(str)
+        bars = bars[bars['trade_date'] == trade_date]
+        columns = [column for column in BAR_COLUMNS if column in bars.columns]
+        bars = bars[columns].drop_duplicates('ts_code', keep='last').sort_values('ts_code').reset_index(drop=True)
+
+        path = self._partition_path(trade_date)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        if self.file_format == 'parquet':
+            bars.to_parquet(tmp_path, index=False)
+        else:
+            bars.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._manifest[trade_date] = {
+                'rows': len(bars),
+                'file': str(path.relative_to(self.root_dir)),
+                'ingested_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._save_manifest()
+        return len(bars)
+
+    def _read_file(self, path: Path, ts_codes: Optional[List[str]] = None) -> pd.DataFrame:
+        if path.suffix == '.parquet':
+            filters = [('ts_code', 'in', ts_codes)] if ts_codes else None
+            return pd.read_parquet(path, filters=filters)
+        bars = pd.read_csv(path, dtype={'ts_code': str, 'trade_date': str})
+        if ts_codes:
+            bars = bars[bars['ts_code'].isin(ts_codes)]
+        return bars
+
+    def read_date(self, trade_date: str) -> pd.DataFrame:
+        """读取某个交易日的全市场截面"""
+        entry = self._manifest.get(_compact_date(trade_date))
+        if entry is None:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        return self._read_file(self.root_dir / entry['file'])
+
+    def read_symbols(self, ts_codes: Iterable[str], start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        读取若干股票在区间内的日线
+
+        Args:
+            ts_codes: Tushare 格式代码（如 000001.SZ）
+            start_date: 开始日期
+            end_date: 结束日期
+
+        Returns:
+            DataFrame: 按 ts_code、trade_date 排序的日线
+        """
+        ts_codes = list(ts_codes)
+        start, end = _compact_date(start_date), _compact_date(end_date)
+        frames = [
+            self._read_file(self.root_dir / entry['file'], ts_codes)
+            for trade_date, entry in sorted(self._manifest.items())
+            if start <= trade_date <= end
+        ]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=BAR_COLUMNS)
+        bars = pd.concat(frames, ignore_index=True)
+        bars['trade_date'] = bars['trade_date'].astype(str)
+        return bars.sort_values(['ts_code', 'trade_date']).reset_index(drop=True)
+
+    def missing_dates(self, trade_dates: Iterable[str]) -> List[str]:
+        """给定交易日中尚未入库的日期"""
+        return [date for date in (_compact_date(day) for day in trade_dates) if date not in self._manifest]
+
+
+@dataclass
+class IngestReport:
+    """入库结果"""
+    ingested: Dict[str, int] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    empty: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    gaps: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        lines = [
+            f"📥 日线入库: 新写入 {len(self.ingested)} 个交易日 ({sum(self.ingested.values())} 行), "
+            f"跳过 {len(self.skipped)}, 无数据 {len(self.empty)}, 失败 {len(self.failed)}"
+        ]
+        for trade_date, error in list(self.failed.items())[:10]:
+            lines.append(f"  ❌ {trade_date}: {error}")
+        if self.gaps:
+            lines.append(f"  ⚠️ 仍缺失 {len(self.gaps)} 个交易日: {', '.join(self.gaps[:10])}")
+        return "\n".join(lines)
+
+
+class DailyBarIngestor:
+    """全市场日线截面入库任务"""
+
+    def __init__(self, store: Optional['DailyBarStore'] = None, provider=None, rate_limiter=None):
+        """
+        Args:
+            store: 日线库，默认为全局实例
+            provider: TushareProvider，默认为全局实例
+            rate_limiter: prefetch.RateLimiter，默认使用 Tushare 的默认调用间隔
+        """
+        if provider is None:
+            from .tushare_utils import get_tushare_provider
+            provider = get_tushare_provider()
+        if rate_limiter is None:
+            from .prefetch import RateLimiter
+            rate_limiter = RateLimiter()
+        self.store = store or get_daily_bar_store()
+        self.provider = provider
+        self.rate_limiter = rate_limiter
+
+    def trade_dates(self, start_date: str, end_date: str) -> List[str]:
+        """区间内的交易日，交易日历不可用时以工作日近似"""
+        self.rate_limiter.acquire('tushare')
+        dates = self.provider.get_trade_dates(start_date, end_date)
+        if not dates:
+            logger.warning("⚠️ [日线库] 数据源交易日历不可用，按内置交易日历检测缺口")
+            dates = _calendar_trade_dates(start_date, end_date)
+        return dates
+
+    def find_gaps(self, start_date: str, end_date: str) -> List[str]:
+        """区间内尚未入库的交易日"""
+        return self.store.missing_dates(self.trade_dates(start_date, end_date))
+
+    def ingest_date(self, trade_date: str, force: bool = False, report: Optional[IngestReport] = None) -> IngestReport:
+        """
+        入库单个交易日
+
+        Args:
+            trade_date: 交易日
+            force: 已入库时是否重新获取并替换
+        """
+        report = report or IngestReport()
+        trade_date = _compact_date(trade_date)
+        if not force and self.store.has_partition(trade_date):
+            report.skipped.append(trade_date)
+            return report
+
+        self.rate_limiter.acquire('tushare')
+        try:
+            bars = self.provider.get_daily_by_trade_date(trade_date)
+        except Exception as e:
+            report.failed[trade_date] = str(e)
+            return report
+        if bars is None or bars.empty:
+            report.empty.append(trade_date)
+            return report
+
+        report.ingested[trade_date] = self.store.write_partition(trade_date, bars)
+        return report
+
+    def ingest_range(self, start_date: str, end_date: str, force: bool = False) -> IngestReport:
+        """
+        入库区间内的全部交易日（默认只补缺口），完成后重新检测缺口
+        """
+        report = IngestReport()
+        trade_dates = self.trade_dates(start_date, end_date)
+        targets = trade_dates if force else self.store.missing_dates(trade_dates)
+        report.skipped.extend(sorted(set(map(_compact_date, trade_dates)) - set(targets)))
+
+        logger.info(f"📥 [日线库] {_compact_date(start_date)}~{_compact_date(end_date)}: "
+                    f"{len(trade_dates)} 个交易日, 待入库 {len(targets)}")
+        for trade_date in targets:
+            self.ingest_date(trade_date, force=True, report=report)
+
+        report.gaps = self.store.missing_dates(trade_dates)
+        logger.info(report.summary())
+        return report
+
+    def refresh_symbol_caches(self, symbols: Iterable[str], start_date: str, end_date: str) -> List[str]:
+        """
+        从日线库刷新单只股票的行情缓存（格式与 TushareProvider.get_stock_daily 写入的一致）
+
+        Args:
+            symbols: 6位A股代码
+            start_date: 开始日期 'YYYY-MM-DD'
+            end_date: 结束日期 'YYYY-MM-DD'
+
+        Returns:
+            写入缓存的股票代码
+        """
+        cache_manager = getattr(self.provider, 'cache_manager', None)
+        if cache_manager is None:
+            from .cache_manager import get_cache
+            cache_manager = get_cache()
+
+        ts_codes = {self.provider._normalize_symbol(symbol): symbol for symbol in symbols}
+        bars = self.store.read_symbols(ts_codes, start_date, end_date)
+        refreshed = []
+        for ts_code, rows in bars.groupby('ts_code'):
+            rows = rows.copy()
+            rows['trade_date'] = pd.to_datetime(rows['trade_date'])
+            cache_manager.save_stock_data(
+                symbol=ts_codes[ts_code], data=rows.reset_index(drop=True),
+                start_date=_dashed_date(start_date), end_date=_dashed_date(end_date), data_source='tushare'
+            )
+            refreshed.append(ts_codes[ts_code])
+        logger.info(f"💾 [日线库] 刷新行情缓存: {len(refreshed)}/{len(ts_codes)} 只")
+        return refreshed
+
+
+# 全局日线库
+_daily_bar_store: Optional[DailyBarStore] = None
+
+def get_daily_bar_store() -> DailyBarStore:
+    """获取全局日线库实例（与K线缓存同目录）"""
+    global _daily_bar_store
+    if _daily_bar_store is None:
+        from .cache_manager import get_cache
+        _daily_bar_store = DailyBarStore(get_cache().cache_dir / "daily_bars")
+    return _daily_bar_store
+
+
+def ingest_daily_bars(start_date: str, end_date: Optional[str] = None, force: bool = False) -> IngestReport:
+    """便捷函数：入库区间内的全市场日线，end_date 默认为今天"""
+    end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+    return DailyBarIngestor().ingest_range(start_date, end_date, force=force)
@@ -18,6 +18,10 @@ warnings.filterwarnings('ignore')
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_dataflow_logging
 logger = setup_dataflow_logging()
+from tradingagents.utils.log_categories import get_log_category, trace_symbol, SYMBOL_TRACE, DATA_PREVIEW
+from tradingagents.utils.tracing import KIND_DATA, traced
+symbol_trace = get_log_category(SYMBOL_TRACE)
+data_preview = get_log_category(DATA_PREVIEW)
 
 
 class ChinaDataSource(Enum):
@@ -293,6 +297,9 @@ class DataSourceManager:
             logger.error(f"❌ TDX适配器导入失败: {e}")
             return None
     
+    @traced("DataSourceManager.get_stock_data", KIND_DATA,
+            attributes=lambda self, symbol, *args, **kwargs: {
+                'symbol': symbol, 'source': self.current_source.value})
     def get_stock_data(self, symbol: str, start_date: str = None, end_date: str = None) -> str:
         """
         获取股票数据的统一接口
@@ -316,17 +323,15 @@ class DataSourceManager:
                    })
 
         # 添加详细的股票代码追踪日志
-        logger.info(f"🔍 [股票代码追踪] DataSourceManager.get_stock_data 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
-        logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-        logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
-        logger.info(f"🔍 [股票代码追踪] 当前数据源: {self.current_source.value}")
+        trace_symbol(logger, "DataSourceManager.get_stock_data", symbol)
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 当前数据源: {self.current_source.value}")
 
         start_time = time.time()
 
         try:
             # 根据数据源调用相应的获取方法
             if self.current_source == ChinaDataSource.TUSHARE:
-                logger.info(f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}'")
+                symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 Tushare 数据源，传入参数: symbol='{symbol}'")
                 result = self._get_tushare_data(symbol, start_date, end_date)
             elif self.current_source == ChinaDataSource.AKSHARE:
                 result = self._get_akshare_data(symbol, start_date, end_date)
@@ -351,7 +356,7 @@ class DataSourceManager:
                                'data_source': self.current_source.value,
                                'duration': duration,
                                'result_length': result_length,
-                               'result_preview': result[:200] + '...' if result_length > 200 else result,
+                               'result_preview': data_preview.preview(result, 200),
                                'event_type': 'data_fetch_success'
                            })
                 return result
@@ -364,7 +369,7 @@ class DataSourceManager:
                                   'data_source': self.current_source.value,
                                   'duration': duration,
                                   'result_length': result_length,
-                                  'result_preview': result[:200] + '...' if result_length > 200 else result,
+                                  'result_preview': data_preview.preview(result, 200),
                                   'event_type': 'data_fetch_warning'
                               })
 
@@ -396,9 +401,7 @@ class DataSourceManager:
         logger.debug(f"📊 [Tushare] 调用参数: symbol={symbol}, start_date={start_date}, end_date={end_date}")
 
         # 添加详细的股票代码追踪日志
-        logger.info(f"🔍 [股票代码追踪] _get_tushare_data 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
-        logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-        logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
+        trace_symbol(logger, "_get_tushare_data", symbol)
         logger.info(f"🔍 [DataSourceManager详细日志] _get_tushare_data 开始执行")
         logger.info(f"🔍 [DataSourceManager详细日志] 当前数据源: {self.current_source.value}")
 
@@ -406,7 +409,7 @@ class DataSourceManager:
         try:
             # 直接调用适配器，避免循环调用interface
             from .tushare_adapter import get_tushare_adapter
-            logger.info(f"🔍 [股票代码追踪] 调用 tushare_adapter，传入参数: symbol='{symbol}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 tushare_adapter，传入参数: symbol='{symbol}'")
             logger.info(f"🔍 [DataSourceManager详细日志] 开始调用tushare_adapter...")
 
             adapter = get_tushare_adapter()
@@ -445,7 +448,7 @@ class DataSourceManager:
 
             duration = time.time() - start_time
             logger.info(f"🔍 [DataSourceManager详细日志] interface调用完成，耗时: {duration:.3f}秒")
-            logger.info(f"🔍 [股票代码追踪] get_china_stock_data_tushare 返回结果前200字符: {result[:200] if result else 'None'}")
+            data_preview.info(logger, lambda: f"🔍 [股票代码追踪] get_china_stock_data_tushare 返回结果前200字符: {result[:200] if result else 'None'}")
             logger.info(f"🔍 [DataSourceManager详细日志] 返回结果类型: {type(result)}")
             logger.info(f"🔍 [DataSourceManager详细日志] 返回结果长度: {len(result) if result else 0}")
 
@@ -788,14 +791,12 @@ def get_china_stock_data_unified(symbol: str, start_date: str, end_date: str) ->
 
 
     # 添加详细的股票代码追踪日志
-    logger.info(f"🔍 [股票代码追踪] data_source_manager.get_china_stock_data_unified 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
-    logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-    logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
+    trace_symbol(logger, "data_source_manager.get_china_stock_data_unified", symbol)
 
     manager = get_data_source_manager()
-    logger.info(f"🔍 [股票代码追踪] 调用 manager.get_stock_data，传入参数: symbol='{symbol}', start_date='{start_date}', end_date='{end_date}'")
+    symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 manager.get_stock_data，传入参数: symbol='{symbol}', start_date='{start_date}', end_date='{end_date}'")
     result = manager.get_stock_data(symbol, start_date, end_date)
-    logger.info(f"🔍 [股票代码追踪] manager.get_stock_data 返回结果前200字符: {result[:200] if result else 'None'}")
+    data_preview.info(logger, lambda: f"🔍 [股票代码追踪] manager.get_stock_data 返回结果前200字符: {result[:200] if result else 'None'}")
     return result
 
 
@@ -7,13 +7,14 @@ MongoDB + Redis 数据库缓存管理器
 import os
 import json
 import pickle
-import hashlib
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any, List, Union
 import pandas as pd
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from .cache_manager import make_cache_key, market_type_of
+from .cache_policy import FRESH, KIND_FUNDAMENTALS, KIND_NEWS, KIND_PRICE, get_cache_policy_engine, market_of
 logger = get_logger('agents')
 
 # MongoDB
@@ -161,14 +162,17 @@ class DatabaseCacheManager:
         except Exception as e:
             logger.error(f"⚠️ MongoDB索引创建失败: {e}")
     
+    def _redis_set(self, cache_key: str, payload: str, kind: str, symbol: str, end_date: str = None):
+        """写入Redis，保留时长由统一缓存策略决定（有效期 + 旧值可用期；已收盘的历史行情不过期）"""
+        expire_seconds = get_cache_policy_engine().store_seconds(kind, market_of(symbol), end_date)
+        if expire_seconds is None:
+            self.redis_client.set(cache_key, payload)
+        else:
+            self.redis_client.setex(cache_key, expire_seconds, payload)
+
     def _generate_cache_key(self, data_type: str, symbol: str, **kwargs) -> str:
-        """生成缓存键"""
-        params_str = f"{data_type}_{symbol}"
-        for key, value in sorted(kwargs.items()):
-            params_str += f"_{key}_{value}"
-        
-        cache_key = hashlib.md5(params_str.encode()).hexdigest()[:16]
-        return f"{data_type}:{symbol}:{cache_key}"
+        """生成缓存键（与文件缓存、多级缓存相同的规则，见 cache_manager.make_cache_key）"""
+        return make_cache_key(data_type, symbol, **kwargs)
     
     def save_stock_data(self, symbol: str, data: Union[pd.DataFrame, str],
                        start_date: str = None, end_date: str = None,
@@ -187,20 +191,15 @@ class DatabaseCacheManager:
         Returns:
             cache_key: 缓存键
         """
-        cache_key = self._generate_cache_key("stock", symbol,
-                                           start_date=start_date,
-                                           end_date=end_date,
-                                           source=data_source)
-        
         # 自动推断市场类型
         if market_type is None:
-            # 根据股票代码格式推断市场类型
-            import re
+            market_type = market_type_of(symbol)
 
-            if re.match(r'^\d{6}$', symbol):  # 6位数字为A股
-                market_type = "china"
-            else:  # 其他格式为美股
-                market_type = "us"
+        cache_key = self._generate_cache_key("stock", symbol,
+                                           start_date=start_date,
+                                           end_date=end_date,
+                                           source=data_source,
+                                           market=market_type)
         
         # 准备文档数据
         doc = {
@@ -232,7 +231,7 @@ class DatabaseCacheManager:
             except Exception as e:
                 logger.error(f"⚠️ MongoDB保存失败: {e}")
         
-        # 保存到Redis（快速缓存，6小时过期）
+        # 保存到Redis（快速缓存，过期时间见统一缓存策略）
         if self.redis_client:
             try:
                 redis_data = {
@@ -240,13 +239,11 @@ class DatabaseCacheManager:
                     "data_format": doc["data_format"],
                     "symbol": symbol,
                     "data_source": data_source,
+                    "end_date": end_date,
                     "created_at": doc["created_at"].isoformat()
                 }
-                self.redis_client.setex(
-                    cache_key,
-                    6 * 3600,  # 6小时过期
-                    json.dumps(redis_data, ensure_ascii=False)
-                )
+                self._redis_set(cache_key, json.dumps(redis_data, ensure_ascii=False),
+                                KIND_PRICE, symbol, end_date)
                 logger.info(f"⚡ 股票数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ Redis缓存失败: {e}")
@@ -288,13 +285,11 @@ class DatabaseCacheManager:
                                 "data_format": doc["data_format"],
                                 "symbol": doc["symbol"],
                                 "data_source": doc["data_source"],
+                                "end_date": doc.get("end_date"),
                                 "created_at": doc["created_at"].isoformat()
                             }
-                            self.redis_client.setex(
-                                cache_key,
-                                6 * 3600,
-                                json.dumps(redis_data, ensure_ascii=False)
-                            )
+                            self._redis_set(cache_key, json.dumps(redis_data, ensure_ascii=False),
+                                            KIND_PRICE, doc["symbol"], doc.get("end_date"))
                             logger.info(f"⚡ 数据已同步到Redis缓存")
                         except Exception as e:
                             logger.error(f"⚠️ Redis同步失败: {e}")
@@ -311,14 +306,15 @@ class DatabaseCacheManager:
     
     def find_cached_stock_data(self, symbol: str, start_date: str = None,
                               end_date: str = None, data_source: str = None,
-                              max_age_hours: int = 6) -> Optional[str]:
-        """查找匹配的缓存数据"""
+                              max_age_hours: int = None) -> Optional[str]:
+        """查找匹配的缓存数据（max_age_hours 为 None 时按统一缓存策略判断是否新鲜）"""
         
         # 生成精确匹配的缓存键
         exact_key = self._generate_cache_key("stock", symbol,
                                            start_date=start_date,
                                            end_date=end_date,
-                                           source=data_source)
+                                           source=data_source,
+                                           market=market_type_of(symbol))
         
         # 检查Redis中是否有精确匹配
         if self.redis_client and self.redis_client.exists(exact_key):
@@ -329,12 +325,7 @@ class DatabaseCacheManager:
         if self.mongodb_db is not None:
             try:
                 collection = self.mongodb_db.stock_data
-                cutoff_time = datetime.utcnow() - timedelta(hours=max_age_hours)
-                
-                query = {
-                    "symbol": symbol,
-                    "created_at": {"$gte": cutoff_time}
-                }
+                query = {"symbol": symbol}
                 
                 if data_source:
                     query["data_source"] = data_source
@@ -345,6 +336,14 @@ class DatabaseCacheManager:
                 
                 doc = collection.find_one(query, sort=[("created_at", -1)])
                 
+                if doc:
+                    # created_at 为 UTC 时间
+                    stored_at = doc["created_at"].replace(tzinfo=timezone.utc).timestamp()
+                    state = get_cache_policy_engine().freshness(
+                        KIND_PRICE, stored_at, market=market_of(symbol), end_date=doc.get("end_date"),
+                        ttl_override=max_age_hours * 3600 if max_age_hours is not None else None)
+                    doc = doc if state == FRESH else None
+
                 if doc:
                     cache_key = doc["_id"]
                     logger.info(f"💾 MongoDB中找到匹配: {symbol} -> {cache_key}")
@@ -387,7 +386,7 @@ class DatabaseCacheManager:
             except Exception as e:
                 logger.error(f"⚠️ MongoDB保存失败: {e}")
 
-        # 保存到Redis（24小时过期）
+        # 保存到Redis（过期时间见统一缓存策略）
         if self.redis_client:
             try:
                 redis_data = {
@@ -396,11 +395,7 @@ class DatabaseCacheManager:
                     "data_source": data_source,
                     "created_at": doc["created_at"].isoformat()
                 }
-                self.redis_client.setex(
-                    cache_key,
-                    24 * 3600,  # 24小时过期
-                    json.dumps(redis_data, ensure_ascii=False)
-                )
+                self._redis_set(cache_key, json.dumps(redis_data, ensure_ascii=False), KIND_NEWS, symbol)
                 logger.info(f"⚡ 新闻数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ Redis缓存失败: {e}")
@@ -415,8 +410,9 @@ class DatabaseCacheManager:
             analysis_date = datetime.now().strftime("%Y-%m-%d")
 
         cache_key = self._generate_cache_key("fundamentals", symbol,
-                                           date=analysis_date,
-                                           source=data_source)
+                                           source=data_source,
+                                           market=market_type_of(symbol),
+                                           date=analysis_date)
 
         doc = {
             "_id": cache_key,
@@ -438,7 +434,7 @@ class DatabaseCacheManager:
             except Exception as e:
                 logger.error(f"⚠️ MongoDB保存失败: {e}")
 
-        # 保存到Redis（24小时过期）
+        # 保存到Redis（过期时间见统一缓存策略）
         if self.redis_client:
             try:
                 redis_data = {
@@ -448,11 +444,7 @@ class DatabaseCacheManager:
                     "analysis_date": analysis_date,
                     "created_at": doc["created_at"].isoformat()
                 }
-                self.redis_client.setex(
-                    cache_key,
-                    24 * 3600,  # 24小时过期
-                    json.dumps(redis_data, ensure_ascii=False)
-                )
+                self._redis_set(cache_key, json.dumps(redis_data, ensure_ascii=False), KIND_FUNDAMENTALS, symbol)
                 logger.info(f"⚡ 基本面数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ Redis缓存失败: {e}")
@@ -1,11 +1,113 @@
 import json
 import os
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Dict, List, Optional
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
 
+# 同时常驻内存的已解析文件数（按最近使用淘汰）
+FINNHUB_INDEX_CACHE_SIZE = 64
+
+
+def finnhub_data_path(ticker, data_type, data_dir, period=None):
+    """finnhub 离线数据文件路径"""
+    if period:
+        return os.path.join(
+            data_dir,
+            "finnhub_data",
+            data_type,
+            f"{ticker}_{period}_data_formatted.json",
+        )
+    return os.path.join(
+        data_dir, "finnhub_data", data_type, f"{ticker}_data_formatted.json"
+    )
+
+
+class FinnhubDateIndex:
+    """单个 finnhub 数据文件的日期索引：有序日期键 + 对应数据，区间查询为两次二分查找"""
+
+    def __init__(self, data: Dict, mtime: float = 0.0):
+        # (日期, 文件中的顺序, 数据)
+        items = sorted(
+            (key, position, value)
+            for position, (key, value) in enumerate(data.items()) if len(value) > 0
+        )
+        self.dates: List[str] = [key for key, _, _ in items]
+        self.positions: List[int] = [position for _, position, _ in items]
+        self.values: List = [value for _, _, value in items]
+        # 文件本身按日期排列时无需还原顺序
+        self.in_file_order = self.positions == sorted(self.positions)
+        self.mtime = mtime
+
+    def range(self, start_date: str, end_date: str) -> Dict:
+        """返回 start_date <= 日期 <= end_date 的数据（与逐键字符串比较结果一致，保持文件中的顺序）"""
+        lo = bisect_left(self.dates, start_date)
+        hi = bisect_right(self.dates, end_date)
+        selected = range(lo, hi)
+        if not self.in_file_order:
+            selected = sorted(selected, key=self.positions.__getitem__)
+        return {self.dates[i]: self.values[i] for i in selected}
+
+
+class FinnhubIndexCache:
+    """按 (股票, 数据类型) 缓存已解析的日期索引，文件修改后自动重新解析"""
+
+    def __init__(self, max_files: int = FINNHUB_INDEX_CACHE_SIZE):
+        self.max_files = max_files
+        self._indexes: "OrderedDict[str, FinnhubDateIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, data_path: str) -> Optional[FinnhubDateIndex]:
+        """获取文件的日期索引，文件不存在或无法解析时返回 None"""
+        try:
+            mtime = os.stat(data_path).st_mtime
+        except FileNotFoundError:
+            logger.warning(f"⚠️ [DEBUG] 数据文件不存在: {data_path}")
+            logger.warning(f"⚠️ [DEBUG] 请确保已下载相关数据或检查数据目录配置")
+            return None
+
+        with self._lock:
+            index = self._indexes.get(data_path)
+            if index is not None and index.mtime == mtime:
+                self._indexes.move_to_end(data_path)
+                return index
+
+        try:
+            with open(data_path, "r", encoding="utf-8") as f:
+                index = FinnhubDateIndex(json.load(f), mtime)
+        except FileNotFoundError:
+            logger.error(f"❌ [ERROR] 文件未找到: {data_path}")
+            return None
+        except json.JSONDecodeError as e:
+            logger.error(f"❌ [ERROR] JSON解析错误: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ [ERROR] 读取数据文件时发生错误: {e}")
+            return None
+
+        with self._lock:
+            self._indexes[data_path] = index
+            self._indexes.move_to_end(data_path)
+            while len(self._indexes) > self.max_files:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+_index_cache = FinnhubIndexCache()
+
+def get_finnhub_index_cache() -> FinnhubIndexCache:
+    """获取全局 finnhub 日期索引缓存"""
+    return _index_cache
+
 
 def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=None):
     """
@@ -18,39 +120,10 @@ def get_data_in_range(ticker, start_date, end_date, data_type, data_dir, period=
         period (str): Default to none, if there is a period specified, should be annual or quarterly.
     """
 
-    if period:
-        data_path = os.path.join(
-            data_dir,
-            "finnhub_data",
-            data_type,
-            f"{ticker}_{period}_data_formatted.json",
-        )
-    else:
-        data_path = os.path.join(
-            data_dir, "finnhub_data", data_type, f"{ticker}_data_formatted.json"
-        )
+    data_path = finnhub_data_path(ticker, data_type, data_dir, period)
 
-    try:
-        if not os.path.exists(data_path):
-            logger.warning(f"⚠️ [DEBUG] 数据文件不存在: {data_path}")
-            logger.warning(f"⚠️ [DEBUG] 请确保已下载相关数据或检查数据目录配置")
-            return {}
-        
-        with open(data_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        logger.error(f"❌ [ERROR] 文件未找到: {data_path}")
-        return {}
-    except json.JSONDecodeError as e:
-        logger.error(f"❌ [ERROR] JSON解析错误: {e}")
+    # 每个文件只解析一次，之后的区间查询只取所需切片
+    index = _index_cache.get(data_path)
+    if index is None:
         return {}
-    except Exception as e:
-        logger.error(f"❌ [ERROR] 读取数据文件时发生错误: {e}")
-        return {}
-
-    # filter keys (date, str in format YYYY-MM-DD) by the date range (str, str in format YYYY-MM-DD)
-    filtered_data = {}
-    for key, value in data.items():
-        if start_date <= key <= end_date and len(value) > 0:
-            filtered_data[key] = value
-    return filtered_data
+    return index.range(start_date, end_date)
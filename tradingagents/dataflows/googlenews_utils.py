@@ -14,6 +14,7 @@ from tenacity import (
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import replayable
 logger = get_logger('agents')
 
 
@@ -35,6 +36,7 @@ def make_request(url, headers):
     return response
 
 
+@replayable('google_news')
 def getNewsData(query, start_date, end_date):
     """
     Scrape Google News search results for a given query and date range.
@@ -12,6 +12,7 @@ import os
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import replayable
 logger = get_logger('agents')
 
 
@@ -40,6 +41,7 @@ class HKStockProvider:
         
         self.last_request_time = time.time()
     
+    @replayable('hk', method=True)
     def get_stock_data(self, symbol: str, start_date: str = None, end_date: str = None) -> Optional[pd.DataFrame]:
         """
         获取港股历史数据
@@ -110,6 +112,7 @@ class HKStockProvider:
             logger.error(f"❌ 港股数据获取异常: {e}")
             return None
     
+    @replayable('hk', method=True)
     def get_stock_info(self, symbol: str) -> Dict[str, Any]:
         """
         获取港股基本信息
@@ -161,6 +164,7 @@ class HKStockProvider:
                 'error': str(e)
             }
     
+    @replayable('hk', method=True)
     def get_real_time_price(self, symbol: str) -> Optional[Dict]:
         """
         获取港股实时价格
@@ -12,6 +12,7 @@ from datetime import datetime, timedelta
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from .cache_policy import KIND_INFO, get_cache_policy_engine
 logger = get_logger("default")
 
 
@@ -20,7 +21,10 @@ class ImprovedHKStockProvider:
     
     def __init__(self):
         self.cache_file = "hk_stock_cache.json"
-        self.cache_ttl = 3600 * 24  # 24小时缓存
+        # 公司名称等基本信息的有效期，默认名称（无数据）按负缓存有效期，见统一缓存策略
+        info_policy = get_cache_policy_engine().policy(KIND_INFO, 'hk')
+        self.cache_ttl = info_policy.ttl
+        self.negative_ttl = info_policy.negative_ttl
         self.rate_limit_wait = 5  # 速率限制等待时间
         self.last_request_time = 0
         
@@ -228,7 +232,7 @@ class ImprovedHKStockProvider:
             # 缓存默认结果（较短的TTL）
             self.cache[cache_key] = {
                 'data': default_name,
-                'timestamp': time.time() - self.cache_ttl + 3600,  # 1小时后过期
+                'timestamp': time.time() - self.cache_ttl + self.negative_ttl,  # 按负缓存有效期过期
                 'source': 'default'
             }
             self._save_cache()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+技术指标增量状态持久化
+
+每天滚动分析同一批股票时，按 (数据源, 股票代码, 指标及参数) 保存指标的增量状态
+（EMA加权和、RSI平均涨跌幅、滑动窗口缓冲区等）和最近一段时间的指标值，
+下次只需把新增的K线追加进状态，不再从全部历史重新计算。
+
+状态文件保存在K线缓存目录下的 indicator_state/ 中。
+一致性检查：记录状态最后一根K线的日期和收盘价，新数据中同一天的收盘价不一致
+（除权除息后复权价格变化）或历史起点更早时，从头重建状态。
+"""
+
+import json
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from tradingagents.indicators import IndicatorSpec
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 状态格式版本，增量实现变化时递增以丢弃旧状态
+STATE_VERSION = 1
+
+# 每个状态保留的最近指标值数量，覆盖常用的回看窗口
+RECENT_VALUES = 120
+
+# 判断收盘价一致的相对误差
+PRICE_TOLERANCE = 1e-6
+
+
+@dataclass
+class IndicatorSeries:
+    """增量计算结果：最近若干根K线的 (日期, 指标值)"""
+    dates: List[str]
+    values: List[Any]
+    rebuilt: bool = False
+    appended: int = 0
+
+    @property
+    def latest(self):
+        return self.values[-1] if self.values else None
+
+    def value_on(self, date: str, default=None):
+        """指定日期的指标值，不在保留范围内时返回 default"""
+        for day, value in zip(reversed(self.dates), reversed(self.values)):
+            if day == date:
+                return value
+            if day < date:
+                break
+        return default
+
+    def covers(self, date: str) -> bool:
+        return bool(self.dates) and self.dates[0] <= date
+
+
+def _json_value(value):
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+def _bar_dates(bars: pd.DataFrame) -> List[str]:
+    """K线日期（'YYYY-MM-DD'），优先使用 Date/date 列，否则使用索引"""
+    for column in ('Date', 'date'):
+        if column in bars.columns:
+            return list(pd.to_datetime(bars[column]).dt.strftime('%Y-%m-%d'))
+    return list(pd.to_datetime(bars.index).strftime('%Y-%m-%d'))
+
+
+def _close_column(bars: pd.DataFrame) -> str:
+    for column in bars.columns:
+        if str(column).lower() == 'close':
+            return column
+    raise KeyError("K线数据缺少 close 列")
+
+
+def _same_price(a: float, b: float) -> bool:
+    return abs(a - b) <= PRICE_TOLERANCE * max(1.0, abs(a), abs(b))
+
+
+class IndicatorStateStore:
+    """指标增量状态存储"""
+
+    def __init__(self, state_dir: str, recent_values: int = RECENT_VALUES):
+        self.state_dir = Path(state_dir)
+        self.recent_values = recent_values
+        self._records: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'appended_bars': 0, 'rebuilds': 0, 'reused': 0}
+
+    def _path(self, namespace: str, symbol: str, key: str) -> Path:
+        safe_symbol = re.sub(r'[^0-9A-Za-z._-]', '_', symbol)
+        return self.state_dir / namespace / safe_symbol / f"{key}.json"
+
+    def _load(self, namespace: str, symbol: str, key: str) -> Optional[Dict[str, Any]]:
+        cache_key = (namespace, symbol, key)
+        if cache_key in self._records:
+            return self._records[cache_key]
+        path = self._path(namespace, symbol, key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ [指标状态] 读取失败，将重建: {path} ({e})")
+            return None
+        if record.get('version') != STATE_VERSION:
+            return None
+        self._records[cache_key] = record
+        return record
+
+    def _save(self, namespace: str, symbol: str, key: str, record: Dict[str, Any]):
+        self._records[(namespace, symbol, key)] = record
+        path = self._path(namespace, symbol, key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+            tmp_path.replace(path)
+        except Exception as e:
+            logger.warning(f"⚠️ [指标状态] 保存失败: {path} ({e})")
+
+    @staticmethod
+    def _resume_position(record: Dict[str, Any], dates: List[str], closes: List[float]) -> Optional[int]:
+        """
+        一致性检查，返回需要从哪根K线继续追加；状态不可用时返回 None
+
+        - 新数据的起点早于状态起点：状态缺少更早的历史，需要重建
+        - 状态最后一根K线不在新数据中：中间有缺口，需要重建
+        - 同一天的收盘价不一致：发生了除权除息等复权调整，需要重建
+        """
+        if not dates or dates[0] < record['first_date']:
+            return None
+        last_date = record['last_date']
+        try:
+            position = dates.index(last_date)
+        except ValueError:
+            return None
+        if not _same_price(closes[position], record['last_close']):
+            return None
+        if record['first_date'] in dates:
+            first = dates.index(record['first_date'])
+            if not _same_price(closes[first], record['first_close']):
+                return None
+        return position + 1
+
+    def advance(self, symbol: str, spec: IndicatorSpec, bars: pd.DataFrame,
+                namespace: str = 'default', settled_before: Optional[str] = None) -> IndicatorSeries:
+        """
+        把K线追加进指标状态，返回最近的指标值
+
+        Args:
+            symbol: 股票代码
+            spec: 指标描述（见 tradingagents.indicators.parse_indicator）
+            bars: 按时间升序的K线
+            namespace: 数据源命名空间，不同数据源的价格口径可能不同
+            settled_before: 早于该日期的K线视为已收盘、写入状态；当天（盘中）K线只在状态副本上计算。
+                            默认今天
+
+        Returns:
+            IndicatorSeries，values 为 spec.select 之后的值
+        """
+        if bars is None or bars.empty:
+            return IndicatorSeries([], [])
+
+        settled_before = settled_before or datetime.now().strftime('%Y-%m-%d')
+        dates = _bar_dates(bars)
+        closes = bars[_close_column(bars)].astype(float).tolist()
+
+        with self._lock:
+            record = self._load(namespace, symbol, spec.key)
+            start = self._resume_position(record, dates, closes) if record else None
+
+            indicator = spec.create()
+            rebuilt = start is None
+            if rebuilt:
+                if record is not None:
+                    logger.info(f"🔄 [指标状态] {namespace}/{symbol} {spec.key} 价格或历史不一致，重建状态")
+                self.stats['rebuilds'] += 1
+                start = 0
+                recent = deque(maxlen=self.recent_values)
+                first_date, first_close = dates[0], closes[0]
+            else:
+                self.stats['reused'] += 1
+                indicator.load_state_dict(record['state'])
+                recent = deque(record['recent'], maxlen=self.recent_values)
+                first_date, first_close = record['first_date'], record['first_close']
+
+            settled_end = start
+            while settled_end < len(dates) and dates[settled_end] < settled_before:
+                settled_end += 1
+
+            # 只转换需要追加的K线
+            records = bars.iloc[start:].to_dict('records')
+            for i in range(start, settled_end):
+                recent.append([dates[i], _json_value(indicator.update(records[i - start]))])
+
+            appended = settled_end - start
+            self.stats['appended_bars'] += appended
+            if settled_end > 0 and (rebuilt or appended):
+                self._save(namespace, symbol, spec.key, {
+                    'version': STATE_VERSION,
+                    'symbol': symbol,
+                    'key': spec.key,
+                    'params': spec.params,
+                    'first_date': first_date,
+                    'first_close': first_close,
+                    'last_date': dates[settled_end - 1],
+                    'last_close': closes[settled_end - 1],
+                    'state': indicator.state_dict(),
+                    'recent': list(recent),
+                })
+
+        # 未收盘的K线只在状态副本上计算，不写回
+        unsettled = []
+        if settled_end < len(dates):
+            scratch = spec.create().load_state_dict(indicator.state_dict())
+            for i in range(settled_end, len(dates)):
+                unsettled.append([dates[i], _json_value(scratch.update(records[i - start]))])
+
+        rows = list(recent) + unsettled
+        return IndicatorSeries(
+            dates=[row[0] for row in rows],
+            values=[spec.select(row[1]) for row in rows],
+            rebuilt=rebuilt,
+            appended=appended,
+        )
+
+    def invalidate(self, symbol: Optional[str] = None, namespace: Optional[str] = None):
+        """清除内存中的状态（磁盘文件保留，下次读取时仍会做一致性检查）"""
+        with self._lock:
+            for cache_key in list(self._records):
+                if (namespace is None or cache_key[0] == namespace) and (symbol is None or cache_key[1] == symbol):
+                    del self._records[cache_key]
+
+
+# 全局指标状态存储
+_indicator_state_store: Optional[IndicatorStateStore] = None
+
+def get_indicator_state_store() -> IndicatorStateStore:
+    """获取全局指标状态存储实例（与K线缓存同目录）"""
+    global _indicator_state_store
+    if _indicator_state_store is None:
+        from .cache_manager import get_cache
+        _indicator_state_store = IndicatorStateStore(get_cache().cache_dir / "indicator_state")
+    return _indicator_state_store
@@ -5,14 +5,21 @@ from .reddit_utils import fetch_top_from_category
 from .chinese_finance_utils import get_chinese_social_sentiment
 from .googlenews_utils import *
 from .finnhub_utils import get_data_in_range
+from .prefetch import dataflow_memo
+from .point_in_time import KIND_FUNDAMENTALS, KIND_INDICATOR, KIND_NEWS, KIND_PRICE, point_in_time
+from .simfin_store import get_simfin_store, simfin_csv_path
+from .trading_calendar import calendar_for_symbol
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_dataflow_logging
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import replayable
 logger = get_logger('agents')
 logger = setup_dataflow_logging()
+from tradingagents.utils.log_categories import get_log_category, trace_symbol, SYMBOL_TRACE
+symbol_trace = get_log_category(SYMBOL_TRACE)
 
 # 导入港股工具
 try:
@@ -64,6 +71,8 @@ except ImportError as e:
 from .config import get_config, set_config, DATA_DIR
 
 
+@point_in_time(KIND_NEWS, date_args=('curr_date',), snapshot=False)
+@dataflow_memo('news')
 def get_finnhub_news(
     ticker: Annotated[
         str,
@@ -204,35 +213,16 @@ def get_simfin_balance_sheet(
     ],
     curr_date: Annotated[str, "current date you are trading at, yyyy-mm-dd"],
 ):
-    data_path = os.path.join(
-        DATA_DIR,
-        "fundamental_data",
-        "simfin_data_all",
-        "balance_sheet",
-        "companies",
-        "us",
-        f"us-balance-{freq}.csv",
-    )
-    df = pd.read_csv(data_path, sep=";")
-
-    # Convert date strings to datetime objects and remove any time components
-    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
-    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
+    data_path = simfin_csv_path(DATA_DIR, "balance_sheet", freq)
 
-    # Convert the current date to datetime and normalize
-    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
-
-    # Filter the DataFrame for the given ticker and for reports that were published on or before the current date
-    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    # Latest report published on or before the current date, from the indexed store
+    latest_balance_sheet = get_simfin_store(data_path).latest_as_of(ticker, curr_date)
 
     # Check if there are any available reports; if not, return a notification
-    if filtered_df.empty:
+    if latest_balance_sheet is None:
         logger.info(f"No balance sheet available before the given current date.")
         return ""
 
-    # Get the most recent balance sheet by selecting the row with the latest Publish Date
-    latest_balance_sheet = filtered_df.loc[filtered_df["Publish Date"].idxmax()]
-
     # drop the SimFinID column
     latest_balance_sheet = latest_balance_sheet.drop("SimFinId")
 
@@ -251,35 +241,16 @@ def get_simfin_cashflow(
     ],
     curr_date: Annotated[str, "current date you are trading at, yyyy-mm-dd"],
 ):
-    data_path = os.path.join(
-        DATA_DIR,
-        "fundamental_data",
-        "simfin_data_all",
-        "cash_flow",
-        "companies",
-        "us",
-        f"us-cashflow-{freq}.csv",
-    )
-    df = pd.read_csv(data_path, sep=";")
-
-    # Convert date strings to datetime objects and remove any time components
-    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
-    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
-
-    # Convert the current date to datetime and normalize
-    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
+    data_path = simfin_csv_path(DATA_DIR, "cashflow", freq)
 
-    # Filter the DataFrame for the given ticker and for reports that were published on or before the current date
-    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    # Latest report published on or before the current date, from the indexed store
+    latest_cash_flow = get_simfin_store(data_path).latest_as_of(ticker, curr_date)
 
     # Check if there are any available reports; if not, return a notification
-    if filtered_df.empty:
+    if latest_cash_flow is None:
         logger.info(f"No cash flow statement available before the given current date.")
         return ""
 
-    # Get the most recent cash flow statement by selecting the row with the latest Publish Date
-    latest_cash_flow = filtered_df.loc[filtered_df["Publish Date"].idxmax()]
-
     # drop the SimFinID column
     latest_cash_flow = latest_cash_flow.drop("SimFinId")
 
@@ -298,35 +269,16 @@ def get_simfin_income_statements(
     ],
     curr_date: Annotated[str, "current date you are trading at, yyyy-mm-dd"],
 ):
-    data_path = os.path.join(
-        DATA_DIR,
-        "fundamental_data",
-        "simfin_data_all",
-        "income_statements",
-        "companies",
-        "us",
-        f"us-income-{freq}.csv",
-    )
-    df = pd.read_csv(data_path, sep=";")
-
-    # Convert date strings to datetime objects and remove any time components
-    df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
-    df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
+    data_path = simfin_csv_path(DATA_DIR, "income", freq)
 
-    # Convert the current date to datetime and normalize
-    curr_date_dt = pd.to_datetime(curr_date, utc=True).normalize()
-
-    # Filter the DataFrame for the given ticker and for reports that were published on or before the current date
-    filtered_df = df[(df["Ticker"] == ticker) & (df["Publish Date"] <= curr_date_dt)]
+    # Latest report published on or before the current date, from the indexed store
+    latest_income = get_simfin_store(data_path).latest_as_of(ticker, curr_date)
 
     # Check if there are any available reports; if not, return a notification
-    if filtered_df.empty:
+    if latest_income is None:
         logger.info(f"No income statement available before the given current date.")
         return ""
 
-    # Get the most recent income statement by selecting the row with the latest Publish Date
-    latest_income = filtered_df.loc[filtered_df["Publish Date"].idxmax()]
-
     # drop the SimFinID column
     latest_income = latest_income.drop("SimFinId")
 
@@ -337,6 +289,8 @@ def get_simfin_income_statements(
     )
 
 
+@point_in_time(KIND_NEWS, date_args=('curr_date',))
+@dataflow_memo('news')
 def get_google_news(
     query: Annotated[str, "Query to search with"],
     curr_date: Annotated[str, "Curr date in yyyy-mm-dd format"],
@@ -363,6 +317,7 @@ def get_google_news(
     return f"## {query} Google News, from {before} to {curr_date}:\n\n{news_str}"
 
 
+@point_in_time(KIND_NEWS, date_args=('start_date',), snapshot=False)
 def get_reddit_global_news(
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
     look_back_days: Annotated[int, "how many days to look back"],
@@ -382,14 +337,9 @@ def get_reddit_global_news(
     before = before.strftime("%Y-%m-%d")
 
     posts = []
-    # iterate from start_date to end_date
-    curr_date = datetime.strptime(before, "%Y-%m-%d")
-
-    total_iterations = (start_date - curr_date).days + 1
-    pbar = tqdm(desc=f"Getting Global News on {start_date}", total=total_iterations)
-
-    while curr_date <= start_date:
-        curr_date_str = curr_date.strftime("%Y-%m-%d")
+    # 新闻在周末和节假日同样发布，逐个自然日读取（日期区间一次生成，不再逐日做日期运算）
+    days = pd.date_range(before, start_date).strftime("%Y-%m-%d")
+    for curr_date_str in tqdm(days, desc=f"Getting Global News on {start_date}"):
         fetch_result = fetch_top_from_category(
             "global_news",
             curr_date_str,
@@ -397,10 +347,6 @@ def get_reddit_global_news(
             data_path=os.path.join(DATA_DIR, "reddit_data"),
         )
         posts.extend(fetch_result)
-        curr_date += relativedelta(days=1)
-        pbar.update(1)
-
-    pbar.close()
 
     if len(posts) == 0:
         return ""
@@ -412,9 +358,10 @@ def get_reddit_global_news(
         else:
             news_str += f"### {post['title']}\n\n{post['content']}\n\n"
 
-    return f"## Global News Reddit, from {before} to {curr_date}:\n{news_str}"
+    return f"## Global News Reddit, from {before} to {days[-1]}:\n{news_str}"
 
 
+@point_in_time(KIND_NEWS, date_args=('start_date',), snapshot=False)
 def get_reddit_company_news(
     ticker: Annotated[str, "ticker symbol of the company"],
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
@@ -474,6 +421,7 @@ def get_reddit_company_news(
     return f"##{ticker} News Reddit, from {before} to {curr_date}:\n\n{news_str}"
 
 
+@point_in_time(KIND_INDICATOR, date_args=('curr_date',))
 def get_stock_stats_indicators_window(
     symbol: Annotated[str, "ticker symbol of the company"],
     indicator: Annotated[str, "technical indicator to get the analysis and report of"],
@@ -577,28 +525,18 @@ def get_stock_stats_indicators_window(
         data["Date"] = pd.to_datetime(data["Date"], utc=True)
         dates_in_df = data["Date"].astype(str).str[:10]
 
-        ind_string = ""
-        while curr_date >= before:
-            # only do the trading dates
-            if curr_date.strftime("%Y-%m-%d") in dates_in_df.values:
-                indicator_value = get_stockstats_indicator(
-                    symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
-                )
-
-                ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
-
-            curr_date = curr_date - relativedelta(days=1)
+        # only do the trading dates
+        window = pd.date_range(before, curr_date).strftime("%Y-%m-%d")
+        window = window[window.isin(dates_in_df)]
     else:
-        # online gathering
-        ind_string = ""
-        while curr_date >= before:
-            indicator_value = get_stockstats_indicator(
-                symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
-            )
+        # online gathering: 按交易日历只取交易日，周末和节假日不再逐日计算指标
+        window = calendar_for_symbol(symbol).trading_days(before, curr_date).strftime("%Y-%m-%d")
 
-            ind_string += f"{curr_date.strftime('%Y-%m-%d')}: {indicator_value}\n"
+    ind_string = ""
+    for day in window[::-1]:
+        indicator_value = get_stockstats_indicator(symbol, indicator, day, online)
 
-            curr_date = curr_date - relativedelta(days=1)
+        ind_string += f"{day}: {indicator_value}\n"
 
     result_str = (
         f"## {indicator} values from {before.strftime('%Y-%m-%d')} to {end_date}:\n\n"
@@ -610,6 +548,7 @@ def get_stock_stats_indicators_window(
     return result_str
 
 
+@point_in_time(KIND_INDICATOR, date_args=('curr_date',))
 def get_stockstats_indicator(
     symbol: Annotated[str, "ticker symbol of the company"],
     indicator: Annotated[str, "technical indicator to get the analysis and report of"],
@@ -639,6 +578,7 @@ def get_stockstats_indicator(
     return str(indicator_value)
 
 
+@point_in_time(KIND_PRICE, date_args=('curr_date',), snapshot=False)
 def get_YFin_data_window(
     symbol: Annotated[str, "ticker symbol of the company"],
     curr_date: Annotated[str, "Start date in yyyy-mm-dd format"],
@@ -680,6 +620,9 @@ def get_YFin_data_window(
     )
 
 
+@point_in_time(KIND_PRICE, date_args=('end_date', 'start_date'))
+@dataflow_memo('price')
+@replayable('yfinance')
 def get_YFin_data_online(
     symbol: Annotated[str, "ticker symbol of the company"],
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
@@ -725,6 +668,7 @@ def get_YFin_data_online(
     return header + csv_string
 
 
+@point_in_time(KIND_PRICE, date_args=('end_date', 'start_date'), snapshot=False)
 def get_YFin_data(
     symbol: Annotated[str, "ticker symbol of the company"],
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
@@ -760,6 +704,8 @@ def get_YFin_data(
     return filtered_data
 
 
+@point_in_time(KIND_NEWS, date_args=('curr_date',))
+@replayable('openai')
 def get_stock_news_openai(ticker, curr_date):
     config = get_config()
     client = OpenAI(base_url=config["backend_url"])
@@ -795,6 +741,8 @@ def get_stock_news_openai(ticker, curr_date):
     return response.output[1].content[0].text
 
 
+@point_in_time(KIND_NEWS, date_args=('curr_date',))
+@replayable('openai')
 def get_global_news_openai(curr_date):
     config = get_config()
     client = OpenAI(base_url=config["backend_url"])
@@ -830,6 +778,8 @@ def get_global_news_openai(curr_date):
     return response.output[1].content[0].text
 
 
+@point_in_time(KIND_FUNDAMENTALS, date_args=('curr_date',))
+@replayable('finnhub')
 def get_fundamentals_finnhub(ticker, curr_date):
     """
     使用Finnhub API获取股票基本面数据作为OpenAI的备选方案
@@ -970,6 +920,9 @@ def get_fundamentals_finnhub(ticker, curr_date):
         return f"Finnhub基本面数据获取失败: {str(e)}"
 
 
+@point_in_time(KIND_FUNDAMENTALS, date_args=('curr_date',))
+@dataflow_memo('fundamentals')
+@replayable('openai')
 def get_fundamentals_openai(ticker, curr_date):
     """
     获取股票基本面数据，优先使用OpenAI，失败时回退到Finnhub API
@@ -1083,8 +1036,8 @@ def get_china_stock_data_tushare(
         logger.debug(f"📊 [Tushare] 获取{ticker}股票数据...")
 
         # 添加详细的股票代码追踪日志
-        logger.info(f"🔍 [股票代码追踪] get_china_stock_data_tushare 接收到的股票代码: '{ticker}' (类型: {type(ticker)})")
-        logger.info(f"🔍 [股票代码追踪] 重定向到data_source_manager")
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] get_china_stock_data_tushare 接收到的股票代码: '{ticker}' (类型: {type(ticker)})")
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 重定向到data_source_manager")
 
         manager = get_data_source_manager()
         return manager.get_china_stock_data_tushare(ticker, start_date, end_date)
@@ -1111,7 +1064,7 @@ def search_china_stocks_tushare(
         from .data_source_manager import get_data_source_manager
 
         logger.debug(f"🔍 [Tushare] 搜索股票: {keyword}")
-        logger.info(f"🔍 [股票代码追踪] 重定向到data_source_manager")
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 重定向到data_source_manager")
 
         manager = get_data_source_manager()
         return manager.search_china_stocks_tushare(keyword)
@@ -1138,7 +1091,7 @@ def get_china_stock_fundamentals_tushare(
         from .data_source_manager import get_data_source_manager
 
         logger.debug(f"📊 [Tushare] 获取{ticker}基本面数据...")
-        logger.info(f"🔍 [股票代码追踪] 重定向到data_source_manager")
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 重定向到data_source_manager")
 
         manager = get_data_source_manager()
         return manager.get_china_stock_fundamentals_tushare(ticker)
@@ -1165,7 +1118,7 @@ def get_china_stock_info_tushare(
         from .data_source_manager import get_data_source_manager
 
         logger.debug(f"📊 [Tushare] 获取{ticker}基本信息...")
-        logger.info(f"🔍 [股票代码追踪] 重定向到data_source_manager")
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 重定向到data_source_manager")
 
         manager = get_data_source_manager()
         return manager.get_china_stock_info_tushare(ticker)
@@ -1177,6 +1130,8 @@ def get_china_stock_info_tushare(
 
 # ==================== 统一数据源接口 ====================
 
+@point_in_time(KIND_PRICE, date_args=('end_date', 'start_date'))
+@dataflow_memo('price')
 def get_china_stock_data_unified(
     ticker: Annotated[str, "中国股票代码，如：000001、600036等"],
     start_date: Annotated[str, "开始日期，格式：YYYY-MM-DD"],
@@ -1205,9 +1160,7 @@ def get_china_stock_data_unified(
                })
 
     # 添加详细的股票代码追踪日志
-    logger.info(f"🔍 [股票代码追踪] get_china_stock_data_unified 接收到的原始股票代码: '{ticker}' (类型: {type(ticker)})")
-    logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(ticker))}")
-    logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(ticker))}")
+    trace_symbol(logger, "get_china_stock_data_unified", ticker)
 
     start_time = time.time()
 
@@ -1263,6 +1216,7 @@ def get_china_stock_data_unified(
         return f"❌ 获取{ticker}股票数据失败: {e}"
 
 
+@dataflow_memo('info')
 def get_china_stock_info_unified(
     ticker: Annotated[str, "中国股票代码，如：000001、600036等"]
 ) -> str:
@@ -1367,6 +1321,8 @@ def get_current_china_data_source() -> str:
 
 # ==================== 港股数据接口 ====================
 
+@point_in_time(KIND_PRICE, date_args=('end_date', 'start_date'))
+@dataflow_memo('price')
 def get_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str = None) -> str:
     """
     获取港股数据的统一接口
@@ -1428,6 +1384,7 @@ def get_hk_stock_data_unified(symbol: str, start_date: str = None, end_date: str
         return f"❌ 获取港股{symbol}数据失败: {e}"
 
 
+@dataflow_memo('info')
 def get_hk_stock_info_unified(symbol: str) -> Dict:
     """
     获取港股信息的统一接口
@@ -1500,7 +1457,7 @@ def get_stock_data_by_market(symbol: str, start_date: str = None, end_date: str
         str: 格式化的股票数据
     """
     try:
-        from .utils.stock_utils import StockUtils
+        from tradingagents.utils.stock_utils import StockUtils
 
         market_info = StockUtils.get_market_info(symbol)
 
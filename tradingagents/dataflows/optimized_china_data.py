@@ -10,6 +10,7 @@ import random
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from .cache_manager import get_cache
+from .cache_policy import STALE, get_cache_policy_engine
 from .config import get_config
 
 # 导入日志模块
@@ -55,18 +56,23 @@ class OptimizedChinaDataProvider:
         """
         logger.info(f"📈 获取A股数据: {symbol} ({start_date} 到 {end_date})")
         
-        # 检查缓存（除非强制刷新）
+        # 检查缓存（除非强制刷新）；过期不久的缓存直接返回，同时在后台刷新
         if not force_refresh:
             cache_key = self.cache.find_cached_stock_data(
                 symbol=symbol,
                 start_date=start_date,
                 end_date=end_date,
-                data_source="tdx"
+                data_source="unified",
+                allow_stale=True
             )
             
             if cache_key:
                 cached_data = self.cache.load_stock_data(cache_key)
                 if cached_data:
+                    if self.cache.cache_freshness(cache_key) == STALE:
+                        get_cache_policy_engine().revalidate(
+                            ('china_stock_data', symbol, start_date, end_date),
+                            lambda: self.get_stock_data(symbol, start_date, end_date, force_refresh=True))
                     logger.info(f"⚡ 从缓存加载A股数据: {symbol}")
                     return cached_data
         
@@ -591,9 +597,11 @@ class OptimizedChinaDataProvider:
                     with open(metadata_file, 'r', encoding='utf-8') as f:
                         metadata = json.load(f)
                     
+                    # 不使用结束日期晚于请求的缓存，避免回测读到之后的行情
                     if (metadata.get('symbol') == symbol and 
                         metadata.get('data_type') == 'stock_data' and
-                        metadata.get('market_type') == 'china'):
+                        metadata.get('market_type') == 'china' and
+                        not (end_date and metadata.get('end_date') and metadata['end_date'] > end_date)):
                         
                         cache_key = metadata_file.stem.replace('_meta', '')
                         cached_data = self.cache.load_stock_data(cache_key)
@@ -12,7 +12,10 @@ from typing import Optional, Dict, Any
 import yfinance as yf
 import pandas as pd
 from .cache_manager import get_cache
+from .cache_policy import STALE, get_cache_policy_engine
 from .config import get_config
+from .point_in_time import KIND_PRICE, point_in_time
+from tradingagents.indicators import standard_indicator_frame
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -58,14 +61,15 @@ class OptimizedUSDataProvider:
         """
         logger.info(f"📈 获取美股数据: {symbol} ({start_date} 到 {end_date})")
         
-        # 检查缓存（除非强制刷新）
+        # 检查缓存（除非强制刷新）；过期不久的缓存直接返回，同时在后台刷新
         if not force_refresh:
             # 优先查找FINNHUB缓存
             cache_key = self.cache.find_cached_stock_data(
                 symbol=symbol,
                 start_date=start_date,
                 end_date=end_date,
-                data_source="finnhub"
+                data_source="finnhub",
+                allow_stale=True
             )
 
             # 如果没有FINNHUB缓存，查找Yahoo Finance缓存
@@ -74,12 +78,17 @@ class OptimizedUSDataProvider:
                     symbol=symbol,
                     start_date=start_date,
                     end_date=end_date,
-                    data_source="yfinance"
+                    data_source="yfinance",
+                    allow_stale=True
                 )
 
             if cache_key:
                 cached_data = self.cache.load_stock_data(cache_key)
                 if cached_data:
+                    if self.cache.cache_freshness(cache_key) == STALE:
+                        get_cache_policy_engine().revalidate(
+                            ('us_stock_data', symbol, start_date, end_date),
+                            lambda: self.get_stock_data(symbol, start_date, end_date, force_refresh=True))
                     logger.info(f"⚡ 从缓存加载美股数据: {symbol}")
                     return cached_data
         
@@ -198,17 +207,11 @@ class OptimizedUSDataProvider:
         price_change = data['Close'].iloc[-1] - data['Close'].iloc[0]
         price_change_pct = (price_change / data['Close'].iloc[0]) * 100
         
-        # 计算技术指标
-        data['MA5'] = data['Close'].rolling(window=5).mean()
-        data['MA10'] = data['Close'].rolling(window=10).mean()
-        data['MA20'] = data['Close'].rolling(window=20).mean()
-        
-        # 计算RSI
-        delta = data['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        # 计算技术指标（共享指标库，与A股数据源口径一致）
+        indicators = standard_indicator_frame(data['Close'].astype(float))
+        for column in ('MA5', 'MA10', 'MA20'):
+            data[column] = indicators[column]
+        rsi = indicators['RSI']
         
         # 格式化输出
         result = f"""# {symbol} 美股数据分析
@@ -250,9 +253,11 @@ class OptimizedUSDataProvider:
                     with open(metadata_file, 'r', encoding='utf-8') as f:
                         metadata = json.load(f)
                     
+                    # 不使用结束日期晚于请求的缓存，避免回测读到之后的行情
                     if (metadata.get('symbol') == symbol and 
                         metadata.get('data_type') == 'stock_data' and
-                        metadata.get('market_type') == 'us'):
+                        metadata.get('market_type') == 'us' and
+                        not (end_date and metadata.get('end_date') and metadata['end_date'] > end_date)):
                         
                         cache_key = metadata_file.stem.replace('_meta', '')
                         cached_data = self.cache.load_stock_data(cache_key)
@@ -354,6 +359,7 @@ def get_optimized_us_data_provider() -> OptimizedUSDataProvider:
     return _us_data_provider
 
 
+@point_in_time(KIND_PRICE, date_args=('end_date', 'start_date'))
 def get_us_stock_data_cached(symbol: str, start_date: str, end_date: str, 
                            force_refresh: bool = False) -> str:
     """
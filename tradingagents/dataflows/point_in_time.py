@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+时点（point-in-time）数据访问
+
+回测时按决策日查看行情、技术指标、新闻和基本面：
+
+    with as_of('2024-03-15'):
+        graph.propagate('000001', '2024-03-15')
+
+    view = as_of('2024-03-15')
+    view.prices('AAPL'); view.news('AAPL'); view.fundamentals('AAPL')
+
+- as-of 上下文中，数据接口的日期参数晚于 as-of 日期（或为空，即"到今天"）时截断为 as-of 日期，
+  工具按当前时间计算的区间不会读到决策日之后的数据
+- 日期在所属市场已收盘（按交易所时区和收盘时间）的结果写入按日期版本化的快照（<缓存目录>/snapshots/<类型>/<日期>/<接口>/<请求键>.pkl.z），
+  只写一次、永不过期，不同回测运行和进程之间共享；失败或空结果不写入
+- as-of 日期通过 contextvars 传递，图内的节点和工具调用自动继承
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import pickle
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import request_key
+from tradingagents.utils.tracing import KIND_CACHE, trace_span
+from .cache_policy import get_cache_policy_engine, infer_context
+logger = get_logger('agents')
+
+
+# 快照的数据类型
+KIND_PRICE = 'price'
+KIND_INDICATOR = 'indicator'
+KIND_NEWS = 'news'
+KIND_FUNDAMENTALS = 'fundamentals'
+
+SNAPSHOT_ENV = 'TRADINGAGENTS_PIT_SNAPSHOTS'
+SNAPSHOT_DIR_ENV = 'TRADINGAGENTS_PIT_SNAPSHOT_DIR'
+
+SNAPSHOT_SUFFIX = '.pkl.z'
+COMPRESS_LEVEL = 6
+
+# 进程内保留的最近快照数
+DEFAULT_MEMORY_ENTRIES = 256
+
+# 结果中出现这些内容时视为失败，不写入快照
+ERROR_MARKERS = ('❌', 'No data found', '获取失败', '库不可用')
+
+_as_of: contextvars.ContextVar = contextvars.ContextVar('tradingagents_as_of', default=None)
+
+
+# ==================== 日期 ====================
+
+def normalize_date(value: Any) -> Optional[str]:
+    """日期规范化为 'YYYY-MM-DD'（支持 'YYYYMMDD'、date、datetime、Timestamp），无法解析时返回 None"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (datetime, date, pd.Timestamp)):
+        return value.strftime('%Y-%m-%d')
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(text[:10] if fmt == '%Y-%m-%d' else text[:8], fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
+
+
+def current_as_of() -> Optional[str]:
+    """当前上下文的 as-of 日期，未设置时为 None"""
+    return _as_of.get()
+
+
+def clamp_date(value: Any, as_of_date: Optional[str] = None) -> Any:
+    """
+    日期截断到 as-of 日期
+
+    晚于 as-of 日期或为空时返回 as-of 日期（保持原来的 'YYYYMMDD' 格式），否则原样返回；
+    没有 as-of 日期或无法解析时原样返回
+    """
+    as_of_date = as_of_date or current_as_of()
+    if as_of_date is None:
+        return value
+    if value is None or value == '':
+        return as_of_date
+    normalized = normalize_date(value)
+    if normalized is None or normalized <= as_of_date:
+        return value
+    if isinstance(value, str) and len(value.strip()) == 8 and value.strip().isdigit():
+        return as_of_date.replace('-', '')
+    return as_of_date
+
+
+def is_settled(value: Any, market: Optional[str] = None, now: Optional[float] = None) -> bool:
+    """
+    该日及之前的数据已经确定，可以永久缓存
+
+    按市场所在时区和收盘时间判断（cache_policy.MarketClock.is_settled）：早于交易所当地今天，
+    或今天已收盘/休市；市场未知时按本地日期判断
+    """
+    return get_cache_policy_engine().clock.is_settled(market, value, now)
+
+
+@contextmanager
+def as_of_scope(as_of_date: Any) -> Iterator[str]:
+    """在上下文中设置 as-of 日期"""
+    normalized = normalize_date(as_of_date)
+    if normalized is None:
+        raise ValueError(f"无效的 as-of 日期: {as_of_date}")
+    token = _as_of.set(normalized)
+    try:
+        yield normalized
+    finally:
+        _as_of.reset(token)
+
+
+# ==================== 快照存储 ====================
+
+@dataclass
+class SnapshotStats:
+    """快照命中统计"""
+    hits: int = 0
+    memory_hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    skipped: int = 0    # 结果失败或为空，未写入
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def _copy(value: Any) -> Any:
+    """返回给调用方的副本，避免修改缓存中的对象"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def is_snapshot_worthy(result: Any) -> bool:
+    """失败、空结果或错误提示不写入快照"""
+    if result is None:
+        return False
+    if isinstance(result, str):
+        return bool(result.strip()) and not any(marker in result for marker in ERROR_MARKERS)
+    if isinstance(result, dict):
+        return bool(result) and 'error' not in result
+    if isinstance(result, pd.DataFrame):
+        return not result.empty
+    return True
+
+
+class SnapshotStore:
+    """按日期版本化的不可变快照：同一 (类型, 日期, 接口, 请求键) 只写一次"""
+
+    def __init__(self, directory: str, memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.directory = Path(directory)
+        self.memory_entries = memory_entries
+        self.stats = SnapshotStats()
+        self._memory: 'OrderedDict[Path, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def path_for(self, kind: str, as_of_date: str, name: str, key: str) -> Path:
+        return self.directory / kind / as_of_date / name / f"{key}{SNAPSHOT_SUFFIX}"
+
+    def _remember(self, path: Path, value: Any):
+        with self._lock:
+            self._memory[path] = value
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, kind: str, as_of_date: str, name: str, key: str) -> Tuple[bool, Any]:
+        path = self.path_for(kind, as_of_date, name, key)
+        with self._lock:
+            if path in self._memory:
+                self._memory.move_to_end(path)
+                self.stats.hits += 1
+                self.stats.memory_hits += 1
+                return True, _copy(self._memory[path])
+        try:
+            value = pickle.loads(zlib.decompress(path.read_bytes()))
+        except FileNotFoundError:
+            with self._lock:
+                self.stats.misses += 1
+            return False, None
+        except Exception as e:
+            logger.warning(f"⚠️ [时点快照] 读取失败，忽略: {path} ({e})")
+            with self._lock:
+                self.stats.misses += 1
+            return False, None
+        self._remember(path, value)
+        with self._lock:
+            self.stats.hits += 1
+        return True, _copy(value)
+
+    def put(self, kind: str, as_of_date: str, name: str, key: str, value: Any) -> bool:
+        """写入快照；已存在时不覆盖，返回是否写入"""
+        path = self.path_for(kind, as_of_date, name, key)
+        if path.exists():
+            return False
+        payload = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+        self._remember(path, value)
+        with self._lock:
+            self.stats.writes += 1
+        logger.debug(f"💾 [时点快照] 已写入: {kind}/{as_of_date}/{name}")
+        return True
+
+    def record_skip(self):
+        with self._lock:
+            self.stats.skipped += 1
+
+    def count(self, kind: Optional[str] = None) -> int:
+        root = self.directory / kind if kind else self.directory
+        return sum(1 for _ in root.rglob(f"*{SNAPSHOT_SUFFIX}")) if root.exists() else 0
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+
+_snapshot_store: Optional[SnapshotStore] = None
+_snapshot_store_lock = threading.Lock()
+
+def get_snapshot_store() -> SnapshotStore:
+    """获取全局快照存储（默认与K线缓存同目录）"""
+    global _snapshot_store
+    with _snapshot_store_lock:
+        if _snapshot_store is None:
+            directory = os.getenv(SNAPSHOT_DIR_ENV)
+            if not directory:
+                from .cache_manager import get_cache
+                directory = get_cache().cache_dir / "snapshots"
+            _snapshot_store = SnapshotStore(str(directory))
+        return _snapshot_store
+
+
+def set_snapshot_store(store: Optional[SnapshotStore]) -> Optional[SnapshotStore]:
+    """替换全局快照存储（测试或自定义目录），返回原来的实例"""
+    global _snapshot_store
+    with _snapshot_store_lock:
+        previous, _snapshot_store = _snapshot_store, store
+        return previous
+
+
+def snapshots_enabled() -> bool:
+    return os.getenv(SNAPSHOT_ENV, 'true').lower() not in ('0', 'false', 'no', 'off')
+
+
+# ==================== 装饰器 ====================
+
+def point_in_time(kind: str, date_args: Sequence[str] = ('end_date',), snapshot: bool = True):
+    """
+    数据接口的时点装饰器
+
+    as-of 上下文中把 date_args 中的日期参数截断到 as-of 日期；第一个日期参数为快照日期（为空时取 as-of 日期），
+    在股票代码参数所属市场已收盘时结果写入不可变快照，之后相同请求直接读取。没有 as-of 上下文时不做任何处理。
+    放在 dataflow_memo 之外，进程内缓存使用截断后的参数。
+
+    Args:
+        kind: 快照类型（price/indicator/news/fundamentals）
+        date_args: 需要截断的日期参数名
+        snapshot: 是否写入快照（本地离线数据只截断日期）
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            as_of_date = current_as_of()
+            if as_of_date is None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            for index, arg in enumerate(date_args):
+                value = bound.arguments.get(arg)
+                # 只有快照日期参数为空时表示"到今天"，其余日期参数为空时保持原样
+                if arg in bound.arguments and (index == 0 or value not in (None, '')):
+                    bound.arguments[arg] = clamp_date(value, as_of_date)
+            snapshot_date = normalize_date(bound.arguments.get(date_args[0])) if date_args else as_of_date
+
+            market = infer_context(bound.args, bound.kwargs)[0] if snapshot_date else None
+            if not (snapshot and snapshots_enabled() and snapshot_date and is_settled(snapshot_date, market)):
+                return func(*bound.args, **bound.kwargs)
+
+            store = get_snapshot_store()
+            key = request_key(func.__module__, name, bound.arguments)
+            with trace_span("cache:snapshot", KIND_CACHE, tier="snapshot") as span:
+                found, value = store.get(kind, snapshot_date, name, key)
+                span.set_attribute("cache_hit", found)
+            if found:
+                logger.debug(f"📦 [时点快照] 命中: {name} @ {snapshot_date}")
+                return value
+
+            value = func(*bound.args, **bound.kwargs)
+            if is_snapshot_worthy(value):
+                try:
+                    store.put(kind, snapshot_date, name, key, value)
+                except Exception as e:
+                    logger.warning(f"⚠️ [时点快照] 写入失败: {name} @ {snapshot_date} ({e})")
+            else:
+                store.record_skip()
+            return value
+
+        wrapper.pit_kind = kind
+        return wrapper
+    return decorator
+
+
+# ==================== as-of 视图 ====================
+
+class AsOfView:
+    """
+    某一日期的数据视图：行情、技术指标、新闻和基本面均只包含该日及之前的信息
+
+    也可作为上下文使用（with as_of(date): ...），范围内的所有数据接口调用都按该日期截断
+    """
+
+    def __init__(self, as_of_date: Any):
+        normalized = normalize_date(as_of_date)
+        if normalized is None:
+            raise ValueError(f"无效的 as-of 日期: {as_of_date}")
+        self.date = normalized
+        self._scopes = threading.local()
+
+    def __repr__(self) -> str:
+        return f"AsOfView({self.date})"
+
+    def __enter__(self) -> 'AsOfView':
+        tokens = getattr(self._scopes, 'tokens', None)
+        if tokens is None:
+            tokens = self._scopes.tokens = []
+        tokens.append(_as_of.set(self.date))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _as_of.reset(self._scopes.tokens.pop())
+        return False
+
+    def _start(self, lookback_days: int) -> str:
+        return (datetime.strptime(self.date, '%Y-%m-%d') - timedelta(days=lookback_days)).strftime('%Y-%m-%d')
+
+    def prices(self, symbol: str, lookback_days: int = 30) -> str:
+        """截至 as-of 日期的行情（按市场自动选择数据源）"""
+        from .interface import get_stock_data_by_market
+        with as_of_scope(self.date):
+            return get_stock_data_by_market(symbol, self._start(lookback_days), self.date)
+
+    def indicator(self, symbol: str, indicator: str, lookback_days: int = 30, online: bool = True) -> str:
+        """截至 as-of 日期的技术指标窗口"""
+        from .interface import get_stock_stats_indicators_window
+        with as_of_scope(self.date):
+            return get_stock_stats_indicators_window(symbol, indicator, self.date, lookback_days, online)
+
+    def news(self, query: str, lookback_days: int = 7) -> str:
+        """as-of 日期之前 lookback_days 天的新闻"""
+        from .interface import get_google_news
+        with as_of_scope(self.date):
+            return get_google_news(query, self.date, lookback_days)
+
+    def fundamentals(self, symbol: str) -> str:
+        """
+        截至 as-of 日期的基本面
+
+        美股/港股使用按日期查询的 Finnhub/OpenAI 接口；A股基本面接口只提供最新数据，
+        不是时点数据，返回结果不写入快照
+        """
+        from .interface import (
+            get_china_stock_fundamentals_tushare, get_fundamentals_finnhub, get_fundamentals_openai,
+        )
+        from tradingagents.utils.stock_utils import StockUtils
+        with as_of_scope(self.date):
+            market_info = StockUtils.get_market_info(symbol)
+            if market_info['is_china']:
+                logger.warning(f"⚠️ [时点数据] {symbol} 的基本面数据源不支持历史日期，返回最新数据")
+                return get_china_stock_fundamentals_tushare(symbol)
+            result = get_fundamentals_finnhub(symbol, self.date)
+            if not is_snapshot_worthy(result):
+                result = get_fundamentals_openai(symbol, self.date)
+            return result
+
+
+def as_of(as_of_date: Any) -> AsOfView:
+    """按日期查看数据；也可用作上下文：with as_of('2024-03-15'): ..."""
+    return AsOfView(as_of_date)
@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+自选股批量预取（缓存预热）
+
+分析开始前，对整个自选股列表并发获取行情、基本信息、基本面和新闻，
+分析师调用工具时直接命中缓存，不再在分析开始后逐只、逐项地等待数据源。
+
+- A股行情优先使用 Tushare daily 的多代码批量接口，一次请求获取一批股票，按股票写入行情缓存
+- 各数据源按调用间隔限流
+- 没有持久化缓存的数据接口（新闻、港股/美股行情、基本信息等）通过 dataflow_memo 做进程内结果缓存，
+  预取和工具调用使用相同参数时直接命中；有效期、旧值后台刷新和负缓存使用统一缓存策略
+- 返回覆盖率报告
+"""
+
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.tracing import KIND_CACHE, KIND_DATA, trace_span
+from .cache_policy import EXPIRED, FRESH, STALE, get_cache_policy_engine, infer_context, is_no_data
+logger = get_logger('agents')
+
+
+# 预取的数据类型
+PREFETCH_KINDS = ('info', 'price', 'fundamentals', 'news')
+
+# 各数据源两次调用之间的最小间隔（秒）
+DEFAULT_RATE_LIMITS = {
+    'tushare': 0.3,
+    'akshare': 0.5,
+    'tdx': 0.2,
+    'yfinance': 1.0,
+    'finnhub': 1.0,
+    'google_news': 2.0,
+    'openai': 1.0,
+}
+
+# Tushare daily 单次返回的最大行数
+TUSHARE_DAILY_MAX_ROWS = 6000
+
+# 进程内结果缓存的最大条目数（超出时淘汰最久未使用的），以及清理过期条目的写入间隔
+DEFAULT_MEMO_ENTRIES = 4096
+MEMO_PURGE_INTERVAL = 256
+# 统一缓存策略中永不过期的数据（已收盘的历史行情）在进程内缓存中的保留时长，
+# 持久化保存由文件/多级缓存负责，进程内只需覆盖一段时间内的重复调用
+SETTLED_MEMO_SECONDS = 24 * 3600
+
+
+# ==================== 进程内结果缓存 ====================
+
+def _is_usable(result: Any) -> bool:
+    """失败或空结果不缓存"""
+    if result is None:
+        return False
+    if isinstance(result, str):
+        return bool(result.strip()) and '❌' not in result
+    if isinstance(result, dict):
+        return bool(result) and 'error' not in result
+    if isinstance(result, pd.DataFrame):
+        return not result.empty
+    return True
+
+
+@dataclass
+class MemoEntry:
+    """一条结果缓存：新鲜截止时间和可返回旧值的截止时间（None 为永不过期，只用于显式 ttl=None）"""
+    value: Any
+    fresh_until: Optional[float]
+    stale_until: Optional[float]
+    negative: bool = False
+
+
+class DataflowMemo:
+    """
+    数据接口结果的进程内缓存，键为 (函数名, 参数)
+
+    条目数有上限（LRU淘汰），写入时定期清理已过期（超过旧值可用期）的条目，
+    长时间运行、遍历大量股票和日期的进程内存不会无限增长
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMO_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, MemoEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'negative_hits': 0, 'evictions': 0, 'purged': 0}
+
+    @staticmethod
+    def _state(entry: Optional[MemoEntry], now: float) -> str:
+        if entry is None:
+            return EXPIRED
+        if entry.fresh_until is None or now < entry.fresh_until:
+            return FRESH
+        if entry.stale_until is not None and now < entry.stale_until:
+            return STALE
+        return EXPIRED
+
+    def lookup(self, key: Tuple) -> Tuple[str, Optional[MemoEntry]]:
+        """返回 (fresh/stale/expired, 缓存项)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            state = self._state(entry, time.time())
+            if state == EXPIRED:
+                self.stats['misses'] += 1
+                return state, None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            if state == STALE:
+                self.stats['stale_hits'] += 1
+            if entry.negative:
+                self.stats['negative_hits'] += 1
+            return state, entry
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """只返回新鲜的结果"""
+        state, entry = self.lookup(key)
+        if state != FRESH:
+            return False, None
+        return True, entry.value
+
+    def set(self, key: Tuple, value: Any, ttl_seconds: Optional[float], stale_seconds: float = 0.0,
+            negative: bool = False):
+        now = time.time()
+        fresh_until = None if ttl_seconds is None else now + ttl_seconds
+        stale_until = None if ttl_seconds is None else fresh_until + stale_seconds
+        self.set_entry(key, MemoEntry(value, fresh_until, stale_until, negative))
+
+    def set_entry(self, key: Tuple, entry: MemoEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._writes += 1
+            if self._writes % MEMO_PURGE_INTERVAL == 0 or len(self._entries) > self.max_entries:
+                self._purge_expired(time.time())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _purge_expired(self, now: float):
+        """清理已过期的条目（调用方持有锁）"""
+        expired = [key for key, entry in self._entries.items() if self._state(entry, now) == EXPIRED]
+        for key in expired:
+            del self._entries[key]
+        self.stats['purged'] += len(expired)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, key: Tuple) -> bool:
+        with self._lock:
+            return self._state(self._entries.get(key), time.time()) == FRESH
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_dataflow_memo = DataflowMemo()
+
+def get_dataflow_memo() -> DataflowMemo:
+    """获取全局数据接口结果缓存"""
+    return _dataflow_memo
+
+
+def memo_key(name: str, args: tuple, kwargs: Dict[str, Any]) -> Tuple:
+    return (name, tuple(str(arg) for arg in args), tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+
+
+def _memo_entry(kind: str, args: tuple, kwargs: Dict[str, Any], value: Any) -> Optional[MemoEntry]:
+    """按统一缓存策略生成缓存项；失败结果返回 None"""
+    negative = is_no_data(value)
+    if not negative and not _is_usable(value):
+        return None
+    engine = get_cache_policy_engine()
+    market, end_date = infer_context(args, kwargs)
+    if negative and not engine.policy(kind, market).negative_ttl:
+        return None
+    fresh_until, stale_until = engine.expiry(kind, market, end_date, negative=negative)
+    if fresh_until is None:
+        fresh_until = stale_until = time.time() + SETTLED_MEMO_SECONDS
+    return MemoEntry(value, fresh_until, stale_until, negative)
+
+
+def dataflow_memo(ttl: Union[float, str]):
+    """
+    数据接口结果缓存装饰器
+
+    ttl 为数据类型（'price'/'news'/'fundamentals'/'info'）时使用统一缓存策略（见 cache_policy.py）：
+    有效期随交易时段和数据结束日期变化，过期后在旧值可用期内直接返回旧值并后台刷新，
+    "无数据"结果按负缓存有效期缓存。ttl 为秒数时在 ttl 秒内直接返回上次的结果。
+    失败结果不缓存。
+    """
+    kind = ttl if isinstance(ttl, str) else None
+
+    def decorator(func: Callable) -> Callable:
+        def store(key, args, kwargs, value):
+            memo = get_dataflow_memo()
+            if kind is not None:
+                entry = _memo_entry(kind, args, kwargs, value)
+                if entry is not None:
+                    memo.set_entry(key, entry)
+            elif _is_usable(value):
+                memo.set(key, value, ttl)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            memo = get_dataflow_memo()
+            key = memo_key(func.__name__, args, kwargs)
+            with trace_span(func.__name__, KIND_DATA) as span:
+                with trace_span("cache:memo", KIND_CACHE, tier="memo") as cache_span:
+                    state, entry = memo.lookup(key)
+                    cache_span.set_attribute("cache_hit", state != EXPIRED)
+                if state != EXPIRED:
+                    if state == STALE:
+                        get_cache_policy_engine().revalidate(
+                            key, lambda: store(key, args, kwargs, func(*args, **kwargs)))
+                    logger.debug(f"📦 [预取缓存] 命中{'(旧值)' if state == STALE else ''}: {func.__name__}{key[1]}")
+                    value = entry.value
+                    return dict(value) if isinstance(value, dict) else value
+                value = func(*args, **kwargs)
+                if isinstance(value, str):
+                    span.set_attribute("bytes", len(value))
+                store(key, args, kwargs, value)
+                return value
+        wrapper.memo_name = func.__name__
+        wrapper.memo_ttl = ttl
+        return wrapper
+    return decorator
+
+
+# ==================== 限流 ====================
+
+class RateLimiter:
+    """按数据源限制调用间隔（线程安全）"""
+
+    def __init__(self, min_intervals: Optional[Dict[str, float]] = None):
+        self.min_intervals = dict(DEFAULT_RATE_LIMITS)
+        self.min_intervals.update(min_intervals or {})
+        self._next_allowed: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, provider: str):
+        interval = self.min_intervals.get(provider, 0)
+        if interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed.get(provider, now))
+            self._next_allowed[provider] = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# ==================== 报告 ====================
+
+@dataclass
+class PrefetchResult:
+    """单只股票、单类数据的预取结果"""
+    symbol: str
+    kind: str
+    status: str  # 'ok' / 'failed' / 'skipped'
+    source: str = ''
+    elapsed: float = 0.0
+    error: str = ''
+
+
+@dataclass
+class PrefetchReport:
+    """预取覆盖率报告"""
+    trade_date: str
+    symbols: List[str]
+    results: List[PrefetchResult] = field(default_factory=list)
+    bulk_symbols: Dict[str, List[str]] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    def coverage(self) -> Dict[str, Dict[str, Any]]:
+        """各数据类型的覆盖情况：{类型: {'ok', 'failed', 'skipped', 'ratio'}}"""
+        summary: Dict[str, Dict[str, Any]] = {}
+        for result in self.results:
+            counts = summary.setdefault(result.kind, {'ok': 0, 'failed': 0, 'skipped': 0})
+            counts[result.status] += 1
+        for counts in summary.values():
+            attempted = counts['ok'] + counts['failed']
+            counts['ratio'] = counts['ok'] / attempted if attempted else 1.0
+        return summary
+
+    def failed(self) -> List[PrefetchResult]:
+        return [result for result in self.results if result.status == 'failed']
+
+    def summary(self) -> str:
+        lines = [f"📦 预取完成: {len(self.symbols)} 只股票, 交易日 {self.trade_date}, 耗时 {self.elapsed:.1f}s"]
+        for source, symbols in self.bulk_symbols.items():
+            lines.append(f"  - 批量接口 {source}: {len(symbols)} 只")
+        for kind, counts in self.coverage().items():
+            lines.append(
+                f"  - {kind}: 成功 {counts['ok']}, 失败 {counts['failed']}, 跳过 {counts['skipped']} "
+                f"(覆盖率 {counts['ratio']:.0%})"
+            )
+        for result in self.failed()[:10]:
+            lines.append(f"  ❌ {result.symbol} {result.kind}: {result.error}")
+        return "\n".join(lines)
+
+
+# ==================== 预取器 ====================
+
+# 单项预取：(数据源, 获取函数(symbol, trade_date, start_date) -> 结果)
+Warmer = Tuple[str, Callable[[str, str, str], Any]]
+
+
+def _china_price(symbol, trade_date, start_date):
+    from .interface import get_china_stock_data_unified
+    return get_china_stock_data_unified(symbol, start_date, trade_date)
+
+
+def _china_info(symbol, trade_date, start_date):
+    from .interface import get_china_stock_info_unified
+    return get_china_stock_info_unified(symbol)
+
+
+def _china_news(symbol, trade_date, start_date):
+    # 与 get_stock_news_unified 的查询参数保持一致
+    from .interface import get_google_news
+    return get_google_news(f"{symbol} 股票", trade_date, 7)
+
+
+def _hk_price(symbol, trade_date, start_date):
+    from .interface import get_hk_stock_data_unified
+    return get_hk_stock_data_unified(symbol, start_date, trade_date)
+
+
+def _hk_info(symbol, trade_date, start_date):
+    from .interface import get_hk_stock_info_unified
+    return get_hk_stock_info_unified(symbol)
+
+
+def _hk_news(symbol, trade_date, start_date):
+    # 与 get_stock_news_unified 的查询参数保持一致
+    from .interface import get_google_news
+    return get_google_news(f"{symbol} 港股", trade_date, 7)
+
+
+def _us_price(symbol, trade_date, start_date):
+    from .interface import get_YFin_data_online
+    return get_YFin_data_online(symbol, start_date, trade_date)
+
+
+def _us_fundamentals(symbol, trade_date, start_date):
+    from .interface import get_fundamentals_openai
+    return get_fundamentals_openai(symbol, trade_date)
+
+
+def _us_news(symbol, trade_date, start_date):
+    from .interface import get_finnhub_news
+    news_start = (datetime.strptime(trade_date, '%Y-%m-%d') - timedelta(days=7)).strftime('%Y-%m-%d')
+    return get_finnhub_news(symbol, news_start, trade_date)
+
+
+# 各市场各数据类型的预取函数，与统一工具（get_stock_*_unified）实际调用的数据接口一致；
+# A股基本面工具使用的是行情数据加本地生成的报告，由 price 覆盖
+WARMERS: Dict[str, Dict[str, Warmer]] = {
+    'china': {
+        'price': ('tushare', _china_price),
+        'info': ('tushare', _china_info),
+        'news': ('google_news', _china_news),
+    },
+    'hk': {
+        'price': ('akshare', _hk_price),
+        'info': ('akshare', _hk_info),
+        'news': ('google_news', _hk_news),
+    },
+    'us': {
+        'price': ('yfinance', _us_price),
+        'fundamentals': ('openai', _us_fundamentals),
+        'news': ('finnhub', _us_news),
+    },
+}
+
+
+def _market_of(symbol: str) -> str:
+    from tradingagents.utils.stock_utils import StockUtils
+    info = StockUtils.get_market_info(symbol)
+    if info['is_china']:
+        return 'china'
+    if info['is_hk']:
+        return 'hk'
+    return 'us'
+
+
+class WatchlistPrefetcher:
+    """自选股批量预取器"""
+
+    def __init__(self, max_workers: int = 4, lookback_days: int = 30,
+                 rate_limits: Optional[Dict[str, float]] = None,
+                 warmers: Optional[Dict[str, Dict[str, Warmer]]] = None):
+        """
+        Args:
+            max_workers: 并发线程数
+            lookback_days: 行情回看天数
+            rate_limits: 覆盖默认的数据源调用间隔（秒）
+            warmers: 覆盖默认的预取函数表
+        """
+        self.max_workers = max_workers
+        self.lookback_days = lookback_days
+        self.rate_limiter = RateLimiter(rate_limits)
+        self.warmers = warmers or WARMERS
+
+    def prefetch(self, watchlist: Iterable[str], trade_date: str,
+                 kinds: Iterable[str] = PREFETCH_KINDS,
+                 progress_callback: Optional[Callable[[PrefetchResult], None]] = None) -> PrefetchReport:
+        """
+        预取自选股数据
+
+        Args:
+            watchlist: 股票代码列表（可混合A股、港股、美股）
+            trade_date: 交易日 'YYYY-MM-DD'
+            kinds: 需要预取的数据类型，见 PREFETCH_KINDS
+            progress_callback: 每完成一项时回调
+
+        Returns:
+            PrefetchReport: 覆盖率报告
+        """
+        started = time.time()
+        symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in watchlist if symbol and symbol.strip()))
+        kinds = [kind for kind in kinds if kind in PREFETCH_KINDS]
+        start_date = (datetime.strptime(trade_date, '%Y-%m-%d') - timedelta(days=self.lookback_days)).strftime('%Y-%m-%d')
+        report = PrefetchReport(trade_date=trade_date, symbols=symbols)
+
+        markets = {symbol: _market_of(symbol) for symbol in symbols}
+        logger.info(f"📦 [预取] 开始: {len(symbols)} 只股票, 数据类型 {kinds}, 交易日 {trade_date}")
+
+        if 'price' in kinds:
+            china_codes = [symbol for symbol in symbols if markets[symbol] == 'china']
+            if china_codes:
+                warmed = self._bulk_china_daily(china_codes, start_date, trade_date)
+                if warmed:
+                    report.bulk_symbols['tushare_daily'] = warmed
+
+        tasks = []
+        for symbol in symbols:
+            for kind in kinds:
+                warmer = self.warmers.get(markets[symbol], {}).get(kind)
+                if warmer is None:
+                    report.results.append(PrefetchResult(symbol, kind, 'skipped'))
+                else:
+                    tasks.append((symbol, kind, warmer))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._run_warmer, symbol, kind, warmer, trade_date, start_date)
+                for symbol, kind, warmer in tasks
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                report.results.append(result)
+                if progress_callback is not None:
+                    try:
+                        progress_callback(result)
+                    except Exception as e:
+                        logger.debug(f"⚠️ [预取] 进度回调失败: {e}")
+
+        report.elapsed = time.time() - started
+        logger.info(report.summary())
+        return report
+
+    def _run_warmer(self, symbol: str, kind: str, warmer: Warmer,
+                    trade_date: str, start_date: str) -> PrefetchResult:
+        source, func = warmer
+        self.rate_limiter.acquire(source)
+        started = time.time()
+        try:
+            value = func(symbol, trade_date, start_date)
+            status = 'ok' if _is_usable(value) else 'failed'
+            error = '' if status == 'ok' else (str(value)[:200] if value else '空结果')
+        except Exception as e:
+            status, error = 'failed', str(e)
+        return PrefetchResult(symbol, kind, status, source, time.time() - started, error)
+
+    def _bulk_china_daily(self, codes: List[str], start_date: str, end_date: str) -> List[str]:
+        """
+        使用 Tushare daily 的多代码查询批量获取A股日线，按股票写入行情缓存
+
+        Returns:
+            成功写入缓存的股票代码
+        """
+        try:
+            from .tushare_utils import get_tushare_provider
+            provider = get_tushare_provider()
+        except Exception as e:
+            logger.debug(f"📦 [预取] Tushare不可用，跳过批量行情: {e}")
+            return []
+        if not provider.connected or provider.cache_manager is None:
+            return []
+
+        days = (datetime.strptime(end_date, '%Y-%m-%d') - datetime.strptime(start_date, '%Y-%m-%d')).days + 1
+        chunk_size = max(1, TUSHARE_DAILY_MAX_ROWS // max(days, 1))
+        ts_codes = {provider._normalize_symbol(code): code for code in codes}
+        warmed = []
+
+        items = list(ts_codes.items())
+        for offset in range(0, len(items), chunk_size):
+            chunk = dict(items[offset:offset + chunk_size])
+            self.rate_limiter.acquire('tushare')
+            try:
+                data = provider.api.daily(
+                    ts_code=','.join(chunk),
+                    start_date=start_date.replace('-', ''),
+                    end_date=end_date.replace('-', ''),
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ [预取] Tushare批量行情失败({len(chunk)}只): {e}")
+                continue
+            if data is None or data.empty:
+                continue
+
+            # 与 TushareProvider.get_stock_daily 写入的缓存格式一致
+            for ts_code, rows in data.groupby('ts_code'):
+                code = chunk.get(ts_code)
+                if code is None:
+                    continue
+                rows = rows.sort_values('trade_date').copy()
+                rows['trade_date'] = pd.to_datetime(rows['trade_date'])
+                provider.cache_manager.save_stock_data(
+                    symbol=code, data=rows, start_date=start_date, end_date=end_date, data_source='tushare'
+                )
+                warmed.append(code)
+
+        logger.info(f"📦 [预取] Tushare批量行情: {len(warmed)}/{len(codes)} 只，{(len(items) - 1) // chunk_size + 1} 次请求")
+        return warmed
+
+
+def prefetch_watchlist(watchlist: Iterable[str], trade_date: Optional[str] = None,
+                       kinds: Iterable[str] = PREFETCH_KINDS, max_workers: int = 4) -> PrefetchReport:
+    """便捷函数：预取自选股数据，trade_date 默认为今天"""
+    trade_date = trade_date or datetime.now().strftime('%Y-%m-%d')
+    return WatchlistPrefetcher(max_workers=max_workers).prefetch(watchlist, trade_date, kinds)
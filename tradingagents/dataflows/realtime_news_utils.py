@@ -14,6 +14,7 @@ from dataclasses import dataclass
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import replayable
 logger = get_logger('agents')
 
 
@@ -71,6 +72,7 @@ class RealtimeNewsAggregator:
         unique_news = self._deduplicate_news(all_news)
         return sorted(unique_news, key=lambda x: x.publish_time, reverse=True)
     
+    @replayable('finnhub-news', method=True)
     def _get_finnhub_realtime_news(self, ticker: str, hours_back: int) -> List[NewsItem]:
         """获取FinnHub实时新闻"""
         if not self.finnhub_key:
@@ -121,6 +123,7 @@ class RealtimeNewsAggregator:
             logger.error(f"FinnHub新闻获取失败: {e}")
             return []
     
+    @replayable('alpha_vantage', method=True)
     def _get_alpha_vantage_news(self, ticker: str, hours_back: int) -> List[NewsItem]:
         """获取Alpha Vantage新闻"""
         if not self.alpha_vantage_key:
@@ -172,6 +175,7 @@ class RealtimeNewsAggregator:
             logger.error(f"Alpha Vantage新闻获取失败: {e}")
             return []
     
+    @replayable('newsapi', method=True)
     def _get_newsapi_news(self, ticker: str, hours_back: int) -> List[NewsItem]:
         """获取NewsAPI新闻"""
         try:
@@ -227,6 +231,7 @@ class RealtimeNewsAggregator:
             logger.error(f"NewsAPI新闻获取失败: {e}")
             return []
     
+    @replayable('chinese-finance', method=True)
     def _get_chinese_finance_news(self, ticker: str, hours_back: int) -> List[NewsItem]:
         """获取中文财经新闻"""
         # 这里可以集成中文财经新闻API
@@ -1,9 +1,12 @@
 import requests
 import time
 import json
-from datetime import datetime, timedelta
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from contextlib import contextmanager
-from typing import Annotated
+from functools import lru_cache
+from typing import Annotated, Dict, List, Optional
 import os
 import re
 
@@ -49,6 +52,227 @@ ticker_to_company = {
 }
 
 
+# Offline corpus index: posts partitioned by category / date / subreddit
+INDEX_DIR_NAME = "_index"
+INDEX_VERSION = 1
+# Number of date partitions kept in memory per index
+PARTITION_CACHE_SIZE = 256
+
+
+def _post_date(created_utc) -> str:
+    return datetime.fromtimestamp(created_utc, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _write_json(path: str, data) -> None:
+    """Write via a temporary file and os.replace, so readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@lru_cache(maxsize=None)
+def company_matcher(ticker: str):
+    """Precompiled case-insensitive alternation of the ticker and its company names."""
+    names = ticker_to_company.get(ticker)
+    terms = names.split(" OR ") if names else []
+    terms.append(ticker)
+    return re.compile("|".join(f"(?:{term})" for term in terms), re.IGNORECASE)
+
+
+class RedditCorpusIndex:
+    """
+    Date-partitioned index over an offline reddit corpus.
+
+    Each category is indexed once into <data_path>/_index/<category>/<YYYY-MM>/<YYYY-MM-DD>.json,
+    holding {subreddit file: [posts sorted by upvotes desc]}. A manifest of source file
+    sizes and mtimes triggers a rebuild when the corpus changes.
+
+    Builds of one category are serialized by a per-category lock, and every file is written
+    to a temporary name and swapped in with os.replace, so concurrent readers see either the
+    previous or the new partition, never a partially written one.
+    """
+
+    def __init__(self, data_path: str, index_path: Optional[str] = None):
+        self.data_path = data_path
+        self.index_path = index_path or os.path.join(data_path, INDEX_DIR_NAME)
+        self._partitions: "OrderedDict[tuple, Dict[str, List[dict]]]" = OrderedDict()
+        self._fresh = set()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        # bumped by every build so partitions read before it are not cached afterwards
+        self._generations: Dict[str, int] = {}
+
+    def _build_lock(self, category: str) -> threading.Lock:
+        with self._lock:
+            return self._build_locks.setdefault(category, threading.Lock())
+
+    def _source_files(self, category: str) -> Dict[str, List[float]]:
+        category_path = os.path.join(self.data_path, category)
+        files = {}
+        for data_file in os.listdir(category_path):
+            if data_file.endswith(".jsonl"):
+                stat = os.stat(os.path.join(category_path, data_file))
+                files[data_file] = [stat.st_size, stat.st_mtime]
+        return files
+
+    def _manifest_path(self, category: str) -> str:
+        return os.path.join(self.index_path, category, "manifest.json")
+
+    def is_fresh(self, category: str) -> bool:
+        try:
+            with open(self._manifest_path(category), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return (
+            manifest.get("version") == INDEX_VERSION
+            and manifest.get("files") == self._source_files(category)
+        )
+
+    def build(self, category: str) -> int:
+        """Parse every post of a category once and write the date partitions. Returns the post count."""
+        with self._build_lock(category):
+            return self._build(category)
+
+    def _build(self, category: str) -> int:
+        sources = self._source_files(category)
+        partitions: Dict[str, Dict[str, List[dict]]] = {}
+        count = 0
+        for data_file in sources:
+            with open(os.path.join(self.data_path, category, data_file), "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    parsed_line = json.loads(line)
+                    post_date = _post_date(parsed_line["created_utc"])
+                    partitions.setdefault(post_date, {}).setdefault(data_file, []).append({
+                        "title": parsed_line["title"],
+                        "content": parsed_line["selftext"],
+                        "url": parsed_line["url"],
+                        "upvotes": parsed_line["ups"],
+                        "posted_date": post_date,
+                    })
+                    count += 1
+
+        written = {self._manifest_path(category)}
+        for post_date, subreddits in partitions.items():
+            for posts in subreddits.values():
+                posts.sort(key=lambda x: x["upvotes"], reverse=True)
+            path = self._partition_path(category, post_date)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_json(path, subreddits)
+            written.add(path)
+
+        # drop partitions of dates no longer in the corpus, then commit the manifest
+        category_index = os.path.join(self.index_path, category)
+        for root, _, files in os.walk(category_index):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith(".json") and path not in written:
+                    os.remove(path)
+        os.makedirs(category_index, exist_ok=True)
+        _write_json(self._manifest_path(category), {"version": INDEX_VERSION, "files": sources})
+
+        with self._lock:
+            for key in [key for key in self._partitions if key[0] == category]:
+                del self._partitions[key]
+            self._generations[category] = self._generations.get(category, 0) + 1
+            self._fresh.add(category)
+        return count
+
+    def ensure(self, category: str):
+        """Build the category index unless it is already up to date."""
+        if category in self._fresh:
+            return
+        with self._build_lock(category):
+            # another thread may have built it while we waited
+            if category in self._fresh:
+                return
+            if not self.is_fresh(category):
+                self._build(category)
+            with self._lock:
+                self._fresh.add(category)
+
+    def _partition_path(self, category: str, date: str) -> str:
+        return os.path.join(self.index_path, category, date[:7], f"{date}.json")
+
+    def partition(self, category: str, date: str) -> Dict[str, List[dict]]:
+        """Posts of one date, keyed by subreddit file and sorted by upvotes desc."""
+        key = (category, date)
+        with self._lock:
+            if key in self._partitions:
+                self._partitions.move_to_end(key)
+                return self._partitions[key]
+            generation = self._generations.get(category, 0)
+        try:
+            with open(self._partition_path(category, date), "r", encoding="utf-8") as f:
+                subreddits = json.load(f)
+        except FileNotFoundError:
+            subreddits = {}
+        with self._lock:
+            if self._generations.get(category, 0) != generation:
+                # rebuilt while reading: serve it, but do not cache a possibly outdated partition
+                return subreddits
+            self._partitions[key] = subreddits
+            while len(self._partitions) > PARTITION_CACHE_SIZE:
+                self._partitions.popitem(last=False)
+        return subreddits
+
+    def query(self, category: str, date: str, max_limit: int, query: str = None) -> List[dict]:
+        """Same result as the line-by-line scan in fetch_top_from_category, read from one partition."""
+        category_entries = os.listdir(os.path.join(self.data_path, category))
+        if max_limit < len(category_entries):
+            raise ValueError(
+                "REDDIT FETCHING ERROR: max limit is less than the number of files in the category. Will not be able to fetch any posts"
+            )
+        limit_per_subreddit = max_limit // len(category_entries)
+
+        self.ensure(category)
+        subreddits = self.partition(category, date)
+        matcher = company_matcher(query) if "company" in category and query else None
+
+        all_content = []
+        for data_file in category_entries:
+            posts = subreddits.get(data_file, [])
+            if matcher is not None:
+                posts = [
+                    post for post in posts
+                    if matcher.search(post["title"]) or matcher.search(post["content"])
+                ]
+            all_content.extend(posts[:limit_per_subreddit])
+        return all_content
+
+
+_corpus_indexes: Dict[str, RedditCorpusIndex] = {}
+_corpus_indexes_lock = threading.Lock()
+
+
+def get_reddit_index(data_path: str) -> RedditCorpusIndex:
+    """Shared index instance for a corpus directory."""
+    key = os.path.abspath(data_path)
+    with _corpus_indexes_lock:
+        if key not in _corpus_indexes:
+            _corpus_indexes[key] = RedditCorpusIndex(data_path)
+        return _corpus_indexes[key]
+
+
+def build_reddit_index(data_path: str, categories: Optional[List[str]] = None) -> Dict[str, int]:
+    """One-time indexing step for an offline corpus. Returns posts indexed per category."""
+    index = get_reddit_index(data_path)
+    if categories is None:
+        categories = [
+            name for name in os.listdir(data_path)
+            if name != INDEX_DIR_NAME and os.path.isdir(os.path.join(data_path, name))
+        ]
+    return {category: index.build(category) for category in categories}
+
+
 def fetch_top_from_category(
     category: Annotated[
         str, "Category to fetch top post from. Collection of subreddits."
@@ -60,6 +284,20 @@ def fetch_top_from_category(
         str,
         "Path to the data folder. Default is 'reddit_data'.",
     ] = "reddit_data",
+):
+    try:
+        return get_reddit_index(data_path).query(category, date, max_limit, query)
+    except OSError:
+        # index directory not writable: fall back to scanning the corpus
+        return scan_top_from_category(category, date, max_limit, query, data_path)
+
+
+def scan_top_from_category(
+    category: str,
+    date: str,
+    max_limit: int,
+    query: str = None,
+    data_path: str = "reddit_data",
 ):
     base_path = data_path
 
@@ -90,31 +328,14 @@ def fetch_top_from_category(
                 parsed_line = json.loads(line)
 
                 # select only lines that are from the date
-                post_date = datetime.utcfromtimestamp(
-                    parsed_line["created_utc"]
-                ).strftime("%Y-%m-%d")
+                post_date = _post_date(parsed_line["created_utc"])
                 if post_date != date:
                     continue
 
                 # if is company_news, check that the title or the content has the company's name (query) mentioned
                 if "company" in category and query:
-                    search_terms = []
-                    if "OR" in ticker_to_company[query]:
-                        search_terms = ticker_to_company[query].split(" OR ")
-                    else:
-                        search_terms = [ticker_to_company[query]]
-
-                    search_terms.append(query)
-
-                    found = False
-                    for term in search_terms:
-                        if re.search(
-                            term, parsed_line["title"], re.IGNORECASE
-                        ) or re.search(term, parsed_line["selftext"], re.IGNORECASE):
-                            found = True
-                            break
-
-                    if not found:
+                    matcher = company_matcher(query)
+                    if not (matcher.search(parsed_line["title"]) or matcher.search(parsed_line["selftext"])):
                         continue
 
                 post = {
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+SimFin离线财报存储
+
+get_simfin_balance_sheet / get_simfin_cashflow / get_simfin_income_statements 原先每次调用都
+完整读取美股全市场的 SimFin CSV 并重新解析日期列。这里把每个 CSV 只解析一次，
+按 (Ticker, Publish Date) 排序后转存为未压缩的 Arrow IPC 文件：
+
+- 之后的进程以内存映射方式打开，多个进程共享操作系统页缓存，无需再解析 CSV
+- 每只股票在文件中的行区间和发布日期数组常驻内存，as-of 查询为一次二分查找
+- 源 CSV 的大小或修改时间变化时自动重建；未安装 pyarrow 时退化为进程内 DataFrame
+"""
+
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+
+# 转换格式版本，转换逻辑变化时递增
+STORE_VERSION = 1
+
+# 原始行号列，用于还原 DataFrame 行标签（报告文本中的 Series Name）
+ROW_COLUMN = '__row__'
+
+# 每个文件缓存的已物化行数（回测中同一期财报会被反复查询）
+ROW_CACHE_SIZE = 4096
+
+# 报表类型 -> (目录名, 文件名前缀)
+STATEMENT_FILES = {
+    'balance_sheet': ('balance_sheet', 'us-balance'),
+    'cashflow': ('cash_flow', 'us-cashflow'),
+    'income': ('income_statements', 'us-income'),
+}
+
+
+def simfin_csv_path(data_dir: str, statement: str, freq: str) -> str:
+    """SimFin 美股财报 CSV 路径"""
+    directory, prefix = STATEMENT_FILES[statement]
+    return os.path.join(data_dir, "fundamental_data", "simfin_data_all", directory,
+                        "companies", "us", f"{prefix}-{freq}.csv")
+
+
+@lru_cache(maxsize=8192)
+def _date_ns(curr_date: str) -> int:
+    """交易日字符串 -> 当天 0 点 (UTC) 的纳秒时间戳"""
+    return pd.to_datetime(curr_date, utc=True).normalize().value
+
+
+class SimfinStatementStore:
+    """单个 SimFin 财报文件的索引存储"""
+
+    def __init__(self, csv_path: str, cache_dir: Optional[str] = None):
+        """
+        Args:
+            csv_path: SimFin CSV 文件
+            cache_dir: 转换后文件的目录，默认与K线缓存同目录下的 simfin/
+        """
+        self.csv_path = Path(csv_path)
+        if cache_dir is None:
+            from .cache_manager import get_cache
+            cache_dir = get_cache().cache_dir / "simfin"
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self._table = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._publish_ns: Optional[np.ndarray] = None
+        self._row = lru_cache(maxsize=ROW_CACHE_SIZE)(self._materialize_row)
+
+    @property
+    def arrow_path(self) -> Path:
+        return self.cache_dir / f"{self.csv_path.stem}.arrow"
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.cache_dir / f"{self.csv_path.stem}.meta.json"
+
+    def _source_signature(self) -> Dict:
+        stat = self.csv_path.stat()
+        return {'version': STORE_VERSION, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def _read_csv(self) -> pd.DataFrame:
+        """与原实现相同的解析方式，只执行一次"""
+        df = pd.read_csv(self.csv_path, sep=";")
+        df["Report Date"] = pd.to_datetime(df["Report Date"], utc=True).dt.normalize()
+        df["Publish Date"] = pd.to_datetime(df["Publish Date"], utc=True).dt.normalize()
+        df[ROW_COLUMN] = df.index
+        # 排序稳定，同一发布日期保持原始行顺序
+        return df.sort_values(["Ticker", "Publish Date"], kind="mergesort").reset_index(drop=True)
+
+    def _is_converted(self) -> bool:
+        if not self.arrow_path.exists():
+            return False
+        try:
+            with open(self._meta_path, 'r', encoding='utf-8') as f:
+                return json.load(f) == self._source_signature()
+        except (OSError, ValueError):
+            return False
+
+    def _convert(self) -> pd.DataFrame:
+        df = self._read_csv()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        tmp_path = self.arrow_path.with_name(f"{self.arrow_path.name}.{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp_path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, self.arrow_path)
+        with open(self._meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self._source_signature(), f)
+        logger.info(f"📦 [SimFin] 已转换: {self.csv_path.name} -> {self.arrow_path} ({len(df)} 行)")
+        return df
+
+    def load(self):
+        """解析或映射文件并建立 Ticker 行区间索引（只执行一次）"""
+        if self._offsets or self._publish_ns is not None:
+            return
+        with self._lock:
+            if self._offsets or self._publish_ns is not None:
+                return
+            if PYARROW_AVAILABLE:
+                if not self._is_converted():
+                    self._convert()
+                self._table = pa.ipc.open_file(pa.memory_map(str(self.arrow_path), 'r')).read_all()
+                tickers = self._table.column("Ticker").to_numpy(zero_copy_only=False)
+                publish = (self._table.column("Publish Date")
+                           .cast(pa.timestamp('ns', tz='UTC')).cast(pa.int64()).to_numpy())
+            else:
+                self._frame = self._read_csv()
+                tickers = self._frame["Ticker"].to_numpy()
+                publish = pd.DatetimeIndex(self._frame["Publish Date"]).as_unit('ns').asi8
+
+            offsets = {}
+            if len(tickers):
+                # 排序后每只股票是连续区间
+                boundaries = np.flatnonzero(tickers[1:] != tickers[:-1]) + 1
+                starts = np.concatenate(([0], boundaries))
+                ends = np.concatenate((boundaries, [len(tickers)]))
+                offsets = {tickers[s]: (int(s), int(e)) for s, e in zip(starts, ends)}
+            self._publish_ns = publish
+            self._offsets = offsets
+
+    def _materialize_row(self, position: int) -> pd.Series:
+        if self._table is not None:
+            frame = self._table.slice(position, 1).to_pandas()
+        else:
+            frame = self._frame.iloc[position:position + 1]
+        row = frame.iloc[0].drop(ROW_COLUMN)
+        row.name = frame[ROW_COLUMN].iloc[0]
+        return row
+
+    def latest_as_of(self, ticker: str, curr_date: str) -> Optional[pd.Series]:
+        """
+        ticker 在 curr_date 当天及之前发布的最新一期财报（与原实现 idxmax 的结果一致）
+
+        Returns:
+            pd.Series 或 None；返回的行被缓存共享，调用方不应原地修改
+        """
+        self.load()
+        span = self._offsets.get(ticker)
+        if span is None:
+            return None
+        start, end = span
+        curr_ns = _date_ns(curr_date)
+        publish = self._publish_ns[start:end]
+        position = int(np.searchsorted(publish, curr_ns, side='right'))
+        if position == 0:
+            return None
+        # 同一发布日期有多行时取原始顺序中的第一行
+        first = int(np.searchsorted(publish, publish[position - 1], side='left'))
+        return self._row(start + first)
+
+
+_stores: Dict[str, SimfinStatementStore] = {}
+_stores_lock = threading.Lock()
+
+def get_simfin_store(csv_path: str) -> SimfinStatementStore:
+    """获取某个 SimFin CSV 的共享存储实例"""
+    key = os.path.abspath(csv_path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = SimfinStatementStore(csv_path)
+        return _stores[key]
+
+
+def preload_simfin_stores(data_dir: str, freqs: Iterable[str] = ('annual', 'quarterly'),
+                          background: bool = True) -> Optional[threading.Thread]:
+    """
+    预先转换/映射全部 SimFin 财报文件（回测开始前调用）
+
+    Args:
+        data_dir: 数据目录（config['data_dir']）
+        freqs: 报告频率
+        background: 是否在后台线程中执行
+    """
+    def _load_all():
+        for statement in STATEMENT_FILES:
+            for freq in freqs:
+                path = simfin_csv_path(data_dir, statement, freq)
+                if os.path.exists(path):
+                    try:
+                        get_simfin_store(path).load()
+                    except Exception as e:
+                        logger.warning(f"⚠️ [SimFin] 预加载失败: {path} ({e})")
+
+    if not background:
+        _load_all()
+        return None
+    thread = threading.Thread(target=_load_all, name='simfin-preload', daemon=True)
+    thread.start()
+    return thread
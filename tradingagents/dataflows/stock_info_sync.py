@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+股票基础信息同步到MongoDB（stock_basic_info）
+
+可复用的同步任务，供 data/scripts/sync_stock_info_to_mongodb.py 和应用内定时任务使用：
+- 向量化构建文档（DataFrame.to_dict('records')）
+- 按内容指纹与已有文档比对，内容未变化的行跳过
+- 分块发送无序批量 upsert
+- 进度回调和吞吐量统计
+- 可在应用内按固定间隔后台运行（TRADINGAGENTS_STOCK_INFO_SYNC_HOURS）
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from pymongo import UpdateOne
+    MONGODB_AVAILABLE = True
+except ImportError:
+    MONGODB_AVAILABLE = False
+
+
+COLLECTION_NAME = 'stock_basic_info'
+
+# 文档内容字段及缺省值（updated_at/created_at 等元数据不参与比对）
+DOCUMENT_DEFAULTS = {
+    'sec': 'unknown',
+    'category': '未知',
+    'volunit': 0,
+    'decimal_point': 0,
+    'pre_close': 0.0,
+}
+
+DATA_VERSION = '1.0'
+
+# 每次 bulk_write 的操作数
+DEFAULT_CHUNK_SIZE = 1000
+
+# 默认同步的证券类型
+DEFAULT_STOCK_TYPES = ('stock', 'index', 'etf')
+
+
+def _market_names(sse: pd.Series) -> pd.Series:
+    return sse.map({'sz': '深圳', 'sh': '上海', 'bj': '北京'}).fillna('上海')
+
+
+def build_documents(stock_data: pd.DataFrame, sync_source: str = 'tdx') -> List[Dict[str, Any]]:
+    """
+    把股票列表 DataFrame 转为 stock_basic_info 文档（不含时间戳）
+
+    Args:
+        stock_data: 至少包含 code、name、sse 列
+        sync_source: 数据来源标识
+
+    Returns:
+        文档列表，每个文档带 content_hash 字段
+    """
+    frame = stock_data.copy()
+    frame['code'] = frame['code'].astype(str)
+    if 'market' not in frame.columns:
+        frame['market'] = _market_names(frame['sse'])
+    else:
+        frame['market'] = frame['market'].fillna(_market_names(frame['sse']))
+    for column, default in DOCUMENT_DEFAULTS.items():
+        if column not in frame.columns:
+            frame[column] = default
+        else:
+            frame[column] = frame[column].fillna(default)
+
+    columns = ['code', 'name', 'sse', 'market', *DOCUMENT_DEFAULTS]
+    frame = frame[columns].drop_duplicates(['code', 'sse'], keep='last')
+    # numpy 标量转为 Python 原生类型，便于BSON编码和指纹计算
+    frame = frame.astype(object).where(frame.notna(), None)
+    documents = frame.to_dict('records')
+    for document in documents:
+        document['sync_source'] = sync_source
+        document['data_version'] = DATA_VERSION
+        document['content_hash'] = content_hash(document)
+    return documents
+
+
+def content_hash(document: Dict[str, Any]) -> str:
+    """文档内容指纹"""
+    content = {key: document.get(key) for key in ('code', 'name', 'sse', 'market', *DOCUMENT_DEFAULTS)}
+    payload = json.dumps(content, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class SyncReport:
+    """同步进度和结果"""
+    stock_type: str = ''
+    total: int = 0
+    unchanged: int = 0
+    pending: int = 0
+    sent: int = 0
+    inserted: int = 0
+    modified: int = 0
+    chunks: int = 0
+    errors: List[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """每秒处理的行数（含跳过的未变化行）"""
+        return self.total / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def progress(self) -> float:
+        return 1.0 if not self.pending else self.sent / self.pending
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stock_type': self.stock_type,
+            'total': self.total,
+            'unchanged': self.unchanged,
+            'sent': self.sent,
+            'inserted': self.inserted,
+            'modified': self.modified,
+            'chunks': self.chunks,
+            'errors': list(self.errors),
+            'elapsed': round(self.elapsed, 3),
+            'throughput': round(self.throughput, 1),
+        }
+
+    def summary(self) -> str:
+        return (f"📊 {self.stock_type or '股票'}同步: 共 {self.total} 条, 未变化 {self.unchanged}, "
+                f"新增 {self.inserted}, 更新 {self.modified}, {self.chunks} 批, "
+                f"耗时 {self.elapsed:.2f}s ({self.throughput:.0f} 条/秒)"
+                + (f", 错误 {len(self.errors)}" if self.errors else ""))
+
+
+def default_stock_fetcher(stock_type: str) -> Optional[pd.DataFrame]:
+    """
+    默认股票列表来源：通达信增强获取器（utils/enhanced_stock_list_fetcher），
+    不可用时对 'stock' 类型退化为 Tushare 股票列表
+    """
+    try:
+        from enhanced_stock_list_fetcher import enhanced_fetch_stock_list
+        return enhanced_fetch_stock_list(type_=stock_type, enable_server_failover=True, max_retries=3)
+    except ImportError:
+        pass
+
+    if stock_type != 'stock':
+        logger.warning(f"⚠️ 通达信股票列表获取器不可用，跳过{stock_type}")
+        return None
+
+    from .tushare_utils import get_tushare_provider
+    stock_list = get_tushare_provider().get_stock_list()
+    if not hasattr(stock_list, 'empty') or stock_list.empty:
+        return None
+    return pd.DataFrame({
+        'code': stock_list['symbol'].astype(str),
+        'name': stock_list['name'],
+        'sse': stock_list['ts_code'].str.split('.').str[-1].str.lower(),
+        'sec': 'stock_cn',
+        'category': stock_list.get('market', '未知'),
+    })
+
+
+class StockInfoSyncJob:
+    """股票基础信息同步任务"""
+
+    def __init__(self, collection, fetcher: Optional[Callable[[str], Optional[pd.DataFrame]]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, sync_source: str = 'tdx'):
+        """
+        Args:
+            collection: MongoDB stock_basic_info 集合
+            fetcher: 按证券类型获取股票列表的函数，默认为 default_stock_fetcher
+            chunk_size: 每次批量写入的操作数
+            sync_source: 数据来源标识
+        """
+        self.collection = collection
+        self.fetcher = fetcher or default_stock_fetcher
+        self.chunk_size = chunk_size
+        self.sync_source = sync_source
+
+    def _existing_hashes(self) -> Dict[tuple, Optional[str]]:
+        cursor = self.collection.find({}, {'_id': 0, 'code': 1, 'sse': 1, 'content_hash': 1})
+        return {(doc.get('code'), doc.get('sse')): doc.get('content_hash') for doc in cursor}
+
+    def sync_frame(self, stock_data: pd.DataFrame, stock_type: str = '',
+                   progress_callback: Optional[Callable[[SyncReport], None]] = None) -> SyncReport:
+        """
+        同步一个股票列表 DataFrame
+
+        Args:
+            stock_data: 股票列表
+            stock_type: 证券类型（仅用于报告）
+            progress_callback: 每写完一批回调一次
+
+        Returns:
+            SyncReport: 同步结果
+        """
+        report = SyncReport(stock_type=stock_type)
+        if stock_data is None or stock_data.empty:
+            return report
+
+        documents = build_documents(stock_data, self.sync_source)
+        existing = self._existing_hashes()
+        changed = [doc for doc in documents if existing.get((doc['code'], doc['sse'])) != doc['content_hash']]
+        report.total = len(documents)
+        report.unchanged = report.total - len(changed)
+        report.pending = len(changed)
+
+        now = datetime.utcnow()
+        for offset in range(0, len(changed), self.chunk_size):
+            chunk = changed[offset:offset + self.chunk_size]
+            operations = [
+                UpdateOne(
+                    {'code': doc['code'], 'sse': doc['sse']},
+                    {'$set': {**doc, 'updated_at': now}, '$setOnInsert': {'created_at': now}},
+                    upsert=True,
+                )
+                for doc in chunk
+            ]
+            try:
+                result = self.collection.bulk_write(operations, ordered=False)
+                report.inserted += result.upserted_count
+                report.modified += result.modified_count
+            except Exception as e:
+                report.errors.append(str(e))
+                logger.error(f"❌ 批量写入失败({len(chunk)}条): {e}")
+            report.sent += len(chunk)
+            report.chunks += 1
+            report.elapsed = time.time() - report.started_at
+            if progress_callback is not None:
+                progress_callback(report)
+
+        report.elapsed = time.time() - report.started_at
+        logger.info(report.summary())
+
+        if changed:
+            from .symbol_index import refresh_symbol_index
+            refresh_symbol_index(changed, build=False)
+        return report
+
+    def run(self, stock_types: Iterable[str] = DEFAULT_STOCK_TYPES,
+            progress_callback: Optional[Callable[[SyncReport], None]] = None) -> List[SyncReport]:
+        """获取并同步各证券类型的股票列表"""
+        reports = []
+        for stock_type in stock_types:
+            try:
+                stock_data = self.fetcher(stock_type)
+            except Exception as e:
+                logger.error(f"❌ 获取{stock_type}数据时发生错误: {e}")
+                reports.append(SyncReport(stock_type=stock_type, errors=[str(e)]))
+                continue
+            if stock_data is None or stock_data.empty:
+                logger.warning(f"⚠️ 未能获取到{stock_type}数据")
+                continue
+            reports.append(self.sync_frame(stock_data, stock_type, progress_callback))
+        return reports
+
+
+def get_stock_info_collection():
+    """通过数据库管理器获取 stock_basic_info 集合，MongoDB不可用时返回 None"""
+    from tradingagents.config.database_manager import get_database_manager
+    db_manager = get_database_manager()
+    client = db_manager.get_mongodb_client()
+    if client is None:
+        return None
+    return client[db_manager.mongodb_config['database']][COLLECTION_NAME]
+
+
+# ==================== 应用内定时同步 ====================
+
+class StockInfoSyncScheduler:
+    """后台线程按固定间隔运行同步任务"""
+
+    def __init__(self, interval_seconds: float, job_factory: Callable[[], Optional[StockInfoSyncJob]]):
+        self.interval_seconds = interval_seconds
+        self.job_factory = job_factory
+        self.last_reports: List[SyncReport] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self) -> List[SyncReport]:
+        job = self.job_factory()
+        if job is None:
+            logger.warning("⚠️ MongoDB不可用，跳过股票信息同步")
+            return []
+        self.last_reports = job.run()
+        return self.last_reports
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"❌ 定时股票信息同步失败: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='stock-info-sync', daemon=True)
+        self._thread.start()
+        logger.info(f"⏰ 股票信息定时同步已启动，间隔 {self.interval_seconds / 3600:.1f} 小时")
+
+    def stop(self):
+        self._stop.set()
+
+
+def _default_job() -> Optional[StockInfoSyncJob]:
+    collection = get_stock_info_collection()
+    return StockInfoSyncJob(collection) if collection is not None else None
+
+
+_scheduler: Optional[StockInfoSyncScheduler] = None
+_scheduler_lock = threading.Lock()
+
+def start_stock_info_sync_schedule(interval_hours: Optional[float] = None) -> Optional[StockInfoSyncScheduler]:
+    """
+    启动应用内定时同步（进程内只启动一次）
+
+    Args:
+        interval_hours: 同步间隔（小时），默认读取 TRADINGAGENTS_STOCK_INFO_SYNC_HOURS，为0或未设置时不启动
+
+    Returns:
+        调度器，未启动时返回 None
+    """
+    global _scheduler
+    if interval_hours is None:
+        interval_hours = float(os.getenv('TRADINGAGENTS_STOCK_INFO_SYNC_HOURS', '0') or 0)
+    if interval_hours <= 0:
+        return None
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = StockInfoSyncScheduler(interval_hours * 3600, _default_job)
+        _scheduler.start()
+    return _scheduler
@@ -4,6 +4,29 @@ from stockstats import wrap
 from typing import Annotated
 import os
 from .config import get_config
+from .indicator_state import get_indicator_state_store
+from .trading_calendar import calendar_for_symbol
+from tradingagents.indicators import compute_indicator, parse_indicator, supports as indicator_supported
+
+
+def _find_covering_file(cache_dir: str, symbol: str, curr_date: pd.Timestamp):
+    """查找结束日期晚于 curr_date 的已下载文件（文件名中的结束日期不含当天，取最新的一个）"""
+    prefix = f"{symbol}-YFin-data-"
+    best, best_end = None, None
+    for name in os.listdir(cache_dir):
+        if not (name.startswith(prefix) and name.endswith(".csv")):
+            continue
+        # 文件名格式: <symbol>-YFin-data-<YYYY-mm-dd>-<YYYY-mm-dd>.csv
+        dates = name[len(prefix):-len(".csv")]
+        if len(dates) != 21:
+            continue
+        try:
+            file_start, file_end = pd.to_datetime(dates[:10]), pd.to_datetime(dates[11:])
+        except ValueError:
+            continue
+        if file_start <= curr_date < file_end and (best_end is None or file_end > best_end):
+            best, best_end = os.path.join(cache_dir, name), file_end
+    return best
 
 
 class StockstatsUtils:
@@ -25,7 +48,10 @@ class StockstatsUtils:
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
     ):
-        df = None
+        # 先按交易日历排除周末和节假日，不必为此读取/下载行情
+        if not calendar_for_symbol(symbol).is_trading_day(curr_date):
+            return "N/A: Not a trading day (weekend or holiday)"
+
         data = None
 
         if not online:
@@ -36,7 +62,6 @@ class StockstatsUtils:
                         f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
                     )
                 )
-                df = wrap(data)
             except FileNotFoundError:
                 raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
         else:
@@ -57,6 +82,10 @@ class StockstatsUtils:
                 config["data_cache_dir"],
                 f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
             )
+            # 历史日期（回测）复用之前下载的、已经覆盖该日的文件，不必每天重新下载15年数据
+            covering_file = _find_covering_file(config["data_cache_dir"], symbol, curr_date)
+            if covering_file is not None:
+                data_file = covering_file
 
             if os.path.exists(data_file):
                 data = pd.read_csv(data_file)
@@ -73,15 +102,29 @@ class StockstatsUtils:
                 data = data.reset_index()
                 data.to_csv(data_file, index=False)
 
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
             curr_date = curr_date.strftime("%Y-%m-%d")
 
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
+        dates = pd.to_datetime(data["Date"]).dt.strftime("%Y-%m-%d")
+        curr_date = pd.to_datetime(curr_date).strftime("%Y-%m-%d")
+        matching = (dates == curr_date).to_numpy()
+        if not matching.any():
+            return "N/A: Not a trading day (weekend or holiday)"
+
+        # 优先使用持久化的增量状态：每天只追加新K线，回看窗口内的值直接读取
+        try:
+            spec = parse_indicator(indicator)
+        except KeyError:
+            spec = None
+        if spec is not None:
+            series = get_indicator_state_store().advance(
+                symbol, spec, data, namespace="yfin" if online else "yfin_offline"
+            )
+            if series.covers(curr_date):
+                return series.value_on(curr_date)
 
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
-            return indicator_value
+        # 常用指标由共享的 NumPy 指标库计算（数值与 stockstats 一致），其余指标仍交给 stockstats
+        if indicator_supported(indicator):
+            values = compute_indicator(data, indicator)
         else:
-            return "N/A: Not a trading day (weekend or holiday)"
+            values = wrap(data.copy())[indicator].values
+        return values[matching.argmax()]
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+股票检索索引
+一次构建、常驻内存的A股/港股/美股代码索引，供股票搜索和输入自动补全使用。
+
+- 代码、Tushare代码、拼音首字母、英文名前缀：有序键数组 + 二分查找
+- 中文名称子串：单字/双字 n-gram 倒排索引，候选集求交后校验
+- 增量更新：upsert/remove 只改动受影响的条目，有序键数组在下一次查询时合并
+- 条目键：A股用 Tushare 代码（000001.SZ），同一6位代码的股票、指数、ETF（如 000001 平安银行与
+  上证指数）各自保留；港股/美股用代码本身
+
+数据来源：MongoDB stock_basic_info（同步后的股票基础信息）或 Tushare stock_basic 股票列表，
+以及内置的常用港股/美股名称。拼音首字母优先使用 Tushare 的 cnspell 字段，
+其次在安装了 pypinyin 时计算，否则不支持拼音检索。
+"""
+
+import bisect
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from pypinyin import Style, lazy_pinyin
+    PYPINYIN_AVAILABLE = True
+except ImportError:
+    PYPINYIN_AVAILABLE = False
+
+
+# 内置常用美股名称（与分析师中使用的名称映射一致）
+US_COMMON_NAMES = {
+    'AAPL': ('苹果公司', 'Apple'),
+    'TSLA': ('特斯拉', 'Tesla'),
+    'NVDA': ('英伟达', 'NVIDIA'),
+    'MSFT': ('微软', 'Microsoft'),
+    'GOOGL': ('谷歌', 'Alphabet'),
+    'AMZN': ('亚马逊', 'Amazon'),
+    'META': ('Meta', 'Meta Platforms'),
+    'NFLX': ('奈飞', 'Netflix'),
+}
+
+# 匹配类型的排序权重（越小越靠前）
+MATCH_RANK = {
+    'code_exact': 0,
+    'code_prefix': 1,
+    'initials_prefix': 2,
+    'name_prefix': 3,
+    'name_contains': 4,
+}
+
+_CJK = re.compile(r'[一-鿿]')
+
+
+@dataclass
+class SymbolEntry:
+    """索引中的一只股票"""
+    code: str          # A股6位代码 / 港股 0700.HK / 美股 AAPL
+    name: str
+    market: str        # 'china' / 'hk' / 'us'
+    ts_code: str = ''
+    initials: str = ''  # 拼音首字母（小写）
+    english_name: str = ''
+    record: Dict[str, Any] = field(default_factory=dict)  # 原始记录（股票列表行或MongoDB文档）
+
+    @property
+    def key(self) -> str:
+        """索引中的唯一键：A股为 Tushare 代码，港股/美股为代码"""
+        return self.ts_code or self.code
+
+    @property
+    def is_stock(self) -> bool:
+        """是否为股票（stock_basic_info 中的指数、ETF 等排在同代码股票之后）"""
+        return self.record.get('sec', 'stock_cn') == 'stock_cn'
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = dict(self.record)
+        result.setdefault('code', self.code)
+        result.setdefault('name', self.name)
+        result['market'] = self.market
+        return result
+
+
+def pinyin_initials(name: str) -> str:
+    """中文名称的拼音首字母（小写），pypinyin 不可用时返回空串"""
+    if not PYPINYIN_AVAILABLE or not _CJK.search(name or ''):
+        return ''
+    return ''.join(lazy_pinyin(name, style=Style.FIRST_LETTER)).lower()
+
+
+def _name_grams(name: str) -> Set[str]:
+    name = name.lower()
+    grams = set(name)
+    grams.update(name[i:i + 2] for i in range(len(name) - 1))
+    return grams
+
+
+def _code_keys(entry: SymbolEntry) -> Set[str]:
+    """前缀检索用的代码类键"""
+    keys = {entry.code.lower()}
+    if entry.ts_code:
+        keys.add(entry.ts_code.lower())
+    if entry.market == 'hk':
+        digits = entry.code.split('.')[0]
+        keys.update({digits, digits.lstrip('0'), digits.zfill(5)})
+    return {key for key in keys if key}
+
+
+class SymbolIndex:
+    """股票检索索引（线程安全）"""
+
+    def __init__(self, entries: Iterable[SymbolEntry] = ()):
+        self._entries: Dict[str, SymbolEntry] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        # (键, 匹配类型, 条目键) 有序数组，以及待合并的新增键和被更新/删除过的条目键
+        self._keys: List[Tuple[str, str, str]] = []
+        self._pending: List[Tuple[str, str, str]] = []
+        self._removed: Set[str] = set()
+        self._lock = threading.RLock()
+        self.upsert(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str) -> Optional[SymbolEntry]:
+        """按条目键（SymbolEntry.key）取条目"""
+        return self._entries.get(key)
+
+    # ---------- 增量更新 ----------
+
+    def upsert(self, entries: Iterable[SymbolEntry]) -> int:
+        """新增或更新条目，返回处理的条目数"""
+        count = 0
+        with self._lock:
+            for entry in entries:
+                entry_key = entry.key
+                if entry_key in self._entries:
+                    self._drop(entry_key)
+                if not entry.initials:
+                    entry.initials = pinyin_initials(entry.name)
+                self._entries[entry_key] = entry
+                for gram in _name_grams(entry.name):
+                    self._grams.setdefault(gram, set()).add(entry_key)
+                self._pending.extend((key, 'code', entry_key) for key in _code_keys(entry))
+                if entry.initials:
+                    self._pending.append((entry.initials, 'initials', entry_key))
+                for name in (entry.name, entry.english_name):
+                    if name:
+                        self._pending.append((name.lower(), 'name', entry_key))
+                count += 1
+        return count
+
+    def remove(self, keys: Iterable[str]):
+        """按条目键删除条目（如退市股票）"""
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+
+    def _drop(self, entry_key: str):
+        entry = self._entries.pop(entry_key)
+        for gram in _name_grams(entry.name):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(entry_key)
+                if not keys:
+                    del self._grams[gram]
+        self._removed.add(entry_key)
+
+    def _key_valid(self, item: Tuple[str, str, str]) -> bool:
+        key, kind, entry_key = item
+        entry = self._entries.get(entry_key)
+        if entry is None:
+            return False
+        if kind == 'code':
+            return key in _code_keys(entry)
+        if kind == 'initials':
+            return key == entry.initials
+        return key in (entry.name.lower(), entry.english_name.lower())
+
+    def _merge_pending(self):
+        """把待合并的键并入有序数组；有条目被更新或删除时顺带清理旧键"""
+        if not self._pending and not self._removed:
+            return
+        if self._removed or len(self._pending) > 64:
+            merged = set(self._keys)
+            merged.update(self._pending)
+            if self._removed:
+                merged = {item for item in merged if self._key_valid(item)}
+            self._keys = sorted(merged)
+        else:
+            for item in self._pending:
+                bisect.insort(self._keys, item)
+        self._pending = []
+        self._removed.clear()
+
+    # ---------- 查询 ----------
+
+    def _prefix_scan(self, prefix: str, limit: int) -> List[Tuple[str, str, str]]:
+        keys = self._keys
+        matches = []
+        for position in range(bisect.bisect_left(keys, (prefix,)), len(keys)):
+            item = keys[position]
+            if not item[0].startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(item)
+        return matches
+
+    def search(self, keyword: str, limit: int = 10, market: Optional[str] = None) -> List[SymbolEntry]:
+        """
+        检索股票
+
+        Args:
+            keyword: 代码前缀、中文名称片段、拼音首字母或港股/美股代码
+            limit: 最多返回条数
+            market: 只返回某个市场（'china' / 'hk' / 'us'）
+
+        Returns:
+            List[SymbolEntry]: 按匹配程度排序的结果
+        """
+        query = (keyword or '').strip().lower()
+        if not query:
+            return []
+
+        with self._lock:
+            self._merge_pending()
+            ranks: Dict[str, Tuple[int, int, bool]] = {}
+
+            def add(entry_key: str, match: str):
+                entry = self._entries.get(entry_key)
+                if entry is None or (market and entry.market != market):
+                    return
+                rank = (MATCH_RANK[match], len(entry.code), not entry.is_stock)
+                if entry_key not in ranks or rank < ranks[entry_key]:
+                    ranks[entry_key] = rank
+
+            # 扫描上限留出余量，供市场过滤和去重使用
+            scan_limit = limit * 8
+            for key, kind, entry_key in self._prefix_scan(query, scan_limit):
+                if kind == 'code':
+                    add(entry_key, 'code_exact' if key == query else 'code_prefix')
+                elif kind == 'initials':
+                    add(entry_key, 'initials_prefix')
+                else:
+                    add(entry_key, 'name_prefix')
+
+            if len(ranks) < limit:
+                for entry_key in self._name_candidates(query):
+                    entry = self._entries[entry_key]
+                    if query in entry.name.lower() or query in entry.english_name.lower():
+                        add(entry_key, 'name_contains')
+                    if len(ranks) >= scan_limit:
+                        break
+
+            ordered = sorted(ranks, key=lambda entry_key: (ranks[entry_key], entry_key))
+            return [self._entries[entry_key] for entry_key in ordered[:limit]]
+
+    def _name_candidates(self, query: str) -> Set[str]:
+        grams = [query[i:i + 2] for i in range(len(query) - 1)] or [query]
+        candidates: Optional[Set[str]] = None
+        for gram in grams:
+            keys = self._grams.get(gram)
+            if not keys:
+                return set()
+            candidates = set(keys) if candidates is None else candidates & keys
+            if not candidates:
+                return set()
+        return candidates or set()
+
+
+# ==================== 条目构造 ====================
+
+def entries_from_stock_records(records: Iterable[Dict[str, Any]]) -> List[SymbolEntry]:
+    """
+    从股票列表记录构造条目
+
+    支持 Tushare stock_basic（ts_code/symbol/name/cnspell）和
+    MongoDB stock_basic_info（code/name/sse）两种格式；后者没有 ts_code，由代码和交易所拼出，
+    使同一代码的股票和指数（如 000001.SZ 平安银行与 000001.SH 上证指数）不互相覆盖。
+    """
+    entries = []
+    for record in records:
+        if not record or 'error' in record:
+            continue
+        code = str(record.get('symbol') or record.get('code') or '').strip()
+        name = str(record.get('name') or '').strip()
+        if not code or not name:
+            continue
+        record = {key: value for key, value in record.items() if key != '_id'}
+        ts_code = str(record.get('ts_code') or '')
+        if not ts_code and record.get('sse'):
+            ts_code = f"{code}.{str(record['sse']).upper()}"
+        entries.append(SymbolEntry(
+            code=code,
+            name=name,
+            market='china',
+            ts_code=ts_code,
+            initials=str(record.get('cnspell') or '').lower(),
+            record=record,
+        ))
+    return entries
+
+
+def builtin_hk_us_entries() -> List[SymbolEntry]:
+    """内置的常用港股和美股条目"""
+    entries = []
+    try:
+        from .improved_hk_utils import get_improved_hk_provider
+        for code, name in get_improved_hk_provider().hk_stock_names.items():
+            if code.endswith('.HK'):
+                entries.append(SymbolEntry(code=code, name=name, market='hk'))
+    except Exception as e:
+        logger.debug(f"⚠️ [股票索引] 内置港股名称不可用: {e}")
+    for code, (name, english_name) in US_COMMON_NAMES.items():
+        entries.append(SymbolEntry(code=code, name=name, market='us', english_name=english_name))
+    return entries
+
+
+def _load_china_records() -> List[Dict[str, Any]]:
+    """A股股票列表：优先 MongoDB stock_basic_info，其次 Tushare 股票列表（24小时缓存）"""
+    try:
+        from .stock_data_service import get_stock_data_service
+        service = get_stock_data_service()
+        if service.db_manager and service.db_manager.is_mongodb_available():
+            records = service._get_from_mongodb()
+            if records:
+                return records
+    except Exception as e:
+        logger.debug(f"⚠️ [股票索引] MongoDB股票列表不可用: {e}")
+
+    try:
+        from .tushare_utils import get_tushare_provider
+        provider = get_tushare_provider()
+        if provider.connected:
+            stock_list = provider.get_stock_list()
+            if hasattr(stock_list, 'empty') and not stock_list.empty:
+                return stock_list.to_dict('records')
+    except Exception as e:
+        logger.debug(f"⚠️ [股票索引] Tushare股票列表不可用: {e}")
+    return []
+
+
+_symbol_index: Optional[SymbolIndex] = None
+_symbol_index_lock = threading.Lock()
+
+def get_symbol_index() -> SymbolIndex:
+    """获取全局股票检索索引（首次调用时构建）"""
+    global _symbol_index
+    if _symbol_index is None:
+        with _symbol_index_lock:
+            if _symbol_index is None:
+                index = SymbolIndex(builtin_hk_us_entries())
+                count = index.upsert(entries_from_stock_records(_load_china_records()))
+                logger.info(f"🔎 [股票索引] 构建完成: A股 {count} 只, 共 {len(index)} 只")
+                _symbol_index = index
+    return _symbol_index
+
+
+def refresh_symbol_index(records: Optional[Iterable[Dict[str, Any]]] = None, build: bool = True) -> int:
+    """
+    增量刷新A股条目（如 stock_basic_info 同步之后），records 为空时重新加载股票列表
+
+    Args:
+        records: 新增或变化的股票记录
+        build: 索引尚未构建时是否构建；为 False 时跳过（首次构建会读取最新数据）
+
+    Returns:
+        更新的条目数
+    """
+    if _symbol_index is None and not build:
+        return 0
+    records = list(records) if records is not None else _load_china_records()
+    return get_symbol_index().upsert(entries_from_stock_records(records))
+
+
+def search_symbols(keyword: str, limit: int = 10, market: Optional[str] = None) -> List[Dict[str, Any]]:
+    """便捷函数：检索股票，返回字典列表"""
+    return [entry.to_dict() for entry in get_symbol_index().search(keyword, limit=limit, market=market)]
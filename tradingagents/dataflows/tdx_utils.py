@@ -12,6 +12,7 @@ import warnings
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import replayable
 logger = get_logger('agents')
 warnings.filterwarnings('ignore')
 
@@ -32,6 +33,12 @@ except ImportError:
     MONGODB_AVAILABLE = False
     logger.warning(f"⚠️ pymongo未安装，无法从MongoDB获取股票名称")
 
+from .bar_frame import BarFrame, StockSnapshot, get_bar_frame_cache, warmup_start
+from .point_in_time import is_settled, normalize_date
+from .trading_calendar import market_zone
+from .indicator_state import get_indicator_state_store
+from tradingagents.indicators import STANDARD_SPEC
+
 try:
     from .cache_manager import get_cache
     FILE_CACHE_AVAILABLE = True
@@ -51,6 +58,10 @@ except ImportError:
     logger.info(f"💡 安装命令: pip install pytdx")
 
 
+# 股票搜索最多查询实时行情的候选数（每个候选一次网络请求）
+SEARCH_QUOTE_LIMIT = 5
+
+
 class TongDaXinDataProvider:
     """通达信数据提供器"""
     
@@ -218,6 +229,7 @@ class TongDaXinDataProvider:
             _stock_name_cache[stock_code] = default_name
             return default_name
     
+    @replayable('tdx', method=True)
     def get_real_time_data(self, stock_code: str) -> Dict:
         """
         获取股票实时数据
@@ -279,6 +291,27 @@ class TongDaXinDataProvider:
         Returns:
             DataFrame: 历史数据
         """
+        frame = self.get_bar_frame(stock_code, start_date, period)
+        return frame.window(start_date, end_date)
+    
+    def get_bar_frame(self, stock_code: str, start_date: str, period: str = 'D') -> BarFrame:
+        """
+        获取覆盖 start_date 至今的K线帧（进程内缓存，同一股票同一周期只获取一次）
+        Args:
+            stock_code: 股票代码
+            start_date: 需要覆盖的开始日期 'YYYY-MM-DD'
+            period: 周期 'D'=日线, 'W'=周线, 'M'=月线
+        Returns:
+            BarFrame: K线帧
+        """
+        return get_bar_frame_cache().get_or_fetch(
+            stock_code, period, start_date,
+            lambda fetch_start: self._fetch_bars(stock_code, fetch_start, period)
+        )
+    
+    @replayable('tdx', method=True)
+    def _fetch_bars(self, stock_code: str, start_date: str, period: str = 'D') -> pd.DataFrame:
+        """从通达信获取 start_date 至今的K线数据"""
         if not self.connected:
             if not self.connect():
                 return pd.DataFrame()
@@ -286,10 +319,9 @@ class TongDaXinDataProvider:
         try:
             market = self._get_market_code(stock_code)
             
-            # 计算需要获取的数据量
+            # 计算需要获取的数据量（K线从最新一根往前取，所以按起始日期到今天计算）
             start_dt = datetime.strptime(start_date, '%Y-%m-%d')
-            end_dt = datetime.strptime(end_date, '%Y-%m-%d')
-            days_diff = (end_dt - start_dt).days
+            days_diff = (datetime.now() - start_dt).days
             
             # 根据周期调整数据量
             if period == 'D':
@@ -305,6 +337,7 @@ class TongDaXinDataProvider:
             category_map = {'D': 9, 'W': 5, 'M': 6}
             category = category_map.get(period, 9)
             
+            logger.debug(f"🌐 [K线帧] 获取K线: {stock_code} {period} 自 {start_date} ({count}条)")
             data = self.api.get_security_bars(category, market, stock_code, 0, count)
             
             if not data:
@@ -318,9 +351,6 @@ class TongDaXinDataProvider:
             df = df.set_index('datetime')
             df = df.sort_index()
             
-            # 筛选日期范围
-            df = df[start_date:end_date]
-            
             # 重命名列以匹配Yahoo Finance格式
             df = df.rename(columns={
                 'open': 'Open',
@@ -340,6 +370,7 @@ class TongDaXinDataProvider:
             logger.error(f"获取历史数据失败: {e}")
             return pd.DataFrame()
     
+    @replayable('tdx', method=True)
     def get_stock_technical_indicators(self, stock_code: str, period: int = 20) -> Dict:
         """
         计算技术指标
@@ -350,55 +381,70 @@ class TongDaXinDataProvider:
             Dict: 技术指标数据
         """
         try:
-            # 获取最近的历史数据
+            # 复用K线帧，保证预热期足够计算全部指标
             end_date = datetime.now().strftime('%Y-%m-%d')
             start_date = (datetime.now() - timedelta(days=period*2)).strftime('%Y-%m-%d')
             
-            df = self.get_stock_history_data(stock_code, start_date, end_date)
-            
-            if df.empty:
-                return {}
-            
-            # 计算技术指标
-            indicators = {}
-            
-            # 移动平均线
-            indicators['MA5'] = df['Close'].rolling(5).mean().iloc[-1] if len(df) >= 5 else None
-            indicators['MA10'] = df['Close'].rolling(10).mean().iloc[-1] if len(df) >= 10 else None
-            indicators['MA20'] = df['Close'].rolling(20).mean().iloc[-1] if len(df) >= 20 else None
-            
-            # RSI
-            if len(df) >= 14:
-                delta = df['Close'].diff()
-                gain = (delta.where(delta > 0, 0)).rolling(14).mean()
-                loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-                rs = gain / loss
-                indicators['RSI'] = (100 - (100 / (1 + rs))).iloc[-1]
-            
-            # MACD
-            if len(df) >= 26:
-                exp1 = df['Close'].ewm(span=12).mean()
-                exp2 = df['Close'].ewm(span=26).mean()
-                macd = exp1 - exp2
-                signal = macd.ewm(span=9).mean()
-                indicators['MACD'] = macd.iloc[-1]
-                indicators['MACD_Signal'] = signal.iloc[-1]
-                indicators['MACD_Histogram'] = (macd - signal).iloc[-1]
-            
-            # 布林带
-            if len(df) >= 20:
-                sma = df['Close'].rolling(20).mean()
-                std = df['Close'].rolling(20).std()
-                indicators['BB_Upper'] = (sma + 2 * std).iloc[-1]
-                indicators['BB_Middle'] = sma.iloc[-1]
-                indicators['BB_Lower'] = (sma - 2 * std).iloc[-1]
-            
-            return indicators
+            frame = self.get_bar_frame(stock_code, warmup_start(start_date, end_date))
+            # 指标状态持久化，每天只需追加新K线
+            series = get_indicator_state_store().advance(stock_code, STANDARD_SPEC, frame.bars, namespace='tdx')
+            return series.latest or {}
             
         except Exception as e:
             logger.error(f"计算技术指标失败: {e}")
             return {}
     
+    def _quote_from_bars(self, stock_code: str, history: pd.DataFrame) -> Dict:
+        """由区间内最后一根K线生成行情（字段与 get_real_time_data 一致）"""
+        if history.empty:
+            return {}
+        last = history.iloc[-1]
+        last_close = float(history['Close'].iloc[-2]) if len(history) > 1 else float(last['Open'])
+        price = float(last['Close'])
+        return {
+            'code': stock_code,
+            'name': self._get_stock_name(stock_code),
+            'price': price,
+            'last_close': last_close,
+            'open': float(last['Open']),
+            'high': float(last['High']),
+            'low': float(last['Low']),
+            'volume': float(last.get('Volume', 0)),
+            'amount': float(last.get('Amount', 0)),
+            'change': price - last_close,
+            'change_percent': (price - last_close) / last_close * 100 if last_close > 0 else 0,
+            'update_time': history.index[-1].strftime('%Y-%m-%d'),
+        }
+
+    def get_stock_snapshot(self, stock_code: str, start_date: str, end_date: str) -> StockSnapshot:
+        """
+        获取行情快照：实时报价、区间历史和截至 end_date 的技术指标
+        三者共用一次K线获取
+        Args:
+            stock_code: 股票代码
+            start_date: 开始日期 'YYYY-MM-DD'
+            end_date: 结束日期 'YYYY-MM-DD'
+        Returns:
+            StockSnapshot: 行情快照
+        """
+        frame = self.get_bar_frame(stock_code, warmup_start(start_date, end_date))
+        history = frame.window(start_date, end_date)
+        # 历史日期（回测）的"实时行情"取 end_date 当天的K线，不使用当前报价；
+        # 当天即使已收盘也用实时报价（当天K线可能尚未更新）
+        today = datetime.now(market_zone('china')).strftime('%Y-%m-%d')
+        if (normalize_date(end_date) or today) < today:
+            realtime = self._quote_from_bars(stock_code, history)
+        else:
+            realtime = self.get_real_time_data(stock_code)
+        return StockSnapshot(
+            code=stock_code,
+            realtime=realtime,
+            history=history,
+            indicators=frame.indicators(as_of=end_date),
+            frame=frame,
+        )
+    
+    @replayable('tdx', method=True)
     def search_stocks(self, keyword: str) -> List[Dict]:
         """
         搜索股票
@@ -430,19 +476,27 @@ class TongDaXinDataProvider:
             }
             
             results = []
-            
+
+            # 优先使用股票检索索引（只取股票，指数/ETF 的实时行情按代码会取到同代码的股票），
+            # 索引为空时使用常见股票映射；每个候选都要请求一次实时行情，限制候选数
+            from .symbol_index import get_symbol_index
+            matches = get_symbol_index().search(keyword, limit=SEARCH_QUOTE_LIMIT * 2, market='china')
+            candidates = [(entry.name, entry.code) for entry in matches if entry.is_stock]
+            if not candidates:
+                candidates = [(name, code) for name, code in stock_mapping.items()
+                              if keyword.lower() in name.lower() or keyword in code]
+
             # 按关键词搜索
-            for name, code in stock_mapping.items():
-                if keyword.lower() in name.lower() or keyword in code:
-                    # 获取实时数据
-                    realtime_data = self.get_real_time_data(code)
-                    if realtime_data:
-                        results.append({
-                            'code': code,
-                            'name': name,
-                            'price': realtime_data.get('price', 0),
-                            'change_percent': realtime_data.get('change_percent', 0)
-                        })
+            for name, code in candidates[:SEARCH_QUOTE_LIMIT]:
+                # 获取实时数据
+                realtime_data = self.get_real_time_data(code)
+                if realtime_data:
+                    results.append({
+                        'code': code,
+                        'name': name,
+                        'price': realtime_data.get('price', 0),
+                        'change_percent': realtime_data.get('change_percent', 0)
+                    })
             
             return results
             
@@ -465,6 +519,7 @@ class TongDaXinDataProvider:
         else:
             return 0  # 默认深圳
     
+    @replayable('tdx', method=True)
     def get_market_overview(self) -> Dict:
         """获取市场概览"""
         if not self.connected:
@@ -646,15 +701,18 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
                 db = mongodb_client[db_manager.mongodb_config["database"]]
                 collection = db.stock_data
 
-                # 查询最近的缓存数据
+                # 查询相同区间的缓存数据；结束日期早于今天的历史数据不会变化，不限制缓存时间
                 from datetime import datetime, timedelta
-                cutoff_time = datetime.utcnow() - timedelta(hours=6)
-
-                cached_doc = collection.find_one({
+                query = {
                     "symbol": stock_code,
                     "market_type": "china",
-                    "created_at": {"$gte": cutoff_time}
-                }, sort=[("created_at", -1)])
+                    "metadata.start_date": start_date,
+                    "metadata.end_date": end_date,
+                }
+                if not is_settled(end_date, 'china'):
+                    query["created_at"] = {"$gte": datetime.utcnow() - timedelta(hours=6)}
+
+                cached_doc = collection.find_one(query, sort=[("created_at", -1)])
 
                 if cached_doc and 'data' in cached_doc:
                     logger.info(f"🗄️ 从MongoDB缓存加载数据: {stock_code}")
@@ -684,19 +742,17 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
     try:
         provider = get_tdx_provider()
 
-        # 获取历史数据
-        df = provider.get_stock_history_data(stock_code, start_date, end_date)
+        # 一次获取K线帧，历史数据、实时行情和技术指标共用
+        snapshot = provider.get_stock_snapshot(stock_code, start_date, end_date)
+        df = snapshot.history
 
         if df.empty:
             error_msg = f"❌ 未能获取股票 {stock_code} 的历史数据"
             print(error_msg)
             return error_msg
         
-        # 获取实时数据
-        realtime_data = provider.get_real_time_data(stock_code)
-
-        # 获取技术指标
-        indicators = provider.get_stock_technical_indicators(stock_code)
+        realtime_data = snapshot.realtime
+        indicators = snapshot.indicators
         
         # 格式化输出
         result = f"""
@@ -717,11 +773,11 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
 - 期间涨幅: {((df['Close'].iloc[-1] - df['Close'].iloc[0]) / df['Close'].iloc[0] * 100):.2f}%
 
 ## 🔍 技术指标
-- MA5: ¥{indicators.get('MA5', 0):.2f}
-- MA10: ¥{indicators.get('MA10', 0):.2f}
-- MA20: ¥{indicators.get('MA20', 0):.2f}
-- RSI: {indicators.get('RSI', 0):.2f}
-- MACD: {indicators.get('MACD', 0):.4f}
+- MA5: ¥{(indicators.get('MA5') or 0):.2f}
+- MA10: ¥{(indicators.get('MA10') or 0):.2f}
+- MA20: ¥{(indicators.get('MA20') or 0):.2f}
+- RSI: {(indicators.get('RSI') or 0):.2f}
+- MACD: {(indicators.get('MACD') or 0):.4f}
 
 ## 📋 最近5日数据
 {df.tail().to_string()}
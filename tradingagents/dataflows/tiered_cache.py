@@ -0,0 +1,629 @@
+#!/usr/bin/env python3
+"""
+多级缓存
+进程内LRU（按字节计容量） → Redis → MongoDB → 文件，各层使用统一的缓存键（cache_manager.make_cache_key）：
+
+- 读穿透：逐层查找，命中较慢的层后提升到更快的层（内存层立即写入，其余层后台写入）
+- 写回：写入时内存层立即生效，Redis/MongoDB/文件由后台线程按顺序写入（flush() 等待写完）
+- 统计：各层命中率、读写耗时、提升与淘汰次数（get_stats()）
+
+get_cache() 返回的 TieredStockDataCache 保持 StockDataCache 的接口，文件层就是原来的文件缓存；
+同一进程内重复的工具调用（同一次分析或多次分析之间）直接命中内存层，不再读文件、反序列化或访问网络。
+
+环境变量：
+    TRADINGAGENTS_CACHE_MEMORY_MB: 内存层容量（默认 128，0 为关闭内存层）
+    TRADINGAGENTS_CACHE_WRITE_BEHIND: 较慢的层是否后台写入（默认 true，false 时同步写入）
+    REDIS_ENABLED / MONGODB_ENABLED: 是否启用 Redis/MongoDB 层（见 config/database_manager.py）
+"""
+
+import atexit
+import base64
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.tracing import KIND_CACHE, trace_span
+from .cache_manager import StockDataCache
+from .cache_policy import FRESH, STALE, get_cache_policy_engine, market_of
+logger = get_logger('agents')
+
+
+TIER_MEMORY = 'memory'
+TIER_REDIS = 'redis'
+TIER_MONGODB = 'mongodb'
+TIER_FILE = 'file'
+
+DEFAULT_MEMORY_MB = 128
+# 单条数据最多占内存层容量的比例，更大的数据只存放在较慢的层
+MAX_ENTRY_FRACTION = 0.25
+
+MEMORY_MB_ENV = 'TRADINGAGENTS_CACHE_MEMORY_MB'
+WRITE_BEHIND_ENV = 'TRADINGAGENTS_CACHE_WRITE_BEHIND'
+
+REDIS_KEY_PREFIX = 'tradingagents:cache:'
+MONGODB_COLLECTION = 'cache_entries'
+
+
+def estimate_size(value: Any) -> int:
+    """数据在内存中占用的字节数（估算）"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def _copy_value(value: Any) -> Any:
+    """DataFrame 是可变的，存入和取出内存层时复制，避免调用方修改缓存内容"""
+    return value.copy() if isinstance(value, pd.DataFrame) else value
+
+
+@dataclass
+class CacheEntry:
+    """一条缓存：数据、元数据（symbol、data_type、start_date、end_date、data_source 等）和写入时间"""
+    key: str
+    value: Any
+    metadata: Dict[str, Any]
+    stored_at: float = field(default_factory=time.time)
+    size: int = 0
+
+    def __post_init__(self):
+        if not self.size:
+            self.size = estimate_size(self.value)
+
+    @property
+    def data_type(self) -> str:
+        return self.metadata.get('data_type', 'stock_data')
+
+    @property
+    def symbol(self) -> str:
+        return self.metadata.get('symbol', '')
+
+    def store_seconds(self) -> Optional[int]:
+        """带过期功能的层（Redis/MongoDB）保留的时长，None 为永不过期（统一缓存策略）"""
+        end_date = self.metadata.get('end_date') if self.data_type == 'stock_data' else None
+        market = market_of(self.symbol) or self.metadata.get('market_type')
+        return get_cache_policy_engine().store_seconds(self.data_type, market, end_date or None)
+
+
+# ==================== 序列化（Redis/MongoDB） ====================
+
+def encode_entry(entry: CacheEntry) -> str:
+    """序列化为 JSON 字符串：文本原样，其余（DataFrame 等）pickle 后 base64，保留列类型"""
+    if isinstance(entry.value, str):
+        value_format, data = 'text', entry.value
+    else:
+        value_format = 'pickle'
+        data = base64.b64encode(pickle.dumps(entry.value, protocol=pickle.HIGHEST_PROTOCOL)).decode('ascii')
+    return json.dumps({
+        'key': entry.key,
+        'metadata': entry.metadata,
+        'stored_at': entry.stored_at,
+        'format': value_format,
+        'data': data,
+    }, ensure_ascii=False, default=str)
+
+
+def decode_entry(payload: Any) -> CacheEntry:
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8')
+    record = json.loads(payload)
+    if record['format'] == 'pickle':
+        value = pickle.loads(base64.b64decode(record['data']))
+    else:
+        value = record['data']
+    return CacheEntry(record['key'], value, record['metadata'], record['stored_at'])
+
+
+# ==================== 缓存层 ====================
+
+@dataclass
+class TierStats:
+    """一层缓存的统计"""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    errors: int = 0
+    promotions: int = 0          # 从较慢的层提升到本层的次数
+    evictions: int = 0           # 内存层因容量淘汰的条目数
+    read_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        lookups = self.hits + self.misses
+        data['hit_rate'] = round(self.hit_rate, 4)
+        data['avg_read_ms'] = round(self.read_seconds * 1000 / lookups, 3) if lookups else 0.0
+        data['avg_write_ms'] = round(self.write_seconds * 1000 / self.writes, 3) if self.writes else 0.0
+        return data
+
+
+class CacheTier:
+    """缓存层接口"""
+    name = ''
+    write_behind = True          # 是否允许后台写入（内存层总是立即写入）
+
+    def __init__(self):
+        self.stats = TierStats()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        raise NotImplementedError
+
+    def put(self, entry: CacheEntry):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryTier(CacheTier):
+    """进程内LRU，容量按字节计算"""
+    name = TIER_MEMORY
+    write_behind = False
+
+    def __init__(self, max_bytes: int):
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry: CacheEntry):
+        if entry.size > self.max_bytes * MAX_ENTRY_FRACTION:
+            logger.debug(f"🔍 [多级缓存] 数据过大不放入内存层: {entry.key} ({entry.size} 字节)")
+            self.delete(entry.key)
+            return
+        entry = CacheEntry(entry.key, _copy_value(entry.value), dict(entry.metadata), entry.stored_at, entry.size)
+        with self._lock:
+            previous = self._entries.pop(entry.key, None)
+            if previous is not None:
+                self.bytes_used -= previous.size
+            self._entries[entry.key] = entry
+            self.bytes_used += entry.size
+            while self.bytes_used > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes_used -= evicted.size
+                self.stats.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.bytes_used -= entry.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def entries(self) -> List[CacheEntry]:
+        """当前条目，最近使用的在前"""
+        with self._lock:
+            return list(reversed(self._entries.values()))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisTier(CacheTier):
+    """Redis 层，保留时长由统一缓存策略决定（已收盘的历史行情不过期）"""
+    name = TIER_REDIS
+
+    def __init__(self, client, prefix: str = REDIS_KEY_PREFIX):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        payload = self.client.get(self.prefix + key)
+        return decode_entry(payload) if payload else None
+
+    def put(self, entry: CacheEntry):
+        seconds = entry.store_seconds()
+        if seconds is None:
+            self.client.set(self.prefix + entry.key, encode_entry(entry))
+        else:
+            self.client.setex(self.prefix + entry.key, seconds, encode_entry(entry))
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+
+class MongoTier(CacheTier):
+    """MongoDB 层，过期时间写入 expires_at（TTL 索引自动清理）"""
+    name = TIER_MONGODB
+
+    def __init__(self, database, collection: str = MONGODB_COLLECTION):
+        super().__init__()
+        self.collection = database[collection]
+        self._indexed = False
+
+    def _ensure_indexes(self):
+        if self._indexed:
+            return
+        self.collection.create_index('expires_at', expireAfterSeconds=0)
+        self.collection.create_index([('symbol', 1), ('data_type', 1), ('end_date', 1)])
+        self._indexed = True
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        doc = self.collection.find_one({'_id': key})
+        if not doc:
+            return None
+        expires_at = doc.get('expires_at')
+        if expires_at is not None and expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
+            return None
+        return decode_entry(doc['payload'])
+
+    def put(self, entry: CacheEntry):
+        self._ensure_indexes()
+        seconds = entry.store_seconds()
+        now = datetime.now(timezone.utc)
+        self.collection.replace_one({'_id': entry.key}, {
+            '_id': entry.key,
+            'symbol': entry.symbol,
+            'data_type': entry.data_type,
+            'start_date': entry.metadata.get('start_date'),
+            'end_date': entry.metadata.get('end_date'),
+            'data_source': entry.metadata.get('data_source'),
+            'payload': encode_entry(entry),
+            'created_at': now,
+            'expires_at': now + timedelta(seconds=seconds) if seconds is not None else None,
+        }, upsert=True)
+
+    def delete(self, key: str):
+        self.collection.delete_one({'_id': key})
+
+
+# 文件缓存元数据中只属于文件层的字段
+_FILE_ONLY_METADATA = ('file_path', 'file_format', 'cached_at')
+
+
+class FileTier(CacheTier):
+    """文件层：StockDataCache 原有的 csv/文本 + 元数据文件"""
+    name = TIER_FILE
+
+    def __init__(self, store: StockDataCache):
+        super().__init__()
+        self.store = store
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.store.read_entry(key)
+        if entry is None:
+            return None
+        value, metadata = entry
+        stored_at = datetime.fromisoformat(metadata['cached_at']).timestamp()
+        metadata = {k: v for k, v in metadata.items() if k not in _FILE_ONLY_METADATA}
+        return CacheEntry(key, value, metadata, stored_at)
+
+    def put(self, entry: CacheEntry):
+        self.store.write_entry(entry.key, entry.value, dict(entry.metadata), entry.stored_at)
+
+    def delete(self, key: str):
+        metadata = self.store._load_metadata(key)
+        if metadata and metadata.get('file_path') and os.path.exists(metadata['file_path']):
+            os.remove(metadata['file_path'])
+        metadata_path = self.store._get_metadata_path(key)
+        if metadata_path.exists():
+            metadata_path.unlink()
+
+
+# ==================== 多级缓存 ====================
+
+class TieredCache:
+    """按从快到慢的顺序组合各层缓存"""
+
+    def __init__(self, tiers: List[CacheTier], write_behind: bool = True):
+        self.tiers = list(tiers)
+        self.write_behind = write_behind
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def tier(self, name: str) -> Optional[CacheTier]:
+        return next((tier for tier in self.tiers if tier.name == name), None)
+
+    @property
+    def memory(self) -> Optional[MemoryTier]:
+        return self.tier(TIER_MEMORY)
+
+    # ---------- 读取 ----------
+
+    def _read(self, tier: CacheTier, key: str) -> Optional[CacheEntry]:
+        started = time.perf_counter()
+        try:
+            entry = tier.get(key)
+        except Exception as e:
+            entry = None
+            with self._lock:
+                tier.stats.errors += 1
+            logger.warning(f"⚠️ [多级缓存] {tier.name} 层读取失败: {key} ({e})")
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            tier.stats.read_seconds += elapsed
+            if entry is not None:
+                tier.stats.hits += 1
+            else:
+                tier.stats.misses += 1
+        return entry
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """逐层查找，命中较慢的层时提升到所有更快的层"""
+        with trace_span("cache:tiered", KIND_CACHE) as span:
+            for i, tier in enumerate(self.tiers):
+                entry = self._read(tier, key)
+                if entry is None:
+                    continue
+                for faster in self.tiers[:i]:
+                    with self._lock:
+                        faster.stats.promotions += 1
+                    self._write(faster, entry)
+                span.set_attributes(tier=tier.name, cache_hit=True)
+                if i > 0:
+                    logger.debug(f"⬆️ [多级缓存] {tier.name} 层命中并提升: {key}")
+                return entry
+            span.set_attribute('cache_hit', False)
+            return None
+
+    def find(self, predicate: Callable[[CacheEntry], bool]) -> List[CacheEntry]:
+        """在内存层中按元数据查找（最近使用的在前）；较慢的层由调用方按各自的索引查找"""
+        memory = self.memory
+        if memory is None:
+            return []
+        return [entry for entry in memory.entries() if predicate(entry)]
+
+    # ---------- 写入 ----------
+
+    def put(self, entry: CacheEntry):
+        """内存层立即写入，较慢的层后台写入（write_behind=False 时同步写入）"""
+        for tier in self.tiers:
+            self._write(tier, entry)
+
+    def _write(self, tier: CacheTier, entry: CacheEntry):
+        # 没有内存层时同步写入，否则写入后到后台写完之前读不到
+        if tier.write_behind and self.write_behind and self.memory is not None:
+            self._submit(tier, entry)
+        else:
+            self._write_now(tier, entry)
+
+    def _write_now(self, tier: CacheTier, entry: CacheEntry):
+        started = time.perf_counter()
+        try:
+            tier.put(entry)
+            failed = False
+        except Exception as e:
+            failed = True
+            logger.warning(f"⚠️ [多级缓存] {tier.name} 层写入失败: {entry.key} ({e})")
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            tier.stats.write_seconds += elapsed
+            if failed:
+                tier.stats.errors += 1
+            else:
+                tier.stats.writes += 1
+
+    def _submit(self, tier: CacheTier, entry: CacheEntry):
+        with self._lock:
+            if self._executor is None:
+                # 单线程按提交顺序写入，同一键后写的覆盖先写的
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-write')
+            self._pending += 1
+
+        def run():
+            try:
+                self._write_now(tier, entry)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+        self._executor.submit(run)
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """等待后台写入完成"""
+        deadline = time.time() + timeout
+        while self.pending():
+            if time.time() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def delete(self, key: str):
+        self.flush()
+        for tier in self.tiers:
+            try:
+                tier.delete(key)
+            except Exception as e:
+                logger.warning(f"⚠️ [多级缓存] {tier.name} 层删除失败: {key} ({e})")
+
+    # ---------- 统计 ----------
+
+    def get_stats(self) -> Dict[str, Any]:
+        """各层统计，以及内存层占用和待写入数"""
+        with self._lock:
+            stats = {tier.name: tier.stats.to_dict() for tier in self.tiers}
+        memory = self.memory
+        if memory is not None:
+            stats[TIER_MEMORY].update(entries=len(memory), bytes_used=memory.bytes_used, max_bytes=memory.max_bytes)
+        stats['pending_writes'] = self.pending()
+        return stats
+
+    def format_stats(self) -> str:
+        """各层命中率和耗时的文本摘要"""
+        lines = []
+        for tier in self.tiers:
+            data = tier.stats.to_dict()
+            lines.append(f"{tier.name:<8} 命中 {data['hits']:>6} / 未命中 {data['misses']:>6} "
+                         f"({data['hit_rate']:.1%})  读 {data['avg_read_ms']:.2f}ms  写 {data['avg_write_ms']:.2f}ms  "
+                         f"提升 {data['promotions']}  淘汰 {data['evictions']}  错误 {data['errors']}")
+        return "\n".join(lines)
+
+
+def default_tiers(file_store: StockDataCache, memory_bytes: Optional[int] = None) -> List[CacheTier]:
+    """按配置组合缓存层：内存（容量大于0时） → Redis、MongoDB（启用且可用时） → 文件"""
+    if memory_bytes is None:
+        memory_bytes = int(float(os.getenv(MEMORY_MB_ENV, DEFAULT_MEMORY_MB)) * 1024 * 1024)
+    tiers: List[CacheTier] = []
+    if memory_bytes > 0:
+        tiers.append(MemoryTier(memory_bytes))
+
+    try:
+        from ..config.database_manager import get_database_manager
+        db_manager = get_database_manager()
+        redis_client = db_manager.get_redis_client()
+        if redis_client is not None:
+            tiers.append(RedisTier(redis_client))
+        mongodb_client = db_manager.get_mongodb_client()
+        if mongodb_client is not None:
+            tiers.append(MongoTier(mongodb_client[db_manager.mongodb_config['database']]))
+    except Exception as e:
+        logger.warning(f"⚠️ [多级缓存] 数据库缓存层不可用: {e}")
+
+    tiers.append(FileTier(file_store))
+    return tiers
+
+
+class TieredStockDataCache(StockDataCache):
+    """
+    StockDataCache 接口的多级缓存
+
+    save_*/load_*/cache_freshness 经由多级缓存存取；文件层即 StockDataCache 原有的存储，
+    部分匹配等按元数据的查找先查内存层，再扫描文件层的元数据
+    """
+
+    def __init__(self, cache_dir: str = None, tiers: Optional[List[CacheTier]] = None,
+                 memory_bytes: Optional[int] = None, write_behind: Optional[bool] = None):
+        """
+        Args:
+            cache_dir: 文件层目录
+            tiers: 自定义缓存层（从快到慢），默认按配置组合（见 default_tiers）
+            memory_bytes: 内存层容量（字节），默认 TRADINGAGENTS_CACHE_MEMORY_MB
+            write_behind: 较慢的层是否后台写入，默认 TRADINGAGENTS_CACHE_WRITE_BEHIND
+        """
+        super().__init__(cache_dir)
+        if write_behind is None:
+            write_behind = os.getenv(WRITE_BEHIND_ENV, 'true').lower() == 'true'
+        self.tiered = TieredCache(tiers if tiers is not None else default_tiers(self, memory_bytes),
+                                  write_behind=write_behind)
+        logger.info(f"🧱 多级缓存: {' → '.join(tier.name for tier in self.tiered.tiers)}")
+
+    def _store(self, cache_key: str, data: Any, metadata: Dict[str, Any]):
+        self.tiered.put(CacheEntry(cache_key, data, dict(metadata)))
+
+    def _fetch(self, cache_key: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        entry = self.tiered.get(cache_key)
+        if entry is None:
+            return None
+        return _copy_value(entry.value), entry.metadata
+
+    def _entry_info(self, cache_key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        # 读取整条数据：查找之后通常紧接着加载，此时数据已提升到内存层
+        entry = self.tiered.get(cache_key)
+        if entry is None:
+            return None
+        return entry.metadata, entry.stored_at
+
+    def find_cached_stock_data(self, symbol: str, start_date: str = None,
+                               end_date: str = None, data_source: str = None,
+                               max_age_hours: int = None, allow_stale: bool = False) -> Optional[str]:
+        """先在内存层中查找（精确或部分匹配），再按 StockDataCache 的方式逐层查找缓存键、扫描文件层的元数据"""
+        market_type = self._determine_market_type(symbol)
+        accepted = (FRESH, STALE) if allow_stale else (FRESH,)
+
+        def matches(entry: CacheEntry) -> bool:
+            metadata = entry.metadata
+            return (metadata.get('symbol') == symbol and
+                    metadata.get('data_type') == 'stock_data' and
+                    metadata.get('market_type') == market_type and
+                    (data_source is None or metadata.get('data_source') == data_source) and
+                    metadata.get('end_date') == end_date and
+                    (not start_date or not metadata.get('start_date') or metadata['start_date'] <= start_date))
+
+        for entry in self.tiered.find(matches):
+            if self.freshness_of(entry.metadata, entry.stored_at, max_age_hours) in accepted:
+                logger.info(f"🎯 内存层中找到匹配的缓存: {symbol} -> {entry.key}")
+                return entry.key
+
+        return super().find_cached_stock_data(symbol, start_date, end_date, data_source,
+                                              max_age_hours=max_age_hours, allow_stale=allow_stale)
+
+    def find_cached_fundamentals_data(self, symbol: str, data_source: str = None,
+                                      max_age_hours: int = None) -> Optional[str]:
+        market_type = self._determine_market_type(symbol)
+        for entry in self.tiered.find(lambda e: (e.metadata.get('symbol') == symbol and
+                                                 e.metadata.get('data_type') == 'fundamentals' and
+                                                 e.metadata.get('market_type') == market_type and
+                                                 (data_source is None or
+                                                  e.metadata.get('data_source') == data_source))):
+            if self.freshness_of(entry.metadata, entry.stored_at, max_age_hours) == FRESH:
+                logger.info(f"🎯 内存层中找到基本面缓存: {symbol} ({data_source}) -> {entry.key}")
+                return entry.key
+        return super().find_cached_fundamentals_data(symbol, data_source, max_age_hours)
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """等待后台写入完成"""
+        return self.tiered.flush(timeout)
+
+    def clear_old_cache(self, max_age_days: int = 7):
+        self.flush()
+        memory = self.tiered.memory
+        if memory is not None:
+            memory.clear()
+        super().clear_old_cache(max_age_days)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        self.flush()
+        stats = super().get_cache_stats()
+        stats['tiers'] = self.tiered.get_stats()
+        return stats
+
+
+_tiered_cache: Optional[TieredStockDataCache] = None
+_tiered_cache_lock = threading.Lock()
+
+
+def get_tiered_cache() -> TieredStockDataCache:
+    """获取全局多级缓存（cache_manager.get_cache() 返回同一实例）"""
+    global _tiered_cache
+    with _tiered_cache_lock:
+        if _tiered_cache is None:
+            _tiered_cache = TieredStockDataCache()
+            atexit.register(_tiered_cache.flush)
+        return _tiered_cache
+
+
+def set_tiered_cache(cache: Optional[TieredStockDataCache]) -> Optional[TieredStockDataCache]:
+    """替换全局多级缓存（测试或自定义缓存层），返回原来的实例"""
+    global _tiered_cache
+    with _tiered_cache_lock:
+        previous, _tiered_cache = _tiered_cache, cache
+        return previous
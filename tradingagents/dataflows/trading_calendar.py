@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+交易日历（A股、港股、美股）
+
+节假日来自随包附带的表（calendars/<市场>.json），可以从数据源刷新（刷新结果写入缓存目录，优先于内置表）。
+基于 NumPy 工作日日历实现，区间查询是向量化的：
+
+    calendar = get_trading_calendar('china')
+    calendar.is_trading_day('2024-10-01')            # False（国庆）
+    calendar.trading_days('2024-09-25', '2024-10-10') # DatetimeIndex，只含交易日
+    calendar.last_trading_day('2024-10-05')          # 2024-09-30
+    calendar.session_times('2024-12-24')             # 当地时间的开盘/收盘（含提前收市）
+
+表覆盖范围以外的日期只排除周末（会记录一次警告）。
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, time as dtime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from zoneinfo import ZoneInfo
+    ZONEINFO_AVAILABLE = True
+except ImportError:
+    ZoneInfo = None
+    ZONEINFO_AVAILABLE = False
+
+
+BUNDLED_DIR = Path(__file__).parent / 'calendars'
+CALENDAR_DIR_ENV = 'TRADINGAGENTS_CALENDAR_DIR'
+
+WEEKMASK = '1111100'
+
+
+@dataclass(frozen=True)
+class MarketSession:
+    """交易所的时区和交易时段（当地时间）"""
+    timezone: str
+    utc_offset_hours: float             # 没有时区数据库时使用的固定时差
+    sessions: Tuple[Tuple[dtime, dtime], ...]
+
+
+MARKET_SESSIONS: Dict[str, MarketSession] = {
+    'china': MarketSession('Asia/Shanghai', 8, ((dtime(9, 30), dtime(11, 30)), (dtime(13, 0), dtime(15, 0)))),
+    'hk': MarketSession('Asia/Hong_Kong', 8, ((dtime(9, 30), dtime(12, 0)), (dtime(13, 0), dtime(16, 0)))),
+    'us': MarketSession('America/New_York', -5, ((dtime(9, 30), dtime(16, 0)),)),
+}
+
+
+def market_of(symbol: Any) -> Optional[str]:
+    """由股票代码判断市场（china/hk/us），无法判断时返回 None"""
+    if symbol is None:
+        return None
+    text = str(symbol).strip().upper()
+    if re.fullmatch(r'\d{6}(\.(SH|SZ|SS|BJ))?', text):
+        return 'china'
+    if text.endswith('.HK') or re.fullmatch(r'\d{4,5}', text):
+        return 'hk'
+    if re.fullmatch(r'[A-Z][A-Z.\-]{0,9}', text):
+        return 'us'
+    return None
+
+
+def market_zone(market: str):
+    """交易所时区（没有时区数据库时使用固定时差）"""
+    session = MARKET_SESSIONS[market]
+    if ZONEINFO_AVAILABLE:
+        try:
+            return ZoneInfo(session.timezone)
+        except Exception:
+            pass
+    return timezone(timedelta(hours=session.utc_offset_hours))
+
+
+def to_day(value: Any) -> np.datetime64:
+    """日期（YYYY-MM-DD、YYYYMMDD、date、datetime、Timestamp）转换为 datetime64[D]"""
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[D]')
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        return np.datetime64(value, 'D')
+    return np.datetime64(pd.Timestamp(str(value)).date(), 'D')
+
+
+def to_days(values: Iterable[Any]) -> np.ndarray:
+    """批量转换为 datetime64[D] 数组"""
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[D]')
+    return pd.to_datetime(pd.Index(list(values)).astype(str)).values.astype('datetime64[D]')
+
+
+@dataclass
+class TradingCalendar:
+    """一个市场的交易日历"""
+    market: str
+    holidays: Tuple[str, ...] = ()
+    early_closes: Dict[str, str] = field(default_factory=dict)   # 日期 -> 提前收市时间 HH:MM
+    covered_from: Optional[str] = None
+    covered_to: Optional[str] = None
+    source: str = 'bundled'
+
+    def __post_init__(self):
+        self._holidays = np.array(sorted(set(self.holidays)), dtype='datetime64[D]')
+        self._busdays = np.busdaycalendar(weekmask=WEEKMASK, holidays=self._holidays)
+        self._covered = (to_day(self.covered_from) if self.covered_from else None,
+                         to_day(self.covered_to) if self.covered_to else None)
+        self._warned_outside = False
+        self._zone = market_zone(self.market) if self.market in MARKET_SESSIONS else timezone.utc
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'TradingCalendar':
+        return cls(
+            market=data['market'],
+            holidays=tuple(data.get('holidays', ())),
+            early_closes=dict(data.get('early_closes', {})),
+            covered_from=data.get('covered_from'),
+            covered_to=data.get('covered_to'),
+            source=data.get('source', 'bundled'),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'market': self.market,
+            'source': self.source,
+            'covered_from': self.covered_from,
+            'covered_to': self.covered_to,
+            'holidays': sorted(set(self.holidays)),
+            'early_closes': dict(sorted(self.early_closes.items())),
+        }
+
+    # ---------- 覆盖范围 ----------
+
+    def covers(self, day: Any) -> bool:
+        """日期是否在节假日表的覆盖范围内"""
+        day = to_day(day)
+        start, end = self._covered
+        return (start is None or day >= start) and (end is None or day <= end)
+
+    def _check_coverage(self, *days: np.datetime64):
+        if self._warned_outside or all(self.covers(day) for day in days):
+            return
+        self._warned_outside = True
+        logger.warning(f"⚠️ [交易日历] {self.market} 节假日表覆盖 {self.covered_from} ~ {self.covered_to}，"
+                       f"范围外的日期只排除周末（可刷新日历）")
+
+    # ---------- 交易日 ----------
+
+    def is_trading_day(self, day: Any) -> bool:
+        day = to_day(day)
+        self._check_coverage(day)
+        return bool(np.is_busday(day, busdaycal=self._busdays))
+
+    def is_trading_days(self, days: Iterable[Any]) -> np.ndarray:
+        """批量判断，返回布尔数组"""
+        days = to_days(days)
+        if len(days):
+            self._check_coverage(days.min(), days.max())
+        return np.is_busday(days, busdaycal=self._busdays)
+
+    def trading_days(self, start: Any, end: Any) -> pd.DatetimeIndex:
+        """[start, end] 内的全部交易日（升序）"""
+        start, end = to_day(start), to_day(end)
+        if end < start:
+            return pd.DatetimeIndex([])
+        self._check_coverage(start, end)
+        days = np.arange(start, end + 1, dtype='datetime64[D]')
+        return pd.DatetimeIndex(days[np.is_busday(days, busdaycal=self._busdays)])
+
+    def count_trading_days(self, start: Any, end: Any) -> int:
+        """[start, end] 内的交易日数"""
+        start, end = to_day(start), to_day(end)
+        if end < start:
+            return 0
+        self._check_coverage(start, end)
+        return int(np.busday_count(start, end + 1, busdaycal=self._busdays))
+
+    def last_trading_day(self, day: Any) -> pd.Timestamp:
+        """当天或之前最近的交易日"""
+        day = to_day(day)
+        self._check_coverage(day)
+        return pd.Timestamp(np.busday_offset(day, 0, roll='backward', busdaycal=self._busdays))
+
+    def next_trading_day(self, day: Any) -> pd.Timestamp:
+        """当天或之后最近的交易日"""
+        day = to_day(day)
+        self._check_coverage(day)
+        return pd.Timestamp(np.busday_offset(day, 0, roll='forward', busdaycal=self._busdays))
+
+    def offset(self, day: Any, n: int) -> pd.Timestamp:
+        """从当天（非交易日时取之前最近的交易日）起第 n 个交易日，n 可为负"""
+        day = to_day(day)
+        self._check_coverage(day)
+        return pd.Timestamp(np.busday_offset(day, n, roll='backward', busdaycal=self._busdays))
+
+    # ---------- 交易时段 ----------
+
+    @property
+    def zone(self):
+        return self._zone
+
+    def session_times(self, day: Any) -> List[Tuple[datetime, datetime]]:
+        """当天各交易时段的 (开盘, 收盘)，当地时间；提前收市的日子截断到收市时间；非交易日为空"""
+        if self.market not in MARKET_SESSIONS or not self.is_trading_day(day):
+            return []
+        day_date = pd.Timestamp(to_day(day)).date()
+        early = self.early_closes.get(day_date.strftime('%Y-%m-%d'))
+        early_close = dtime.fromisoformat(early) if early else None
+        sessions = []
+        for start, end in MARKET_SESSIONS[self.market].sessions:
+            if early_close is not None:
+                if start >= early_close:
+                    break
+                end = min(end, early_close)
+            sessions.append((datetime.combine(day_date, start, tzinfo=self._zone),
+                             datetime.combine(day_date, end, tzinfo=self._zone)))
+        return sessions
+
+    def open_time(self, day: Any) -> Optional[datetime]:
+        sessions = self.session_times(day)
+        return sessions[0][0] if sessions else None
+
+    def close_time(self, day: Any) -> Optional[datetime]:
+        sessions = self.session_times(day)
+        return sessions[-1][1] if sessions else None
+
+
+# ==================== 加载与刷新 ====================
+
+def _refreshed_dir() -> Path:
+    directory = os.getenv(CALENDAR_DIR_ENV)
+    if directory:
+        return Path(directory)
+    from .cache_manager import get_cache
+    return Path(get_cache().cache_dir) / 'calendars'
+
+
+def _read_table(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ [交易日历] 读取失败 {path}: {e}")
+        return None
+
+
+def load_trading_calendar(market: str) -> TradingCalendar:
+    """加载日历：刷新过的表覆盖范围更新时优先，否则使用内置表"""
+    bundled = _read_table(BUNDLED_DIR / f'{market}.json')
+    try:
+        refreshed = _read_table(_refreshed_dir() / f'{market}.json')
+    except Exception as e:
+        logger.debug(f"🔍 [交易日历] 无法访问刷新目录: {e}")
+        refreshed = None
+    candidates = [table for table in (refreshed, bundled) if table]
+    if not candidates:
+        logger.warning(f"⚠️ [交易日历] {market} 没有节假日表，只排除周末")
+        return TradingCalendar(market=market, source='weekdays')
+    table = max(candidates, key=lambda t: t.get('covered_to') or '')
+    return TradingCalendar.from_dict(table)
+
+
+def _china_trade_dates() -> Iterable[Any]:
+    import akshare as ak
+    return ak.tool_trade_date_hist_sina()['trade_date']
+
+
+def _exchange_trade_dates(exchange: str) -> Callable[[], Iterable[Any]]:
+    def fetch():
+        import pandas_market_calendars as mcal
+        today = pd.Timestamp.today()
+        schedule = mcal.get_calendar(exchange).schedule(
+            start_date=f"{today.year - 3}-01-01", end_date=f"{today.year + 1}-12-31")
+        return schedule.index
+    return fetch
+
+
+# 各市场默认的交易日数据源（返回全部交易日）
+TRADE_DATE_PROVIDERS: Dict[str, Callable[[], Iterable[Any]]] = {
+    'china': _china_trade_dates,
+    'hk': _exchange_trade_dates('XHKG'),
+    'us': _exchange_trade_dates('XNYS'),
+}
+
+
+def refresh_trading_calendar(market: str, trade_dates: Optional[Iterable[Any]] = None,
+                             early_closes: Optional[Dict[str, str]] = None) -> TradingCalendar:
+    """
+    由交易日列表重建节假日表（覆盖范围内不是交易日的工作日即为节假日），写入缓存目录并替换全局日历
+
+    Args:
+        market: 市场（china/hk/us）
+        trade_dates: 全部交易日，None 时从默认数据源获取（A股 akshare，港美股 pandas_market_calendars）
+        early_closes: 提前收市日期 -> HH:MM，None 时沿用当前日历
+    """
+    if trade_dates is None:
+        trade_dates = TRADE_DATE_PROVIDERS[market]()
+    days = np.unique(to_days(trade_dates))
+    if not len(days):
+        raise ValueError(f"{market} 交易日数据为空")
+    weekdays = np.arange(days[0], days[-1] + 1, dtype='datetime64[D]')
+    weekdays = weekdays[np.is_busday(weekdays, weekmask=WEEKMASK)]
+    holidays = np.setdiff1d(weekdays, days)
+
+    current = get_trading_calendar(market)
+    calendar = TradingCalendar(
+        market=market,
+        holidays=tuple(str(day) for day in holidays),
+        early_closes=dict(current.early_closes if early_closes is None else early_closes),
+        covered_from=str(days[0]),
+        covered_to=str(days[-1]),
+        source='refreshed',
+    )
+    path = _refreshed_dir() / f'{market}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(calendar.to_dict(), f, ensure_ascii=False, indent=2)
+    set_trading_calendar(market, calendar)
+    logger.info(f"📅 [交易日历] {market} 已刷新: {calendar.covered_from} ~ {calendar.covered_to}，"
+                f"{len(holidays)} 个节假日")
+    return calendar
+
+
+_calendars: Dict[str, TradingCalendar] = {}
+_calendars_lock = threading.Lock()
+
+
+def get_trading_calendar(market: str) -> TradingCalendar:
+    """获取市场的全局交易日历（china/hk/us）"""
+    with _calendars_lock:
+        if market not in _calendars:
+            _calendars[market] = load_trading_calendar(market)
+        return _calendars[market]
+
+
+def set_trading_calendar(market: str, calendar: Optional[TradingCalendar]) -> Optional[TradingCalendar]:
+    """替换市场的全局日历（测试或刷新），None 表示下次使用时重新加载；返回原来的日历"""
+    with _calendars_lock:
+        previous = _calendars.pop(market, None)
+        if calendar is not None:
+            _calendars[market] = calendar
+        return previous
+
+
+def calendar_for_symbol(symbol: Any, default: str = 'us') -> TradingCalendar:
+    """股票代码所属市场的日历，无法判断市场时使用 default"""
+    return get_trading_calendar(market_of(symbol) or default)
@@ -14,6 +14,8 @@ warnings.filterwarnings('ignore')
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
+from tradingagents.utils.log_categories import get_log_category, trace_symbol, SYMBOL_TRACE
+symbol_trace = get_log_category(SYMBOL_TRACE)
 
 # 导入Tushare工具
 try:
@@ -90,12 +92,10 @@ class TushareDataAdapter:
             logger.debug(f"🔄 获取{symbol}数据 (类型: {data_type})...")
 
             # 添加详细的股票代码追踪日志
-            logger.info(f"🔍 [股票代码追踪] TushareAdapter.get_stock_data 接收到的股票代码: '{symbol}' (类型: {type(symbol)})")
-            logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-            logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
+            trace_symbol(logger, "TushareAdapter.get_stock_data", symbol)
 
             if data_type == "daily":
-                logger.info(f"🔍 [股票代码追踪] 调用 _get_daily_data，传入参数: symbol='{symbol}'")
+                symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 _get_daily_data，传入参数: symbol='{symbol}'")
                 return self._get_daily_data(symbol, start_date, end_date)
             elif data_type == "realtime":
                 return self._get_realtime_data(symbol)
@@ -152,7 +152,7 @@ class TushareDataAdapter:
             logger.info(f"🔍 [TushareAdapter详细日志] 缓存未启用，直接从API获取")
 
         # 2. 从Tushare获取数据
-        logger.info(f"🔍 [股票代码追踪] _get_daily_data 调用 provider.get_stock_daily，传入参数: symbol='{symbol}'")
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] _get_daily_data 调用 provider.get_stock_daily，传入参数: symbol='{symbol}'")
         logger.info(f"🔍 [TushareAdapter详细日志] 开始调用Tushare Provider...")
 
         import time
@@ -161,20 +161,20 @@ class TushareDataAdapter:
         provider_duration = time.time() - provider_start_time
 
         logger.info(f"🔍 [TushareAdapter详细日志] Provider调用完成，耗时: {provider_duration:.3f}秒")
-        logger.info(f"🔍 [股票代码追踪] adapter.get_stock_data 返回数据形状: {data.shape if data is not None and hasattr(data, 'shape') else 'None'}")
+        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] adapter.get_stock_data 返回数据形状: {data.shape if data is not None and hasattr(data, 'shape') else 'None'}")
 
         if data is not None and not data.empty:
             logger.debug(f"✅ 从Tushare获取{symbol}数据成功: {len(data)}条")
-            logger.info(f"🔍 [股票代码追踪] provider.get_stock_daily 返回数据形状: {data.shape}")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] provider.get_stock_daily 返回数据形状: {data.shape}")
             logger.info(f"🔍 [TushareAdapter详细日志] 数据获取成功，开始检查数据内容...")
 
             # 检查数据中的股票代码列
             if 'ts_code' in data.columns:
                 unique_codes = data['ts_code'].unique()
-                logger.info(f"🔍 [股票代码追踪] 返回数据中的股票代码: {unique_codes}")
+                symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 返回数据中的股票代码: {unique_codes}")
             if 'symbol' in data.columns:
                 unique_symbols = data['symbol'].unique()
-                logger.info(f"🔍 [股票代码追踪] 返回数据中的symbol: {unique_symbols}")
+                symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 返回数据中的symbol: {unique_symbols}")
 
             logger.info(f"🔍 [TushareAdapter详细日志] 开始标准化数据...")
             standardized_data = self._standardize_data(data)
@@ -14,7 +14,11 @@ import time
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import replayable
 logger = get_logger('agents')
+from tradingagents.utils.log_categories import get_log_category, trace_symbol, SYMBOL_TRACE, DATA_PREVIEW
+symbol_trace = get_log_category(SYMBOL_TRACE)
+data_preview = get_log_category(DATA_PREVIEW)
 warnings.filterwarnings('ignore')
 
 # 导入统一日志系统
@@ -36,6 +40,12 @@ except ImportError:
     TUSHARE_AVAILABLE = False
     logger.error("❌ Tushare库未安装，请运行: pip install tushare")
 
+# 股票搜索最多返回的条数
+SEARCH_RESULT_LIMIT = 50
+
+# 股票搜索结果的列（与 get_stock_list 的 stock_basic 字段一致）
+SEARCH_RESULT_COLUMNS = ['ts_code', 'symbol', 'name', 'area', 'industry', 'market', 'list_date']
+
 
 class TushareProvider:
     """Tushare数据提供器"""
@@ -83,6 +93,7 @@ class TushareProvider:
         else:
             logger.error("❌ Tushare库不可用")
     
+    @replayable('tushare', method=True)
     def get_stock_list(self) -> pd.DataFrame:
         """
         获取A股股票列表
@@ -119,7 +130,7 @@ class TushareProvider:
             stock_list = self.api.stock_basic(
                 exchange='',
                 list_status='L',  # 上市状态
-                fields='ts_code,symbol,name,area,industry,market,list_date'
+                fields='ts_code,symbol,name,area,industry,market,list_date,cnspell'
             )
             
             if stock_list is not None and not stock_list.empty:
@@ -146,6 +157,7 @@ class TushareProvider:
             logger.error(f"❌ 获取股票列表失败: {e}")
             return pd.DataFrame()
     
+    @replayable('tushare', method=True)
     def get_stock_daily(self, symbol: str, start_date: str = None, end_date: str = None) -> pd.DataFrame:
         """
         获取股票日线数据
@@ -170,9 +182,9 @@ class TushareProvider:
 
         try:
             # 标准化股票代码
-            logger.info(f"🔍 [股票代码追踪] get_stock_daily 调用 _normalize_symbol，传入参数: '{symbol}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] get_stock_daily 调用 _normalize_symbol，传入参数: '{symbol}'")
             ts_code = self._normalize_symbol(symbol)
-            logger.info(f"🔍 [股票代码追踪] _normalize_symbol 返回结果: '{ts_code}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] _normalize_symbol 返回结果: '{ts_code}'")
 
             # 设置默认日期
             original_start = start_date
@@ -193,7 +205,7 @@ class TushareProvider:
                 logger.info(f"🔍 [Tushare详细日志] 开始日期转换: '{original_start}' -> '{start_date}'")
 
             logger.info(f"🔄 从Tushare获取{ts_code}数据 ({start_date} 到 {end_date})...")
-            logger.info(f"🔍 [股票代码追踪] 调用 Tushare API daily，传入参数: ts_code='{ts_code}', start_date='{start_date}', end_date='{end_date}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 Tushare API daily，传入参数: ts_code='{ts_code}', start_date='{start_date}', end_date='{end_date}'")
 
             # 记录API调用前的状态
             api_start_time = time.time()
@@ -217,7 +229,7 @@ class TushareProvider:
                 raise api_error
 
             # 详细记录返回数据的信息
-            logger.info(f"🔍 [股票代码追踪] Tushare API daily 返回数据形状: {data.shape if data is not None and hasattr(data, 'shape') else 'None'}")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] Tushare API daily 返回数据形状: {data.shape if data is not None and hasattr(data, 'shape') else 'None'}")
             logger.info(f"🔍 [Tushare详细日志] 返回数据类型: {type(data)}")
 
             if data is not None:
@@ -227,7 +239,7 @@ class TushareProvider:
                     logger.info(f"🔍 [Tushare详细日志] 数据索引类型: {type(data.index)}")
                     if 'ts_code' in data.columns:
                         unique_codes = data['ts_code'].unique()
-                        logger.info(f"🔍 [股票代码追踪] 返回数据中的ts_code: {unique_codes}")
+                        symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 返回数据中的ts_code: {unique_codes}")
                     if 'trade_date' in data.columns:
                         date_range = f"{data['trade_date'].min()} 到 {data['trade_date'].max()}"
                         logger.info(f"🔍 [Tushare详细日志] 数据日期范围: {date_range}")
@@ -275,6 +287,7 @@ class TushareProvider:
             logger.error(f"❌ [Tushare详细日志] 异常堆栈: {traceback.format_exc()}")
             return pd.DataFrame()
     
+    @replayable('tushare', method=True)
     def get_stock_info(self, symbol: str) -> Dict:
         """
         获取股票基本信息
@@ -289,20 +302,20 @@ class TushareProvider:
             return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'unknown'}
         
         try:
-            logger.info(f"🔍 [股票代码追踪] get_stock_info 调用 _normalize_symbol，传入参数: '{symbol}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] get_stock_info 调用 _normalize_symbol，传入参数: '{symbol}'")
             ts_code = self._normalize_symbol(symbol)
-            logger.info(f"🔍 [股票代码追踪] _normalize_symbol 返回结果: '{ts_code}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] _normalize_symbol 返回结果: '{ts_code}'")
 
             # 获取股票基本信息
-            logger.info(f"🔍 [股票代码追踪] 调用 Tushare API stock_basic，传入参数: ts_code='{ts_code}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 调用 Tushare API stock_basic，传入参数: ts_code='{ts_code}'")
             basic_info = self.api.stock_basic(
                 ts_code=ts_code,
-                fields='ts_code,symbol,name,area,industry,market,list_date'
+                fields='ts_code,symbol,name,area,industry,market,list_date,cnspell'
             )
 
-            logger.info(f"🔍 [股票代码追踪] Tushare API stock_basic 返回数据形状: {basic_info.shape if basic_info is not None and hasattr(basic_info, 'shape') else 'None'}")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] Tushare API stock_basic 返回数据形状: {basic_info.shape if basic_info is not None and hasattr(basic_info, 'shape') else 'None'}")
             if basic_info is not None and not basic_info.empty:
-                logger.info(f"🔍 [股票代码追踪] 返回数据内容: {basic_info.to_dict('records')}")
+                data_preview.info(logger, lambda: f"🔍 [股票代码追踪] 返回数据内容: {basic_info.to_dict('records')}")
             
             if basic_info is not None and not basic_info.empty:
                 info = basic_info.iloc[0]
@@ -323,6 +336,7 @@ class TushareProvider:
             logger.error(f"❌ 获取{symbol}股票信息失败: {e}")
             return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'unknown'}
     
+    @replayable('tushare', method=True)
     def get_financial_data(self, symbol: str, period: str = "20231231") -> Dict:
         """
         获取财务数据
@@ -383,7 +397,67 @@ class TushareProvider:
         except Exception as e:
             logger.error(f"❌ 获取{symbol}财务数据失败: {e}")
             return {}
-    
+
+    @replayable('tushare', method=True)
+    def get_daily_by_trade_date(self, trade_date: str) -> pd.DataFrame:
+        """
+        获取某个交易日全市场的日线数据（截面数据，一次请求）
+
+        Args:
+            trade_date: 交易日（YYYYMMDD 或 YYYY-MM-DD）
+
+        Returns:
+            DataFrame: 全市场日线数据，trade_date 为 YYYYMMDD 字符串；失败或非交易日时为空
+        """
+        if not self.connected:
+            logger.error(f"❌ Tushare未连接")
+            return pd.DataFrame()
+
+        trade_date = trade_date.replace('-', '')
+        try:
+            data = self.api.daily(trade_date=trade_date)
+        except Exception as e:
+            logger.error(f"❌ 获取{trade_date}全市场日线失败: {e}")
+            return pd.DataFrame()
+
+        if data is None or data.empty:
+            logger.warning(f"⚠️ Tushare返回空数据: {trade_date}全市场日线")
+            return pd.DataFrame()
+
+        logger.info(f"✅ 获取{trade_date}全市场日线成功: {len(data)}条")
+        return data
+
+    @replayable('tushare', method=True)
+    def get_trade_dates(self, start_date: str, end_date: str, exchange: str = 'SSE') -> List[str]:
+        """
+        获取区间内的交易日
+
+        Args:
+            start_date: 开始日期（YYYYMMDD 或 YYYY-MM-DD）
+            end_date: 结束日期（YYYYMMDD 或 YYYY-MM-DD）
+            exchange: 交易所
+
+        Returns:
+            List[str]: 升序的交易日（YYYYMMDD）；失败时为空列表
+        """
+        if not self.connected:
+            return []
+
+        try:
+            calendar = self.api.trade_cal(
+                exchange=exchange,
+                start_date=start_date.replace('-', ''),
+                end_date=end_date.replace('-', ''),
+                is_open='1'
+            )
+        except Exception as e:
+            logger.error(f"❌ 获取交易日历失败: {e}")
+            return []
+
+        if calendar is None or calendar.empty:
+            return []
+        return sorted(calendar['cal_date'].astype(str).tolist())
+
     def _normalize_symbol(self, symbol: str) -> str:
         """
         标准化股票代码为Tushare格式
@@ -395,49 +469,48 @@ class TushareProvider:
             str: Tushare格式的股票代码
         """
         # 添加详细的股票代码追踪日志
-        logger.info(f"🔍 [股票代码追踪] _normalize_symbol 接收到的原始股票代码: '{symbol}' (类型: {type(symbol)})")
-        logger.info(f"🔍 [股票代码追踪] 股票代码长度: {len(str(symbol))}")
-        logger.info(f"🔍 [股票代码追踪] 股票代码字符: {list(str(symbol))}")
+        trace_symbol(logger, "_normalize_symbol", symbol)
 
         original_symbol = symbol
 
         # 移除可能的前缀
         symbol = symbol.replace('sh.', '').replace('sz.', '')
         if symbol != original_symbol:
-            logger.info(f"🔍 [股票代码追踪] 移除前缀后: '{original_symbol}' -> '{symbol}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 移除前缀后: '{original_symbol}' -> '{symbol}'")
 
         # 如果已经是Tushare格式，直接返回
         if '.' in symbol:
-            logger.info(f"🔍 [股票代码追踪] 已经是Tushare格式，直接返回: '{symbol}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 已经是Tushare格式，直接返回: '{symbol}'")
             return symbol
 
         # 根据代码判断交易所
         if symbol.startswith('6'):
             result = f"{symbol}.SH"  # 上海证券交易所
-            logger.info(f"🔍 [股票代码追踪] 上海证券交易所: '{symbol}' -> '{result}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 上海证券交易所: '{symbol}' -> '{result}'")
             return result
         elif symbol.startswith(('0', '3')):
             result = f"{symbol}.SZ"  # 深圳证券交易所
-            logger.info(f"🔍 [股票代码追踪] 深圳证券交易所: '{symbol}' -> '{result}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 深圳证券交易所: '{symbol}' -> '{result}'")
             return result
         elif symbol.startswith('8'):
             result = f"{symbol}.BJ"  # 北京证券交易所
-            logger.info(f"🔍 [股票代码追踪] 北京证券交易所: '{symbol}' -> '{result}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 北京证券交易所: '{symbol}' -> '{result}'")
             return result
         elif symbol.startswith('5'):
             result = f"{symbol}.SH"  # 上海证券交易所ETF (5开头)
-            logger.info(f"🔍 [股票代码追踪] 上海证券交易所ETF: '{symbol}' -> '{result}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 上海证券交易所ETF: '{symbol}' -> '{result}'")
             return result
         elif symbol.startswith('1'):
             result = f"{symbol}.SZ"  # 深圳证券交易所ETF (1开头)
-            logger.info(f"🔍 [股票代码追踪] 深圳证券交易所ETF: '{symbol}' -> '{result}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 深圳证券交易所ETF: '{symbol}' -> '{result}'")
             return result
         else:
             # 默认深圳
             result = f"{symbol}.SZ"
-            logger.info(f"🔍 [股票代码追踪] 默认深圳证券交易所: '{symbol}' -> '{result}'")
+            symbol_trace.info(logger, lambda: f"🔍 [股票代码追踪] 默认深圳证券交易所: '{symbol}' -> '{result}'")
             return result
     
+    @replayable('tushare', method=True)
     def search_stocks(self, keyword: str) -> pd.DataFrame:
         """
         搜索股票
@@ -449,12 +522,20 @@ class TushareProvider:
             DataFrame: 搜索结果
         """
         try:
+            # 优先使用常驻内存的股票检索索引
+            from .symbol_index import get_symbol_index
+            matches = get_symbol_index().search(keyword, limit=SEARCH_RESULT_LIMIT, market='china')
+            if matches:
+                results = self._search_results(matches)
+                logger.debug(f"🔍 搜索'{keyword}'找到{len(results)}只股票")
+                return results
+
             stock_list = self.get_stock_list()
             
             if stock_list.empty:
                 return pd.DataFrame()
             
-            # 按名称和代码搜索
+            # 索引未命中时按名称和代码扫描
             mask = (
                 stock_list['name'].str.contains(keyword, na=False) |
                 stock_list['symbol'].str.contains(keyword, na=False) |
@@ -471,6 +552,40 @@ class TushareProvider:
             return pd.DataFrame()
 
 
+    def _search_results(self, matches) -> pd.DataFrame:
+        """
+        把索引命中转换为股票列表的列（SEARCH_RESULT_COLUMNS）
+
+        索引可能由 MongoDB stock_basic_info 文档构建（code/name/sse/category，没有行业、地区、
+        上市日期），缺少的字段用股票列表（24小时缓存）补全
+        """
+        rows = []
+        for entry in matches:
+            record = entry.record
+            sse = record.get('sse')
+            rows.append({
+                'ts_code': entry.ts_code or None,
+                'symbol': entry.code,
+                'name': entry.name,
+                'area': record.get('area'),
+                'industry': record.get('industry'),
+                # MongoDB 文档的 market 是交易所名称，板块在 category 中
+                'market': record.get('category') if sse else record.get('market'),
+                'list_date': record.get('list_date'),
+            })
+        results = pd.DataFrame(rows, columns=SEARCH_RESULT_COLUMNS)
+
+        if results.isna().any().any() and self.connected:
+            stock_list = self.get_stock_list()
+            if isinstance(stock_list, pd.DataFrame) and not stock_list.empty:
+                # 按 ts_code 补全：同一6位代码的指数（如 000001.SH）不会拿到股票的行业、地区
+                lookup = stock_list.drop_duplicates('ts_code').set_index('ts_code')
+                for column in SEARCH_RESULT_COLUMNS:
+                    if column not in ('ts_code', 'symbol') and column in lookup.columns:
+                        results[column] = results[column].fillna(results['ts_code'].map(lookup[column]))
+        return results
+
+
 # 全局提供器实例
 _tushare_provider = None
 
@@ -17,8 +17,28 @@ DEFAULT_CONFIG = {
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # Debate context compaction settings
+    "context_compaction_enabled": True,
+    "context_digest_mode": "extract",  # extract: 规则抽取摘要; llm: 每次运行用LLM摘要一次
+    "report_digest_max_chars": 2000,  # 每份分析师报告摘要的最大字符数
+    "debate_history_max_turns": 4,  # 辩论方可见的最近发言轮数
+    "node_prompt_token_budget": 16000,  # 每个辩论/风险节点提示上下文的token预算
     # Tool settings
     "online_tools": True,
+    # Analysis result cache settings
+    "analysis_cache_enabled": os.getenv("TRADINGAGENTS_ANALYSIS_CACHE", "false").lower() == "true",  # 默认关闭
+    "analysis_cache_dir": os.getenv(
+        "TRADINGAGENTS_ANALYSIS_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), "Documents", "TradingAgents", "data", "analysis_results"),
+    ),
+    "analysis_cache_ttl_hours": 24 * 7,  # 交易日结束后生成的最终结果
+    "analysis_cache_provisional_ttl_hours": 1,  # 交易日当天生成的临时结果
+    "analysis_cache_reuse_reports": False,  # 复用已缓存的分析师报告，直接进入辩论阶段
+    # Tracing settings
+    "trace_summary": True,  # 每次分析结束后输出关键路径耗时摘要
+    # State logging / memory settings
+    "log_states": True,  # 将每次分析的完整状态写入 eval_results/
+    "memory_namespace": None,  # 记忆集合名前缀，用于隔离不同的记忆（如回测）
 
     # Note: Database and cache configuration is now managed by .env file and config.database_manager
     # No database/cache settings in default config to avoid configuration conflicts
@@ -43,11 +43,17 @@ class Propagator:
             "fundamentals_report": "",
             "sentiment_report": "",
             "news_report": "",
+            "report_digests": {},
         }
 
-    def get_graph_args(self) -> Dict[str, Any]:
-        """Get arguments for the graph invocation."""
+    def get_graph_args(self, stream_tokens: bool = False) -> Dict[str, Any]:
+        """Get arguments for the graph invocation.
+
+        Args:
+            stream_tokens: Also stream LLM output chunks ("messages" mode), so
+                nodes' partial content reaches the caller while it is generated.
+        """
         return {
-            "stream_mode": "values",
+            "stream_mode": ["values", "messages"] if stream_tokens else "values",
             "config": {"recursion_limit": self.max_recur_limit},
         }
@@ -4,6 +4,7 @@ from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统
+from tradingagents.llm_adapters.llm_cache import cached_invoke_kwargs
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
 
@@ -71,7 +72,10 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             ),
         ]
 
-        result = self.quick_thinking_llm.invoke(messages).content
+        # 相同报告和收益的反思结果确定，优先读取 LLM 响应缓存
+        result = self.quick_thinking_llm.invoke(
+            messages, **cached_invoke_kwargs(self.quick_thinking_llm)
+        ).content
         return result
 
     def reflect_bull_researcher(self, current_state, returns_losses, bull_memory):
@@ -83,6 +87,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "BULL", bull_debate_history, situation, returns_losses
         )
         bull_memory.add_situations([(situation, result)])
+        return result
 
     def reflect_bear_researcher(self, current_state, returns_losses, bear_memory):
         """Reflect on bear researcher's analysis and update memory."""
@@ -93,6 +98,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "BEAR", bear_debate_history, situation, returns_losses
         )
         bear_memory.add_situations([(situation, result)])
+        return result
 
     def reflect_trader(self, current_state, returns_losses, trader_memory):
         """Reflect on trader's decision and update memory."""
@@ -103,6 +109,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "TRADER", trader_decision, situation, returns_losses
         )
         trader_memory.add_situations([(situation, result)])
+        return result
 
     def reflect_invest_judge(self, current_state, returns_losses, invest_judge_memory):
         """Reflect on investment judge's decision and update memory."""
@@ -113,6 +120,7 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "INVEST JUDGE", judge_decision, situation, returns_losses
         )
         invest_judge_memory.add_situations([(situation, result)])
+        return result
 
     def reflect_risk_manager(self, current_state, returns_losses, risk_manager_memory):
         """Reflect on risk manager's decision and update memory."""
@@ -123,3 +131,4 @@ Adhere strictly to these instructions, and ensure your output is detailed, accur
             "RISK JUDGE", judge_decision, situation, returns_losses
         )
         risk_manager_memory.add_situations([(situation, result)])
+        return result
@@ -0,0 +1,322 @@
+# TradingAgents/graph/result_cache.py
+
+"""
+分析结果缓存
+按 (股票代码, 交易日期, 分析师组合, 模型, 辩论深度) 的确定性配置指纹缓存整次分析的
+最终状态和处理后的交易信号，避免重复执行全部LLM调用和数据获取。
+
+- 完整结果缓存：相同指纹直接返回最终状态和信号
+- 分析师报告缓存：报告只依赖数据和快速模型，可选地复用报告并直接进入辩论阶段
+- 数据新鲜度：交易日当天（或之前）生成的结果视为"临时结果"，使用较短的TTL，
+  交易日结束后的结果视为"最终结果"，使用较长的TTL
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 默认缓存目录（用户数据目录，与 default_config 的 data_dir 一致）
+DEFAULT_CACHE_DIR = Path.home() / "Documents" / "TradingAgents" / "data" / "analysis_results"
+
+# 缓存格式版本，修改状态结构时递增以使旧缓存失效
+CACHE_SCHEMA_VERSION = 1
+
+# 影响最终结果的配置项
+RESULT_CONFIG_KEYS = (
+    "llm_provider",
+    "deep_think_llm",
+    "quick_think_llm",
+    "backend_url",
+    "max_debate_rounds",
+    "max_risk_discuss_rounds",
+    "online_tools",
+    "memory_enabled",
+    "memory_namespace",
+    # 辩论上下文压缩设置改变辩论/风险节点的提示
+    "context_compaction_enabled",
+    "context_digest_mode",
+    "report_digest_max_chars",
+    "debate_history_max_turns",
+    "node_prompt_token_budget",
+)
+
+# 只影响分析师报告的配置项（报告由快速模型和数据工具生成）
+REPORT_CONFIG_KEYS = (
+    "llm_provider",
+    "quick_think_llm",
+    "backend_url",
+    "online_tools",
+)
+
+# 分析师类型与报告字段的对应关系
+ANALYST_REPORT_FIELDS = {
+    "market": "market_report",
+    "social": "sentiment_report",
+    "news": "news_report",
+    "fundamentals": "fundamentals_report",
+}
+
+
+class AnalysisResultCache:
+    """整次分析结果缓存 - 文件存储，支持TTL和数据新鲜度失效"""
+
+    def __init__(self, cache_dir: str = None, ttl_hours: float = 24 * 7,
+                 provisional_ttl_hours: float = 1):
+        """
+        初始化分析结果缓存
+
+        Args:
+            cache_dir: 缓存目录，默认为用户数据目录下的 analysis_results（不写入安装的包目录）
+            ttl_hours: 最终结果（交易日结束后生成）的有效期
+            provisional_ttl_hours: 临时结果（交易日当天或之前生成）的有效期
+        """
+        if cache_dir is None:
+            cache_dir = DEFAULT_CACHE_DIR
+
+        self.cache_dir = Path(cache_dir)
+        self.results_dir = self.cache_dir / "results"
+        self.reports_dir = self.cache_dir / "reports"
+        for dir_path in [self.results_dir, self.reports_dir]:
+            dir_path.mkdir(parents=True, exist_ok=True)
+
+        self.ttl_hours = ttl_hours
+        self.provisional_ttl_hours = provisional_ttl_hours
+
+    # ------------------------------------------------------------------
+    # 指纹
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fingerprint(payload: Dict[str, Any]) -> str:
+        """对参数字典生成确定性的SHA256指纹"""
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def build_fingerprint(cls, ticker: str, trade_date: str,
+                          selected_analysts: List[str], config: Dict[str, Any]) -> str:
+        """生成完整分析结果的配置指纹"""
+        return cls._fingerprint({
+            "schema": CACHE_SCHEMA_VERSION,
+            "kind": "result",
+            "ticker": str(ticker).upper(),
+            "trade_date": str(trade_date),
+            "analysts": sorted(selected_analysts),
+            "config": {key: config.get(key) for key in RESULT_CONFIG_KEYS},
+        })
+
+    @classmethod
+    def build_report_fingerprint(cls, ticker: str, trade_date: str,
+                                 analyst: str, config: Dict[str, Any]) -> str:
+        """生成单个分析师报告的配置指纹"""
+        return cls._fingerprint({
+            "schema": CACHE_SCHEMA_VERSION,
+            "kind": "report",
+            "ticker": str(ticker).upper(),
+            "trade_date": str(trade_date),
+            "analyst": analyst,
+            "config": {key: config.get(key) for key in REPORT_CONFIG_KEYS},
+        })
+
+    # ------------------------------------------------------------------
+    # 新鲜度
+    # ------------------------------------------------------------------
+
+    def _is_provisional(self, trade_date: str, created_at: datetime) -> bool:
+        """交易日结束前生成的结果依赖盘中数据，视为临时结果"""
+        try:
+            trade_day = datetime.strptime(str(trade_date)[:10], "%Y-%m-%d").date()
+        except ValueError:
+            return True
+        return created_at.date() <= trade_day
+
+    def is_entry_valid(self, entry: Dict[str, Any]) -> bool:
+        """检查缓存条目是否仍然有效"""
+        if entry.get("schema") != CACHE_SCHEMA_VERSION:
+            return False
+
+        try:
+            created_at = datetime.fromisoformat(entry["created_at"])
+        except (KeyError, ValueError):
+            return False
+
+        if self._is_provisional(entry.get("trade_date", ""), created_at):
+            ttl_hours = self.provisional_ttl_hours
+        else:
+            ttl_hours = self.ttl_hours
+
+        return datetime.now() - created_at < timedelta(hours=ttl_hours)
+
+    # ------------------------------------------------------------------
+    # 读写
+    # ------------------------------------------------------------------
+
+    def _read_entry(self, path: Path) -> Optional[Dict[str, Any]]:
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ 读取分析结果缓存失败: {path.name} - {e}")
+            return None
+
+        if not self.is_entry_valid(entry):
+            return None
+        return entry
+
+    def _write_entry(self, path: Path, entry: Dict[str, Any]):
+        # 先写临时文件再替换，避免并发读取到半个文件
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2, default=str)
+        tmp_path.replace(path)
+
+    @staticmethod
+    def serialize_state(final_state: Dict[str, Any]) -> Dict[str, Any]:
+        """提取可持久化的状态字段（消息对象不缓存）"""
+        return {
+            key: value for key, value in final_state.items()
+            if key != "messages"
+        }
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        读取完整分析结果
+
+        Returns:
+            包含 final_state 和 decision 的条目，未命中或已过期时返回None
+        """
+        entry = self._read_entry(self.results_dir / f"{fingerprint}.json")
+        if entry:
+            logger.info(f"🎯 分析结果缓存命中: {entry.get('ticker')} {entry.get('trade_date')}")
+            entry["final_state"].setdefault("messages", [])
+        return entry
+
+    def put(self, fingerprint: str, ticker: str, trade_date: str,
+            final_state: Dict[str, Any], decision: Any):
+        """保存完整分析结果"""
+        entry = {
+            "schema": CACHE_SCHEMA_VERSION,
+            "ticker": str(ticker),
+            "trade_date": str(trade_date),
+            "created_at": datetime.now().isoformat(),
+            "final_state": self.serialize_state(final_state),
+            "decision": decision,
+        }
+        try:
+            self._write_entry(self.results_dir / f"{fingerprint}.json", entry)
+            logger.info(f"💾 分析结果已缓存: {ticker} {trade_date} -> {fingerprint[:12]}")
+        except Exception as e:
+            logger.warning(f"⚠️ 保存分析结果缓存失败: {e}")
+
+    def get_reports(self, ticker: str, trade_date: str, selected_analysts: List[str],
+                    config: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """
+        读取分析师报告，只有全部所选分析师的报告都有效时才返回
+
+        Returns:
+            报告字段名到报告内容的字典
+        """
+        reports = {}
+        for analyst in selected_analysts:
+            field = ANALYST_REPORT_FIELDS.get(analyst)
+            if field is None:
+                return None
+            fingerprint = self.build_report_fingerprint(ticker, trade_date, analyst, config)
+            entry = self._read_entry(self.reports_dir / f"{fingerprint}.json")
+            if not entry or not entry.get("report"):
+                return None
+            reports[field] = entry["report"]
+
+        logger.info(f"🎯 分析师报告缓存命中: {ticker} {trade_date} ({', '.join(selected_analysts)})")
+        return reports
+
+    def put_reports(self, ticker: str, trade_date: str, selected_analysts: List[str],
+                    config: Dict[str, Any], final_state: Dict[str, Any]):
+        """保存各分析师报告，供后续不同辩论配置复用"""
+        created_at = datetime.now().isoformat()
+        for analyst in selected_analysts:
+            field = ANALYST_REPORT_FIELDS.get(analyst)
+            report = final_state.get(field) if field else None
+            if not report:
+                continue
+            fingerprint = self.build_report_fingerprint(ticker, trade_date, analyst, config)
+            entry = {
+                "schema": CACHE_SCHEMA_VERSION,
+                "ticker": str(ticker),
+                "trade_date": str(trade_date),
+                "analyst": analyst,
+                "created_at": created_at,
+                "report": report,
+            }
+            try:
+                self._write_entry(self.reports_dir / f"{fingerprint}.json", entry)
+            except Exception as e:
+                logger.warning(f"⚠️ 保存分析师报告缓存失败: {analyst} - {e}")
+
+    def invalidate(self, ticker: str = None, trade_date: str = None) -> int:
+        """
+        使缓存失效
+
+        Args:
+            ticker: 只清理该股票的缓存，None表示全部
+            trade_date: 只清理该交易日的缓存，None表示全部
+
+        Returns:
+            删除的缓存条目数
+        """
+        removed = 0
+        for dir_path in [self.results_dir, self.reports_dir]:
+            for path in dir_path.glob("*.json"):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        entry = json.load(f)
+                except Exception:
+                    entry = {}
+
+                if ticker is not None and str(entry.get("ticker", "")).upper() != str(ticker).upper():
+                    continue
+                if trade_date is not None and str(entry.get("trade_date")) != str(trade_date):
+                    continue
+
+                path.unlink(missing_ok=True)
+                removed += 1
+
+        logger.info(f"🧹 已清理 {removed} 个分析结果缓存")
+        return removed
+
+
+# 全局缓存实例，按 (缓存目录, 有效期) 区分，不同配置的图使用各自的缓存
+_result_cache_instances: Dict[Tuple[str, float, float], AnalysisResultCache] = {}
+_result_cache_lock = threading.Lock()
+
+def get_result_cache(config: Dict[str, Any] = None) -> AnalysisResultCache:
+    """获取配置对应的分析结果缓存实例"""
+    config = config or {}
+    if config.get("analysis_cache_dir"):
+        cache_dir = Path(config["analysis_cache_dir"])
+    elif config.get("data_cache_dir"):
+        cache_dir = Path(config["data_cache_dir"]) / "analysis_results"
+    else:
+        cache_dir = DEFAULT_CACHE_DIR
+    ttl_hours = config.get("analysis_cache_ttl_hours", 24 * 7)
+    provisional_ttl_hours = config.get("analysis_cache_provisional_ttl_hours", 1)
+
+    key = (str(cache_dir.resolve()), float(ttl_hours), float(provisional_ttl_hours))
+    with _result_cache_lock:
+        if key not in _result_cache_instances:
+            _result_cache_instances[key] = AnalysisResultCache(
+                cache_dir=cache_dir,
+                ttl_hours=ttl_hours,
+                provisional_ttl_hours=provisional_ttl_hours,
+            )
+        return _result_cache_instances[key]
@@ -10,6 +10,7 @@ from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
 
 from .conditional_logic import ConditionalLogic
+from tradingagents.utils.tracing import trace_node
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -49,7 +50,8 @@ class GraphSetup:
         self.react_llm = react_llm
 
     def setup_graph(
-        self, selected_analysts=["market", "social", "news", "fundamentals"]
+        self, selected_analysts=["market", "social", "news", "fundamentals"],
+        start_from_debate=False,
     ):
         """Set up and compile the agent workflow graph.
 
@@ -59,8 +61,13 @@ class GraphSetup:
                 - "social": Social media analyst
                 - "news": News analyst
                 - "fundamentals": Fundamentals analyst
+            start_from_debate (bool): Skip the analyst nodes and start at the
+                Bull Researcher. The analyst reports must already be present in
+                the initial state (e.g. restored from the analysis result cache).
         """
-        if len(selected_analysts) == 0:
+        if start_from_debate:
+            selected_analysts = []
+        elif len(selected_analysts) == 0:
             raise ValueError("Trading Agents Graph Setup Error: no analysts selected!")
 
         # Create analyst nodes
@@ -138,49 +145,57 @@ class GraphSetup:
 
         # Create researcher and manager nodes
         bull_researcher_node = create_bull_researcher(
-            self.quick_thinking_llm, self.bull_memory
+            self.quick_thinking_llm, self.bull_memory, self.config
         )
         bear_researcher_node = create_bear_researcher(
-            self.quick_thinking_llm, self.bear_memory
+            self.quick_thinking_llm, self.bear_memory, self.config
         )
         research_manager_node = create_research_manager(
-            self.deep_thinking_llm, self.invest_judge_memory
+            self.deep_thinking_llm, self.invest_judge_memory, self.config
         )
         trader_node = create_trader(self.quick_thinking_llm, self.trader_memory)
 
         # Create risk analysis nodes
-        risky_analyst = create_risky_debator(self.quick_thinking_llm)
-        neutral_analyst = create_neutral_debator(self.quick_thinking_llm)
-        safe_analyst = create_safe_debator(self.quick_thinking_llm)
+        risky_analyst = create_risky_debator(self.quick_thinking_llm, self.config)
+        neutral_analyst = create_neutral_debator(self.quick_thinking_llm, self.config)
+        safe_analyst = create_safe_debator(self.quick_thinking_llm, self.config)
         risk_manager_node = create_risk_manager(
-            self.deep_thinking_llm, self.risk_manager_memory
+            self.deep_thinking_llm, self.risk_manager_memory, self.config
         )
 
         # Create workflow
         workflow = StateGraph(AgentState)
 
+        def add_node(name, node):
+            # 函数节点记录为追踪中的 node span（工具节点的调用由回调记录）
+            workflow.add_node(name, trace_node(name, node))
+
         # Add analyst nodes to the graph
         for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
-            workflow.add_node(
+            add_node(f"{analyst_type.capitalize()} Analyst", node)
+            add_node(
                 f"Msg Clear {analyst_type.capitalize()}", delete_nodes[analyst_type]
             )
             workflow.add_node(f"tools_{analyst_type}", tool_nodes[analyst_type])
 
         # Add other nodes
-        workflow.add_node("Bull Researcher", bull_researcher_node)
-        workflow.add_node("Bear Researcher", bear_researcher_node)
-        workflow.add_node("Research Manager", research_manager_node)
-        workflow.add_node("Trader", trader_node)
-        workflow.add_node("Risky Analyst", risky_analyst)
-        workflow.add_node("Neutral Analyst", neutral_analyst)
-        workflow.add_node("Safe Analyst", safe_analyst)
-        workflow.add_node("Risk Judge", risk_manager_node)
+        add_node("Bull Researcher", bull_researcher_node)
+        add_node("Bear Researcher", bear_researcher_node)
+        add_node("Research Manager", research_manager_node)
+        add_node("Trader", trader_node)
+        add_node("Risky Analyst", risky_analyst)
+        add_node("Neutral Analyst", neutral_analyst)
+        add_node("Safe Analyst", safe_analyst)
+        add_node("Risk Judge", risk_manager_node)
 
         # Define edges
-        # Start with the first analyst
-        first_analyst = selected_analysts[0]
-        workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
+        if start_from_debate:
+            # 分析师报告已就绪，直接进入辩论
+            workflow.add_edge(START, "Bull Researcher")
+        else:
+            # Start with the first analyst
+            first_analyst = selected_analysts[0]
+            workflow.add_edge(START, f"{first_analyst.capitalize()} Analyst")
 
         # Connect analysts in sequence
         for i, analyst_type in enumerate(selected_analysts):
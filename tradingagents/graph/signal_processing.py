@@ -3,6 +3,7 @@
 from langchain_openai import ChatOpenAI
 
 # 导入统一日志系统和图处理模块日志装饰器
+from tradingagents.llm_adapters.llm_cache import cached_invoke_kwargs
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_graph_module
 logger = get_logger("graph.signal_processing")
@@ -72,7 +73,10 @@ class SignalProcessor:
         ]
 
         try:
-            response = self.quick_thinking_llm.invoke(messages).content
+            # 相同报告的信号提取结果确定，优先读取 LLM 响应缓存
+            response = self.quick_thinking_llm.invoke(
+                messages, **cached_invoke_kwargs(self.quick_thinking_llm)
+            ).content
             logger.debug(f"🔍 [SignalProcessor] LLM响应: {response[:200]}...")
 
             # 尝试解析JSON响应
@@ -0,0 +1,103 @@
+# TradingAgents/graph/streaming.py
+
+"""
+图执行的流式输出
+以 LangGraph 的 ["values", "messages"] 双模式执行图：状态快照照常产出，
+节点内LLM生成的分块通过回调实时交给CLI/Web界面显示
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from langchain_core.messages import AIMessageChunk
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+
+# 回调签名：on_token(节点名称, 新增文本)
+TokenCallback = Callable[[str, str], None]
+
+
+def chunk_text(content: Any) -> str:
+    """提取消息分块中的文本（兼容多模态内容列表）"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            item.get("text", "") if isinstance(item, dict) else str(item)
+            for item in content
+        )
+    return str(content or "")
+
+
+def stream_graph(graph, state: Dict[str, Any], args: Dict[str, Any],
+                 on_token: Optional[TokenCallback] = None) -> Iterator[Dict[str, Any]]:
+    """
+    执行图并逐个产出状态快照
+
+    Args:
+        graph: 编译后的 LangGraph 图
+        state: 初始状态
+        args: 图调用参数（stream_mode 为 ["values", "messages"] 时才会有分块回调）
+        on_token: LLM流式分块回调
+
+    Yields:
+        每一步之后的完整状态
+    """
+    stream_mode = args.get("stream_mode", "values")
+    multi_mode = isinstance(stream_mode, (list, tuple))
+
+    for item in graph.stream(state, **args):
+        if not multi_mode:
+            yield item
+            continue
+
+        mode, data = item
+        if mode == "messages":
+            message, metadata = data
+            # 只转发模型生成的分块，节点返回的完整消息会在状态快照中出现
+            if on_token is not None and isinstance(message, AIMessageChunk):
+                text = chunk_text(message.content)
+                if text:
+                    try:
+                        on_token(metadata.get("langgraph_node", ""), text)
+                    except Exception as e:
+                        logger.debug(f"⚠️ [流式输出] 回调失败: {e}")
+        elif mode == "values":
+            yield data
+
+
+class NodeOutputBuffer:
+    """
+    按节点累积正在生成的内容，供界面显示
+
+    切换到新节点时自动清空；只保留末尾 max_chars 个字符；
+    ready() 用于限制界面刷新频率。
+    """
+
+    def __init__(self, max_chars: int = 4000, min_interval: float = 0.2):
+        self.max_chars = max_chars
+        self.min_interval = min_interval
+        self.node = None
+        self.text = ""
+        self._last_flush = 0.0
+
+    def append(self, node: str, text: str):
+        if node != self.node:
+            self.node = node
+            self.text = ""
+        self.text = (self.text + text)[-self.max_chars:]
+
+    def clear(self):
+        self.node = None
+        self.text = ""
+
+    def ready(self) -> bool:
+        """距离上次刷新超过 min_interval 时返回 True 并记录本次刷新"""
+        now = time.time()
+        if now - self._last_flush < self.min_interval:
+            return False
+        self._last_flush = now
+        return True
@@ -35,6 +35,9 @@ from .setup import GraphSetup
 from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
+from .result_cache import get_result_cache
+from .streaming import stream_graph
+from tradingagents.utils.tracing import KIND_GRAPH, LANGCHAIN_AVAILABLE, TracingCallbackHandler, get_tracer
 
 
 class TradingAgentsGraph:
@@ -45,6 +48,8 @@ class TradingAgentsGraph:
         selected_analysts=["market", "social", "news", "fundamentals"],
         debug=False,
         config: Dict[str, Any] = None,
+        quick_thinking_llm=None,
+        deep_thinking_llm=None,
     ):
         """Initialize the trading agents graph and components.
 
@@ -52,6 +57,9 @@ class TradingAgentsGraph:
             selected_analysts: List of analyst types to include
             debug: Whether to run in debug mode
             config: Configuration dictionary. If None, uses default config
+            quick_thinking_llm: Optional pre-built chat model; when both models
+                are given, ``llm_provider`` is ignored (benchmarks, replay)
+            deep_thinking_llm: Optional pre-built chat model for deep thinking
         """
         self.debug = debug
         self.config = config or DEFAULT_CONFIG
@@ -66,7 +74,10 @@ class TradingAgentsGraph:
         )
 
         # Initialize LLMs
-        if self.config["llm_provider"].lower() == "openai" or self.config["llm_provider"] == "ollama" or self.config["llm_provider"] == "openrouter":
+        if quick_thinking_llm is not None and deep_thinking_llm is not None:
+            self.deep_thinking_llm = deep_thinking_llm
+            self.quick_thinking_llm = quick_thinking_llm
+        elif self.config["llm_provider"].lower() == "openai" or self.config["llm_provider"] == "ollama" or self.config["llm_provider"] == "openrouter":
             self.deep_thinking_llm = ChatOpenAI(model=self.config["deep_think_llm"], base_url=self.config["backend_url"])
             self.quick_thinking_llm = ChatOpenAI(model=self.config["quick_think_llm"], base_url=self.config["backend_url"])
         elif self.config["llm_provider"].lower() == "anthropic":
@@ -139,12 +150,15 @@ class TradingAgentsGraph:
         # Initialize memories (如果启用)
         memory_enabled = self.config.get("memory_enabled", True)
         if memory_enabled:
-            # 使用单例ChromaDB管理器，避免并发创建冲突
-            self.bull_memory = FinancialSituationMemory("bull_memory", self.config)
-            self.bear_memory = FinancialSituationMemory("bear_memory", self.config)
-            self.trader_memory = FinancialSituationMemory("trader_memory", self.config)
-            self.invest_judge_memory = FinancialSituationMemory("invest_judge_memory", self.config)
-            self.risk_manager_memory = FinancialSituationMemory("risk_manager_memory", self.config)
+            # 使用单例ChromaDB管理器，避免并发创建冲突；同名集合在各实例间共享，
+            # memory_namespace 用于隔离（如回测中每只股票一套记忆）
+            namespace = self.config.get("memory_namespace")
+            prefix = f"{namespace}_" if namespace else ""
+            self.bull_memory = FinancialSituationMemory(f"{prefix}bull_memory", self.config)
+            self.bear_memory = FinancialSituationMemory(f"{prefix}bear_memory", self.config)
+            self.trader_memory = FinancialSituationMemory(f"{prefix}trader_memory", self.config)
+            self.invest_judge_memory = FinancialSituationMemory(f"{prefix}invest_judge_memory", self.config)
+            self.risk_manager_memory = FinancialSituationMemory(f"{prefix}risk_manager_memory", self.config)
         else:
             # 创建空的内存对象
             self.bull_memory = None
@@ -157,7 +171,10 @@ class TradingAgentsGraph:
         self.tool_nodes = self._create_tool_nodes()
 
         # Initialize components
-        self.conditional_logic = ConditionalLogic()
+        self.conditional_logic = ConditionalLogic(
+            max_debate_rounds=self.config.get("max_debate_rounds", 1),
+            max_risk_discuss_rounds=self.config.get("max_risk_discuss_rounds", 1),
+        )
         self.graph_setup = GraphSetup(
             self.quick_thinking_llm,
             self.deep_thinking_llm,
@@ -183,7 +200,18 @@ class TradingAgentsGraph:
         self.log_states_dict = {}  # date to full state dict
 
         # Set up the graph
+        self.selected_analysts = list(selected_analysts)
         self.graph = self.graph_setup.setup_graph(selected_analysts)
+        self._debate_graph = None  # 复用分析师报告时按需构建
+
+        # 分析结果缓存
+        self.result_cache = (
+            get_result_cache(self.config)
+            if self.config.get("analysis_cache_enabled", False) else None
+        )
+
+        # 最近一次 propagate 的追踪（关键路径摘要见 last_trace.summary()）
+        self.last_trace = None
 
     def _create_tool_nodes(self) -> Dict[str, ToolNode]:
         """Create tool nodes for different data sources."""
@@ -232,8 +260,29 @@ class TradingAgentsGraph:
             ),
         }
 
-    def propagate(self, company_name, trade_date):
-        """Run the trading agents graph for a company on a specific date."""
+    def propagate(self, company_name, trade_date, use_cache=True, on_token=None):
+        """Run the trading agents graph for a company on a specific date.
+
+        Args:
+            company_name: Ticker to analyse
+            trade_date: Trade date of the analysis
+            use_cache: Whether to consult the analysis result cache. Pass False
+                to force a fresh run (the new result still refreshes the cache).
+            on_token: Optional callback ``on_token(node_name, text)`` receiving
+                LLM output chunks as each node generates them.
+        """
+        # 整次分析记录为一个追踪：节点 -> LLM/工具 -> 数据源 -> 缓存
+        tracer = get_tracer()
+        with tracer.trace("propagate", KIND_GRAPH, symbol=company_name, trade_date=str(trade_date)) as root:
+            result = self._propagate(company_name, trade_date, use_cache, on_token, root)
+
+        self.last_trace = tracer.collector.get(root.trace_id)
+        if self.last_trace is not None and self.config.get("trace_summary", True):
+            logger.info(self.last_trace.summary())
+        return result
+
+    def _propagate(self, company_name, trade_date, use_cache, on_token, root_span):
+        """propagate 的实际执行过程（在追踪的根 span 内运行）"""
 
         # 添加详细的接收日志
         logger.debug(f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 =====")
@@ -245,27 +294,62 @@ class TradingAgentsGraph:
 
         # Initialize state
         logger.debug(f"🔍 [GRAPH DEBUG] 创建初始状态，传递参数: company_name='{company_name}', trade_date='{trade_date}'")
+        # 检查分析结果缓存
+        fingerprint = None
+        if self.result_cache is not None:
+            fingerprint = self.result_cache.build_fingerprint(
+                company_name, trade_date, self.selected_analysts, self.config
+            )
+            cached = self.result_cache.get(fingerprint) if use_cache else None
+            if cached:
+                root_span.set_attribute("cache_hit", True)
+                final_state = cached["final_state"]
+                self.curr_state = final_state
+                self._log_state(trade_date, final_state)
+                return final_state, cached["decision"]
+
         init_agent_state = self.propagator.create_initial_state(
             company_name, trade_date
         )
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的company_of_interest: '{init_agent_state.get('company_of_interest', 'NOT_FOUND')}'")
         logger.debug(f"🔍 [GRAPH DEBUG] 初始状态中的trade_date: '{init_agent_state.get('trade_date', 'NOT_FOUND')}'")
-        args = self.propagator.get_graph_args()
-
-        if self.debug:
-            # Debug mode with tracing
+        args = self.propagator.get_graph_args(stream_tokens=on_token is not None)
+        if LANGCHAIN_AVAILABLE:
+            args["config"]["callbacks"] = [TracingCallbackHandler(get_tracer())]
+
+        # 可选：复用已缓存的分析师报告，直接进入辩论阶段
+        graph = self.graph
+        if (
+            self.result_cache is not None
+            and use_cache
+            and self.config.get("analysis_cache_reuse_reports", False)
+        ):
+            cached_reports = self.result_cache.get_reports(
+                company_name, trade_date, self.selected_analysts, self.config
+            )
+            if cached_reports:
+                init_agent_state.update(cached_reports)
+                if self._debate_graph is None:
+                    self._debate_graph = self.graph_setup.setup_graph(
+                        self.selected_analysts, start_from_debate=True
+                    )
+                graph = self._debate_graph
+
+        if self.debug or on_token is not None:
+            # Debug mode with tracing / streaming LLM output to the caller
             trace = []
-            for chunk in self.graph.stream(init_agent_state, **args):
+            for chunk in stream_graph(graph, init_agent_state, args, on_token):
                 if len(chunk["messages"]) == 0:
                     pass
                 else:
-                    chunk["messages"][-1].pretty_print()
+                    if self.debug:
+                        chunk["messages"][-1].pretty_print()
                     trace.append(chunk)
 
             final_state = trace[-1]
         else:
             # Standard mode without tracing
-            final_state = self.graph.invoke(init_agent_state, **args)
+            final_state = graph.invoke(init_agent_state, **args)
 
         # Store current state for reflection
         self.curr_state = final_state
@@ -274,7 +358,17 @@ class TradingAgentsGraph:
         self._log_state(trade_date, final_state)
 
         # Return decision and processed signal
-        return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
+        decision = self.process_signal(final_state["final_trade_decision"], company_name)
+
+        if self.result_cache is not None:
+            self.result_cache.put(fingerprint, company_name, trade_date, final_state, decision)
+            if graph is self.graph:
+                # 复用的报告不重新写入，避免延长其有效期
+                self.result_cache.put_reports(
+                    company_name, trade_date, self.selected_analysts, self.config, final_state
+                )
+
+        return final_state, decision
 
     def _log_state(self, trade_date, final_state):
         """Log the final state to a JSON file."""
@@ -308,6 +402,9 @@ class TradingAgentsGraph:
             "final_trade_decision": final_state["final_trade_decision"],
         }
 
+        if not self.config.get("log_states", True):
+            return
+
         # Save to file
         directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
         directory.mkdir(parents=True, exist_ok=True)
@@ -318,23 +415,44 @@ class TradingAgentsGraph:
         ) as f:
             json.dump(self.log_states_dict, f, indent=4)
 
-    def reflect_and_remember(self, returns_losses):
-        """Reflect on decisions and update memory based on returns."""
-        self.reflector.reflect_bull_researcher(
-            self.curr_state, returns_losses, self.bull_memory
-        )
-        self.reflector.reflect_bear_researcher(
-            self.curr_state, returns_losses, self.bear_memory
-        )
-        self.reflector.reflect_trader(
-            self.curr_state, returns_losses, self.trader_memory
-        )
-        self.reflector.reflect_invest_judge(
-            self.curr_state, returns_losses, self.invest_judge_memory
-        )
-        self.reflector.reflect_risk_manager(
-            self.curr_state, returns_losses, self.risk_manager_memory
-        )
+    def reflect_and_remember(self, returns_losses, state=None):
+        """Reflect on decisions and update memory based on returns.
+
+        Args:
+            returns_losses: Realized position returns of the decision
+            state: Final state to reflect on; defaults to the state of the most
+                recent ``propagate`` (backtests reflect on earlier dates once
+                their outcome is known)
+
+        Returns:
+            Dict mapping memory name to the lesson added to it
+        """
+        state = state if state is not None else self.curr_state
+        return {
+            "bull_memory": self.reflector.reflect_bull_researcher(
+                state, returns_losses, self.bull_memory
+            ),
+            "bear_memory": self.reflector.reflect_bear_researcher(
+                state, returns_losses, self.bear_memory
+            ),
+            "trader_memory": self.reflector.reflect_trader(
+                state, returns_losses, self.trader_memory
+            ),
+            "invest_judge_memory": self.reflector.reflect_invest_judge(
+                state, returns_losses, self.invest_judge_memory
+            ),
+            "risk_manager_memory": self.reflector.reflect_risk_manager(
+                state, returns_losses, self.risk_manager_memory
+            ),
+        }
+
+    def restore_memories(self, state, lessons):
+        """Re-add lessons returned by ``reflect_and_remember`` without calling the LLM."""
+        situation = self.reflector._extract_current_situation(state)
+        for name, lesson in lessons.items():
+            memory = getattr(self, name, None)
+            if memory is not None and lesson:
+                memory.add_situations([(situation, lesson)])
 
     def process_signal(self, full_signal, stock_symbol=None):
         """Process a signal to extract the core decision."""
@@ -0,0 +1,56 @@
+"""
+技术指标计算库
+
+所有行情数据源共用的 NumPy 指标实现：
+- kernels: 向量化计算（1-D 单只股票，2-D 多只股票批量）
+- streaming: 增量计算，追加一根K线 O(1)
+- frame: DataFrame 层入口（stockstats 指标名、格式化输出指标表、批量计算）
+"""
+
+from . import kernels
+from .frame import (
+    STANDARD_MIN_BARS,
+    batch_apply,
+    compute_indicator,
+    standard_indicator_frame,
+    supports,
+)
+from .streaming import (
+    ATR,
+    EMA,
+    INCREMENTAL_INDICATORS,
+    STANDARD_SPEC,
+    MACD,
+    MFI,
+    RSI,
+    SMA,
+    VWMA,
+    Bollinger,
+    IncrementalIndicator,
+    IndicatorSpec,
+    StandardIndicators,
+    parse_indicator,
+)
+
+__all__ = [
+    'kernels',
+    'batch_apply',
+    'compute_indicator',
+    'standard_indicator_frame',
+    'supports',
+    'STANDARD_MIN_BARS',
+    'IncrementalIndicator',
+    'INCREMENTAL_INDICATORS',
+    'IndicatorSpec',
+    'STANDARD_SPEC',
+    'StandardIndicators',
+    'parse_indicator',
+    'SMA',
+    'EMA',
+    'RSI',
+    'MACD',
+    'Bollinger',
+    'ATR',
+    'VWMA',
+    'MFI',
+]
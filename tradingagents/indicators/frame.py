@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+DataFrame 层的指标计算入口
+
+- compute_indicator: 按 stockstats 指标名（close_50_sma、macd、boll_ub、rsi、atr、mfi 等）计算，
+  数值与 stockstats 一致，供 get_stockstats_indicator 等接口使用
+- standard_indicator_frame: 各行情格式化输出共用的 MA/RSI/MACD/布林带 指标表
+- batch_apply: 多只股票按长度分组堆叠为二维数组，一次调用完成批量计算
+"""
+
+import re
+from typing import Callable, Dict, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import kernels
+
+
+# stockstats 各指标的默认周期
+DEFAULT_WINDOWS = {
+    'rsi': 14,
+    'boll': 20,
+    'atr': 14,
+    'vwma': 14,
+    'mfi': 14,
+}
+
+# 格式化输出指标表中各指标需要的最少K线数量，不足时视为无数据
+STANDARD_MIN_BARS = {
+    'MA5': 5, 'MA10': 10, 'MA20': 20, 'RSI': 14,
+    'MACD': 26, 'MACD_Signal': 26, 'MACD_Histogram': 26,
+    'BB_Upper': 20, 'BB_Middle': 20, 'BB_Lower': 20,
+}
+
+_MOVING_AVERAGE = re.compile(r'^(?P<column>[a-z]+)_(?P<window>\d+)_(?P<kind>sma|ema|smma)$')
+_WINDOWED = re.compile(r'^(?P<name>rsi|atr|vwma|mfi)(?:_(?P<window>\d+))?$')
+
+
+def _column(df: pd.DataFrame, name: str) -> Optional[np.ndarray]:
+    """按不区分大小写的列名取出浮点数组"""
+    for column in df.columns:
+        if str(column).lower() == name:
+            return df[column].to_numpy(dtype=np.float64)
+    return None
+
+
+def _require(df: pd.DataFrame, name: str) -> np.ndarray:
+    values = _column(df, name)
+    if values is None:
+        raise KeyError(f"计算指标缺少列: {name}")
+    return values
+
+
+def _typical_price(df: pd.DataFrame) -> np.ndarray:
+    amount = _column(df, 'amount')
+    volume = _column(df, 'volume')
+    if amount is not None and volume is not None:
+        return kernels.typical_price(None, None, None, amount=amount, volume=volume)
+    return kernels.typical_price(_require(df, 'high'), _require(df, 'low'), _require(df, 'close'))
+
+
+def supports(indicator: str) -> bool:
+    """是否可以由本模块计算该 stockstats 指标名"""
+    name = indicator.lower()
+    return (
+        name in ('macd', 'macds', 'macdh', 'boll', 'boll_ub', 'boll_lb')
+        or bool(_MOVING_AVERAGE.match(name))
+        or bool(_WINDOWED.match(name))
+    )
+
+
+def compute_indicator(df: pd.DataFrame, indicator: str) -> np.ndarray:
+    """
+    按 stockstats 指标名计算整列指标
+
+    Args:
+        df: 按时间升序的K线数据（列名不区分大小写）
+        indicator: 指标名，如 close_50_sma、close_10_ema、macd、macds、macdh、rsi、
+                   boll、boll_ub、boll_lb、atr、vwma、mfi
+
+    Returns:
+        与 df 等长的指标数组
+
+    Raises:
+        KeyError: 不支持的指标名或缺少所需的列
+    """
+    name = indicator.lower()
+
+    match = _MOVING_AVERAGE.match(name)
+    if match:
+        values = _require(df, match.group('column'))
+        window = int(match.group('window'))
+        if match.group('kind') == 'sma':
+            return kernels.sma(values, window)
+        if match.group('kind') == 'ema':
+            return kernels.ema(values, span=window)
+        return kernels.smma(values, window)
+
+    if name in ('macd', 'macds', 'macdh'):
+        line, signal, histogram = kernels.macd(_require(df, 'close'))
+        return {'macd': line, 'macds': signal, 'macdh': histogram}[name]
+
+    if name in ('boll', 'boll_ub', 'boll_lb'):
+        middle, upper, lower = kernels.bollinger(_require(df, 'close'), DEFAULT_WINDOWS['boll'])
+        return {'boll': middle, 'boll_ub': upper, 'boll_lb': lower}[name]
+
+    match = _WINDOWED.match(name)
+    if match:
+        kind = match.group('name')
+        window = int(match.group('window') or DEFAULT_WINDOWS[kind])
+        if kind == 'rsi':
+            return kernels.rsi(_require(df, 'close'), window)
+        if kind == 'atr':
+            return kernels.atr(_require(df, 'high'), _require(df, 'low'), _require(df, 'close'), window)
+        if kind == 'vwma':
+            return kernels.vwma(_typical_price(df), _require(df, 'volume'), window)
+        return kernels.mfi(_typical_price(df), _require(df, 'volume'), window)
+
+    raise KeyError(f"不支持的指标: {indicator}")
+
+
+def standard_indicator_frame(close) -> pd.DataFrame:
+    """
+    行情格式化输出共用的指标表（与 pandas rolling 的写法一致，不足窗口时为 NaN）
+
+    Args:
+        close: 收盘价 Series（结果沿用其索引）或数组
+
+    Returns:
+        MA5/MA10/MA20、RSI(14, 简单平均)、MACD/MACD_Signal/MACD_Histogram、BB_Upper/BB_Middle/BB_Lower
+    """
+    index = close.index if isinstance(close, pd.Series) else None
+    values = np.asarray(close, dtype=np.float64)
+
+    columns = {f'MA{window}': kernels.sma(values, window, min_periods=window) for window in (5, 10, 20)}
+    columns['RSI'] = kernels.rsi(values, 14, smoothing='sma')
+    columns['MACD'], columns['MACD_Signal'], columns['MACD_Histogram'] = kernels.macd(values)
+    middle, upper, lower = kernels.bollinger(values, 20, min_periods=20)
+    columns['BB_Upper'], columns['BB_Middle'], columns['BB_Lower'] = upper, middle, lower
+    return pd.DataFrame(columns, index=index)
+
+
+def batch_apply(series: Mapping[str, np.ndarray],
+                func: Callable[..., np.ndarray], **kwargs) -> Dict[str, np.ndarray]:
+    """
+    对多只股票批量计算同一个核心函数
+
+    长度相同的序列堆叠为 (股票数, K线数) 的二维数组后只调用一次 func，
+    结果与逐只计算完全一致。
+
+    Args:
+        series: {股票代码: 一维数组}
+        func: kernels 中的函数，如 kernels.sma
+        **kwargs: 传给 func 的参数
+
+    Returns:
+        {股票代码: 结果数组}；func 返回元组时每只股票得到对应的元组
+    """
+    groups: Dict[int, list] = {}
+    for symbol, values in series.items():
+        groups.setdefault(len(values), []).append(symbol)
+
+    results = {}
+    for symbols in groups.values():
+        matrix = np.vstack([np.asarray(series[symbol], dtype=np.float64) for symbol in symbols])
+        output = func(matrix, **kwargs)
+        for row, symbol in enumerate(symbols):
+            if isinstance(output, tuple):
+                results[symbol] = tuple(part[row] for part in output)
+            else:
+                results[symbol] = output[row]
+    return results
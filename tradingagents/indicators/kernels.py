@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+技术指标向量化计算核心（NumPy）
+
+所有函数都沿最后一个轴计算：
+- 1-D 数组：单只股票的时间序列
+- 2-D 数组 (股票数, K线数)：多只股票对齐后堆叠，一次调用完成批量计算
+
+默认语义与 stockstats 保持一致（前段不足窗口时按已有数据计算、EMA 使用 adjust=True 权重），
+需要与 pandas rolling 一致（不足窗口为 NaN）时传入 min_periods=window。
+输入应为不含 NaN 的浮点序列。
+"""
+
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+
+# 分块递推时 b^-k 允许的最大量级，保证数值不溢出且精度足够
+_MAX_SCALE_LOG = math.log(1e100)
+
+
+def _as_float(x) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def linear_recurrence(x, decay: float, init=0.0) -> np.ndarray:
+    """
+    计算 y[t] = x[t] + decay * y[t-1]（y[-1] = init），沿最后一个轴
+
+    EMA/SMMA 的核心递推。按块展开为 b^t * cumsum(x / b^t)，
+    每块只有一次向量化 cumsum，块间传递末值，避免逐根K线的 Python 循环。
+    """
+    x = _as_float(x)
+    n = x.shape[-1]
+    out = np.empty_like(x)
+    if n == 0:
+        return out
+    if decay == 0:
+        out[...] = x
+        return out
+
+    block = n if decay >= 1 else max(1, min(n, int(_MAX_SCALE_LOG / -math.log(decay))))
+    carry = np.broadcast_to(_as_float(init), x.shape[:-1]).astype(np.float64)
+    for start in range(0, n, block):
+        seg = x[..., start:start + block]
+        powers = decay ** np.arange(seg.shape[-1], dtype=np.float64)
+        out[..., start:start + block] = powers * (
+            decay * carry[..., None] + np.cumsum(seg / powers, axis=-1)
+        )
+        carry = out[..., start + seg.shape[-1] - 1]
+    return out
+
+
+def _mask_min_periods(values: np.ndarray, min_periods: int) -> np.ndarray:
+    if min_periods > 1:
+        values[..., :min_periods - 1] = np.nan
+    return values
+
+
+def rolling_sum(x, window: int, min_periods: int = 1) -> np.ndarray:
+    """滑动窗口求和（前段不足窗口时按已有数据求和）"""
+    x = _as_float(x)
+    csum = np.cumsum(x, axis=-1)
+    out = csum.copy()
+    out[..., window:] = csum[..., window:] - csum[..., :-window]
+    return _mask_min_periods(out, min_periods)
+
+
+def _window_counts(n: int, window: int) -> np.ndarray:
+    return np.minimum(np.arange(1, n + 1, dtype=np.float64), window)
+
+
+def sma(x, window: int, min_periods: int = 1) -> np.ndarray:
+    """简单移动平均"""
+    x = _as_float(x)
+    # 减去首值再累加，降低长序列 cumsum 的精度损失
+    base = x[..., :1] if x.shape[-1] else 0.0
+    out = rolling_sum(x - base, window) / _window_counts(x.shape[-1], window) + base
+    return _mask_min_periods(out, min_periods)
+
+
+def rolling_std(x, window: int, min_periods: int = 1, ddof: int = 1) -> np.ndarray:
+    """滑动窗口标准差（默认样本标准差，与 pandas/stockstats 一致）"""
+    x = _as_float(x)
+    n = x.shape[-1]
+    centered = x - (x[..., :1] if n else 0.0)
+    counts = _window_counts(n, window)
+    mean = rolling_sum(centered, window) / counts
+    mean_sq = rolling_sum(centered * centered, window) / counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = np.maximum(mean_sq - mean * mean, 0.0) * counts / (counts - ddof)
+    out = np.sqrt(var)
+    out[..., counts <= ddof] = np.nan
+    return _mask_min_periods(out, min_periods)
+
+
+def ema(x, span: Optional[float] = None, alpha: Optional[float] = None,
+        adjust: bool = True, min_periods: int = 1) -> np.ndarray:
+    """
+    指数移动平均
+
+    Args:
+        span: 周期，alpha = 2 / (span + 1)
+        alpha: 平滑系数，与 span 二选一
+        adjust: True 时与 pandas ewm(adjust=True) 相同（前段按权重和归一化）
+    """
+    if alpha is None:
+        alpha = 2.0 / (span + 1.0)
+    x = _as_float(x)
+    decay = 1.0 - alpha
+    if adjust:
+        num = linear_recurrence(x, decay)
+        den = linear_recurrence(np.ones(x.shape[-1]), decay)
+        out = num / den
+    else:
+        first = x[..., 0] if x.shape[-1] else 0.0
+        out = linear_recurrence(alpha * x, decay, init=first)
+    return _mask_min_periods(out, min_periods)
+
+
+def smma(x, window: int, adjust: bool = True, min_periods: int = 1) -> np.ndarray:
+    """Wilder 平滑移动平均（alpha = 1 / window）"""
+    return ema(x, alpha=1.0 / window, adjust=adjust, min_periods=min_periods)
+
+
+def diff(x) -> np.ndarray:
+    """一阶差分，首位为 0（与 stockstats 一致）"""
+    x = _as_float(x)
+    out = np.zeros_like(x)
+    out[..., 1:] = np.diff(x, axis=-1)
+    return out
+
+
+def rsi(close, window: int = 14, smoothing: str = 'wilder') -> np.ndarray:
+    """
+    相对强弱指数 RSI
+
+    Args:
+        smoothing: 'wilder' 使用 SMMA 平滑涨跌幅（与 stockstats 一致，首根为50）；
+                   'sma' 使用简单移动平均（pandas rolling(window).mean() 的写法，前 window 根为 NaN）
+    """
+    delta = diff(close)
+    gain = np.clip(delta, 0, None)
+    loss = np.clip(-delta, 0, None)
+
+    if smoothing == 'sma':
+        gain, loss = gain[..., 1:], loss[..., 1:]
+        avg_gain = sma(gain, window, min_periods=window)
+        avg_loss = sma(loss, window, min_periods=window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = 100 - 100 / (1 + avg_gain / avg_loss)
+        out = np.full(delta.shape, np.nan)
+        out[..., 1:] = values
+        return out
+
+    avg_gain = smma(gain, window)
+    avg_loss = smma(loss, window)
+    total = avg_gain + avg_loss
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(total == 0, 50.0, 100.0 * avg_gain / total)
+    out[..., :1] = 50.0
+    return out
+
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD，返回 (MACD线, 信号线, 柱状图)"""
+    line = ema(close, span=fast) - ema(close, span=slow)
+    signal_line = ema(line, span=signal)
+    return line, signal_line, line - signal_line
+
+
+def bollinger(close, window: int = 20, k: float = 2.0,
+              min_periods: int = 1) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """布林带，返回 (中轨, 上轨, 下轨)"""
+    middle = sma(close, window, min_periods=min_periods)
+    std = rolling_std(close, window, min_periods=min_periods)
+    return middle, middle + k * std, middle - k * std
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """真实波幅 TR = max(H-L, |H-前收|, |L-前收|)，首根以自身收盘价作为前收（与 stockstats 一致）"""
+    high, low, close = _as_float(high), _as_float(low), _as_float(close)
+    prev_close = np.empty_like(close)
+    prev_close[..., :1] = close[..., :1]
+    prev_close[..., 1:] = close[..., :-1]
+    return np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+
+
+def atr(high, low, close, window: int = 14) -> np.ndarray:
+    """平均真实波幅 ATR（SMMA 平滑）"""
+    return smma(true_range(high, low, close), window)
+
+
+def typical_price(high, low, close, amount=None, volume=None) -> np.ndarray:
+    """典型价格：有成交额时为 成交额/成交量，否则为 (H+L+C)/3"""
+    if amount is not None and volume is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return _as_float(amount) / _as_float(volume)
+    return (_as_float(high) + _as_float(low) + _as_float(close)) / 3.0
+
+
+def vwma(price, volume, window: int = 14) -> np.ndarray:
+    """成交量加权移动平均"""
+    volume = _as_float(volume)
+    total_volume = rolling_sum(volume, window)
+    weighted = rolling_sum(_as_float(price) * volume, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total_volume == 0, 0.0, weighted / total_volume)
+
+
+def mfi(price, volume, window: int = 14) -> np.ndarray:
+    """
+    资金流量指数 MFI（0~1 的比例值，与 stockstats 一致；前 window 根为 0.5）
+
+    Args:
+        price: 典型价格，见 typical_price
+    """
+    price = _as_float(price)
+    direction = np.sign(diff(price))
+    raw_flow = price * _as_float(volume)
+    positive = rolling_sum(np.where(direction > 0, raw_flow, 0.0), window)
+    negative = rolling_sum(np.where(direction < 0, raw_flow, 0.0), window)
+    total = positive + negative
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = np.where(total == 0, 0.5, positive / total)
+    out[..., :window] = 0.5
+    return out
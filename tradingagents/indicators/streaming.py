@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+技术指标增量计算
+
+每个指标对象保存计算所需的最小状态（EMA的加权和、滑动窗口缓冲区等），
+追加一根K线的开销为 O(1)，结果与 kernels 中对应的向量化函数逐点一致。
+
+K线可以是数值（视为收盘价），也可以是包含 close/high/low/volume/amount 的字典
+（同时兼容首字母大写的列名）。
+
+state_dict()/load_state_dict() 把内部状态转换为可 JSON 序列化的字典，用于持久化后次日继续追加。
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Union
+
+from .frame import STANDARD_MIN_BARS
+
+Bar = Union[float, int, Mapping[str, Any]]
+
+
+def bar_field(bar: Bar, name: str) -> Optional[float]:
+    """读取K线字段，数值K线只提供 close"""
+    if not isinstance(bar, Mapping):
+        return float(bar) if name == 'close' else None
+    for key in (name, name.capitalize(), name.upper()):
+        if key in bar and bar[key] is not None:
+            return float(bar[key])
+    return None
+
+
+class IncrementalIndicator:
+    """增量指标基类：update() 追加一根K线并返回最新值"""
+
+    def __init__(self):
+        self.count = 0
+        self.value = None
+
+    def update(self, bar: Bar):
+        self.count += 1
+        self.value = self._update(bar)
+        return self.value
+
+    def _update(self, bar: Bar):
+        raise NotImplementedError
+
+    def state_dict(self) -> Dict[str, Any]:
+        """导出内部状态（构造参数不在其中，恢复时由调用方用相同参数重新构造）"""
+        return {name: _dump(value) for name, value in vars(self).items()}
+
+    def load_state_dict(self, state: Mapping[str, Any]):
+        """恢复 state_dict() 导出的状态"""
+        for name, value in state.items():
+            current = getattr(self, name, None)
+            if isinstance(current, (_RollingSum, _EWM)):
+                current.load(value)
+            elif isinstance(current, IncrementalIndicator):
+                current.load_state_dict(value)
+            else:
+                setattr(self, name, _restore(value))
+        return self
+
+
+def _dump(value):
+    if isinstance(value, (_RollingSum, _EWM)):
+        return value.dump()
+    if isinstance(value, IncrementalIndicator):
+        return value.state_dict()
+    if isinstance(value, tuple):
+        return list(value)
+    if isinstance(value, dict):
+        return {key: _dump(item) for key, item in value.items()}
+    return value
+
+
+def _restore(value):
+    # 多值指标（MACD、布林带）的结果以元组表示
+    return tuple(value) if isinstance(value, list) else value
+
+
+class _RollingSum:
+    """滑动窗口求和，窗口未满时按已有数据求和"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.buffer = deque(maxlen=window)
+        self.total = 0.0
+
+    def push(self, value: float) -> float:
+        if len(self.buffer) == self.window:
+            self.total -= self.buffer[0]
+        self.buffer.append(value)
+        self.total += value
+        return self.total
+
+    def dump(self) -> Dict[str, Any]:
+        return {'buffer': list(self.buffer), 'total': self.total}
+
+    def load(self, state: Mapping[str, Any]):
+        self.buffer = deque(state['buffer'], maxlen=self.window)
+        self.total = state['total']
+
+
+class _EWM:
+    """指数加权平均，adjust=True 时保存加权和与权重和"""
+
+    def __init__(self, alpha: float, adjust: bool = True):
+        self.alpha = alpha
+        self.adjust = adjust
+        self.num = 0.0
+        self.den = 0.0
+        self.mean = None
+
+    def push(self, value: float) -> float:
+        decay = 1.0 - self.alpha
+        if self.adjust:
+            self.num = value + decay * self.num
+            self.den = 1.0 + decay * self.den
+            self.mean = self.num / self.den
+        elif self.mean is None:
+            self.mean = value
+        else:
+            self.mean = self.alpha * value + decay * self.mean
+        return self.mean
+
+    def dump(self) -> Dict[str, Any]:
+        return {'num': self.num, 'den': self.den, 'mean': self.mean}
+
+    def load(self, state: Mapping[str, Any]):
+        self.num, self.den, self.mean = state['num'], state['den'], state['mean']
+
+
+class SMA(IncrementalIndicator):
+    """简单移动平均"""
+
+    def __init__(self, window: int, field: str = 'close'):
+        super().__init__()
+        self.window = window
+        self.field = field
+        self._sum = _RollingSum(window)
+
+    def _update(self, bar):
+        total = self._sum.push(bar_field(bar, self.field))
+        return total / len(self._sum.buffer)
+
+
+class EMA(IncrementalIndicator):
+    """指数移动平均（span 或 alpha 二选一）"""
+
+    def __init__(self, span: Optional[float] = None, alpha: Optional[float] = None,
+                 adjust: bool = True, field: str = 'close'):
+        super().__init__()
+        self.field = field
+        self._ewm = _EWM(alpha if alpha is not None else 2.0 / (span + 1.0), adjust)
+
+    def _update(self, bar):
+        return self._ewm.push(bar_field(bar, self.field))
+
+
+class RSI(IncrementalIndicator):
+    """
+    相对强弱指数
+
+    smoothing='wilder'（默认）与 kernels.rsi 默认一致；
+    smoothing='sma' 与 kernels.rsi(smoothing='sma') 一致，不足 window 个涨跌幅时为 None
+    """
+
+    def __init__(self, window: int = 14, smoothing: str = 'wilder'):
+        super().__init__()
+        self.window = window
+        self.smoothing = smoothing
+        self.prev_close = None
+        if smoothing == 'sma':
+            self._gain = _RollingSum(window)
+            self._loss = _RollingSum(window)
+        else:
+            self._gain = _EWM(1.0 / window)
+            self._loss = _EWM(1.0 / window)
+
+    def _update(self, bar):
+        close = bar_field(bar, 'close')
+        change = None if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+
+        if self.smoothing == 'sma':
+            if change is None:
+                return None
+            gain = self._gain.push(max(change, 0.0))
+            loss = self._loss.push(max(-change, 0.0))
+            if self.count <= self.window or (gain == 0 and loss == 0):
+                return None
+            return 100.0 if loss == 0 else 100.0 - 100.0 / (1.0 + gain / loss)
+
+        change = change or 0.0
+        gain = self._gain.push(max(change, 0.0))
+        loss = self._loss.push(max(-change, 0.0))
+        if self.count == 1 or gain + loss == 0:
+            return 50.0
+        return 100.0 * gain / (gain + loss)
+
+
+class MACD(IncrementalIndicator):
+    """MACD，value 为 (MACD线, 信号线, 柱状图)"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super().__init__()
+        self._fast = _EWM(2.0 / (fast + 1.0))
+        self._slow = _EWM(2.0 / (slow + 1.0))
+        self._signal = _EWM(2.0 / (signal + 1.0))
+
+    def _update(self, bar):
+        close = bar_field(bar, 'close')
+        line = self._fast.push(close) - self._slow.push(close)
+        signal = self._signal.push(line)
+        return line, signal, line - signal
+
+
+class Bollinger(IncrementalIndicator):
+    """布林带，value 为 (中轨, 上轨, 下轨)；只有一根K线时上下轨为 None"""
+
+    def __init__(self, window: int = 20, k: float = 2.0):
+        super().__init__()
+        self.window = window
+        self.k = k
+        self.base = None
+        self._sum = _RollingSum(window)
+        self._sum_sq = _RollingSum(window)
+
+    def _update(self, bar):
+        close = bar_field(bar, 'close')
+        if self.base is None:
+            # 以首个价格为基准累加，减小平方和的精度损失
+            self.base = close
+        centered = close - self.base
+        n = min(self.count, self.window)
+        mean = self._sum.push(centered) / n
+        mean_sq = self._sum_sq.push(centered * centered) / n
+        middle = mean + self.base
+        if n < 2:
+            return middle, None, None
+        std = (max(mean_sq - mean * mean, 0.0) * n / (n - 1)) ** 0.5
+        return middle, middle + self.k * std, middle - self.k * std
+
+
+class ATR(IncrementalIndicator):
+    """平均真实波幅（SMMA 平滑）"""
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.prev_close = None
+        self._ewm = _EWM(1.0 / window)
+
+    def _update(self, bar):
+        high, low, close = bar_field(bar, 'high'), bar_field(bar, 'low'), bar_field(bar, 'close')
+        prev_close = close if self.prev_close is None else self.prev_close
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        self.prev_close = close
+        return self._ewm.push(tr)
+
+
+def typical_price(bar: Bar) -> float:
+    """典型价格，与 kernels.typical_price 一致"""
+    amount, volume = bar_field(bar, 'amount'), bar_field(bar, 'volume')
+    if amount is not None and volume:
+        return amount / volume
+    return (bar_field(bar, 'high') + bar_field(bar, 'low') + bar_field(bar, 'close')) / 3.0
+
+
+class VWMA(IncrementalIndicator):
+    """成交量加权移动平均"""
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self._weighted = _RollingSum(window)
+        self._volume = _RollingSum(window)
+
+    def _update(self, bar):
+        volume = bar_field(bar, 'volume') or 0.0
+        weighted = self._weighted.push(typical_price(bar) * volume)
+        total_volume = self._volume.push(volume)
+        return weighted / total_volume if total_volume else 0.0
+
+
+class MFI(IncrementalIndicator):
+    """资金流量指数（0~1 比例值，前 window 根为 0.5）"""
+
+    def __init__(self, window: int = 14):
+        super().__init__()
+        self.window = window
+        self.prev_price = None
+        self._positive = _RollingSum(window)
+        self._negative = _RollingSum(window)
+
+    def _update(self, bar):
+        price = typical_price(bar)
+        flow = price * (bar_field(bar, 'volume') or 0.0)
+        change = 0.0 if self.prev_price is None else price - self.prev_price
+        self.prev_price = price
+        positive = self._positive.push(flow if change > 0 else 0.0)
+        negative = self._negative.push(flow if change < 0 else 0.0)
+        if self.count <= self.window or positive + negative <= 0:
+            return 0.5
+        return positive / (positive + negative)
+
+
+class StandardIndicators(IncrementalIndicator):
+    """
+    行情格式化输出共用指标表（frame.standard_indicator_frame）的增量版本
+
+    value 为 {指标名: 数值}，K线数量不足 STANDARD_MIN_BARS 时对应指标为 None
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.ma5 = SMA(5)
+        self.ma10 = SMA(10)
+        self.ma20 = SMA(20)
+        self.rsi = RSI(14, smoothing='sma')
+        self.macd = MACD()
+        self.boll = Bollinger(20)
+
+    def _update(self, bar):
+        macd, signal, histogram = self.macd.update(bar)
+        middle, upper, lower = self.boll.update(bar)
+        values = {
+            'MA5': self.ma5.update(bar),
+            'MA10': self.ma10.update(bar),
+            'MA20': self.ma20.update(bar),
+            'RSI': self.rsi.update(bar),
+            'MACD': macd,
+            'MACD_Signal': signal,
+            'MACD_Histogram': histogram,
+            'BB_Upper': upper,
+            'BB_Middle': middle,
+            'BB_Lower': lower,
+        }
+        return {
+            name: (value if self.count >= STANDARD_MIN_BARS[name] else None)
+            for name, value in values.items()
+        }
+
+
+INCREMENTAL_INDICATORS: Dict[str, type] = {
+    'sma': SMA,
+    'ema': EMA,
+    'rsi': RSI,
+    'macd': MACD,
+    'boll': Bollinger,
+    'atr': ATR,
+    'vwma': VWMA,
+    'mfi': MFI,
+}
+
+
+@dataclass
+class IndicatorSpec:
+    """
+    增量指标的描述：状态键 + 构造参数 + 取值分量
+
+    macd/macds/macdh 共用同一个状态（键 macd_12_26_9），只是取不同分量。
+    """
+    key: str
+    cls: type
+    params: Dict[str, Any] = field(default_factory=dict)
+    component: Optional[Union[int, str]] = None
+
+    def create(self) -> IncrementalIndicator:
+        return self.cls(**self.params)
+
+    def select(self, value):
+        if value is None or self.component is None:
+            return value
+        return value[self.component]
+
+
+STANDARD_SPEC = IndicatorSpec('standard', StandardIndicators)
+
+_MOVING_AVERAGE = re.compile(r'^close_(?P<window>\d+)_(?P<kind>sma|ema)$')
+_WINDOWED = re.compile(r'^(?P<name>rsi|atr|vwma|mfi)(?:_(?P<window>\d+))?$')
+
+
+def parse_indicator(indicator: str) -> IndicatorSpec:
+    """
+    将 stockstats 指标名转换为增量指标描述
+
+    Raises:
+        KeyError: 没有对应的增量实现
+    """
+    name = indicator.lower()
+
+    match = _MOVING_AVERAGE.match(name)
+    if match:
+        window = int(match.group('window'))
+        if match.group('kind') == 'sma':
+            return IndicatorSpec(f'sma_{window}', SMA, {'window': window})
+        return IndicatorSpec(f'ema_{window}', EMA, {'span': window})
+
+    if name in ('macd', 'macds', 'macdh'):
+        return IndicatorSpec('macd_12_26_9', MACD, {}, ('macd', 'macds', 'macdh').index(name))
+
+    if name in ('boll', 'boll_ub', 'boll_lb'):
+        return IndicatorSpec('boll_20_2', Bollinger, {}, ('boll', 'boll_ub', 'boll_lb').index(name))
+
+    match = _WINDOWED.match(name)
+    if match:
+        kind = match.group('name')
+        window = int(match.group('window') or 14)
+        return IndicatorSpec(f'{kind}_{window}', INCREMENTAL_INDICATORS[kind], {'window': window})
+
+    raise KeyError(f"没有增量实现的指标: {indicator}")
@@ -5,17 +5,24 @@
 
 import os
 import json
-from typing import Any, Dict, List, Optional, Union, Iterator, AsyncIterator, Sequence
+from typing import Any, ClassVar, Dict, List, Optional, Union, Iterator, AsyncIterator, Sequence, Tuple
 from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
-from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.messages import BaseMessage, AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables.config import run_in_executor
 from langchain_core.callbacks.manager import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
 from langchain_core.tools import BaseTool
 from langchain_core.utils.function_calling import convert_to_openai_tool
 from pydantic import Field, SecretStr
 import dashscope
 from dashscope import Generation
+try:
+    from dashscope import AioGeneration
+except ImportError:  # 旧版 dashscope 不提供异步接口
+    AioGeneration = None
 from ..config.config_manager import token_tracker
+from .llm_cache import cached_generate
+from .streaming import TRACKING_KWARGS, acached_stream, cached_stream
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -26,6 +33,8 @@ logger = get_logger('agents')
 class ChatDashScope(BaseChatModel):
     """阿里百炼大模型的 LangChain 适配器"""
     
+    uses_llm_cache: ClassVar[bool] = True  # 生成调用经过 LLM 响应缓存（见 llm_cache.cached_invoke_kwargs）
+    
     # 模型配置
     model: str = Field(default="qwen-turbo", description="DashScope 模型名称")
     api_key: Optional[SecretStr] = Field(default=None, description="DashScope API 密钥")
@@ -100,7 +109,22 @@ class ChatDashScope(BaseChatModel):
         run_manager: Optional[CallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> ChatResult:
-        """生成聊天回复"""
+        """生成聊天回复（确定性调用优先读取LLM响应缓存）"""
+        tracking = {k: kwargs[k] for k in TRACKING_KWARGS if k in kwargs}
+        result, cache_status = cached_generate(
+            self.model, self.temperature, messages, stop, kwargs,
+            lambda: self._generate_uncached(messages, stop, run_manager, **kwargs),
+        )
+        self._track_token_usage(result, cache_status, messages, tracking)
+        return result
+
+    def _build_request_params(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]],
+        kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """构建 DashScope 请求参数"""
         
         # 转换消息格式
         dashscope_messages = self._convert_messages_to_dashscope_format(messages)
@@ -119,8 +143,66 @@ class ChatDashScope(BaseChatModel):
         if stop:
             request_params["stop"] = stop
         
-        # 合并额外参数
-        request_params.update(kwargs)
+        # 合并额外参数（会话统计参数不传给接口）
+        request_params.update({k: v for k, v in kwargs.items() if k not in TRACKING_KWARGS})
+        return request_params
+    
+    @staticmethod
+    def _extract_usage(response: Any) -> Tuple[int, int]:
+        """从 DashScope 响应中提取 (输入token, 输出token)"""
+        input_tokens = 0
+        output_tokens = 0
+        
+        # DashScope API响应中包含usage信息
+        if hasattr(response, 'usage') and response.usage:
+            usage = response.usage
+            # 根据API文档，usage可能包含input_tokens和output_tokens
+            if hasattr(usage, 'input_tokens'):
+                input_tokens = usage.input_tokens
+            if hasattr(usage, 'output_tokens'):
+                output_tokens = usage.output_tokens
+            # 有些情况下可能是total_tokens
+            elif hasattr(usage, 'total_tokens'):
+                # 估算输入和输出token（如果没有分别提供）
+                total_tokens = usage.total_tokens
+                # 简单估算：假设输入占30%，输出占70%
+                input_tokens = int(total_tokens * 0.3)
+                output_tokens = int(total_tokens * 0.7)
+        
+        return input_tokens, output_tokens
+    
+    def _track_usage(self, input_tokens: int, output_tokens: int,
+                     messages: List[BaseMessage], kwargs: Dict[str, Any]):
+        """记录token使用量"""
+        if input_tokens > 0 or output_tokens > 0:
+            try:
+                # 生成会话ID（如果没有提供）
+                session_id = kwargs.get('session_id', f"dashscope_{hash(str(messages))%10000}")
+                analysis_type = kwargs.get('analysis_type', 'stock_analysis')
+                
+                # 使用TokenTracker记录使用量
+                token_tracker.track_usage(
+                    provider="dashscope",
+                    model_name=self.model,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=session_id,
+                    analysis_type=analysis_type
+                )
+            except Exception as track_error:
+                # 记录失败不应该影响主要功能
+                logger.info(f"Token tracking failed: {track_error}")
+    
+    def _generate_uncached(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """调用 DashScope API 生成聊天回复"""
+        
+        request_params = self._build_request_params(messages, stop, kwargs)
         
         try:
             # 调用 DashScope API
@@ -131,45 +213,8 @@ class ChatDashScope(BaseChatModel):
                 output = response.output
                 message_content = output.choices[0].message.content
                 
-                # 提取token使用量信息
-                input_tokens = 0
-                output_tokens = 0
-                
-                # DashScope API响应中包含usage信息
-                if hasattr(response, 'usage') and response.usage:
-                    usage = response.usage
-                    # 根据API文档，usage可能包含input_tokens和output_tokens
-                    if hasattr(usage, 'input_tokens'):
-                        input_tokens = usage.input_tokens
-                    if hasattr(usage, 'output_tokens'):
-                        output_tokens = usage.output_tokens
-                    # 有些情况下可能是total_tokens
-                    elif hasattr(usage, 'total_tokens'):
-                        # 估算输入和输出token（如果没有分别提供）
-                        total_tokens = usage.total_tokens
-                        # 简单估算：假设输入占30%，输出占70%
-                        input_tokens = int(total_tokens * 0.3)
-                        output_tokens = int(total_tokens * 0.7)
-                
-                # 记录token使用量
-                if input_tokens > 0 or output_tokens > 0:
-                    try:
-                        # 生成会话ID（如果没有提供）
-                        session_id = kwargs.get('session_id', f"dashscope_{hash(str(messages))%10000}")
-                        analysis_type = kwargs.get('analysis_type', 'stock_analysis')
-                        
-                        # 使用TokenTracker记录使用量
-                        token_tracker.track_usage(
-                            provider="dashscope",
-                            model_name=self.model,
-                            input_tokens=input_tokens,
-                            output_tokens=output_tokens,
-                            session_id=session_id,
-                            analysis_type=analysis_type
-                        )
-                    except Exception as track_error:
-                        # 记录失败不应该影响主要功能
-                        logger.info(f"Token tracking failed: {track_error}")
+                # 提取token使用量（由 _generate 按缓存状态记录）
+                input_tokens, output_tokens = self._extract_usage(response)
                 
                 # 创建 AI 消息
                 ai_message = AIMessage(content=message_content)
@@ -177,13 +222,123 @@ class ChatDashScope(BaseChatModel):
                 # 创建生成结果
                 generation = ChatGeneration(message=ai_message)
                 
-                return ChatResult(generations=[generation])
+                return ChatResult(
+                    generations=[generation],
+                    llm_output={
+                        "token_usage": {
+                            "prompt_tokens": input_tokens,
+                            "completion_tokens": output_tokens,
+                            "total_tokens": input_tokens + output_tokens,
+                        },
+                        "model_name": self.model,
+                    },
+                )
             else:
                 raise Exception(f"DashScope API error: {response.code} - {response.message}")
                 
         except Exception as e:
             raise Exception(f"Error calling DashScope API: {str(e)}")
     
+    def _response_to_chunk(self, response: Any) -> Tuple[ChatGenerationChunk, Optional[Dict[str, int]]]:
+        """将增量输出的流式响应转换为 (LangChain 分块, 累计使用量)"""
+        if response.status_code != 200:
+            raise Exception(f"DashScope API error: {response.code} - {response.message}")
+        
+        choice = response.output.choices[0]
+        content = choice.message.content or ""
+        input_tokens, output_tokens = self._extract_usage(response)
+        usage_metadata = None
+        if input_tokens or output_tokens:
+            usage_metadata = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+        finish_reason = getattr(choice, "finish_reason", None)
+        generation_info = {"finish_reason": finish_reason} if finish_reason and finish_reason != "null" else None
+        return ChatGenerationChunk(message=AIMessageChunk(content=content), generation_info=generation_info), usage_metadata
+    
+    def _track_token_usage(self, result: ChatResult, cache_status: str,
+                           messages: List[BaseMessage], kwargs: Dict[str, Any]):
+        """按缓存状态记录token使用量：命中只累计节省的token，不计费"""
+        token_usage = (result.llm_output or {}).get("token_usage", {})
+        input_tokens = token_usage.get("prompt_tokens", 0)
+        output_tokens = token_usage.get("completion_tokens", 0)
+        if cache_status != "bypass":
+            try:
+                token_tracker.track_cache_event(
+                    "dashscope", self.model, cache_status == "hit", input_tokens, output_tokens
+                )
+            except Exception as track_error:
+                logger.info(f"Token tracking failed: {track_error}")
+        if cache_status == "hit":
+            return
+        self._track_usage(input_tokens, output_tokens, messages, kwargs)
+    
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """流式生成聊天回复（增量输出），流结束时记录token使用量"""
+        tracking = {k: kwargs[k] for k in TRACKING_KWARGS if k in kwargs}
+        
+        def stream() -> Iterator[ChatGenerationChunk]:
+            request_params = self._build_request_params(messages, stop, kwargs)
+            request_params.update({"stream": True, "incremental_output": True})
+            
+            usage_metadata = None
+            for response in Generation.call(**request_params):
+                chunk, usage = self._response_to_chunk(response)
+                usage_metadata = usage or usage_metadata
+                yield chunk
+            
+            # usage为累计值，只在最后附加一次
+            if usage_metadata:
+                yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage_metadata))
+        
+        yield from cached_stream(
+            self.model, self.temperature, messages, stop, kwargs, stream,
+            lambda result, cache_status: self._track_token_usage(result, cache_status, messages, tracking),
+        )
+    
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """异步流式生成聊天回复"""
+        if AioGeneration is None:
+            # 旧版 dashscope 没有异步接口，在线程池中执行同步流
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
+            return
+        
+        tracking = {k: kwargs[k] for k in TRACKING_KWARGS if k in kwargs}
+        
+        async def astream() -> AsyncIterator[ChatGenerationChunk]:
+            request_params = self._build_request_params(messages, stop, kwargs)
+            request_params.update({"stream": True, "incremental_output": True})
+            
+            usage_metadata = None
+            async for response in await AioGeneration.call(**request_params):
+                chunk, usage = self._response_to_chunk(response)
+                usage_metadata = usage or usage_metadata
+                yield chunk
+            
+            if usage_metadata:
+                yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage_metadata))
+        
+        async for chunk in acached_stream(
+            self.model, self.temperature, messages, stop, kwargs, astream,
+            lambda result, cache_status: self._track_token_usage(result, cache_status, messages, tracking),
+        ):
+            yield chunk
+    
     async def _agenerate(
         self,
         messages: List[BaseMessage],
@@ -191,9 +346,8 @@ class ChatDashScope(BaseChatModel):
         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
         **kwargs: Any,
     ) -> ChatResult:
-        """异步生成聊天回复"""
-        # 目前使用同步方法，后续可以实现真正的异步
-        return self._generate(messages, stop, run_manager, **kwargs)
+        """异步生成聊天回复（在线程池中执行，不阻塞事件循环）"""
+        return await run_in_executor(None, self._generate, messages, stop, None, **kwargs)
     
     def bind_tools(
         self,
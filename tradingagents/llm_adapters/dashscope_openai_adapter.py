@@ -5,12 +5,14 @@
 """
 
 import os
-from typing import Any, Dict, List, Optional, Union, Sequence
+from typing import Any, ClassVar, Dict, List, Optional, Union, Sequence
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import BaseTool
 from langchain_core.utils.function_calling import convert_to_openai_tool
 from pydantic import Field, SecretStr
 from ..config.config_manager import token_tracker
+from .llm_cache import cached_generate
+from .streaming import acached_stream, cached_stream, pop_tracking_kwargs
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -23,6 +25,7 @@ class ChatDashScopeOpenAI(ChatOpenAI):
     继承 ChatOpenAI，通过 OpenAI 兼容接口调用百炼模型
     支持原生 Function Calling 和工具调用
     """
+    uses_llm_cache: ClassVar[bool] = True  # 生成调用经过 LLM 响应缓存（见 llm_cache.cached_invoke_kwargs）
     
     def __init__(self, **kwargs):
         """初始化 DashScope OpenAI 兼容客户端"""
@@ -51,13 +54,48 @@ class ChatDashScopeOpenAI(ChatOpenAI):
         api_base = getattr(self, 'base_url', None) or getattr(self, 'openai_api_base', None) or kwargs.get('base_url', 'unknown')
         logger.info(f"   API Base: {api_base}")
     
-    def _generate(self, *args, **kwargs):
-        """重写生成方法，添加 token 使用量追踪"""
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        """重写生成方法，添加 LLM 响应缓存和 token 使用量追踪"""
         
-        # 调用父类的生成方法
-        result = super()._generate(*args, **kwargs)
+        # 提取会话统计参数，避免传递给接口
+        tracking = pop_tracking_kwargs(kwargs)
         
-        # 尝试追踪 token 使用量
+        # 调用父类的生成方法（确定性调用优先读取LLM响应缓存）
+        result, cache_status = cached_generate(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(ChatDashScopeOpenAI, self)._generate(messages, stop, run_manager, **kwargs),
+        )
+        
+        self._track_token_usage(result, messages, cache_status, tracking)
+        return result
+    
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        """流式生成，流结束时追踪 token 使用量"""
+        
+        tracking = pop_tracking_kwargs(kwargs)
+        kwargs.setdefault("stream_usage", True)
+        
+        yield from cached_stream(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(ChatDashScopeOpenAI, self)._stream(messages, stop, run_manager, **kwargs),
+            lambda result, cache_status: self._track_token_usage(result, messages, cache_status, tracking),
+        )
+    
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        """异步流式生成，流结束时追踪 token 使用量"""
+        
+        tracking = pop_tracking_kwargs(kwargs)
+        kwargs.setdefault("stream_usage", True)
+        
+        async for chunk in acached_stream(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(ChatDashScopeOpenAI, self)._astream(messages, stop, run_manager, **kwargs),
+            lambda result, cache_status: self._track_token_usage(result, messages, cache_status, tracking),
+        ):
+            yield chunk
+    
+    def _track_token_usage(self, result, messages, cache_status, tracking):
+        """追踪 token 使用量"""
         try:
             # 从结果中提取 token 使用信息
             if hasattr(result, 'llm_output') and result.llm_output:
@@ -65,11 +103,20 @@ class ChatDashScopeOpenAI(ChatOpenAI):
                 
                 input_tokens = token_usage.get('prompt_tokens', 0)
                 output_tokens = token_usage.get('completion_tokens', 0)
+
+                # 缓存命中不产生实际调用，只记录节省的token
+                if cache_status != "bypass":
+                    token_tracker.track_cache_event(
+                        "dashscope", self.model_name, cache_status == "hit",
+                        input_tokens, output_tokens
+                    )
+                if cache_status == "hit":
+                    return
                 
                 if input_tokens > 0 or output_tokens > 0:
                     # 生成会话ID
-                    session_id = kwargs.get('session_id', f"dashscope_openai_{hash(str(args))%10000}")
-                    analysis_type = kwargs.get('analysis_type', 'stock_analysis')
+                    session_id = tracking.get('session_id', f"dashscope_openai_{hash(str(messages))%10000}")
+                    analysis_type = tracking.get('analysis_type', 'stock_analysis')
                     
                     # 使用 TokenTracker 记录使用量
                     token_tracker.track_usage(
@@ -84,8 +131,6 @@ class ChatDashScopeOpenAI(ChatOpenAI):
         except Exception as track_error:
             # token 追踪失败不应该影响主要功能
             logger.error(f"⚠️ Token 追踪失败: {track_error}")
-        
-        return result
     
     def bind_tools(
         self,
@@ -4,11 +4,15 @@ DeepSeek LLM适配器，支持Token使用统计
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage, SystemMessage
-from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+
+from .llm_cache import cached_generate
+from .streaming import acached_stream, cached_stream, pop_tracking_kwargs
+from tradingagents.utils.token_counter import get_token_counter
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
@@ -34,6 +38,7 @@ class ChatDeepSeek(ChatOpenAI):
     
     继承自ChatOpenAI，添加了Token使用量统计功能
     """
+    uses_llm_cache: ClassVar[bool] = True  # 生成调用经过 LLM 响应缓存（见 llm_cache.cached_invoke_kwargs）
     
     def __init__(
         self,
@@ -93,72 +98,139 @@ class ChatDeepSeek(ChatOpenAI):
         analysis_type = kwargs.pop('analysis_type', None)
 
         try:
-            # 调用父类方法生成响应
-            result = super()._generate(messages, stop, run_manager, **kwargs)
-            
-            # 提取token使用量
-            input_tokens = 0
-            output_tokens = 0
-            
-            # 尝试从响应中提取token使用量
-            if hasattr(result, 'llm_output') and result.llm_output:
-                token_usage = result.llm_output.get('token_usage', {})
-                if token_usage:
-                    input_tokens = token_usage.get('prompt_tokens', 0)
-                    output_tokens = token_usage.get('completion_tokens', 0)
-            
-            # 如果没有获取到token使用量，进行估算
-            if input_tokens == 0 and output_tokens == 0:
-                input_tokens = self._estimate_input_tokens(messages)
-                output_tokens = self._estimate_output_tokens(result)
-                logger.debug(f"🔍 [DeepSeek] 使用估算token: 输入={input_tokens}, 输出={output_tokens}")
-            else:
-                logger.info(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
-            
-            # 记录token使用量
-            if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
-                try:
-                    # 使用提取的参数或生成默认值
-                    if session_id is None:
-                        session_id = f"deepseek_{hash(str(messages))%10000}"
-                    if analysis_type is None:
-                        analysis_type = 'stock_analysis'
-
-                    # 记录使用量
-                    usage_record = token_tracker.track_usage(
-                        provider="deepseek",
-                        model_name=self.model_name,
-                        input_tokens=input_tokens,
-                        output_tokens=output_tokens,
-                        session_id=session_id,
-                        analysis_type=analysis_type
-                    )
-
-                    if usage_record:
-                        if usage_record.cost == 0.0:
-                            logger.warning(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
-                        else:
-                            logger.info(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
-
-                        # 使用统一日志管理器的Token记录方法
-                        logger_manager = get_logger_manager()
-                        logger_manager.log_token_usage(
-                            logger, "deepseek", self.model_name,
-                            input_tokens, output_tokens, usage_record.cost,
-                            session_id
-                        )
-                    else:
-                        logger.warning(f"⚠️ [DeepSeek] 未创建使用记录")
-
-                except Exception as track_error:
-                    logger.error(f"⚠️ [DeepSeek] Token统计失败: {track_error}", exc_info=True)
+            # 调用父类方法生成响应（确定性调用优先读取LLM响应缓存）
+            result, cache_status = cached_generate(
+                self.model_name, self.temperature, messages, stop, kwargs,
+                lambda: super(ChatDeepSeek, self)._generate(messages, stop, run_manager, **kwargs),
+            )
             
+            self._record_usage(messages, result, cache_status, session_id, analysis_type)
             return result
             
         except Exception as e:
             logger.error(f"❌ [DeepSeek] 调用失败: {e}", exc_info=True)
             raise
     
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        流式生成聊天响应，流结束时记录token使用量
+        """
+        tracking = pop_tracking_kwargs(kwargs)
+        kwargs.setdefault("stream_usage", True)
+
+        yield from cached_stream(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(ChatDeepSeek, self)._stream(messages, stop, run_manager, **kwargs),
+            lambda result, cache_status: self._record_usage(
+                messages, result, cache_status, tracking.get('session_id'), tracking.get('analysis_type')
+            ),
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        异步流式生成聊天响应，流结束时记录token使用量
+        """
+        tracking = pop_tracking_kwargs(kwargs)
+        kwargs.setdefault("stream_usage", True)
+
+        async for chunk in acached_stream(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(ChatDeepSeek, self)._astream(messages, stop, run_manager, **kwargs),
+            lambda result, cache_status: self._record_usage(
+                messages, result, cache_status, tracking.get('session_id'), tracking.get('analysis_type')
+            ),
+        ):
+            yield chunk
+
+    def _record_usage(
+        self,
+        messages: List[BaseMessage],
+        result: ChatResult,
+        cache_status: str,
+        session_id: Optional[str] = None,
+        analysis_type: Optional[str] = None,
+    ):
+        """
+        记录一次调用的token使用量（提供商未返回时估算）
+        """
+        # 提取token使用量
+        input_tokens = 0
+        output_tokens = 0
+        
+        # 尝试从响应中提取token使用量
+        if hasattr(result, 'llm_output') and result.llm_output:
+            token_usage = result.llm_output.get('token_usage', {})
+            if token_usage:
+                input_tokens = token_usage.get('prompt_tokens', 0)
+                output_tokens = token_usage.get('completion_tokens', 0)
+        
+        # 如果没有获取到token使用量，进行估算
+        if input_tokens == 0 and output_tokens == 0:
+            input_tokens = self._estimate_input_tokens(messages)
+            output_tokens = self._estimate_output_tokens(result)
+            logger.debug(f"🔍 [DeepSeek] 使用估算token: 输入={input_tokens}, 输出={output_tokens}")
+        else:
+            logger.info(f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}")
+
+        # 缓存命中不产生实际调用，只记录节省的token
+        if TOKEN_TRACKING_ENABLED and cache_status != "bypass":
+            token_tracker.track_cache_event(
+                "deepseek", self.model_name, cache_status == "hit", input_tokens, output_tokens
+            )
+        if cache_status == "hit":
+            logger.info(f"🎯 [DeepSeek] LLM缓存命中，节省token: 输入={input_tokens}, 输出={output_tokens}")
+            return
+        
+        # 记录token使用量
+        if TOKEN_TRACKING_ENABLED and (input_tokens > 0 or output_tokens > 0):
+            try:
+                # 使用提取的参数或生成默认值
+                if session_id is None:
+                    session_id = f"deepseek_{hash(str(messages))%10000}"
+                if analysis_type is None:
+                    analysis_type = 'stock_analysis'
+
+                # 记录使用量
+                usage_record = token_tracker.track_usage(
+                    provider="deepseek",
+                    model_name=self.model_name,
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens,
+                    session_id=session_id,
+                    analysis_type=analysis_type
+                )
+
+                if usage_record:
+                    if usage_record.cost == 0.0:
+                        logger.warning(f"⚠️ [DeepSeek] 成本计算为0，可能配置有问题")
+                    else:
+                        logger.info(f"💰 [DeepSeek] 本次调用成本: ¥{usage_record.cost:.6f}")
+
+                    # 使用统一日志管理器的Token记录方法
+                    logger_manager = get_logger_manager()
+                    logger_manager.log_token_usage(
+                        logger, "deepseek", self.model_name,
+                        input_tokens, output_tokens, usage_record.cost,
+                        session_id
+                    )
+                else:
+                    logger.warning(f"⚠️ [DeepSeek] 未创建使用记录")
+
+            except Exception as track_error:
+                logger.error(f"⚠️ [DeepSeek] Token统计失败: {track_error}", exc_info=True)
+
     def _estimate_input_tokens(self, messages: List[BaseMessage]) -> int:
         """
         估算输入token数量
@@ -169,15 +241,7 @@ class ChatDeepSeek(ChatOpenAI):
         Returns:
             估算的输入token数量
         """
-        total_chars = 0
-        for message in messages:
-            if hasattr(message, 'content'):
-                total_chars += len(str(message.content))
-        
-        # 粗略估算：中文约1.5字符/token，英文约4字符/token
-        # 这里使用保守估算：2字符/token
-        estimated_tokens = max(1, total_chars // 2)
-        return estimated_tokens
+        return max(1, get_token_counter().count_messages(messages, self.model_name))
     
     def _estimate_output_tokens(self, result: ChatResult) -> int:
         """
@@ -189,14 +253,12 @@ class ChatDeepSeek(ChatOpenAI):
         Returns:
             估算的输出token数量
         """
-        total_chars = 0
-        for generation in result.generations:
-            if hasattr(generation, 'message') and hasattr(generation.message, 'content'):
-                total_chars += len(str(generation.message.content))
-        
-        # 粗略估算：2字符/token
-        estimated_tokens = max(1, total_chars // 2)
-        return estimated_tokens
+        contents = [
+            str(generation.message.content)
+            for generation in result.generations
+            if hasattr(generation, 'message') and hasattr(generation.message, 'content')
+        ]
+        return max(1, sum(get_token_counter().count_batch(contents, self.model_name)))
     
     def invoke(
         self,
@@ -216,20 +278,8 @@ class ChatDeepSeek(ChatOpenAI):
             AI消息响应
         """
         
-        # 处理输入
-        if isinstance(input, str):
-            messages = [HumanMessage(content=input)]
-        else:
-            messages = input
-        
-        # 调用生成方法
-        result = self._generate(messages, **kwargs)
-        
-        # 返回第一个生成结果的消息
-        if result.generations:
-            return result.generations[0].message
-        else:
-            return AIMessage(content="")
+        # 经由LangChain标准调用链，回调（包括LangGraph的流式输出）才能生效
+        return super().invoke(input, config, **kwargs)
 
 
 def create_deepseek_llm(
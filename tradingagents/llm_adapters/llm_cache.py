@@ -0,0 +1,422 @@
+"""
+LLM响应缓存
+在适配器层缓存确定性调用的LLM响应（信号提取、反思、分析师工具规划等重复提示），
+减少回测重放同一日期时的重复成本和延迟。
+
+- 缓存键：模型 + 规范化后的消息 + 工具 + 温度 + 停止词等生成参数的哈希
+- 存储层：进程内LRU（一级） + 可选SQLite/Redis（二级）
+- 安全性：默认只缓存温度不高于 TRADINGAGENTS_LLM_CACHE_MAX_TEMPERATURE 的调用（默认 0.0，即只缓存
+  确定性调用；分析师、辩论等以默认温度 0.1 创建的模型每次重新采样），调用方可通过 llm_cache=True/False
+  参数强制启用或绕过；信号提取、反思等确定性调用点用 cached_invoke_kwargs(llm) 显式启用
+
+环境变量：
+    TRADINGAGENTS_LLM_CACHE: 是否启用（默认 true）
+    TRADINGAGENTS_LLM_CACHE_BACKEND: 二级存储 memory/sqlite/redis（默认 memory）
+    TRADINGAGENTS_LLM_CACHE_SIZE: 内存LRU条目数（默认 512）
+    TRADINGAGENTS_LLM_CACHE_TTL_HOURS: 二级存储有效期（默认 168）
+    TRADINGAGENTS_LLM_CACHE_PATH: SQLite 文件路径（默认 ~/Documents/TradingAgents/data/llm_cache/llm_cache.sqlite）
+    TRADINGAGENTS_LLM_CACHE_MAX_TEMPERATURE: 自动缓存的最高温度（默认 0.0）
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import KIND_LLM, get_replay_session
+from tradingagents.utils.tracing import KIND_CACHE, trace_span
+logger = get_logger('agents')
+
+
+# 不参与缓存键计算的调用参数（会话标识、缓存控制等）
+_NON_KEY_KWARGS = {"session_id", "analysis_type", "llm_cache", "stream_usage"}
+
+
+def _normalize_content(content: Any) -> Any:
+    """规范化消息内容：合并连续空白，使仅有空白差异的提示命中同一缓存"""
+    if isinstance(content, str):
+        return " ".join(content.split())
+    if isinstance(content, list):
+        return [_normalize_content(item) for item in content]
+    if isinstance(content, dict):
+        return {k: _normalize_content(v) for k, v in content.items()}
+    return content
+
+
+def _normalize_message(message: Any) -> Dict[str, Any]:
+    """将消息转换为稳定的可哈希结构"""
+    if isinstance(message, BaseMessage):
+        normalized = {
+            "type": message.type,
+            "content": _normalize_content(message.content),
+        }
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            normalized["tool_calls"] = [
+                {"name": call.get("name"), "args": call.get("args")} for call in tool_calls
+            ]
+        tool_call_id = getattr(message, "tool_call_id", None)
+        if tool_call_id:
+            normalized["tool_call_id"] = tool_call_id
+        return normalized
+    if isinstance(message, (tuple, list)) and len(message) == 2:
+        return {"type": str(message[0]), "content": _normalize_content(message[1])}
+    if isinstance(message, dict):
+        return {k: _normalize_content(v) for k, v in message.items()}
+    return {"content": _normalize_content(str(message))}
+
+
+def make_cache_key(model: str, messages: List[Any], temperature: Optional[float] = None,
+                   stop: Optional[List[str]] = None, **kwargs: Any) -> str:
+    """
+    生成LLM调用的缓存键
+
+    Args:
+        model: 模型名称
+        messages: 消息列表
+        temperature: 温度参数
+        stop: 停止词
+        **kwargs: 其他生成参数（tools、tool_choice等）
+
+    Returns:
+        SHA256缓存键
+    """
+    payload = {
+        "model": model,
+        "messages": [_normalize_message(m) for m in messages],
+        "temperature": temperature,
+        "stop": stop,
+        "params": {k: v for k, v in kwargs.items() if k not in _NON_KEY_KWARGS},
+    }
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def serialize_result(result: ChatResult) -> str:
+    """将ChatResult序列化为JSON字符串"""
+    return json.dumps({
+        "generations": [
+            {
+                "message": message_to_dict(generation.message),
+                "generation_info": generation.generation_info,
+            }
+            for generation in result.generations
+        ],
+        "llm_output": result.llm_output,
+    }, ensure_ascii=False, default=str)
+
+
+def deserialize_result(payload: str) -> ChatResult:
+    """从JSON字符串恢复ChatResult"""
+    data = json.loads(payload)
+    generations = []
+    for item in data.get("generations", []):
+        message = messages_from_dict([item["message"]])[0]
+        generations.append(ChatGeneration(message=message, generation_info=item.get("generation_info")))
+    return ChatResult(generations=generations, llm_output=data.get("llm_output"))
+
+
+class MemoryLRUCache:
+    """线程安全的进程内LRU缓存"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheBackend:
+    """SQLite持久化缓存层，适合单机多进程共享"""
+
+    def __init__(self, db_path: str, ttl_hours: float = 168):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=10)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if time.time() - created_at > self.ttl_seconds:
+            return None
+        return value
+
+    def set(self, key: str, value: str):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time()),
+            )
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+
+class RedisCacheBackend:
+    """Redis缓存层，适合多实例共享部署"""
+
+    def __init__(self, ttl_hours: float = 168, prefix: str = "llm_cache:"):
+        import redis
+
+        self.client = redis.Redis(
+            host=os.getenv("REDIS_HOST", "localhost"),
+            port=int(os.getenv("REDIS_PORT", 6379)),
+            password=os.getenv("REDIS_PASSWORD") or None,
+            db=int(os.getenv("REDIS_DB", 0)),
+            socket_timeout=2,
+        )
+        self.client.ping()
+        self.ttl_seconds = int(ttl_hours * 3600)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str):
+        self.client.setex(self.prefix + key, self.ttl_seconds, value)
+
+    def clear(self):
+        for key in self.client.scan_iter(f"{self.prefix}*"):
+            self.client.delete(key)
+
+
+# SQLite二级存储的默认位置（用户数据目录，与 default_config 的 data_dir 一致，不写入安装目录）
+DEFAULT_SQLITE_PATH = Path.home() / "Documents" / "TradingAgents" / "data" / "llm_cache" / "llm_cache.sqlite"
+
+# 自动缓存的最高温度：只有温度为 0 的确定性调用自动缓存，其余调用需显式 llm_cache=True
+DEFAULT_MAX_TEMPERATURE = 0.0
+
+
+class LLMResponseCache:
+    """LLM响应缓存：内存LRU + 可选持久化二级存储，带命中统计"""
+
+    def __init__(self, max_entries: int = 512, backend: Any = None,
+                 max_temperature: float = DEFAULT_MAX_TEMPERATURE, enabled: bool = True):
+        self.memory = MemoryLRUCache(max_entries)
+        self.backend = backend
+        self.max_temperature = max_temperature
+        self.enabled = enabled
+        self._stats_lock = threading.Lock()
+        self.stats = {"hits": 0, "memory_hits": 0, "backend_hits": 0, "misses": 0, "bypassed": 0}
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def should_cache(self, temperature: Optional[float], force: Optional[bool] = None) -> bool:
+        """判断本次调用是否使用缓存"""
+        if not self.enabled or force is False:
+            return False
+        if force is True:
+            return True
+        return temperature is not None and temperature <= self.max_temperature
+
+    def get(self, key: str) -> Optional[ChatResult]:
+        with trace_span("cache:llm", KIND_CACHE, tier="memory") as span:
+            payload = self.memory.get(key)
+            if payload is not None:
+                self._count("hits")
+                self._count("memory_hits")
+                span.set_attribute("cache_hit", True)
+                return deserialize_result(payload)
+
+            if self.backend is not None:
+                span.set_attribute("tier", "backend")
+                try:
+                    payload = self.backend.get(key)
+                except Exception as e:
+                    logger.warning(f"⚠️ LLM缓存二级存储读取失败: {e}")
+                    payload = None
+                if payload is not None:
+                    self.memory.set(key, payload)
+                    self._count("hits")
+                    self._count("backend_hits")
+                    span.set_attribute("cache_hit", True)
+                    return deserialize_result(payload)
+
+            self._count("misses")
+            span.set_attribute("cache_hit", False)
+            return None
+
+    def set(self, key: str, result: ChatResult):
+        # 带工具调用的响应同样可以缓存（工具规划轮次），空响应不缓存
+        if not result.generations:
+            return
+        payload = serialize_result(result)
+        self.memory.set(key, payload)
+        if self.backend is not None:
+            try:
+                self.backend.set(key, payload)
+            except Exception as e:
+                logger.warning(f"⚠️ LLM缓存二级存储写入失败: {e}")
+
+    def clear(self):
+        self.memory.clear()
+        if self.backend is not None:
+            self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self.memory)
+        return stats
+
+
+def _create_backend(backend_type: str, ttl_hours: float):
+    """根据配置创建二级存储，失败时回退为纯内存缓存"""
+    backend_type = backend_type.lower()
+    try:
+        if backend_type == "sqlite":
+            db_path = os.path.expanduser(os.getenv("TRADINGAGENTS_LLM_CACHE_PATH", str(DEFAULT_SQLITE_PATH)))
+            return SQLiteCacheBackend(db_path, ttl_hours)
+        if backend_type == "redis":
+            return RedisCacheBackend(ttl_hours)
+    except Exception as e:
+        logger.warning(f"⚠️ LLM缓存二级存储 {backend_type} 初始化失败，仅使用内存缓存: {e}")
+    return None
+
+
+# 全局缓存实例
+_llm_cache_instance: Optional[LLMResponseCache] = None
+
+def get_llm_cache() -> LLMResponseCache:
+    """获取全局LLM响应缓存实例"""
+    global _llm_cache_instance
+    if _llm_cache_instance is None:
+        ttl_hours = float(os.getenv("TRADINGAGENTS_LLM_CACHE_TTL_HOURS", 168))
+        _llm_cache_instance = LLMResponseCache(
+            max_entries=int(os.getenv("TRADINGAGENTS_LLM_CACHE_SIZE", 512)),
+            backend=_create_backend(os.getenv("TRADINGAGENTS_LLM_CACHE_BACKEND", "memory"), ttl_hours),
+            max_temperature=float(os.getenv("TRADINGAGENTS_LLM_CACHE_MAX_TEMPERATURE", DEFAULT_MAX_TEMPERATURE)),
+            enabled=os.getenv("TRADINGAGENTS_LLM_CACHE", "true").lower() == "true",
+        )
+    return _llm_cache_instance
+
+
+def set_llm_cache(cache: Optional[LLMResponseCache]):
+    """替换全局LLM响应缓存实例（测试或自定义存储时使用）"""
+    global _llm_cache_instance
+    _llm_cache_instance = cache
+
+
+def cached_invoke_kwargs(llm: Any) -> Dict[str, Any]:
+    """
+    确定性调用点（信号提取、反思）的 invoke 参数：经过响应缓存的适配器强制启用缓存，
+    其他模型（如 ChatOpenAI、ChatAnthropic）不认识 llm_cache 参数，不传
+    """
+    return {"llm_cache": True} if getattr(llm, "uses_llm_cache", False) else {}
+
+
+def cached_generate(
+    model: str,
+    temperature: Optional[float],
+    messages: List[Any],
+    stop: Optional[List[str]],
+    kwargs: Dict[str, Any],
+    generate: Callable[[], ChatResult],
+) -> Tuple[ChatResult, str]:
+    """
+    带缓存地执行一次生成调用
+
+    Args:
+        model: 模型名称
+        temperature: 温度参数
+        messages: 消息列表
+        stop: 停止词
+        kwargs: 生成参数，其中的 llm_cache 控制参数会被移除
+        generate: 未命中时执行的实际生成函数
+
+    Returns:
+        (生成结果, 缓存状态 "hit"/"miss"/"bypass")
+    """
+    force = kwargs.pop("llm_cache", None)
+
+    session = get_replay_session()
+    if session is not None:
+        # 录制/回放：回放的响应不产生实际调用，按缓存命中计
+        key = make_cache_key(model, messages, temperature, stop, **kwargs)
+        status = ["hit"]
+
+        def run():
+            result, status[0] = _cached_generate(model, temperature, messages, stop, kwargs, generate, force)
+            return serialize_result(result)
+
+        payload = session.call(KIND_LLM, "llm", model, key, run, group="llm")
+        return deserialize_result(payload), status[0]
+
+    return _cached_generate(model, temperature, messages, stop, kwargs, generate, force)
+
+
+def _cached_generate(
+    model: str,
+    temperature: Optional[float],
+    messages: List[Any],
+    stop: Optional[List[str]],
+    kwargs: Dict[str, Any],
+    generate: Callable[[], ChatResult],
+    force: Optional[bool],
+) -> Tuple[ChatResult, str]:
+    cache = get_llm_cache()
+
+    if not cache.should_cache(temperature, force):
+        cache._count("bypassed")
+        return generate(), "bypass"
+
+    key = make_cache_key(model, messages, temperature, stop, **kwargs)
+    cached = cache.get(key)
+    if cached is not None:
+        logger.debug(f"🎯 [LLM缓存] 命中: {model} ({key[:12]})")
+        return cached, "hit"
+
+    result = generate()
+    cache.set(key, result)
+    return result, "miss"
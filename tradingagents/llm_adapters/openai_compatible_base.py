@@ -5,11 +5,15 @@ OpenAI兼容适配器基类
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, AsyncIterator, ClassVar, Dict, Iterator, List, Optional, Union
 from langchain_core.messages import BaseMessage
-from langchain_core.outputs import ChatResult
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
 from langchain_openai import ChatOpenAI
-from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+
+from .llm_cache import cached_generate
+from .streaming import acached_stream, cached_stream, pop_tracking_kwargs
+from tradingagents.utils.token_counter import get_token_counter
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
@@ -34,6 +38,7 @@ class OpenAICompatibleBase(ChatOpenAI):
     OpenAI兼容适配器基类
     为所有支持OpenAI接口的LLM提供商提供统一实现
     """
+    uses_llm_cache: ClassVar[bool] = True  # 生成调用经过 LLM 响应缓存（见 llm_cache.cached_invoke_kwargs）
     
     def __init__(
         self,
@@ -115,27 +120,102 @@ class OpenAICompatibleBase(ChatOpenAI):
         # 记录开始时间
         start_time = time.time()
         
-        # 调用父类生成方法
-        result = super()._generate(messages, stop, run_manager, **kwargs)
+        # 调用父类生成方法（确定性调用优先读取LLM响应缓存）
+        result, cache_status = cached_generate(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(OpenAICompatibleBase, self)._generate(messages, stop, run_manager, **kwargs),
+        )
         
         # 记录token使用量
         if TOKEN_TRACKING_ENABLED:
             try:
-                self._track_token_usage(result, kwargs, start_time)
+                self._track_token_usage(result, kwargs, start_time, cache_status, messages)
             except Exception as e:
                 logger.error(f"⚠️ {self.provider_name} Token追踪失败: {e}", exc_info=True)
         
         return result
     
-    def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        流式生成聊天响应，流结束时记录token使用量
+        """
+        start_time = time.time()
+        tracking = pop_tracking_kwargs(kwargs)
+        kwargs.setdefault("stream_usage", True)
+
+        yield from cached_stream(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(OpenAICompatibleBase, self)._stream(messages, stop, run_manager, **kwargs),
+            lambda result, cache_status: self._track_stream_usage(result, tracking, start_time, cache_status, messages),
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        异步流式生成聊天响应，流结束时记录token使用量
+        """
+        start_time = time.time()
+        tracking = pop_tracking_kwargs(kwargs)
+        kwargs.setdefault("stream_usage", True)
+
+        async for chunk in acached_stream(
+            self.model_name, self.temperature, messages, stop, kwargs,
+            lambda: super(OpenAICompatibleBase, self)._astream(messages, stop, run_manager, **kwargs),
+            lambda result, cache_status: self._track_stream_usage(result, tracking, start_time, cache_status, messages),
+        ):
+            yield chunk
+
+    def _track_stream_usage(self, result: ChatResult, tracking: Dict, start_time: float,
+                            cache_status: str, messages: List[BaseMessage]):
+        """流结束时追踪token使用量"""
+        if not TOKEN_TRACKING_ENABLED:
+            return
+        try:
+            self._track_token_usage(result, tracking, start_time, cache_status, messages)
+        except Exception as e:
+            logger.error(f"⚠️ {self.provider_name} Token追踪失败: {e}", exc_info=True)
+
+    def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float,
+                           cache_status: str = "bypass", messages: Optional[List[BaseMessage]] = None):
         """追踪token使用量"""
         
         # 提取token使用信息
         if hasattr(result, 'llm_output') and result.llm_output:
-            token_usage = result.llm_output.get('token_usage', {})
+            token_usage = result.llm_output.get('token_usage', {}) or {}
             
             input_tokens = token_usage.get('prompt_tokens', 0)
             output_tokens = token_usage.get('completion_tokens', 0)
+
+            # 提供商未返回使用量时，使用Token计数服务估算
+            if input_tokens == 0 and output_tokens == 0 and messages:
+                counter = get_token_counter()
+                input_tokens = counter.count_messages(messages, self.model_name)
+                output_tokens = sum(counter.count_batch(
+                    [str(generation.message.content) for generation in result.generations],
+                    self.model_name
+                ))
+                logger.debug(f"🔍 {self.provider_name} 使用估算token: 输入={input_tokens}, 输出={output_tokens}")
+
+            # 缓存命中不产生实际调用，只记录节省的token
+            if cache_status != "bypass":
+                token_tracker.track_cache_event(
+                    self.provider_name, self.model_name, cache_status == "hit",
+                    input_tokens, output_tokens
+                )
+            if cache_status == "hit":
+                logger.info(f"🎯 {self.provider_name} LLM缓存命中，节省token: 输入={input_tokens}, 输出={output_tokens}")
+                return
             
             if input_tokens > 0 or output_tokens > 0:
                 # 生成会话ID
@@ -0,0 +1,251 @@
+"""
+LLM流式输出工具
+为各适配器的 _stream/_astream 提供统一实现：
+- 与 _generate 共用LLM响应缓存（命中时一次性返回完整内容）
+- 流结束后合并分块，得到与非流式调用相同结构的 ChatResult，用于token统计和写入缓存
+- 录制/回放：录制合并后的完整结果，回放时一次性返回（与 cached_generate 共用请求键和分组）
+"""
+
+import json
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.messages import AIMessageChunk, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from .llm_cache import deserialize_result, get_llm_cache, make_cache_key, serialize_result
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.replay import KIND_LLM, get_replay_session
+logger = get_logger('agents')
+
+
+# 只用于token统计、不能传给模型API的调用参数
+TRACKING_KWARGS = ("session_id", "analysis_type")
+
+
+def pop_tracking_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """从调用参数中取出会话统计参数"""
+    return {name: kwargs.pop(name) for name in TRACKING_KWARGS if name in kwargs}
+
+
+def result_to_chunk(result: ChatResult) -> ChatGenerationChunk:
+    """将完整结果转换为单个流式分块（用于缓存命中）"""
+    message = result.generations[0].message
+    tool_call_chunks = [
+        {
+            "name": call.get("name"),
+            "args": json.dumps(call.get("args", {}), ensure_ascii=False),
+            "id": call.get("id"),
+            "index": index,
+        }
+        for index, call in enumerate(getattr(message, "tool_calls", None) or [])
+    ]
+    return ChatGenerationChunk(
+        message=AIMessageChunk(
+            content=message.content,
+            tool_call_chunks=tool_call_chunks,
+            usage_metadata=getattr(message, "usage_metadata", None),
+        )
+    )
+
+
+def chunks_to_result(chunks: List[ChatGenerationChunk], model: Optional[str] = None) -> ChatResult:
+    """
+    合并流式分块为完整结果
+
+    usage_metadata（流末尾的使用量）转换为 llm_output["token_usage"]，
+    与非流式调用的结构保持一致，便于复用现有的token统计逻辑。
+    """
+    if not chunks:
+        return ChatResult(generations=[ChatGeneration(message=message_chunk_to_message(AIMessageChunk(content="")))])
+
+    merged = chunks[0]
+    for chunk in chunks[1:]:
+        merged = merged + chunk
+
+    message = message_chunk_to_message(merged.message)
+    usage = getattr(merged.message, "usage_metadata", None) or {}
+    llm_output = {
+        "token_usage": {
+            "prompt_tokens": usage.get("input_tokens", 0),
+            "completion_tokens": usage.get("output_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0),
+        },
+        "model_name": model,
+    }
+    return ChatResult(
+        generations=[ChatGeneration(message=message, generation_info=merged.generation_info)],
+        llm_output=llm_output,
+    )
+
+
+def _lookup(model, temperature, messages, stop, kwargs):
+    """返回 (缓存, 缓存键, 命中结果)，不缓存时缓存键为 None"""
+    force = kwargs.pop("llm_cache", None)
+    cache = get_llm_cache()
+    if not cache.should_cache(temperature, force):
+        cache._count("bypassed")
+        return cache, None, None
+    key = make_cache_key(model, messages, temperature, stop, **kwargs)
+    return cache, key, cache.get(key)
+
+
+class _LiveStream(Exception):
+    """回放时没有录制记录（非严格模式），改为实时流式调用"""
+
+
+def _go_live():
+    raise _LiveStream()
+
+
+def _replayed(session, model: str, key: str) -> Optional[ChatResult]:
+    """回放录制的完整结果；没有录制记录且非严格模式时返回 None"""
+    try:
+        payload = session.call(KIND_LLM, "llm", model, key, _go_live, group="llm")
+    except _LiveStream:
+        return None
+    return deserialize_result(payload)
+
+
+def _record(session, model: str, key: str, result: Optional[ChatResult], started: float,
+            error: Optional[BaseException] = None):
+    """录制流式调用：流结束后保存合并的完整结果（或异常），与 cached_generate 的录制格式相同"""
+    def value():
+        if error is not None:
+            raise error
+        return serialize_result(result)
+
+    session.call(KIND_LLM, "llm", model, key, value, group="llm",
+                 latency_s=time.perf_counter() - started)
+
+
+def cached_stream(
+    model: str,
+    temperature: Optional[float],
+    messages: List[Any],
+    stop: Optional[List[str]],
+    kwargs: Dict[str, Any],
+    stream: Callable[[], Iterator[ChatGenerationChunk]],
+    on_complete: Callable[[ChatResult, str], None],
+) -> Iterator[ChatGenerationChunk]:
+    """
+    带缓存地执行一次流式生成
+
+    录制/回放会话开启时，录制流结束后合并的完整结果，回放时一次性返回（按缓存命中计）
+
+    Args:
+        model: 模型名称
+        temperature: 温度参数
+        messages: 消息列表
+        stop: 停止词
+        kwargs: 生成参数，其中的 llm_cache 控制参数会被移除
+        stream: 未命中时执行的实际流式生成函数
+        on_complete: 流结束后的回调，参数为 (完整结果, 缓存状态 "hit"/"miss"/"bypass")
+    """
+    session = get_replay_session()
+    if session is None:
+        yield from _cached_stream(model, temperature, messages, stop, kwargs, stream, on_complete)
+        return
+
+    replay_key = make_cache_key(model, messages, temperature, stop, **kwargs)
+    if not session.recording:
+        replayed = _replayed(session, model, replay_key)
+        if replayed is not None:
+            yield result_to_chunk(replayed)
+            on_complete(replayed, "hit")
+            return
+        yield from _cached_stream(model, temperature, messages, stop, kwargs, stream, on_complete)
+        return
+
+    started = time.perf_counter()
+    completed = []
+    try:
+        yield from _cached_stream(model, temperature, messages, stop, kwargs, stream,
+                                  lambda result, status: completed.append((result, status)))
+    except Exception as e:
+        _record(session, model, replay_key, None, started, e)
+        raise
+    result, status = completed[0]
+    _record(session, model, replay_key, result, started)
+    on_complete(result, status)
+
+
+def _cached_stream(model, temperature, messages, stop, kwargs, stream, on_complete):
+    cache, key, cached = _lookup(model, temperature, messages, stop, kwargs)
+    if cached is not None:
+        logger.debug(f"🎯 [LLM缓存] 流式命中: {model} ({key[:12]})")
+        yield result_to_chunk(cached)
+        on_complete(cached, "hit")
+        return
+
+    chunks = []
+    for chunk in stream():
+        chunks.append(chunk)
+        yield chunk
+
+    result = chunks_to_result(chunks, model)
+    if key is not None:
+        cache.set(key, result)
+    on_complete(result, "miss" if key is not None else "bypass")
+
+
+async def acached_stream(
+    model: str,
+    temperature: Optional[float],
+    messages: List[Any],
+    stop: Optional[List[str]],
+    kwargs: Dict[str, Any],
+    astream: Callable[[], AsyncIterator[ChatGenerationChunk]],
+    on_complete: Callable[[ChatResult, str], None],
+) -> AsyncIterator[ChatGenerationChunk]:
+    """cached_stream 的异步版本"""
+    session = get_replay_session()
+    if session is None:
+        async for chunk in _acached_stream(model, temperature, messages, stop, kwargs, astream, on_complete):
+            yield chunk
+        return
+
+    replay_key = make_cache_key(model, messages, temperature, stop, **kwargs)
+    if not session.recording:
+        replayed = _replayed(session, model, replay_key)
+        if replayed is not None:
+            yield result_to_chunk(replayed)
+            on_complete(replayed, "hit")
+            return
+        async for chunk in _acached_stream(model, temperature, messages, stop, kwargs, astream, on_complete):
+            yield chunk
+        return
+
+    started = time.perf_counter()
+    completed = []
+    try:
+        async for chunk in _acached_stream(model, temperature, messages, stop, kwargs, astream,
+                                           lambda result, status: completed.append((result, status))):
+            yield chunk
+    except Exception as e:
+        _record(session, model, replay_key, None, started, e)
+        raise
+    result, status = completed[0]
+    _record(session, model, replay_key, result, started)
+    on_complete(result, status)
+
+
+async def _acached_stream(model, temperature, messages, stop, kwargs, astream, on_complete):
+    cache, key, cached = _lookup(model, temperature, messages, stop, kwargs)
+    if cached is not None:
+        logger.debug(f"🎯 [LLM缓存] 流式命中: {model} ({key[:12]})")
+        yield result_to_chunk(cached)
+        on_complete(cached, "hit")
+        return
+
+    chunks = []
+    async for chunk in astream():
+        chunks.append(chunk)
+        yield chunk
+
+    result = chunks_to_result(chunks, model)
+    if key is not None:
+        cache.set(key, result)
+    on_complete(result, "miss" if key is not None else "bypass")
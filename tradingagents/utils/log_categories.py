@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+日志分类：热路径日志的开关、采样与限流
+
+股票代码追踪、数据预览、工具参数等日志在数据层每次调用都会输出多行，且消息中的
+字符串拼接（预览截断、list(str(symbol)) 等）即使被日志级别过滤也会先执行。
+这里按名称划分日志类别，每个类别可在运行时：
+
+- on / off：开启或关闭
+- sample:N：每 N 条保留 1 条
+- rate:R：每秒最多 R 条
+
+消息使用 %-格式参数、可调用对象或 LazyPreview 延迟构造，类别关闭或级别不满足时几乎没有开销。
+
+配置来源（后者覆盖前者）：logging.toml 的 [logging.categories]、
+环境变量 TRADINGAGENTS_LOG_CATEGORIES（如 "symbol-trace=off,data-preview=sample:10"）、
+运行时调用 configure_log_category()
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Union
+
+# 注意：这里不能导入 logging_manager，会造成循环导入
+
+
+# 内置类别
+SYMBOL_TRACE = 'symbol-trace'   # 股票代码在各层之间的传递追踪
+DATA_PREVIEW = 'data-preview'   # 数据/结果内容预览
+TOOL_ARGS = 'tool-args'         # 工具调用参数
+
+CATEGORY_ENV = 'TRADINGAGENTS_LOG_CATEGORIES'
+
+
+class LazyPreview:
+    """截断预览，只有在日志真正被格式化时才转换为字符串"""
+    __slots__ = ('value', 'limit')
+
+    def __init__(self, value: Any, limit: int = 200):
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = str(self.value)
+        return text[:self.limit] + '...' if len(text) > self.limit else text
+
+    __repr__ = __str__
+
+
+class LogCategory:
+    """单个日志类别的开关、采样与限流状态"""
+
+    def __init__(self, name: str, spec: str = 'on'):
+        self.name = name
+        self.enabled = True
+        self.sample_every = 1
+        self.rate_per_sec = 0.0
+        self.emitted = 0
+        self.suppressed = 0
+        self._seen = 0
+        self._tokens = 0.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+        self.configure(spec)
+
+    def configure(self, spec: Union[str, bool]):
+        """
+        Args:
+            spec: 'on' / 'off' / 'sample:N' / 'rate:R'，也接受 True/False
+        """
+        if isinstance(spec, bool):
+            spec = 'on' if spec else 'off'
+        spec = str(spec).strip().lower()
+        mode, _, value = spec.partition(':')
+        if mode in ('on', 'true', '1', ''):
+            self.enabled, self.sample_every, self.rate_per_sec = True, 1, 0.0
+        elif mode in ('off', 'false', '0'):
+            self.enabled = False
+        elif mode == 'sample':
+            self.enabled, self.sample_every, self.rate_per_sec = True, max(1, int(value)), 0.0
+        elif mode == 'rate':
+            self.enabled, self.sample_every, self.rate_per_sec = True, 1, float(value)
+            self._tokens = self.rate_per_sec
+        else:
+            raise ValueError(f"无效的日志类别配置: {self.name}={spec}")
+
+    @property
+    def spec(self) -> str:
+        if not self.enabled:
+            return 'off'
+        if self.sample_every > 1:
+            return f'sample:{self.sample_every}'
+        if self.rate_per_sec > 0:
+            return f'rate:{self.rate_per_sec:g}'
+        return 'on'
+
+    def allow(self) -> bool:
+        """本条日志是否输出（计入采样/限流）"""
+        if not self.enabled:
+            return False
+        if self.sample_every > 1:
+            self._seen += 1
+            if (self._seen - 1) % self.sample_every:
+                self.suppressed += 1
+                return False
+        elif self.rate_per_sec > 0:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate_per_sec,
+                                   self._tokens + (now - self._last_refill) * self.rate_per_sec)
+                self._last_refill = now
+                if self._tokens < 1:
+                    self.suppressed += 1
+                    return False
+                self._tokens -= 1
+        self.emitted += 1
+        return True
+
+    def enabled_for(self, logger: logging.Logger, level: int) -> bool:
+        """先检查开关和日志级别，再计入采样/限流"""
+        return self.enabled and logger.isEnabledFor(level) and self.allow()
+
+    def log(self, logger: logging.Logger, level: int, msg, *args, **kwargs):
+        """
+        按类别输出日志
+
+        Args:
+            msg: 格式字符串，或返回消息文本的无参可调用对象（仅在输出时调用）
+        """
+        if not self.enabled_for(logger, level):
+            return
+        if callable(msg):
+            msg = msg()
+        kwargs['stacklevel'] = kwargs.get('stacklevel', 1) + 1
+        logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, logger: logging.Logger, msg, *args, **kwargs):
+        kwargs['stacklevel'] = kwargs.get('stacklevel', 1) + 1
+        self.log(logger, logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, logger: logging.Logger, msg, *args, **kwargs):
+        kwargs['stacklevel'] = kwargs.get('stacklevel', 1) + 1
+        self.log(logger, logging.INFO, msg, *args, **kwargs)
+
+    def preview(self, value: Any, limit: int = 200) -> Optional[LazyPreview]:
+        """用于 extra 字段的结果预览：类别关闭或被采样掉时返回 None"""
+        if value is None or not self.allow():
+            return None
+        return LazyPreview(value, limit)
+
+
+_categories: Dict[str, LogCategory] = {}
+_categories_lock = threading.Lock()
+
+
+def get_log_category(name: str) -> LogCategory:
+    """获取日志类别（不存在时以默认开启状态创建）"""
+    category = _categories.get(name)
+    if category is None:
+        with _categories_lock:
+            category = _categories.setdefault(name, LogCategory(name))
+    return category
+
+
+def configure_log_category(name: str, spec: Union[str, bool]) -> LogCategory:
+    """运行时调整日志类别，如 configure_log_category('symbol-trace', 'sample:20')"""
+    category = get_log_category(name)
+    category.configure(spec)
+    return category
+
+
+def configure_log_categories(specs: Union[str, Dict[str, Any], None]):
+    """
+    批量配置日志类别
+
+    Args:
+        specs: {'symbol-trace': 'off'} 或 "symbol-trace=off,data-preview=rate:5"
+    """
+    if not specs:
+        return
+    if isinstance(specs, str):
+        specs = dict(item.split('=', 1) for item in specs.split(',') if '=' in item)
+    for name, spec in specs.items():
+        configure_log_category(name.strip(), spec)
+
+
+def get_log_category_stats() -> Dict[str, Dict[str, Any]]:
+    """各类别当前配置及输出/抑制条数"""
+    return {
+        name: {'spec': c.spec, 'emitted': c.emitted, 'suppressed': c.suppressed}
+        for name, c in sorted(_categories.items())
+    }
+
+
+def apply_log_category_config(config: Optional[Dict[str, Any]] = None):
+    """应用配置文件中的类别设置，环境变量优先"""
+    configure_log_categories(config)
+    configure_log_categories(os.getenv(CATEGORY_ENV))
+
+
+def trace_symbol(logger: logging.Logger, where: str, symbol: Any):
+    """股票代码追踪：记录某一层接收到的原始代码、长度和逐字符内容"""
+    trace = get_log_category(SYMBOL_TRACE)
+    if not trace.enabled_for(logger, logging.INFO):
+        return
+    text = str(symbol)
+    logger.info("🔍 [股票代码追踪] %s 接收到的股票代码: '%s' (类型: %s)", where, symbol, type(symbol), stacklevel=2)
+    logger.info("🔍 [股票代码追踪] 股票代码长度: %d", len(text), stacklevel=2)
+    logger.info("🔍 [股票代码追踪] 股票代码字符: %s", list(text), stacklevel=2)
+
+
+for _name in (SYMBOL_TRACE, DATA_PREVIEW, TOOL_ARGS):
+    get_log_category(_name)
+apply_log_category_config()
@@ -4,16 +4,26 @@
 提供项目级别的日志配置和管理功能
 """
 
+import atexit
+import copy
 import logging
 import logging.handlers
 import os
 import sys
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
 import json
 import toml
 
+from tradingagents.utils.log_categories import apply_log_category_config
+from tradingagents.utils.logging_queue import (
+    DEFAULT_HIGH_WATER,
+    DEFAULT_QUEUE_SIZE,
+    DEFAULT_SHED_SAMPLE_RATE,
+    QueuedLoggingPipeline,
+)
+
 # 注意：这里不能导入自己，会造成循环导入
 # logger将在类定义后创建
 
@@ -33,8 +43,9 @@ class ColoredFormatter(logging.Formatter):
     }
     
     def format(self, record):
-        # 添加颜色
+        # 添加颜色（在副本上修改，避免颜色代码写入文件等其他处理器）
         if hasattr(record, 'levelname') and record.levelname in self.COLORS:
+            record = copy.copy(record)
             record.levelname = f"{self.COLORS[record.levelname]}{record.levelname}{self.COLORS['RESET']}"
         
         return super().format(record)
@@ -75,6 +86,7 @@ class TradingAgentsLogger:
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or self._load_default_config()
         self.loggers: Dict[str, logging.Logger] = {}
+        self.pipeline: Optional[QueuedLoggingPipeline] = None
         self._setup_logging()
     
     def _load_default_config(self) -> Dict[str, Any]:
@@ -125,9 +137,26 @@ class TradingAgentsLogger:
             'docker': {
                 'enabled': os.getenv('DOCKER_CONTAINER', 'false').lower() == 'true',
                 'stdout_only': True  # Docker环境只输出到stdout
-            }
+            },
+            'queue': self._default_queue_config()
+        }
+
+    def _default_queue_config(self) -> Dict[str, Any]:
+        """日志队列默认配置，可通过 TRADINGAGENTS_LOG_ASYNC=false 关闭"""
+        return {
+            'enabled': os.getenv('TRADINGAGENTS_LOG_ASYNC', 'true').lower() != 'false',
+            'queue_size': DEFAULT_QUEUE_SIZE,
+            'high_water': DEFAULT_HIGH_WATER,
+            'shed_sample_rate': DEFAULT_SHED_SAMPLE_RATE
         }
 
+    def _merge_queue_config(self, queue_config: Dict[str, Any]) -> Dict[str, Any]:
+        """配置文件中的队列设置，显式设置的环境变量优先"""
+        merged = {**self._default_queue_config(), **queue_config}
+        if os.getenv('TRADINGAGENTS_LOG_ASYNC') is not None:
+            merged['enabled'] = os.getenv('TRADINGAGENTS_LOG_ASYNC').lower() != 'false'
+        return merged
+
     def _load_config_file(self) -> Optional[Dict[str, Any]]:
         """从配置文件加载日志配置"""
         # 确定配置文件路径
@@ -170,6 +199,8 @@ class TradingAgentsLogger:
                 'enabled': is_docker,
                 'stdout_only': logging_config.get('docker', {}).get('stdout_only', True)
             },
+            'queue': self._merge_queue_config(logging_config.get('queue', {})),
+            'categories': logging_config.get('categories', {}),
             'performance': logging_config.get('performance', {}),
             'security': logging_config.get('security', {}),
             'business': logging_config.get('business', {})
@@ -186,21 +217,42 @@ class TradingAgentsLogger:
         root_logger = logging.getLogger()
         root_logger.setLevel(getattr(logging, self.config['level']))
         
-        # 清除现有处理器
+        # 清除现有处理器（包括上一次配置的日志队列）
+        _stop_active_pipeline()
         root_logger.handlers.clear()
         
-        # 添加处理器
-        self._add_console_handler(root_logger)
+        # 创建处理器
+        handlers: List[logging.Handler] = []
+        self._add_console_handler(handlers)
         
         if not self.config['docker']['enabled'] or not self.config['docker']['stdout_only']:
-            self._add_file_handler(root_logger)
+            self._add_file_handler(handlers)
             if self.config['handlers']['structured']['enabled']:
-                self._add_structured_handler(root_logger)
+                self._add_structured_handler(handlers)
+        
+        # 默认通过队列由后台线程写入，业务线程只负责入队
+        queue_config = self.config.get('queue') or {}
+        if queue_config.get('enabled', False) and handlers:
+            self.pipeline = QueuedLoggingPipeline(
+                handlers,
+                queue_size=int(queue_config.get('queue_size', DEFAULT_QUEUE_SIZE)),
+                high_water=float(queue_config.get('high_water', DEFAULT_HIGH_WATER)),
+                shed_sample_rate=int(queue_config.get('shed_sample_rate', DEFAULT_SHED_SAMPLE_RATE))
+            )
+            self.pipeline.start()
+            _set_active_pipeline(self.pipeline)
+            root_logger.addHandler(self.pipeline.handler)
+        else:
+            for handler in handlers:
+                root_logger.addHandler(handler)
         
         # 配置特定日志器
         self._configure_specific_loggers()
+
+        # 热路径日志类别（股票代码追踪、数据预览、工具参数）的开关/采样/限流
+        apply_log_category_config(self.config.get('categories'))
     
-    def _add_console_handler(self, logger: logging.Logger):
+    def _add_console_handler(self, handlers: List[logging.Handler]):
         """添加控制台处理器"""
         if not self.config['handlers']['console']['enabled']:
             return
@@ -216,9 +268,9 @@ class TradingAgentsLogger:
             formatter = logging.Formatter(self.config['format']['console'])
         
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
-    def _add_file_handler(self, logger: logging.Logger):
+    def _add_file_handler(self, handlers: List[logging.Handler]):
         """添加文件处理器"""
         if not self.config['handlers']['file']['enabled']:
             return
@@ -242,9 +294,9 @@ class TradingAgentsLogger:
         
         formatter = logging.Formatter(self.config['format']['file'])
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
     
-    def _add_structured_handler(self, logger: logging.Logger):
+    def _add_structured_handler(self, handlers: List[logging.Handler]):
         """添加结构化日志处理器"""
         log_dir = Path(self.config['handlers']['structured']['directory'])
         log_file = log_dir / 'tradingagents_structured.log'
@@ -261,7 +313,7 @@ class TradingAgentsLogger:
         
         formatter = StructuredFormatter()
         structured_handler.setFormatter(formatter)
-        logger.addHandler(structured_handler)
+        handlers.append(structured_handler)
     
     def _configure_specific_loggers(self):
         """配置特定的日志器"""
@@ -282,6 +334,32 @@ class TradingAgentsLogger:
         else:
             return int(size_str)
     
+    def disable_console_output(self):
+        """移除输出到 stdout/stderr 的处理器（CLI 模式保持界面清爽）"""
+        console_streams = (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__)
+
+        def is_console(handler: logging.Handler) -> bool:
+            if not isinstance(handler, logging.StreamHandler) or isinstance(handler, logging.FileHandler):
+                return False
+            stream = getattr(handler, 'stream', None)
+            return stream in console_streams or getattr(stream, 'name', None) in ('<stderr>', '<stdout>')
+
+        root_logger = logging.getLogger()
+        for handler in root_logger.handlers[:]:
+            if is_console(handler):
+                root_logger.removeHandler(handler)
+        if self.pipeline is not None:
+            self.pipeline.remove_handlers(is_console)
+
+    def get_queue_stats(self) -> Optional[Dict[str, int]]:
+        """日志队列统计（入队/采样丢弃/队列满丢弃），未启用队列时返回 None"""
+        return self.pipeline.stats.to_dict() if self.pipeline is not None else None
+
+    def flush(self):
+        """等待队列中的日志写出"""
+        if self.pipeline is not None:
+            self.pipeline.flush()
+
     def get_logger(self, name: str) -> logging.Logger:
         """获取指定名称的日志器"""
         if name not in self.loggers:
@@ -389,6 +467,24 @@ class TradingAgentsLogger:
 # 全局日志管理器实例
 _logger_manager: Optional[TradingAgentsLogger] = None
 
+# 当前生效的日志队列（重新配置或进程退出时停止并写完）
+_active_pipeline: Optional[QueuedLoggingPipeline] = None
+
+
+def _set_active_pipeline(pipeline: QueuedLoggingPipeline):
+    global _active_pipeline
+    _active_pipeline = pipeline
+
+
+def _stop_active_pipeline():
+    global _active_pipeline
+    if _active_pipeline is not None:
+        _active_pipeline.close()
+        _active_pipeline = None
+
+
+atexit.register(_stop_active_pipeline)
+
 
 def get_logger_manager() -> TradingAgentsLogger:
     """获取全局日志管理器实例"""
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+非阻塞日志队列
+业务线程只把日志记录放入有界队列，格式化和文件/控制台写入由后台线程完成；
+队列繁忙时按策略对 DEBUG/INFO 日志采样或丢弃，WARNING 及以上尽量保留
+"""
+
+import copy
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional
+
+# 注意：这里不能导入 logging_manager，会造成循环导入
+
+
+# 默认队列容量（条）
+DEFAULT_QUEUE_SIZE = 10000
+
+# 队列占用超过该比例后，DEBUG/INFO 日志只保留 1/N
+DEFAULT_HIGH_WATER = 0.8
+DEFAULT_SHED_SAMPLE_RATE = 10
+
+# WARNING 及以上日志在队列满时最多等待的秒数
+DEFAULT_BLOCK_TIMEOUT = 1.0
+
+# 丢弃统计的汇报间隔（秒）
+DROP_REPORT_INTERVAL = 30.0
+
+# 可以安全延迟到后台线程格式化的参数类型
+_IMMUTABLE_ARG_TYPES = (str, int, float, bool, type(None), bytes, type)
+
+
+def _args_immutable(args) -> bool:
+    if isinstance(args, tuple):
+        return all(isinstance(arg, _IMMUTABLE_ARG_TYPES) for arg in args)
+    return False
+
+
+@dataclass
+class QueueLoggingStats:
+    """日志队列统计"""
+    enqueued: int = 0
+    shed: int = 0      # 队列繁忙时按采样策略丢弃
+    dropped: int = 0   # 队列已满时丢弃
+
+    def to_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """有界队列处理器：入队不阻塞业务线程，繁忙时对低级别日志降采样"""
+
+    def __init__(self, log_queue: queue.Queue, high_water: float = DEFAULT_HIGH_WATER,
+                 shed_sample_rate: int = DEFAULT_SHED_SAMPLE_RATE,
+                 block_timeout: float = DEFAULT_BLOCK_TIMEOUT):
+        super().__init__(log_queue)
+        self.high_water_mark = max(1, int(log_queue.maxsize * high_water)) if log_queue.maxsize > 0 else 0
+        self.shed_sample_rate = max(1, int(shed_sample_rate))
+        self.block_timeout = block_timeout
+        self.stats = QueueLoggingStats()
+        self._shed_counter = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        与标准 QueueHandler 不同，这里不在调用线程格式化整条日志：
+        参数均为不可变类型时，消息拼接也延迟到后台线程
+        """
+        if record.args and not _args_immutable(record.args):
+            # 可变参数可能在写入前被修改，先固定消息文本（在副本上修改，不影响其他处理器）
+            record = copy.copy(record)
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def _admit_low_level(self) -> bool:
+        if self.high_water_mark and self.queue.qsize() >= self.high_water_mark:
+            self._shed_counter += 1
+            if self._shed_counter % self.shed_sample_rate:
+                self.stats.shed += 1
+                return False
+        return True
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            low_level = record.levelno <= logging.INFO
+            if low_level and not self._admit_low_level():
+                return
+            prepared = self.prepare(record)
+            try:
+                if low_level:
+                    self.queue.put_nowait(prepared)
+                else:
+                    self.queue.put(prepared, timeout=self.block_timeout)
+            except queue.Full:
+                self.stats.dropped += 1
+                return
+            self.stats.enqueued += 1
+        except Exception:
+            self.handleError(record)
+
+
+class ReportingQueueListener(logging.handlers.QueueListener):
+    """后台写入线程，定期把丢弃数量作为一条 WARNING 日志写出"""
+
+    def __init__(self, log_queue: queue.Queue, handlers: Iterable[logging.Handler],
+                 stats: QueueLoggingStats):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.stats = stats
+        self._reported = 0
+        self._last_report = 0.0
+
+    def handle(self, record: logging.LogRecord):
+        super().handle(record)
+        lost = self.stats.shed + self.stats.dropped
+        if lost > self._reported and time.monotonic() - self._last_report >= DROP_REPORT_INTERVAL:
+            self.report_drops()
+
+    def report_drops(self):
+        lost = self.stats.shed + self.stats.dropped
+        if lost <= self._reported:
+            return
+        notice = logging.LogRecord(
+            'tradingagents.logging', logging.WARNING, __file__, 0,
+            f"⚠️ 日志队列繁忙，已累计丢弃 {lost} 条 DEBUG/INFO 日志"
+            f"（采样 {self.stats.shed}，队列满 {self.stats.dropped}）",
+            None, None,
+        )
+        self._reported = lost
+        self._last_report = time.monotonic()
+        super().handle(notice)
+
+    def stop(self):
+        super().stop()
+        self.report_drops()
+
+
+class QueuedLoggingPipeline:
+    """根日志器 -> 有界队列 -> 后台线程 -> 实际处理器"""
+
+    def __init__(self, handlers: List[logging.Handler], queue_size: int = DEFAULT_QUEUE_SIZE,
+                 high_water: float = DEFAULT_HIGH_WATER,
+                 shed_sample_rate: int = DEFAULT_SHED_SAMPLE_RATE,
+                 block_timeout: float = DEFAULT_BLOCK_TIMEOUT):
+        self.queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.handler = BoundedQueueHandler(self.queue, high_water, shed_sample_rate, block_timeout)
+        self.listener = ReportingQueueListener(self.queue, handlers, self.handler.stats)
+        self._lock = threading.Lock()
+        self._running = False
+
+    @property
+    def handlers(self) -> List[logging.Handler]:
+        return list(self.listener.handlers)
+
+    @property
+    def stats(self) -> QueueLoggingStats:
+        return self.handler.stats
+
+    def start(self):
+        with self._lock:
+            if not self._running:
+                self.listener.start()
+                self._running = True
+
+    def stop(self):
+        """等待队列写完并停止后台线程"""
+        with self._lock:
+            if self._running:
+                self.listener.stop()
+                self._running = False
+
+    def flush(self, timeout: float = 5.0):
+        """等待队列中已有的日志写出（测试和进程退出前使用）"""
+        deadline = time.monotonic() + timeout
+        while not self.queue.empty() and time.monotonic() < deadline:
+            time.sleep(0.005)
+        for handler in self.listener.handlers:
+            handler.flush()
+
+    def remove_handlers(self, predicate) -> List[logging.Handler]:
+        """移除满足条件的处理器，返回被移除的处理器"""
+        removed = [h for h in self.listener.handlers if predicate(h)]
+        if removed:
+            self.listener.handlers = tuple(h for h in self.listener.handlers if not predicate(h))
+        return removed
+
+    def close(self):
+        self.stop()
+        for handler in self.listener.handlers:
+            try:
+                handler.close()
+            except Exception:
+                pass
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+数据源与 LLM 流量的录制/回放
+
+录制模式下，数据源调用（Tushare、AKShare、通达信、yfinance、Finnhub、新闻源等）的返回值，
+以及每次 LLM 请求的响应，连同耗时一起写入内容寻址的归档目录：
+
+    <归档目录>/index.jsonl            每次调用一行：请求键、内容哈希、耗时、相对开始时间
+    <归档目录>/blobs/ab/abcdef...     响应内容（pickle + zlib），相同内容只保存一份
+
+回放模式下按请求键返回录制的内容，并按原始耗时（可缩放）等待，无需网络即可完整复现一次分析。
+请求键不匹配时（例如提示词中含有当前时间），按同一接口的录制顺序取下一条；仍然没有时
+按 strict 设置报错或调用真实接口。
+
+配置：环境变量 TRADINGAGENTS_REPLAY_MODE=record/replay、TRADINGAGENTS_REPLAY_DIR、
+TRADINGAGENTS_REPLAY_LATENCY_SCALE（回放耗时倍数，0 为不等待）、TRADINGAGENTS_REPLAY_STRICT，
+或在代码中使用 recording()/replaying() 上下文
+"""
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+# 调用类型
+KIND_PROVIDER = 'provider'
+KIND_LLM = 'llm'
+
+REPLAY_MODE_ENV = 'TRADINGAGENTS_REPLAY_MODE'
+REPLAY_DIR_ENV = 'TRADINGAGENTS_REPLAY_DIR'
+REPLAY_LATENCY_ENV = 'TRADINGAGENTS_REPLAY_LATENCY_SCALE'
+REPLAY_STRICT_ENV = 'TRADINGAGENTS_REPLAY_STRICT'
+
+INDEX_FILE = 'index.jsonl'
+BLOB_DIR = 'blobs'
+COMPRESS_LEVEL = 6
+
+
+class ReplayMissError(LookupError):
+    """严格回放模式下请求没有录制记录"""
+
+
+class ReplayedCallError(RuntimeError):
+    """录制时接口抛出的异常，回放时原样复现"""
+
+
+def request_key(*parts: Any) -> str:
+    """请求键：各部分规范化为 JSON 后的 SHA-256"""
+    text = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class ReplayEntry:
+    """一次录制的调用"""
+    seq: int
+    kind: str
+    provider: str
+    name: str
+    key: str
+    group: str
+    blob: Optional[str]
+    latency_ms: float
+    offset_ms: float
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ReplayStats:
+    """录制/回放统计"""
+    recorded: int = 0
+    replayed: int = 0
+    fallback: int = 0   # 请求键不匹配，按录制顺序回放
+    misses: int = 0     # 没有录制记录
+    slept_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ReplayArchive:
+    """内容寻址的录制归档目录"""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.index_path = self.directory / INDEX_FILE
+        self._lock = threading.Lock()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / BLOB_DIR / digest[:2] / digest
+
+    def put(self, value: Any) -> str:
+        """保存内容，返回内容哈希（已存在时不重复写入）"""
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(zlib.compress(payload, COMPRESS_LEVEL))
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> Any:
+        return pickle.loads(zlib.decompress(self._blob_path(digest).read_bytes()))
+
+    def append(self, entry: ReplayEntry):
+        line = json.dumps(entry.to_dict(), ensure_ascii=False) + '\n'
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def entries(self) -> List[ReplayEntry]:
+        if not self.index_path.exists():
+            return []
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return [ReplayEntry(**json.loads(line)) for line in f if line.strip()]
+
+    def blob_stats(self) -> Dict[str, int]:
+        """归档中的内容数和压缩后字节数"""
+        blobs = [p for p in (self.directory / BLOB_DIR).glob('*/*') if not p.name.endswith('.tmp')]
+        return {'blobs': len(blobs), 'bytes': sum(p.stat().st_size for p in blobs)}
+
+
+class ReplaySession:
+    """一次录制或回放"""
+
+    def __init__(self, mode: str, directory: str, latency_scale: float = 1.0, strict: bool = False):
+        """
+        Args:
+            mode: 'record' 或 'replay'
+            directory: 归档目录
+            latency_scale: 回放时耗时的倍数（1 为原始耗时，0 为不等待）
+            strict: 回放时没有录制记录是否报错（否则调用真实接口）
+        """
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"无效的回放模式: {mode}")
+        self.mode = mode
+        self.archive = ReplayArchive(directory)
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.stats = ReplayStats()
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._seq = 0
+        self._by_key: Dict[str, Deque[ReplayEntry]] = defaultdict(deque)
+        self._by_group: Dict[str, Deque[ReplayEntry]] = defaultdict(deque)
+        self._consumed = set()
+        self._last_by_key: Dict[str, ReplayEntry] = {}
+        if mode == MODE_REPLAY:
+            self._load_index()
+        else:
+            # 追加录制到已有归档时序号接着编
+            self._seq = max((entry.seq for entry in self.archive.entries()), default=0)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    def _load_index(self):
+        entries = self.archive.entries()
+        for entry in entries:
+            self._by_key[entry.key].append(entry)
+            self._by_group[entry.group].append(entry)
+        logger.info(f"📼 [回放] 已加载 {len(entries)} 条录制记录: {self.archive.directory}")
+
+    # ---------- 录制 ----------
+
+    def _record(self, kind: str, provider: str, name: str, key: str, group: str,
+                value: Any, latency_s: float, error: Optional[BaseException] = None):
+        try:
+            blob = None if error is not None else self.archive.put(value)
+        except Exception as e:
+            logger.warning(f"⚠️ [录制] 无法保存 {provider}.{name} 的返回值: {e}")
+            return
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            self.stats.recorded += 1
+        self.archive.append(ReplayEntry(
+            seq=seq, kind=kind, provider=provider, name=name, key=key, group=group, blob=blob,
+            latency_ms=round(latency_s * 1000, 3),
+            offset_ms=round((time.perf_counter() - self._started - latency_s) * 1000, 3),
+            error=f"{type(error).__name__}: {error}" if error is not None else None,
+        ))
+
+    # ---------- 回放 ----------
+
+    def _take(self, queue: Optional[Deque[ReplayEntry]]) -> Optional[ReplayEntry]:
+        """取出队列中第一条未使用的记录"""
+        while queue:
+            entry = queue.popleft()
+            if entry.seq not in self._consumed:
+                self._consumed.add(entry.seq)
+                return entry
+        return None
+
+    def _lookup(self, key: str, group: str) -> Optional[ReplayEntry]:
+        with self._lock:
+            # 同一请求按录制顺序回放，调用次数多于录制时重复最后一条
+            entry = self._take(self._by_key.get(key)) or self._last_by_key.get(key)
+            if entry is not None:
+                self._last_by_key[key] = entry
+                self.stats.replayed += 1
+                return entry
+            entry = self._take(self._by_group.get(group))
+            if entry is not None:
+                self._last_by_key[key] = entry
+                self.stats.replayed += 1
+                self.stats.fallback += 1
+                return entry
+            self.stats.misses += 1
+            return None
+
+    def _replay(self, entry: ReplayEntry) -> Any:
+        delay = entry.latency_ms / 1000 * self.latency_scale
+        if delay > 0:
+            time.sleep(delay)
+            with self._lock:
+                self.stats.slept_ms += delay * 1000
+        if entry.error is not None:
+            raise ReplayedCallError(entry.error)
+        return self.archive.get(entry.blob)
+
+    def call(self, kind: str, provider: str, name: str, key: str, func: Callable[[], Any],
+             group: Optional[str] = None, latency_s: Optional[float] = None) -> Any:
+        """
+        录制或回放一次调用
+
+        Args:
+            kind: 'provider' / 'llm'
+            provider: 数据源或模型提供方
+            name: 接口名或模型名
+            key: 请求键
+            func: 实际调用
+            group: 请求键不匹配时按顺序回放的分组，默认为 provider:name
+            latency_s: 录制时使用的耗时；调用已在别处完成（如流式输出结束后录制合并结果）时由调用方给出
+        """
+        group = group or f"{provider}:{name}"
+        if self.recording:
+            start = time.perf_counter()
+            try:
+                value = func()
+            except Exception as e:
+                elapsed = latency_s if latency_s is not None else time.perf_counter() - start
+                self._record(kind, provider, name, key, group, None, elapsed, e)
+                raise
+            elapsed = latency_s if latency_s is not None else time.perf_counter() - start
+            self._record(kind, provider, name, key, group, value, elapsed)
+            return value
+
+        entry = self._lookup(key, group)
+        if entry is not None:
+            return self._replay(entry)
+        if self.strict:
+            raise ReplayMissError(f"没有录制记录: {provider}.{name} ({key[:12]})")
+        logger.warning(f"⚠️ [回放] 没有录制记录，调用真实接口: {provider}.{name}")
+        return func()
+
+
+# 当前会话（None 表示关闭，调用方只需一次判断）
+_session: Optional[ReplaySession] = None
+_session_lock = threading.Lock()
+
+
+def get_replay_session() -> Optional[ReplaySession]:
+    """当前的录制/回放会话，未开启时为 None"""
+    return _session
+
+
+def start_recording(directory: str) -> ReplaySession:
+    """开始录制数据源和 LLM 调用"""
+    return _start(ReplaySession(MODE_RECORD, directory))
+
+
+def start_replay(directory: str, latency_scale: float = 1.0, strict: bool = False) -> ReplaySession:
+    """开始回放录制的调用"""
+    return _start(ReplaySession(MODE_REPLAY, directory, latency_scale, strict))
+
+
+def _start(session: ReplaySession) -> ReplaySession:
+    global _session
+    with _session_lock:
+        _session = session
+    logger.info(f"📼 [{'录制' if session.recording else '回放'}] 已开启: {session.archive.directory}")
+    return session
+
+
+def stop_replay_session() -> Optional[ReplaySession]:
+    """结束当前会话并返回它（用于读取统计）"""
+    global _session
+    with _session_lock:
+        session, _session = _session, None
+    if session is not None:
+        logger.info(f"📼 [{'录制' if session.recording else '回放'}] 已结束: {session.stats.to_dict()}")
+    return session
+
+
+@contextmanager
+def recording(directory: str) -> Iterator[ReplaySession]:
+    session = start_recording(directory)
+    try:
+        yield session
+    finally:
+        stop_replay_session()
+
+
+@contextmanager
+def replaying(directory: str, latency_scale: float = 1.0, strict: bool = False) -> Iterator[ReplaySession]:
+    session = start_replay(directory, latency_scale, strict)
+    try:
+        yield session
+    finally:
+        stop_replay_session()
+
+
+def replayable(provider: str, name: Optional[str] = None, method: bool = False):
+    """
+    数据源接口装饰器：录制模式下保存返回值，回放模式下直接返回录制内容
+
+    Args:
+        provider: 数据源名称（tushare/akshare/tdx/yfinance/finnhub/...）
+        name: 接口名，默认为函数限定名
+        method: 是否为实例方法（请求键不包含 self）
+    """
+    def decorator(func: Callable) -> Callable:
+        call_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            session = _session
+            if session is None:
+                return func(*args, **kwargs)
+            key = request_key(KIND_PROVIDER, provider, call_name, args[1:] if method else args, kwargs)
+            return session.call(KIND_PROVIDER, provider, call_name, key, lambda: func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def configure_replay_from_env() -> Optional[ReplaySession]:
+    """按环境变量开启录制或回放"""
+    mode = os.getenv(REPLAY_MODE_ENV, '').strip().lower()
+    directory = os.getenv(REPLAY_DIR_ENV)
+    if mode not in (MODE_RECORD, MODE_REPLAY):
+        return None
+    if not directory:
+        logger.warning(f"⚠️ [回放] 设置了 {REPLAY_MODE_ENV}={mode} 但没有设置 {REPLAY_DIR_ENV}，已忽略")
+        return None
+    if mode == MODE_RECORD:
+        return start_recording(directory)
+    return start_replay(
+        directory,
+        latency_scale=float(os.getenv(REPLAY_LATENCY_ENV, '1.0')),
+        strict=os.getenv(REPLAY_STRICT_ENV, 'false').lower() == 'true',
+    )
+
+
+configure_replay_from_env()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Token计数服务
+为成本跟踪和上下文预算提供准确、快速的token计数
+
+- OpenAI系列模型：懒加载并缓存 tiktoken 编码器（未安装 tiktoken 时退回启发式估算）
+- 国产模型（通义千问、DeepSeek、GLM等）及未知模型：按官方公布的字符/token比例
+  分别估算中文字符和其他字符，只需一次UTF-8编码，20k字符提示耗时在微秒级
+- 对重复的提示片段（系统提示、分析师报告等）做结果缓存
+"""
+
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+# 启发式估算比例：每个中文字符 / 每个其他字符对应的token数
+# DeepSeek官方说明：1个中文字符≈0.6 token，1个英文字符≈0.3 token
+# 通义千问官方说明：1个token约对应1.5~1.8个汉字、3~4个英文字母
+HEURISTIC_RATIOS = {
+    "deepseek": (0.6, 0.3),
+    "qwen": (0.6, 0.27),
+    "glm": (0.7, 0.3),
+    "claude": (1.0, 0.28),
+    "gemini": (0.8, 0.25),
+    "default": (0.7, 0.3),
+}
+
+# OpenAI模型前缀到tiktoken编码的映射
+TIKTOKEN_ENCODINGS = (
+    ("gpt-4o", "o200k_base"),
+    ("gpt-4.1", "o200k_base"),
+    ("o1", "o200k_base"),
+    ("o3", "o200k_base"),
+    ("o4", "o200k_base"),
+    ("gpt-4", "cl100k_base"),
+    ("gpt-3.5", "cl100k_base"),
+    ("text-embedding", "cl100k_base"),
+)
+
+# 每条聊天消息的额外开销（角色标记、分隔符）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def resolve_model_family(model: Optional[str]) -> str:
+    """根据模型名称确定计数方式：tiktoken编码名或启发式家族名"""
+    name = str(model or "").lower()
+    for prefix, encoding in TIKTOKEN_ENCODINGS:
+        if name.startswith(prefix):
+            return f"tiktoken:{encoding}"
+    for family in HEURISTIC_RATIOS:
+        if family != "default" and family in name:
+            return family
+    return "default"
+
+
+@functools.lru_cache(maxsize=None)
+def _load_encoding(encoding_name: str):
+    """懒加载tiktoken编码器，每种编码只加载一次"""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(encoding_name)
+    except Exception as e:
+        logger.debug(f"🔍 [TokenCounter] tiktoken编码 {encoding_name} 不可用，使用启发式估算: {e}")
+        return None
+
+
+def heuristic_count(text: str, family: str = "default") -> int:
+    """
+    启发式token估算
+
+    利用UTF-8编码长度区分字符类型：ASCII占1字节，常用汉字占3字节，
+    因此 (字节数 - 字符数) / 2 即为非ASCII字符数，无需逐字符扫描。
+    """
+    if not text:
+        return 0
+    cjk_ratio, other_ratio = HEURISTIC_RATIOS.get(family, HEURISTIC_RATIOS["default"])
+    chars = len(text)
+    wide = (len(text.encode("utf-8")) - chars) // 2
+    wide = min(max(wide, 0), chars)
+    return max(1, int(wide * cjk_ratio + (chars - wide) * other_ratio + 0.5))
+
+
+def _count_uncached(text: str, family: str) -> int:
+    if family.startswith("tiktoken:"):
+        encoding = _load_encoding(family.split(":", 1)[1])
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return heuristic_count(text, "default")
+    return heuristic_count(text, family)
+
+
+class _SegmentCountCache:
+    """
+    片段token数的LRU缓存
+
+    以 (文本哈希, 文本长度, 模型族) 为键，不保存文本本身：辩论记录和报告每段数十KB，
+    以原文为键时缓存会占用数百MB内存
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._counts: "OrderedDict[Tuple[bytes, int, str], int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str, family: str) -> int:
+        key = (hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest(), len(text), family)
+        with self._lock:
+            count = self._counts.get(key)
+            if count is not None:
+                self._counts.move_to_end(key)
+                self.hits += 1
+                return count
+            self.misses += 1
+        count = _count_uncached(text, family)
+        with self._lock:
+            self._counts[key] = count
+            if len(self._counts) > self.maxsize:
+                self._counts.popitem(last=False)
+        return count
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._counts)}
+
+
+_segment_cache = _SegmentCountCache()
+
+
+def _count_cached(text: str, family: str) -> int:
+    return _segment_cache.count(text, family)
+
+
+class TokenCounter:
+    """Token计数器"""
+
+    def __init__(self, default_model: Optional[str] = None):
+        self.default_model = default_model
+
+    def count(self, text: str, model: Optional[str] = None) -> int:
+        """计算单段文本的token数"""
+        if not text:
+            return 0
+        return _count_cached(str(text), resolve_model_family(model or self.default_model))
+
+    def count_batch(self, texts: Iterable[str], model: Optional[str] = None) -> List[int]:
+        """批量计算多段文本的token数"""
+        family = resolve_model_family(model or self.default_model)
+        texts = [str(text) if text else "" for text in texts]
+
+        if family.startswith("tiktoken:"):
+            encoding = _load_encoding(family.split(":", 1)[1])
+            if encoding is not None:
+                # tiktoken批量编码在内部使用线程池并行
+                pending = [text for text in texts if text]
+                encoded = encoding.encode_batch(pending, disallowed_special=()) if pending else []
+                counts = iter(len(tokens) for tokens in encoded)
+                return [next(counts) if text else 0 for text in texts]
+
+        return [_count_cached(text, family) if text else 0 for text in texts]
+
+    def count_messages(self, messages: List[Any], model: Optional[str] = None) -> int:
+        """
+        计算聊天消息列表的token数
+
+        Args:
+            messages: LangChain消息、(role, content) 元组或 {"role", "content"} 字典
+            model: 模型名称
+        """
+        contents = []
+        for message in messages:
+            if hasattr(message, "content"):
+                content = message.content
+            elif isinstance(message, dict):
+                content = message.get("content", "")
+            elif isinstance(message, (tuple, list)) and len(message) == 2:
+                content = message[1]
+            else:
+                content = message
+
+            if isinstance(content, list):
+                content = "".join(
+                    item.get("text", "") if isinstance(item, dict) else str(item)
+                    for item in content
+                )
+            contents.append(str(content) if content else "")
+
+        return sum(self.count_batch(contents, model)) + MESSAGE_OVERHEAD_TOKENS * len(contents)
+
+    @staticmethod
+    def cache_info() -> Dict[str, int]:
+        """获取片段缓存统计"""
+        return _segment_cache.info()
+
+
+# 全局计数器实例
+_token_counter: Optional[TokenCounter] = None
+
+def get_token_counter() -> TokenCounter:
+    """获取全局Token计数器实例"""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter()
+    return _token_counter
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """计算文本token数（便捷函数）"""
+    return get_token_counter().count(text, model)
@@ -4,6 +4,7 @@
 为所有工具调用添加统一的日志记录
 """
 
+import logging
 import time
 import functools
 from typing import Any, Dict, Optional, Callable
@@ -15,8 +16,11 @@ from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.logging_manager import get_logger, get_logger_manager
 logger = get_logger('agents')
 
+from tradingagents.utils.log_categories import DATA_PREVIEW, TOOL_ARGS, LazyPreview, get_log_category
+
 # 工具调用日志器
 tool_logger = get_logger("tools")
+tool_args = get_log_category(TOOL_ARGS)
 
 
 def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_result: bool = False):
@@ -37,19 +41,17 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
             # 记录开始时间
             start_time = time.time()
             
-            # 准备参数信息
-            args_info = {}
-            if log_args:
+            # 准备参数信息（tool-args 类别关闭、被采样掉或级别不满足时不构造）
+            args_info = None
+            if log_args and tool_args.enabled_for(tool_logger, logging.INFO):
+                args_info = {}
                 # 记录位置参数
                 if args:
-                    args_info['args'] = [str(arg)[:100] + '...' if len(str(arg)) > 100 else str(arg) for arg in args]
+                    args_info['args'] = [LazyPreview(arg, 100) for arg in args]
                 
                 # 记录关键字参数
                 if kwargs:
-                    args_info['kwargs'] = {
-                        k: str(v)[:100] + '...' if len(str(v)) > 100 else str(v) 
-                        for k, v in kwargs.items()
-                    }
+                    args_info['kwargs'] = {k: LazyPreview(v, 100) for k, v in kwargs.items()}
             
             # 记录工具调用开始
             tool_logger.info(
@@ -58,7 +60,7 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
                     'tool_name': name,
                     'event_type': 'tool_call_start',
                     'timestamp': datetime.now().isoformat(),
-                    'args_info': args_info if log_args else None
+                    'args_info': args_info
                 }
             )
             
@@ -72,8 +74,7 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
                 # 准备结果信息
                 result_info = None
                 if log_result and result is not None:
-                    result_str = str(result)
-                    result_info = result_str[:200] + '...' if len(result_str) > 200 else result_str
+                    result_info = get_log_category(DATA_PREVIEW).preview(result, 200)
                 
                 # 记录工具调用成功
                 tool_logger.info(
@@ -0,0 +1,602 @@
+#!/usr/bin/env python3
+"""
+端到端追踪
+一次分析（propagate）生成一棵 span 树：图 -> 节点 -> LLM调用/工具调用 -> 数据源 -> 缓存层，
+每个 span 记录耗时和属性（股票代码、数据源、缓存命中、token、字节数）。
+
+- 导出：进程内收集器（默认）、JSONL 文件、OTLP/JSON（文件或 HTTP 推送到 Collector）
+- 分析结束后生成关键路径摘要，说明 propagate 的墙钟时间具体花在哪里
+- 没有活动的追踪时 span() 直接返回空操作对象，数据层在分析之外调用几乎没有额外开销
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+try:
+    from langchain_core.callbacks import BaseCallbackHandler
+    LANGCHAIN_AVAILABLE = True
+except ImportError:
+    BaseCallbackHandler = object
+    LANGCHAIN_AVAILABLE = False
+
+
+# span 类型
+KIND_GRAPH = 'graph'
+KIND_NODE = 'node'
+KIND_LLM = 'llm'
+KIND_TOOL = 'tool'
+KIND_DATA = 'data'
+KIND_CACHE = 'cache'
+
+# 关键路径摘要中展示的属性
+SUMMARY_ATTRIBUTES = ('symbol', 'source', 'tier', 'cache_hit', 'model', 'tokens_in', 'tokens_out', 'bytes')
+
+# 进程内保留的最近追踪数
+DEFAULT_COLLECTOR_SIZE = 20
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('tradingagents_span', default=None)
+
+
+@dataclass
+class Span:
+    """一段计时区间"""
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = 'ok'
+    error: Optional[str] = None
+    thread: str = ''
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns or time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException):
+        self.status = 'error'
+        self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['duration_ms'] = round(self.duration_ms, 3)
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Span':
+        data = {k: v for k, v in data.items() if k != 'duration_ms'}
+        return cls(**data)
+
+
+class _NoopSpan:
+    """没有活动追踪时返回的空 span"""
+    __slots__ = ()
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def __bool__(self):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    """一次追踪的全部 span"""
+
+    def __init__(self, root: Span):
+        self.trace_id = root.trace_id
+        self.root = root
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    @classmethod
+    def from_spans(cls, spans: Iterable[Span]) -> 'Trace':
+        spans = list(spans)
+        root = next(s for s in spans if s.parent_id is None)
+        trace = cls(root)
+        trace.spans = spans
+        return trace
+
+    def children(self) -> Dict[Optional[str], List[Span]]:
+        tree = defaultdict(list)
+        for span in self.spans:
+            tree[span.parent_id].append(span)
+        for siblings in tree.values():
+            siblings.sort(key=lambda s: s.start_ns)
+        return tree
+
+    # ---------- 关键路径 ----------
+
+    @staticmethod
+    def _critical_children(parent: Span, children: List[Span]) -> List[Span]:
+        """从父 span 结束时刻往回走，每次选择在游标之前最晚结束的子 span"""
+        cursor = parent.end_ns
+        chosen = []
+        for child in sorted(children, key=lambda s: s.end_ns, reverse=True):
+            if child.end_ns <= cursor and child.start_ns >= parent.start_ns:
+                chosen.append(child)
+                cursor = child.start_ns
+        chosen.reverse()
+        return chosen
+
+    def critical_path(self) -> List[Dict[str, Any]]:
+        """
+        关键路径上的 span（深度优先顺序）
+
+        Returns:
+            [{'span', 'depth', 'self_ms'}]，self_ms 为该 span 未被关键子 span 覆盖的时间
+        """
+        tree = self.children()
+        rows = []
+
+        def visit(span: Span, depth: int):
+            critical = self._critical_children(span, tree.get(span.span_id, []))
+            self_ms = span.duration_ms - sum(child.duration_ms for child in critical)
+            rows.append({'span': span, 'depth': depth, 'self_ms': max(self_ms, 0.0)})
+            for child in critical:
+                visit(child, depth + 1)
+
+        visit(self.root, 0)
+        return rows
+
+    def time_by_kind(self) -> Dict[str, float]:
+        """关键路径自身耗时按 span 类型汇总（毫秒）"""
+        totals: Dict[str, float] = defaultdict(float)
+        for row in self.critical_path():
+            totals[row['span'].kind] += row['self_ms']
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def summary(self, max_rows: int = 60) -> str:
+        """火焰图风格的关键路径摘要"""
+        root = self.root
+        total = root.duration_ms or 1e-9
+        label = ' '.join(str(root.attributes[k]) for k in ('symbol', 'trade_date') if k in root.attributes)
+        lines = [f"⏱️ 关键路径 {root.name} {label} 总耗时 {total / 1000:.2f}s ({len(self.spans)} 个span)"]
+        rows = self.critical_path()
+        for row in rows[:max_rows]:
+            span = row['span']
+            attrs = ' '.join(f"{k}={span.attributes[k]}" for k in SUMMARY_ATTRIBUTES if k in span.attributes)
+            flag = ' ❌' if span.status == 'error' else ''
+            indent = '  ' * row['depth'] + ('└ ' if row['depth'] else '')
+            lines.append(
+                f"  {span.duration_ms / 1000:>8.2f}s {span.duration_ms / total * 100:>5.1f}%  "
+                f"{span.kind:<5} {indent}{span.name}  自身 {row['self_ms'] / 1000:.2f}s {attrs}{flag}".rstrip()
+            )
+        if len(rows) > max_rows:
+            lines.append(f"  ... 另有 {len(rows) - max_rows} 个关键路径span")
+        by_kind = ' | '.join(f"{kind} {ms / 1000:.2f}s ({ms / total * 100:.1f}%)"
+                             for kind, ms in self.time_by_kind().items())
+        lines.append(f"  按类型汇总: {by_kind}")
+        return '\n'.join(lines)
+
+    def folded_stacks(self) -> List[str]:
+        """折叠栈格式（flamegraph.pl / speedscope 可直接读取），数值为自身耗时毫秒"""
+        tree = self.children()
+        lines = []
+
+        def visit(span: Span, prefix: str):
+            frame = f"{prefix};{span.kind}:{span.name}" if prefix else f"{span.kind}:{span.name}"
+            children = tree.get(span.span_id, [])
+            child_ms = sum(child.duration_ms for child in self._critical_children(span, children))
+            self_ms = max(span.duration_ms - child_ms, 0.0)
+            if self_ms >= 1:
+                lines.append(f"{frame} {int(self_ms)}")
+            for child in children:
+                visit(child, frame)
+
+        visit(self.root, '')
+        return lines
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'trace_id': self.trace_id, 'spans': [span.to_dict() for span in self.spans]}
+
+
+# ==================== 导出 ====================
+
+class SpanExporter:
+    """追踪导出器基类：每次追踪结束时调用 export"""
+
+    def export(self, trace: Trace):
+        raise NotImplementedError
+
+
+class InMemoryCollector(SpanExporter):
+    """进程内保留最近的追踪"""
+
+    def __init__(self, max_traces: int = DEFAULT_COLLECTOR_SIZE):
+        self._traces: deque = deque(maxlen=max_traces)
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def traces(self) -> List[Trace]:
+        with self._lock:
+            return list(self._traces)
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            return next((t for t in reversed(self._traces) if t.trace_id == trace_id), None)
+
+    def last(self) -> Optional[Trace]:
+        with self._lock:
+            return self._traces[-1] if self._traces else None
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+class JsonlSpanExporter(SpanExporter):
+    """每个 span 一行 JSON，追加写入 traces.jsonl"""
+
+    def __init__(self, directory: str, filename: str = 'traces.jsonl'):
+        self.path = Path(directory) / filename
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        lines = ''.join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n'
+                        for span in trace.spans)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def to_otlp_json(trace: Trace, service_name: str = 'tradingagents') -> Dict[str, Any]:
+    """转换为 OTLP/JSON（ExportTraceServiceRequest）格式，可直接 POST 到 Collector 的 /v1/traces"""
+    otlp_spans = []
+    for span in trace.spans:
+        attributes = [{'key': 'tradingagents.kind', 'value': {'stringValue': span.kind}}]
+        attributes += [{'key': k, 'value': _otlp_value(v)} for k, v in span.attributes.items()]
+        otlp_span = {
+            'traceId': span.trace_id,
+            'spanId': span.span_id,
+            'name': span.name,
+            'kind': 3 if span.kind == KIND_LLM else 1,  # CLIENT / INTERNAL
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': attributes,
+            'status': {'code': 2, 'message': span.error or ''} if span.status == 'error' else {'code': 1},
+        }
+        if span.parent_id:
+            otlp_span['parentSpanId'] = span.parent_id
+        otlp_spans.append(otlp_span)
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'tradingagents.tracing'}, 'spans': otlp_spans}],
+        }]
+    }
+
+
+class OtlpJsonExporter(SpanExporter):
+    """OTLP/JSON 导出：写入 otlp/<trace_id>.json，配置 endpoint 时同时推送到 Collector"""
+
+    def __init__(self, directory: Optional[str] = None, endpoint: Optional[str] = None,
+                 service_name: str = 'tradingagents', timeout: float = 5.0):
+        self.directory = Path(directory) / 'otlp' if directory else None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.timeout = timeout
+
+    def export(self, trace: Trace):
+        payload = to_otlp_json(trace, self.service_name)
+        if self.directory:
+            with open(self.directory / f"{trace.trace_id}.json", 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, default=str)
+        if self.endpoint:
+            try:
+                import requests
+                requests.post(self.endpoint, json=payload, timeout=self.timeout)
+            except Exception as e:
+                logger.warning(f"⚠️ [追踪] OTLP推送失败: {self.endpoint} ({e})")
+
+
+# ==================== 追踪器 ====================
+
+class _SpanContext:
+    """span() 返回的上下文管理器"""
+    __slots__ = ('tracer', 'name', 'kind', 'attributes', 'span', 'token')
+
+    def __init__(self, tracer: 'Tracer', name: str, kind: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.span = None
+        self.token = None
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is None:
+            return NOOP_SPAN
+        self.span = self.tracer.start_span(self.name, self.kind, parent, **self.attributes)
+        if self.span is None:
+            return NOOP_SPAN
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is None:
+            return False
+        _current_span.reset(self.token)
+        self.tracer.end_span(self.span, exc)
+        return False
+
+
+class Tracer:
+    """追踪器：创建 span、维护活动追踪、结束时交给导出器"""
+
+    def __init__(self, collector_size: int = DEFAULT_COLLECTOR_SIZE):
+        self.collector = InMemoryCollector(collector_size)
+        self.exporters: List[SpanExporter] = [self.collector]
+        self._active: Dict[str, Trace] = {}
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter: SpanExporter):
+        self.exporters.append(exporter)
+
+    def configure_from_env(self):
+        """TRADINGAGENTS_TRACE_DIR：写入 JSONL 和 OTLP/JSON 文件；TRADINGAGENTS_OTLP_ENDPOINT：推送到 Collector"""
+        trace_dir = os.getenv('TRADINGAGENTS_TRACE_DIR')
+        endpoint = os.getenv('TRADINGAGENTS_OTLP_ENDPOINT')
+        if trace_dir:
+            self.add_exporter(JsonlSpanExporter(trace_dir))
+        if trace_dir or endpoint:
+            self.add_exporter(OtlpJsonExporter(trace_dir, endpoint))
+
+    @staticmethod
+    def current_span() -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(self, name: str, kind: str, parent: Optional[Span] = None, **attributes) -> Optional[Span]:
+        """手动创建子 span（回调等无法使用 with 的场景），父追踪已结束时返回 None"""
+        parent = parent if parent is not None else _current_span.get()
+        if parent is None or parent.trace_id not in self._active:
+            return None
+        return Span(name=name, kind=kind, trace_id=parent.trace_id, span_id=uuid.uuid4().hex[:16],
+                    parent_id=parent.span_id, start_ns=time.time_ns(), attributes=attributes,
+                    thread=threading.current_thread().name)
+
+    def end_span(self, span: Span, error: Optional[BaseException] = None):
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.record_error(error)
+        trace = self._active.get(span.trace_id)
+        if trace is not None:
+            trace.add(span)
+
+    def span(self, name: str, kind: str = KIND_DATA, **attributes) -> _SpanContext:
+        """子 span；没有活动追踪时为空操作"""
+        return _SpanContext(self, name, kind, attributes)
+
+    def trace(self, name: str, kind: str = KIND_GRAPH, **attributes) -> '_TraceContext':
+        """开始一次新的追踪（根 span）"""
+        return _TraceContext(self, name, kind, attributes)
+
+    def _finish_trace(self, trace: Trace):
+        with self._lock:
+            self._active.pop(trace.trace_id, None)
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception as e:
+                logger.warning(f"⚠️ [追踪] 导出失败 {type(exporter).__name__}: {e}")
+
+
+class _TraceContext:
+    """trace() 返回的上下文管理器"""
+
+    def __init__(self, tracer: Tracer, name: str, kind: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.root = Span(name=name, kind=kind, trace_id=uuid.uuid4().hex, span_id=uuid.uuid4().hex[:16],
+                         parent_id=None, start_ns=0, attributes=attributes,
+                         thread=threading.current_thread().name)
+        self.trace_obj = Trace(self.root)
+        self.token = None
+
+    def __enter__(self) -> Span:
+        with self.tracer._lock:
+            self.tracer._active[self.root.trace_id] = self.trace_obj
+        self.root.start_ns = time.time_ns()
+        self.token = _current_span.set(self.root)
+        return self.root
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        self.root.end_ns = time.time_ns()
+        if exc is not None:
+            self.root.record_error(exc)
+        self.trace_obj.add(self.root)
+        self.tracer._finish_trace(self.trace_obj)
+        return False
+
+
+# ==================== LangChain 回调 ====================
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """
+    把 LangChain 的 LLM / 工具调用记录为 span
+
+    回调与被调用的模型/工具在同一上下文中执行，因此开始时把新 span 设为当前 span，
+    工具内部的数据源、缓存 span 会挂在工具调用之下
+    """
+    run_inline = True
+
+    def __init__(self, tracer: Optional['Tracer'] = None):
+        super().__init__()
+        self.tracer = tracer or get_tracer()
+        self._runs: Dict[Any, tuple] = {}
+
+    def _start(self, run_id, name: str, kind: str, **attributes):
+        span = self.tracer.start_span(name, kind, **attributes)
+        if span is not None:
+            self._runs[run_id] = (span, _current_span.get())
+            _current_span.set(span)
+
+    def _end(self, run_id, error: Optional[BaseException] = None, **attributes):
+        entry = self._runs.pop(run_id, None)
+        if entry is None:
+            return
+        span, previous = entry
+        span.set_attributes(**attributes)
+        if _current_span.get() is span:
+            _current_span.set(previous)
+        self.tracer.end_span(span, error)
+
+    @staticmethod
+    def _model_name(serialized: Optional[Dict], kwargs: Dict) -> str:
+        metadata = kwargs.get('metadata') or {}
+        invocation = kwargs.get('invocation_params') or {}
+        return (metadata.get('ls_model_name') or invocation.get('model_name') or invocation.get('model')
+                or (serialized or {}).get('name') or 'llm')
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        model = self._model_name(serialized, kwargs)
+        provider = (kwargs.get('metadata') or {}).get('ls_provider', '')
+        self._start(run_id, f"llm:{model}", KIND_LLM, model=model, provider=provider,
+                    messages=sum(len(batch) for batch in messages),
+                    prompt_chars=sum(len(str(m.content)) for batch in messages for m in batch))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        model = self._model_name(serialized, kwargs)
+        self._start(run_id, f"llm:{model}", KIND_LLM, model=model, prompts=len(prompts),
+                    prompt_chars=sum(len(p) for p in prompts))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        attributes = {}
+        usage = (getattr(response, 'llm_output', None) or {}).get('token_usage') or {}
+        tokens_in, tokens_out = usage.get('prompt_tokens'), usage.get('completion_tokens')
+        if tokens_in is None:
+            try:
+                metadata = response.generations[0][0].message.usage_metadata or {}
+                tokens_in, tokens_out = metadata.get('input_tokens'), metadata.get('output_tokens')
+            except (AttributeError, IndexError):
+                pass
+        if tokens_in is not None:
+            attributes.update(tokens_in=tokens_in, tokens_out=tokens_out)
+        self._end(run_id, **attributes)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = (serialized or {}).get('name') or kwargs.get('name') or 'tool'
+        self._start(run_id, f"tool:{name}", KIND_TOOL, tool=name, input_bytes=len(str(input_str)))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        content = getattr(output, 'content', output)
+        self._end(run_id, bytes=len(str(content)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def trace_node(name: str, node: Callable) -> Callable:
+    """把图节点函数包装为 node span"""
+    @functools.wraps(node)
+    def wrapper(*args, **kwargs):
+        with get_tracer().span(name, KIND_NODE):
+            return node(*args, **kwargs)
+    return wrapper
+
+
+# 全局追踪器
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器实例"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                tracer = Tracer()
+                tracer.configure_from_env()
+                _tracer = tracer
+    return _tracer
+
+
+def traced(name: Optional[str] = None, kind: str = KIND_DATA,
+           attributes: Optional[Callable[..., Dict[str, Any]]] = None,
+           result_attributes: Optional[Callable[[Any], Dict[str, Any]]] = None):
+    """
+    span 装饰器（全局追踪器），字符串结果自动记录 bytes 属性
+
+    Args:
+        name: span 名称，默认为函数限定名
+        kind: span 类型
+        attributes: 由调用参数生成属性的函数，仅在有活动追踪时调用
+        result_attributes: 由返回值生成属性的函数（如缓存是否命中）
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            attrs = attributes(*args, **kwargs) if attributes else {}
+            with get_tracer().span(span_name, kind, **attrs) as span:
+                result = func(*args, **kwargs)
+                if result_attributes is not None:
+                    span.set_attributes(**result_attributes(result))
+                elif isinstance(result, (str, bytes)):
+                    span.set_attribute('bytes', len(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def trace_span(name: str, kind: str = KIND_DATA, **attributes) -> _SpanContext:
+    """全局追踪器的子 span（见 Tracer.span）"""
+    return get_tracer().span(name, kind, **attributes)